@@ -36,8 +36,14 @@ logger.addHandler(logging.NullHandler())
 from .client import Elasticsearch
 from .transport import Transport
 from .connection_pool import ConnectionPool, ConnectionSelector, RoundRobinSelector
-from .serializer import JSONSerializer
-from .connection import Connection, RequestsHttpConnection, Urllib3HttpConnection
+from .serializer import JSONSerializer, OrjsonSerializer
+from .compression import Compression
+from .connection import (
+    Connection,
+    HttpxHttpConnection,
+    RequestsHttpConnection,
+    Urllib3HttpConnection,
+)
 from .exceptions import (
     ImproperlyConfigured,
     ElasticsearchException,
@@ -65,7 +71,10 @@ __all__ = [
     "ConnectionSelector",
     "RoundRobinSelector",
     "JSONSerializer",
+    "OrjsonSerializer",
+    "Compression",
     "Connection",
+    "HttpxHttpConnection",
     "RequestsHttpConnection",
     "Urllib3HttpConnection",
     "ImproperlyConfigured",
@@ -89,12 +98,14 @@ try:
         raise ImportError
 
     from ._async.http_aiohttp import AIOHttpConnection, AsyncConnection
+    from ._async.http_httpx import AsyncHttpxHttpConnection
     from ._async.transport import AsyncTransport
     from ._async.client import AsyncElasticsearch
 
     __all__ += [
         "AIOHttpConnection",
         "AsyncConnection",
+        "AsyncHttpxHttpConnection",
         "AsyncTransport",
         "AsyncElasticsearch",
     ]
@@ -26,8 +26,11 @@ from .connection_pool import (
     RoundRobinSelector as RoundRobinSelector,
 )
 from .serializer import JSONSerializer as JSONSerializer
+from .serializer import OrjsonSerializer as OrjsonSerializer
+from .compression import Compression as Compression
 from .connection import (
     Connection as Connection,
+    HttpxHttpConnection as HttpxHttpConnection,
     RequestsHttpConnection as RequestsHttpConnection,
     Urllib3HttpConnection as Urllib3HttpConnection,
 )
@@ -52,6 +55,9 @@ try:
         raise ImportError
 
     from ._async.http_aiohttp import AIOHttpConnection as AIOHttpConnection
+    from ._async.http_httpx import (
+        AsyncHttpxHttpConnection as AsyncHttpxHttpConnection,
+    )
     from ._async.transport import AsyncTransport as AsyncTransport
     from ._async.client import AsyncElasticsearch as AsyncElasticsearch
 except (ImportError, SyntaxError):
@@ -35,6 +35,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -57,6 +61,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -76,6 +84,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -96,6 +108,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -112,6 +128,10 @@ class CatClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -139,6 +159,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -159,6 +183,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -181,6 +209,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -204,6 +236,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -227,6 +263,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -247,6 +287,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -268,6 +312,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -290,6 +338,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -310,6 +362,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -330,6 +386,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -350,6 +410,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -370,6 +434,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -392,6 +460,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -415,6 +487,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -436,6 +512,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -458,6 +538,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -480,6 +564,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -503,6 +591,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -527,6 +619,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -550,6 +646,10 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        deadline: Optional[float] = ...,
+        raw_response: Optional[bool] = ...,
+        stream_response: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         params: Optional[MutableMapping[str, Any]] = ...,
@@ -18,16 +18,24 @@
 import asyncio
 
 from .client import AsyncElasticsearch  # noqa
+from .compat import get_running_loop
 from ..exceptions import TransportError
 from ..compat import map
+from ..serializer import _bytes_dumper
 
 from ..helpers.actions import (
     _ActionChunker,
     _process_bulk_chunk_error,
     _process_bulk_chunk_success,
+    _backoff,
+    _BulkBody,
+    _resolve_deadline,
+    _serialize_action,
     expand_action,
 )
+from ..helpers.dataframe import _check_arguments, _encode_batch, _expanded
 from ..helpers.errors import ScanError
+from ..helpers.streaming import HitsParser
 
 import logging
 
@@ -35,16 +43,37 @@ import logging
 logger = logging.getLogger("elasticsearch.helpers")
 
 
-async def _chunk_actions(actions, chunk_size, max_chunk_bytes, serializer):
+async def _chunk_actions(
+    actions, chunk_size, max_chunk_bytes, serializer, offload_policy=None
+):
     """
-    Split actions into chunks by number or size, serialize them into strings in
-    the process.
+    Split actions into chunks by number or size, serialize them into bytes in
+    the process. An expanded action may come with its serialized form, what
+    :func:`_serialize_action` returns, as a third element.
+
+    With an :class:`~elasticsearch.transport.OffloadPolicy` large documents
+    are serialized in its executor and the loop gets to run other coroutines
+    every ``min_size`` bytes of smaller ones.
     """
     chunker = _ActionChunker(
         chunk_size=chunk_size, max_chunk_bytes=max_chunk_bytes, serializer=serializer
     )
-    async for action, data in actions:
-        ret = chunker.feed(action, data)
+    inline = 0
+    async for item in actions:
+        action, data = item[0], item[1]
+        serialized = item[2] if len(item) > 2 else None
+        if serialized is None and offload_policy is not None:
+            if offload_policy.offload((action, data)):
+                serialized = await offload_policy.run(
+                    get_running_loop(), _serialize_action, serializer, action, data
+                )
+            else:
+                serialized = _serialize_action(serializer, action, data)
+                inline += serialized[2]
+                if inline >= offload_policy.min_size:
+                    inline = 0
+                    await asyncio.sleep(0)
+        ret = chunker.feed(action, data, serialized)
         if ret:
             yield ret
     ret = chunker.flush()
@@ -52,6 +81,38 @@ async def _chunk_actions(actions, chunk_size, max_chunk_bytes, serializer):
         yield ret
 
 
+async def _dataframe_actions(
+    dataframe, id_column, op_type, serializer, batch_size, offload_policy=None
+):
+    for start in range(0, len(dataframe), batch_size):
+        batch = dataframe.iloc[start : start + batch_size]
+        if offload_policy is not None:
+            items = await offload_policy.run(
+                get_running_loop(), _encode_batch, batch, id_column, op_type, serializer
+            )
+        else:
+            items = _encode_batch(batch, id_column, op_type, serializer)
+        for item in items:
+            yield item
+
+
+async def _iter_hits(parser, chunks):
+    """
+    Feed the asynchronous iterator of ``chunks`` to ``parser`` and yield the
+    hits as they are parsed.
+    """
+    try:
+        async for chunk in chunks:
+            for hit in parser.feed(chunk):
+                yield hit
+        for hit in parser.close():
+            yield hit
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
 async def _process_bulk_chunk(
     client,
     bulk_actions,
@@ -66,7 +127,7 @@ async def _process_bulk_chunk(
     """
     try:
         # send the actual request
-        resp = await client.bulk("\n".join(bulk_actions) + "\n", *args, **kwargs)
+        resp = await client.bulk(_BulkBody(bulk_actions), *args, **kwargs)
     except TransportError as e:
         gen = _process_bulk_chunk_error(
             error=e,
@@ -155,21 +216,33 @@ async def async_streaming_bulk(
         2**retry_number``
     :arg max_backoff: maximum number of seconds a retry will wait
     :arg yield_ok: if set to False will skip successful documents in the output
+
+    A ``total_timeout`` (in seconds) limits the whole operation: the
+    ``bulk`` requests and the waits between retries share one deadline.
+
+    When the transport of the client has an ``offload_policy`` the actions
+    are serialized following it, see
+    :class:`~elasticsearch.transport.OffloadPolicy`.
     """
+    deadline = _resolve_deadline(kwargs)
 
     async def map_actions():
         async for item in aiter(actions):
             yield expand_action_callback(item)
 
     async for bulk_data, bulk_actions in _chunk_actions(
-        map_actions(), chunk_size, max_chunk_bytes, client.transport.serializer
+        map_actions(),
+        chunk_size,
+        max_chunk_bytes,
+        client.transport.serializer,
+        getattr(client.transport, "offload_policy", None),
     ):
 
         for attempt in range(max_retries + 1):
             to_retry, to_retry_data = [], []
             if attempt:
                 await asyncio.sleep(
-                    min(max_backoff, initial_backoff * 2 ** (attempt - 1))
+                    _backoff(attempt, initial_backoff, max_backoff, deadline)
                 )
 
             try:
@@ -195,10 +268,10 @@ async def async_streaming_bulk(
                             and info["status"] == 429
                             and (attempt + 1) <= max_retries
                         ):
-                            # _process_bulk_chunk expects strings so we need to
+                            # _process_bulk_chunk expects bytes so we need to
                             # re-serialize the data
                             to_retry.extend(
-                                map(client.transport.serializer.dumps, data)
+                                map(_bytes_dumper(client.transport.serializer), data)
                             )
                             to_retry_data.append(data)
                         else:
@@ -264,6 +337,43 @@ async def async_bulk(client, actions, stats_only=False, *args, **kwargs):
     return success, failed if stats_only else errors
 
 
+async def async_bulk_dataframe(
+    client, dataframe, id_column=None, op_type="index", batch_size=10000, **kwargs
+):
+    """
+    Index the rows of a pandas ``DataFrame`` as documents, their columns
+    encoded to JSON ``batch_size`` rows at a time, see
+    :func:`~elasticsearch.helpers.bulk_dataframe`. When the transport of the
+    client has an ``offload_policy`` the batches are encoded in its
+    executor.
+
+    :arg client: instance of :class:`~elasticsearch.AsyncElasticsearch` to use
+    :arg dataframe: the ``DataFrame`` to index
+    :arg id_column: name of the column holding the ``_id`` of the documents,
+        it isn't part of their source. Elasticsearch generates the ids when
+        ``None``
+    :arg op_type: ``index`` (default), ``create``, ``update`` (partial
+        documents) or ``delete`` (only the ids are sent)
+    :arg batch_size: number of rows encoded at a time
+
+    Any additional keyword arguments, ``index`` for instance, will be passed
+    to :func:`~elasticsearch.helpers.async_bulk` which is used to execute the
+    operation, see :func:`~elasticsearch.helpers.async_bulk` for more
+    accepted parameters.
+    """
+    _check_arguments(id_column, op_type)
+    actions = _dataframe_actions(
+        dataframe,
+        id_column,
+        op_type,
+        client.transport.serializer,
+        batch_size,
+        getattr(client.transport, "offload_policy", None),
+    )
+    kwargs["expand_action_callback"] = _expanded
+    return await async_bulk(client, actions, **kwargs)
+
+
 async def async_scan(
     client,
     query=None,
@@ -274,6 +384,8 @@ async def async_scan(
     request_timeout=None,
     clear_scroll=True,
     scroll_kwargs=None,
+    total_timeout=None,
+    stream=False,
     **kwargs
 ):
     """
@@ -304,6 +416,13 @@ async def async_scan(
         to true.
     :arg scroll_kwargs: additional kwargs to be passed to
         :meth:`~elasticsearch.AsyncElasticsearch.scroll`
+    :arg total_timeout: maximum number of seconds the whole scan may take,
+        the ``search`` and ``scroll`` requests share one deadline. The time
+        spent consuming the hits counts as well.
+    :arg stream: parse the responses incrementally, yielding every hit as
+        soon as it has been received instead of once the whole page has
+        been, so that only one hit is held in memory at a time rather than
+        ``size`` of them. See :class:`~elasticsearch.helpers.HitsParser`.
 
     Any additional keyword arguments will be passed to the initial
     :meth:`~elasticsearch.AsyncElasticsearch.search` call::
@@ -316,6 +435,12 @@ async def async_scan(
 
     """
     scroll_kwargs = scroll_kwargs or {}
+    deadline = _resolve_deadline(kwargs, total_timeout)
+    if deadline is not None:
+        scroll_kwargs = dict(scroll_kwargs, deadline=deadline)
+    if stream:
+        kwargs["stream_response"] = True
+        scroll_kwargs = dict(scroll_kwargs, stream_response=True)
 
     if not preserve_order:
         query = query.copy() if query else {}
@@ -325,12 +450,26 @@ async def async_scan(
     resp = await client.search(
         body=query, scroll=scroll, size=size, request_timeout=request_timeout, **kwargs
     )
-    scroll_id = resp.get("_scroll_id")
+    scroll_id = None if stream else resp.get("_scroll_id")
+    parser = hits = None
 
     try:
-        while scroll_id and resp["hits"]["hits"]:
-            for hit in resp["hits"]["hits"]:
-                yield hit
+        while True:
+            if stream:
+                # the rest of the response is known once the hits are parsed
+                parser = HitsParser()
+                hits = _iter_hits(parser, resp)
+                async for hit in hits:
+                    yield hit
+                resp = parser.response
+                scroll_id = resp.get("_scroll_id")
+                if not (scroll_id and parser.count):
+                    break
+            else:
+                if not (scroll_id and resp["hits"]["hits"]):
+                    break
+                for hit in resp["hits"]["hits"]:
+                    yield hit
 
             # check if we have any errors
             if (resp["_shards"]["successful"] + resp["_shards"]["skipped"]) < resp[
@@ -355,9 +494,15 @@ async def async_scan(
             resp = await client.scroll(
                 body={"scroll_id": scroll_id, "scroll": scroll}, **scroll_kwargs
             )
-            scroll_id = resp.get("_scroll_id")
+            if not stream:
+                scroll_id = resp.get("_scroll_id")
 
     finally:
+        if hits is not None:
+            await hits.aclose()
+        if parser is not None:
+            # the page may have been left before all of it was parsed
+            scroll_id = parser.response.get("_scroll_id", scroll_id)
         if scroll_id and clear_scroll:
             await client.clear_scroll(body={"scroll_id": [scroll_id]}, ignore=(404,))
 
@@ -33,13 +33,22 @@ from typing import (
 import logging
 from .client import AsyncElasticsearch
 from ..serializer import Serializer
+from ..transport import OffloadPolicy
+from ..helpers.streaming import HitsParser
 
 logger: logging.Logger
 
 T = TypeVar("T")
 
 def _chunk_actions(
-    actions: Any, chunk_size: int, max_chunk_bytes: int, serializer: Serializer
+    actions: Any,
+    chunk_size: int,
+    max_chunk_bytes: int,
+    serializer: Serializer,
+    offload_policy: Optional[OffloadPolicy] = ...,
+) -> AsyncGenerator[Any, None]: ...
+def _iter_hits(
+    parser: HitsParser, chunks: AsyncIterable[Union[str, bytes]]
 ) -> AsyncGenerator[Any, None]: ...
 def _process_bulk_chunk(
     client: AsyncElasticsearch,
@@ -76,6 +85,14 @@ async def async_bulk(
     *args: Any,
     **kwargs: Any
 ) -> Tuple[int, Union[int, List[Any]]]: ...
+async def async_bulk_dataframe(
+    client: AsyncElasticsearch,
+    dataframe: Any,
+    id_column: Optional[Any] = ...,
+    op_type: str = ...,
+    batch_size: int = ...,
+    **kwargs: Any
+) -> Tuple[int, Union[int, List[Any]]]: ...
 def async_scan(
     client: AsyncElasticsearch,
     query: Optional[Any] = ...,
@@ -86,6 +103,8 @@ def async_scan(
     request_timeout: Optional[Union[float, int]] = ...,
     clear_scroll: bool = ...,
     scroll_kwargs: Optional[Mapping[str, Any]] = ...,
+    total_timeout: Optional[Union[float, int]] = ...,
+    stream: bool = ...,
     **kwargs: Any
 ) -> AsyncGenerator[int, None]: ...
 async def async_reindex(
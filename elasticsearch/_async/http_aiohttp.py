@@ -23,12 +23,14 @@ import warnings
 from ._extra_imports import aiohttp_exceptions, aiohttp, yarl
 from .compat import get_running_loop
 from ..connection import Connection
+from ..connection.base import _is_chunked
 from ..compat import urlencode
 from ..exceptions import (
     ConnectionError,
     ConnectionTimeout,
     ImproperlyConfigured,
     SSLError,
+    TransportError,
 )
 
 
@@ -48,6 +50,14 @@ except ImportError:
     pass
 
 
+async def _chunks(chunks):
+    for chunk in chunks:
+        yield chunk
+        # producing the chunks (compressing them...) takes time and writing
+        # them doesn't wait unless the socket is full, let the loop run
+        await asyncio.sleep(0)
+
+
 class AsyncConnection(Connection):
     """Base class for Async HTTP connection implementations"""
 
@@ -63,6 +73,24 @@ class AsyncConnection(Connection):
     ):
         raise NotImplementedError()
 
+    async def perform_request_stream(
+        self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+    ):
+        status, headers, data = await self.perform_request(
+            method, url, params, body, timeout=timeout, ignore=ignore, headers=headers
+        )
+        if not isinstance(data, bytes):
+            data = data.encode("utf-8", "surrogatepass")
+        return status, headers, _chunks((data,))
+
+    async def warm_up(self, count=1, timeout=None):
+        try:
+            await self.perform_request("HEAD", "/", timeout=timeout)
+        except TransportError as e:
+            # any answer means that the connection is open
+            if not isinstance(e.status_code, int):
+                raise
+
     async def close(self):
         raise NotImplementedError()
 
@@ -89,6 +117,7 @@ class AIOHttpConnection(AsyncConnection):
         api_key=None,
         opaque_id=None,
         loop=None,
+        offload_policy=None,
         **kwargs,
     ):
         """
@@ -119,13 +148,17 @@ class AIOHttpConnection(AsyncConnection):
             host. See https://urllib3.readthedocs.io/en/1.4/pools.html#api for more
             information.
         :arg headers: any custom http headers to be add to requests
-        :arg http_compress: Use gzip compression
+        :arg http_compress: Use gzip compression, or a
+            :class:`~elasticsearch.Compression` to tune it
         :arg cloud_id: The Cloud ID from ElasticCloud. Convenient way to connect to cloud instances.
             Other host connection params will be ignored.
         :arg api_key: optional API Key authentication as either base64 encoded string or a tuple.
         :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
             For tracing all requests made by this transport.
         :arg loop: asyncio Event Loop to use with aiohttp. This is set by default to the currently running loop.
+        :arg offload_policy: :class:`~elasticsearch.transport.OffloadPolicy`
+            deciding which bodies are compressed in an executor rather than
+            on the loop, set by ``AsyncTransport``
         """
 
         self.headers = {}
@@ -160,6 +193,7 @@ class AIOHttpConnection(AsyncConnection):
                 "When using `ssl_context`, all other SSL related kwargs are ignored"
             )
 
+        self.offload_policy = offload_policy
         self.ssl_assert_fingerprint = ssl_assert_fingerprint
         if self.use_ssl and ssl_context is None:
             ssl_context = ssl.SSLContext(ssl_version or ssl.PROTOCOL_TLS)
@@ -211,6 +245,26 @@ class AIOHttpConnection(AsyncConnection):
 
     async def perform_request(
         self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+    ):
+        return await self._perform_request(
+            method, url, params, body, timeout, ignore, headers
+        )
+
+    async def perform_request_stream(
+        self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+    ):
+        """
+        Like :meth:`perform_request` but the body of a successful response is
+        returned as an asynchronous iterator of ``bytes`` chunks read as they
+        are received. The iterator has to be consumed or closed for the
+        connection to be reused.
+        """
+        return await self._perform_request(
+            method, url, params, body, timeout, ignore, headers, stream=True
+        )
+
+    async def _perform_request(
+        self, method, url, params, body, timeout, ignore, headers, stream=False
     ):
         if self.session is None:
             await self._create_aiohttp_session()
@@ -264,26 +318,45 @@ class AIOHttpConnection(AsyncConnection):
         if headers:
             req_headers.update(headers)
 
-        if self.http_compress and body:
-            body = self._gzip_compress(body)
-            req_headers["content-encoding"] = "gzip"
+        policy, compression = self.offload_policy, self.compression
+        if (
+            policy is not None
+            and compression is not None
+            and body
+            and not _is_chunked(body)
+            and policy.offload(body)
+        ):
+            compressed = await policy.run(self.loop, compression.compress, body)
+            if compressed is not None:
+                body = compressed
+                req_headers["content-encoding"] = compression.content_encoding
+        else:
+            body = self._compress_body(body, req_headers)
+        if _is_chunked(body):
+            # aiohttp sends asynchronous iterators with chunked transfer encoding
+            body = _chunks(body)
 
         start = self.loop.time()
         try:
-            async with self.session.request(
+            response = await self.session.request(
                 method,
                 url,
                 data=body,
                 headers=req_headers,
                 timeout=timeout,
                 fingerprint=self.ssl_assert_fingerprint,
-            ) as response:
-                if is_head:  # We actually called 'GET' so throw away the data.
-                    await response.release()
-                    raw_data = ""
-                else:
-                    raw_data = await response.text()
-                duration = self.loop.time() - start
+            )
+            if stream and not is_head and 200 <= response.status < 300:
+                raw_data = None
+            else:
+                try:
+                    if is_head:  # We actually called 'GET' so throw away the data.
+                        raw_data = b""
+                    else:
+                        raw_data = await response.read()
+                finally:
+                    response.release()
+            duration = self.loop.time() - start
 
         # We want to reraise a cancellation.
         except asyncio.CancelledError:
@@ -298,13 +371,7 @@ class AIOHttpConnection(AsyncConnection):
                 self.loop.time() - start,
                 exception=e,
             )
-            if isinstance(e, aiohttp_exceptions.ServerFingerprintMismatch):
-                raise SSLError("N/A", str(e), e)
-            if isinstance(
-                e, (asyncio.TimeoutError, aiohttp_exceptions.ServerTimeoutError)
-            ):
-                raise ConnectionTimeout("TIMEOUT", str(e), e)
-            raise ConnectionError("N/A", str(e), e)
+            raise self._connection_error(e)
 
         # raise warnings if any from the 'Warnings' header.
         warning_headers = response.headers.getall("warning", ())
@@ -327,8 +394,54 @@ class AIOHttpConnection(AsyncConnection):
             method, str(url), url_path, orig_body, response.status, raw_data, duration
         )
 
+        if stream:
+            if raw_data is None:
+                return response.status, response.headers, self._stream(response)
+            return response.status, response.headers, _chunks((raw_data,))
         return response.status, response.headers, raw_data
 
+    def _connection_error(self, e):
+        """
+        The :class:`~elasticsearch.ConnectionError` to raise for the
+        exception ``e`` aiohttp raised.
+        """
+        if isinstance(e, aiohttp_exceptions.ServerFingerprintMismatch):
+            return SSLError("N/A", str(e), e)
+        if isinstance(e, (asyncio.TimeoutError, aiohttp_exceptions.ServerTimeoutError)):
+            return ConnectionTimeout("TIMEOUT", str(e), e)
+        return ConnectionError("N/A", str(e), e)
+
+    async def _stream(self, response):
+        done = False
+        try:
+            async for chunk in response.content.iter_any():
+                yield chunk
+            done = True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # the node failed in the middle of the body
+            raise self._connection_error(e)
+        finally:
+            if not done:
+                # the rest of the body can't be left on the connection
+                response.close()
+            response.release()
+
+    async def warm_up(self, count=1, timeout=None):
+        """
+        Open up to ``count`` (at most ``maxsize``) connections to the node by
+        sending concurrent requests.
+        """
+        count = min(count, self._limit)
+        results = await asyncio.gather(
+            *[super().warm_up(timeout=timeout) for _ in range(count)],
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors and len(errors) == count:
+            raise errors[0]
+
     async def close(self):
         """
         Explicitly closes connection
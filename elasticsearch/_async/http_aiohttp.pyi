@@ -16,8 +16,19 @@
 #  under the License.
 
 from ._extra_imports import aiohttp  # type: ignore
-from typing import Optional, Mapping, Collection, Union, Any, Tuple
+from typing import (
+    Optional,
+    Mapping,
+    Collection,
+    Union,
+    Any,
+    Tuple,
+    AsyncIterator,
+    Iterator,
+)
 from ..connection import Connection
+from ..compression import Compression
+from ..transport import OffloadPolicy
 
 class AsyncConnection(Connection):
     async def perform_request(  # type: ignore
@@ -25,16 +36,30 @@ class AsyncConnection(Connection):
         method: str,
         url: str,
         params: Optional[Mapping[str, Any]] = ...,
-        body: Optional[bytes] = ...,
+        body: Optional[Union[bytes, Iterator[bytes]]] = ...,
         timeout: Optional[Union[int, float]] = ...,
         ignore: Collection[int] = ...,
         headers: Optional[Mapping[str, str]] = ...,
-    ) -> Tuple[int, Mapping[str, str], str]: ...
+    ) -> Tuple[int, Mapping[str, str], Union[str, bytes]]: ...
+    async def perform_request_stream(  # type: ignore
+        self,
+        method: str,
+        url: str,
+        params: Optional[Mapping[str, Any]] = ...,
+        body: Optional[Union[bytes, Iterator[bytes]]] = ...,
+        timeout: Optional[Union[int, float]] = ...,
+        ignore: Collection[int] = ...,
+        headers: Optional[Mapping[str, str]] = ...,
+    ) -> Tuple[int, Mapping[str, str], AsyncIterator[bytes]]: ...
+    async def warm_up(  # type: ignore
+        self, count: int = ..., timeout: Optional[Union[int, float]] = ...
+    ) -> None: ...
     async def close(self) -> None: ...
 
 class AIOHttpConnection(AsyncConnection):
     session: Optional[aiohttp.ClientSession]
     ssl_assert_fingerprint: Optional[str]
+    offload_policy: Optional[OffloadPolicy]
     def __init__(
         self,
         host: str = ...,
@@ -51,10 +76,14 @@ class AIOHttpConnection(AsyncConnection):
         maxsize: int = ...,
         headers: Optional[Mapping[str, str]] = ...,
         ssl_context: Optional[Any] = ...,
-        http_compress: Optional[bool] = ...,
+        http_compress: Optional[Union[bool, Compression]] = ...,
         cloud_id: Optional[str] = ...,
         api_key: Optional[Any] = ...,
         opaque_id: Optional[str] = ...,
         loop: Any = ...,
+        offload_policy: Optional[OffloadPolicy] = ...,
         **kwargs: Any,
     ) -> None: ...
+    async def warm_up(  # type: ignore
+        self, count: int = ..., timeout: Optional[Union[int, float]] = ...
+    ) -> None: ...
@@ -0,0 +1,81 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import asyncio
+from .compat import get_running_loop
+from .http_aiohttp import AsyncConnection
+from ..connection.http_httpx import HttpxHttpConnection, HTTPX_AVAILABLE
+
+if HTTPX_AVAILABLE:
+    import httpx
+
+
+class AsyncHttpxHttpConnection(HttpxHttpConnection, AsyncConnection):
+    """
+    Connection for ``AsyncElasticsearch`` using the `httpx` library over
+    HTTP/2, see :class:`~elasticsearch.connection.HttpxHttpConnection` for
+    the parameters.
+
+    :arg loop: asyncio Event Loop to use. This is set by default to the currently running loop.
+    """
+
+    def __init__(self, *args, loop=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop = loop
+
+    def _create_session(self):
+        return httpx.AsyncClient(**self._client_kwargs)
+
+    async def perform_request(
+        self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+    ):
+        if self.loop is None:
+            self.loop = get_running_loop()
+        full_url, url, req_body, req_headers = self._prepare_request(
+            method, url, params, body, headers
+        )
+
+        start = self.loop.time()
+        try:
+            response = await self.session.request(
+                method,
+                full_url,
+                content=req_body,
+                headers=req_headers,
+                timeout=timeout or self.timeout,
+            )
+            duration = self.loop.time() - start
+            raw_data = response.content
+
+        # We want to reraise a cancellation.
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            self._handle_exception(
+                method, full_url, url, body, self.loop.time() - start, e
+            )
+
+        return self._process_response(
+            method, full_url, url, body, ignore, response, raw_data, duration
+        )
+
+    async def close(self):
+        """
+        Explicitly closes connections
+        """
+        await self.session.aclose()
@@ -0,0 +1,38 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import asyncio
+from typing import Optional, Any, Mapping, Collection, Union, Tuple
+from .http_aiohttp import AsyncConnection
+from ..connection.http_httpx import HttpxHttpConnection
+
+class AsyncHttpxHttpConnection(HttpxHttpConnection, AsyncConnection):  # type: ignore
+    loop: Optional[asyncio.AbstractEventLoop]
+    def __init__(
+        self, *args: Any, loop: Optional[asyncio.AbstractEventLoop] = ..., **kwargs: Any
+    ) -> None: ...
+    async def perform_request(  # type: ignore
+        self,
+        method: str,
+        url: str,
+        params: Optional[Mapping[str, Any]] = ...,
+        body: Optional[bytes] = ...,
+        timeout: Optional[Union[int, float]] = ...,
+        ignore: Collection[int] = ...,
+        headers: Optional[Mapping[str, str]] = ...,
+    ) -> Tuple[int, Mapping[str, str], Union[str, bytes]]: ...
+    async def close(self) -> None: ...
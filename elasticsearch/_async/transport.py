@@ -22,7 +22,14 @@ import sys
 
 from .compat import get_running_loop
 from .http_aiohttp import AIOHttpConnection
-from ..transport import Transport
+from ..connection.base import _is_chunked
+from ..transport import (
+    Transport,
+    _ChunkedBody,
+    _deserialize_body,
+    _pool_connection,
+    _serialize_body,
+)
 from ..exceptions import (
     TransportError,
     ConnectionTimeout,
@@ -34,6 +41,46 @@ from ..exceptions import (
 logger = logging.getLogger("elasticsearch")
 
 
+class _AsyncStreamedChunks(object):
+    """
+    Asynchronous counterpart of :class:`~elasticsearch.transport._StreamedChunks`.
+    """
+
+    def __init__(self, chunks, finish):
+        self.source = chunks
+        self.chunks = chunks.__aiter__()
+        self.finish = finish
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.finish is None:
+            raise StopAsyncIteration
+        try:
+            return await self.chunks.__anext__()
+        except StopAsyncIteration:
+            await self._finish(None)
+            raise
+        except Exception as e:
+            await self._finish(e)
+            raise
+
+    async def aclose(self):
+        await self._finish(None)
+
+    async def _finish(self, error):
+        finish, self.finish = self.finish, None
+        if finish is None:
+            return
+        try:
+            aclose = getattr(self.source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        finally:
+            finish(error)
+
+
 class AsyncTransport(Transport):
     """
     Encapsulation of transport-related to logic. Handles instantiation of the
@@ -44,7 +91,15 @@ class AsyncTransport(Transport):
 
     DEFAULT_CONNECTION_CLASS = AIOHttpConnection
 
-    def __init__(self, hosts, *args, sniff_on_start=False, **kwargs):
+    def __init__(
+        self,
+        hosts,
+        *args,
+        sniff_on_start=False,
+        health_check_interval=None,
+        offload_policy=None,
+        **kwargs
+    ):
         """
         :arg hosts: list of dictionaries, each containing keyword arguments to
             create a `connection_class` instance
@@ -77,18 +132,61 @@ class AsyncTransport(Transport):
             don't support passing bodies with GET requests. If you set this to
             'POST' a POST method will be used instead, if to 'source' then the body
             will be serialized and passed as a query parameter `source`.
+        :arg health_check_interval: number of seconds between health checks of
+            dead connections. When set, a background task probes dead nodes
+            with a ``HEAD /`` request and only returns them to the pool once
+            they respond, instead of retrying them with user requests after
+            their timeout.
+        :arg hedge_policy: :class:`~elasticsearch.transport.HedgePolicy`
+            instance. When set, idempotent reads that take longer than usual
+            are also sent to a second node and the first response is used,
+            the other request is cancelled.
+        :arg retry_budget: :class:`~elasticsearch.transport.RetryBudget`
+            instance limiting the number of retries relative to the number of
+            successful requests.
+        :arg concurrency_limiter:
+            :class:`~elasticsearch.transport.ConcurrencyLimiter` instance
+            adapting the number of requests in flight to how loaded the
+            cluster is. Requests waiting for a slot don't block the loop.
+        :arg routing_policy: :class:`~elasticsearch.transport.RoutingPolicy`
+            instance sending each family of APIs to the nodes with the
+            matching roles.
+        :arg shard_router: :class:`~elasticsearch.routing.ShardRouter`
+            instance sending single document operations straight to a node
+            holding the document's shard.
+        :arg request_coalescer: :class:`~elasticsearch.transport.RequestCoalescer`
+            instance sharing one in-flight request between concurrent
+            identical reads.
+        :arg response_cache: :class:`~elasticsearch.transport.ResponseCache`
+            instance caching the responses of read APIs.
+        :arg warm_up_connections: number of connections to open to each node,
+            in the background, when the client is created and when sniffing
+            discovers new nodes (default 0, connections are opened by the
+            first requests)
+        :arg offload_policy: :class:`~elasticsearch.transport.OffloadPolicy`
+            instance. When set, large bodies are serialized, compressed and
+            deserialized in an executor instead of blocking the loop.
 
         Any extra keyword arguments will be passed to the `connection_class`
         when creating and instance unless overridden by that connection's
         options provided as part of the hosts parameter.
         """
         self.sniffing_task = None
+        self.health_check_task = None
         self.loop = None
         self._async_init_called = False
 
+        # sniffing always happens in a task, there is no thread to start
+        kwargs.pop("sniff_in_background", None)
+
         super(AsyncTransport, self).__init__(
             *args, hosts=[], sniff_on_start=False, **kwargs
         )
+        self.health_check_interval = health_check_interval
+        self.offload_policy = offload_policy
+        if offload_policy is not None:
+            # the connections compress the bodies
+            self.kwargs["offload_policy"] = offload_policy
 
         # Don't enable sniffing on Cloud instances.
         if kwargs.get("cloud_id", False):
@@ -122,6 +220,9 @@ class AsyncTransport(Transport):
             self.last_sniff = self.loop.time()
             self.create_sniff_task(initial=True)
 
+        if self.health_check_interval:
+            self.health_check_task = self.loop.create_task(self._health_check_loop())
+
     async def _async_call(self):
         """This method is called within any async method of AsyncTransport
         where the transport is not closing. This will check to see if we should
@@ -260,8 +361,39 @@ class AsyncTransport(Transport):
         if self.sniff_on_connection_fail:
             self.create_sniff_task()
 
-    def get_connection(self):
-        return self.connection_pool.get_connection()
+    async def check_dead_connections(self):
+        """
+        Send a ``HEAD /`` request to every dead connection and return the
+        ones that respond to the live pool. Returns the revived connections.
+        """
+        revived = []
+        pool = self.connection_pool
+        for connection in pool.dead_connections():
+            try:
+                await connection.perform_request(
+                    "HEAD", "/", timeout=self.health_check_interval
+                )
+            except TransportError as e:
+                # any HTTP response other than a retryable status means the
+                # node is up again
+                if self._is_node_failure(e):
+                    continue
+            if pool.revive(connection):
+                revived.append(connection)
+        return revived
+
+    async def _health_check_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.check_dead_connections()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Health check of dead connections failed.")
+
+    def get_connection(self, roles=None):
+        return _pool_connection(self.connection_pool, roles)
 
     async def perform_request(self, method, url, headers=None, params=None, body=None):
         """
@@ -275,6 +407,20 @@ class AsyncTransport(Transport):
         If the operation was successful and the connection used was previously
         marked as dead, mark it as live, resetting it's failure count.
 
+        ``request_timeout`` in ``params`` limits each attempt while
+        ``total_timeout`` (in seconds) or ``deadline`` (a :func:`time.time`
+        timestamp) limit the whole request: every retry only gets the time
+        that is left and no attempt is started once it is over.
+
+        With ``raw_response`` in ``params`` the body of the response is
+        returned as ``bytes``, without being deserialized, to be forwarded
+        as is. With ``stream_response`` it is returned as an iterator of
+        ``bytes`` chunks instead, read from the connection as the iterator is
+        consumed, to be parsed incrementally (see
+        :class:`~elasticsearch.helpers.HitsParser`); the iterator has to be
+        consumed or closed for the connection to be reused. Such requests are
+        neither cached, coalesced nor hedged.
+
         :arg method: HTTP method to use
         :arg url: absolute url (without host) to target
         :arg headers: dictionary of headers, will be handed over to the
@@ -282,31 +428,193 @@ class AsyncTransport(Transport):
         :arg params: dictionary of query parameters, will be handed over to the
             underlying :class:`~elasticsearch.Connection` class for serialization
         :arg body: body of the request, will be serialized using serializer and
-            passed to the connection
+            passed to the connection. An iterator of ``bytes`` (or text)
+            chunks, a generator for instance, is sent with chunked transfer
+            encoding as it is produced instead. Such a request is only
+            retried if the failed attempt didn't consume any chunk.
         """
         await self._async_call()
 
-        method, params, body, ignore, timeout = self._resolve_request_args(
-            method, params, body
+        policy = self.offload_policy
+        if (
+            policy is not None
+            and body is not None
+            and not _is_chunked(body)
+            and policy.offload(body)
+        ):
+            body = await policy.run(self.loop, _serialize_body, self.serializer, body)
+
+        (
+            method,
+            params,
+            body,
+            ignore,
+            timeout,
+            deadline,
+            raw,
+            stream,
+        ) = self._resolve_request_args(method, params, body)
+        # neither the bodies nor a chunked request can be shared
+        keyed = not (raw or stream or isinstance(body, _ChunkedBody))
+
+        cache, cache_key = self.response_cache, None
+        if cache is not None and keyed:
+            cache_key, ttl = cache.key(method, url, headers, params, body, ignore)
+            if cache_key is not None:
+                hit, value = cache.get(cache_key)
+                if hit:
+                    return value
+
+        args = (
+            method,
+            url,
+            headers,
+            params,
+            body,
+            ignore,
+            timeout,
+            deadline,
+            raw,
+            stream,
         )
+        key = None
+        if self.request_coalescer is not None and keyed:
+            key = self.request_coalescer.key(method, url, headers, params, body, ignore)
+        try:
+            if key is not None:
+                data = await self._perform_coalesced_request(key, *args)
+            else:
+                data = await self._perform_request(*args)
+        finally:
+            if cache is not None and cache_key is None:
+                cache.written(method, url, body)
+
+        if cache_key is not None:
+            cache.put(cache_key, url, data, ttl, value)
+        return data
+
+    async def _perform_coalesced_request(self, key, *args):
+        coalescer = self.request_coalescer
+        with coalescer.lock:
+            coalescer.requests += 1
+            flight = coalescer.in_flight.get(key)
+            leader = flight is None
+            if leader:
+                # [future, number of waiting requests]
+                flight = coalescer.in_flight[key] = [self.loop.create_future(), 0]
+            else:
+                flight[1] += 1
+                coalescer.coalesced += 1
+        future = flight[0]
+
+        if not leader:
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # the request we were waiting for was cancelled, not us
+                return await self._perform_request(*args)
+            return coalescer.copy_response(result)
 
+        try:
+            result = await self._perform_request(*args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # don't complain about the exception when nobody was waiting
+            future.exception()
+            raise
+        else:
+            shared = result
+            if flight[1]:
+                try:
+                    # the waiting requests copy a response of their own, the
+                    # caller may modify the one it gets before they do
+                    shared = coalescer.copy_response(result)
+                except Exception as e:
+                    future.set_exception(e)
+                    return result
+            future.set_result(shared)
+            return result
+        finally:
+            with coalescer.lock:
+                del coalescer.in_flight[key]
+
+    async def _perform_request(
+        self,
+        method,
+        url,
+        headers,
+        params,
+        body,
+        ignore,
+        timeout,
+        deadline,
+        raw,
+        stream=False,
+    ):
+        # neither a streamed response nor a chunked body can be sent twice
+        hedge = (
+            not stream
+            and not isinstance(body, _ChunkedBody)
+            and self.hedge_policy is not None
+            and self.hedge_policy.is_hedgeable(method, url)
+        )
+        roles = None
+        if self.routing_policy is not None:
+            roles = self.routing_policy.roles_for(method, url)
+        index, routed = None, None
+        if self.shard_router is not None:
+            index, routed = self._get_shard_connection(method, url, params)
+
+        error = None
         for attempt in range(self.max_retries + 1):
-            connection = self.get_connection()
+            # don't start a new attempt once the deadline has passed
+            self._check_deadline(deadline, error)
+            if attempt == 0 and routed is not None:
+                connection = routed
+            else:
+                connection = self.get_connection(roles)
+            attempt_timeout, cut = self._attempt_timeout(connection, timeout, deadline)
 
             try:
-                status, headers, data = await connection.perform_request(
-                    method,
-                    url,
-                    params,
-                    body,
-                    headers=headers,
-                    ignore=ignore,
-                    timeout=timeout,
-                )
+                if hedge:
+                    connection, response = await self._perform_hedged_request(
+                        connection,
+                        roles,
+                        method,
+                        url,
+                        params,
+                        body,
+                        headers=headers,
+                        ignore=ignore,
+                        timeout=attempt_timeout,
+                    )
+                else:
+                    response = await self._perform_connection_request(
+                        connection,
+                        method,
+                        url,
+                        params,
+                        body,
+                        headers=headers,
+                        ignore=ignore,
+                        timeout=attempt_timeout,
+                        stream=stream,
+                    )
+                status, headers_response, data = response
+                response = None
             except TransportError as e:
                 if method == "HEAD" and e.status_code == 404:
                     return False
+                if cut and isinstance(e, ConnectionTimeout):
+                    # the deadline passed, the node isn't to blame
+                    raise e
 
+                error = e
                 retry = False
                 if isinstance(e, ConnectionTimeout):
                     retry = self.retry_on_timeout
@@ -314,8 +622,14 @@ class AsyncTransport(Transport):
                     retry = True
                 elif e.status_code in self.retry_on_status:
                     retry = True
+                if isinstance(body, _ChunkedBody) and not body.restart():
+                    # the chunks that were sent are gone
+                    retry = False
 
                 if retry:
+                    if connection is routed:
+                        # the shards may have moved away from the node
+                        self.shard_router.invalidate(index)
                     try:
                         # only mark as dead if we are retrying
                         self.mark_dead(connection)
@@ -323,8 +637,8 @@ class AsyncTransport(Transport):
                         # If sniffing on failure, it could fail too. Catch the
                         # exception not to interrupt the retries.
                         pass
-                    # raise exception on last retry
-                    if attempt == self.max_retries:
+                    # raise exception on last retry or once the budget is spent
+                    if attempt == self.max_retries or not self._retry_allowed():
                         raise e
                 else:
                     raise e
@@ -332,14 +646,200 @@ class AsyncTransport(Transport):
             else:
                 # connection didn't fail, confirm it's live status
                 self.connection_pool.mark_live(connection)
+                if self.retry_budget is not None:
+                    self.retry_budget.deposit()
 
                 if method == "HEAD":
                     return 200 <= status < 300
 
+                if stream:
+                    return data
+
+                if raw:
+                    if not isinstance(data, (bytes, bytearray, memoryview)):
+                        data = data.encode("utf-8", "surrogatepass")
+                    return data
+
                 if data:
-                    data = self.deserializer.loads(data, headers.get("content-type"))
+                    args = (
+                        self.deserializer,
+                        data,
+                        headers_response.get("content-type"),
+                    )
+                    policy = self.offload_policy
+                    if policy is not None and policy.offload(data):
+                        data = await policy.run(self.loop, _deserialize_body, *args)
+                    else:
+                        data = _deserialize_body(*args)
                 return data
 
+    def _warm_up(self, connections):
+        async def warm_up(connection):
+            try:
+                await connection.warm_up(self.warm_up_connections)
+            except Exception:
+                logger.warning(
+                    "Unable to warm up the connections to %r.",
+                    connection,
+                    exc_info=True,
+                )
+
+        for connection in connections:
+            self.loop.create_task(warm_up(connection))
+
+    def _schedule_shard_refresh(self, index):
+        self.loop.create_task(self._refresh_shard_routing(index))
+
+    async def _refresh_shard_routing(self, index):
+        router = self.shard_router
+        try:
+            nodes, metadata, shards = [
+                await self.perform_request("GET", url, params=params)
+                for (url, params) in self._shard_routing_requests(index)
+            ]
+            router.update(index, metadata, shards, self._node_addresses(nodes))
+        except Exception:
+            logger.warning(
+                "Unable to fetch the shard routing of %r.", index, exc_info=True
+            )
+            # send requests as usual until the next refresh
+            router.update(index, None, None, {})
+        finally:
+            router.refresh_done(index)
+
+    async def _perform_connection_request(self, connection, *args, **kwargs):
+        """
+        Send a single request over ``connection``, keeping the connection
+        pool informed about how long it took and whether the node failed.
+        """
+        limiter = self.concurrency_limiter
+        if limiter is not None and not await self._acquire_slot(connection):
+            raise TransportError("N/A", "Concurrency limit reached.")
+
+        stream = kwargs.pop("stream", False)
+        self.connection_pool.request_started(connection)
+        start = self.loop.time()
+        success = False
+        overloaded = False
+        try:
+            if stream:
+                status, headers, chunks = await connection.perform_request_stream(
+                    *args, **kwargs
+                )
+
+                def finish(error):
+                    duration = self.loop.time() - start
+                    self._stream_finished(connection, duration, error)
+
+                response = status, headers, _AsyncStreamedChunks(chunks, finish)
+            else:
+                response = await connection.perform_request(*args, **kwargs)
+            success = True
+            return response
+        except asyncio.CancelledError:
+            # the losing request of a hedge, the node isn't to blame
+            success = None
+            raise
+        except TransportError as e:
+            success = not self._is_server_error(e)
+            overloaded = limiter is not None and limiter.is_overload(e)
+            raise
+        finally:
+            # a streamed response is finished once its chunks have been read
+            if not (stream and success):
+                duration = self.loop.time() - start
+                self._request_finished(connection, duration, success, overloaded)
+
+    async def _acquire_slot(self, connection):
+        """
+        Asynchronous counterpart of
+        :meth:`~elasticsearch.transport.ConcurrencyLimiter.acquire`, waits
+        for a free slot without blocking the event loop.
+        """
+        limiter = self.concurrency_limiter
+        if limiter.try_acquire(connection):
+            return True
+
+        deadline = None
+        if limiter.queue_timeout is not None:
+            deadline = self.loop.time() + limiter.queue_timeout
+        while limiter.block:
+            woken = self.loop.create_future()
+
+            def wake(woken=woken):
+                # release() may be called from another thread
+                self.loop.call_soon_threadsafe(
+                    lambda: woken.done() or woken.set_result(None)
+                )
+
+            if limiter.try_acquire(connection, wake):
+                return True
+            timeout = None
+            if deadline is not None:
+                timeout = max(0, deadline - self.loop.time())
+            try:
+                await asyncio.wait_for(woken, timeout)
+            except asyncio.TimeoutError:
+                limiter.cancel_waiter(connection, wake)
+                break
+            except asyncio.CancelledError:
+                limiter.cancel_waiter(connection, wake)
+                raise
+
+        limiter.reject()
+        return False
+
+    async def _perform_hedged_request(self, connection, roles, *args, **kwargs):
+        """
+        Send a request over ``connection`` and, if it isn't answered within
+        the hedge delay, over a second connection (to a node with one of
+        ``roles`` if any) as well. Returns the connection that answered first
+        along with its response, the other request is cancelled. If both
+        requests fail the error of the original one is raised.
+        """
+        policy = self.hedge_policy
+        policy.request_sent()
+        delay = policy.hedge_delay()
+        if delay is None or len(self.connection_pool.connections) < 2:
+            return (
+                connection,
+                await self._perform_connection_request(connection, *args, **kwargs),
+            )
+
+        def send(conn):
+            return self.loop.create_task(
+                self._perform_connection_request(conn, *args, **kwargs)
+            )
+
+        # The 'loop' keyword is deprecated in 3.8+ so don't
+        # pass it to asyncio.wait() unless we're on <=3.7
+        wait_kwargs = {"loop": self.loop} if sys.version_info < (3, 8) else {}
+
+        original = send(connection)
+        tasks = {original: connection}
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=delay, **wait_kwargs)
+            if not done:
+                hedge_connection = _pool_connection(self.connection_pool, roles)
+                if hedge_connection is not connection and policy.acquire():
+                    tasks[send(hedge_connection)] = hedge_connection
+                    pending = set(tasks)
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED, **wait_kwargs
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not original:
+                            policy.hedge_won()
+                        return tasks[task], task.result()
+
+            return connection, original.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
     async def close(self):
         """
         Explicitly closes connections
@@ -351,5 +851,12 @@ class AsyncTransport(Transport):
             except asyncio.CancelledError:
                 pass
             self.sniffing_task = None
+        if self.health_check_task:
+            try:
+                self.health_check_task.cancel()
+                await self.health_check_task
+            except asyncio.CancelledError:
+                pass
+            self.health_check_task = None
         for connection in self.connection_pool.connections:
             await connection.close()
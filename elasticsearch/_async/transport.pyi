@@ -25,11 +25,22 @@ from typing import (
     Any,
     Dict,
     List,
+    FrozenSet,
 )
 
 from ..connection import Connection
 from ..connection_pool import ConnectionPool
+from ..routing import ShardRouter
 from ..serializer import Serializer, Deserializer
+from ..transport import (
+    HedgePolicy,
+    RetryBudget,
+    ConcurrencyLimiter,
+    RoutingPolicy,
+    RequestCoalescer,
+    OffloadPolicy,
+    ResponseCache,
+)
 
 class AsyncTransport(object):
     DEFAULT_CONNECTION_CLASS: Type[Connection]
@@ -40,6 +51,16 @@ class AsyncTransport(object):
     retry_on_timeout: bool
     retry_on_status: Collection[int]
     send_get_body_as: str
+    health_check_interval: Optional[float]
+    hedge_policy: Optional[HedgePolicy]
+    retry_budget: Optional[RetryBudget]
+    concurrency_limiter: Optional[ConcurrencyLimiter]
+    routing_policy: Optional[RoutingPolicy]
+    shard_router: Optional[ShardRouter]
+    request_coalescer: Optional[RequestCoalescer]
+    response_cache: Optional[ResponseCache]
+    offload_policy: Optional[OffloadPolicy]
+    warm_up_connections: int
     serializer: Serializer
     connection_pool_class: Type[ConnectionPool]
     connection_class: Type[Connection]
@@ -73,13 +94,24 @@ class AsyncTransport(object):
         retry_on_status: Collection[int] = ...,
         retry_on_timeout: bool = ...,
         send_get_body_as: str = ...,
+        health_check_interval: Optional[float] = ...,
+        hedge_policy: Optional[HedgePolicy] = ...,
+        retry_budget: Optional[RetryBudget] = ...,
+        concurrency_limiter: Optional[ConcurrencyLimiter] = ...,
+        routing_policy: Optional[RoutingPolicy] = ...,
+        shard_router: Optional[ShardRouter] = ...,
+        request_coalescer: Optional[RequestCoalescer] = ...,
+        response_cache: Optional[ResponseCache] = ...,
+        warm_up_connections: int = ...,
+        offload_policy: Optional[OffloadPolicy] = ...,
         **kwargs: Any
     ) -> None: ...
     def add_connection(self, host: Any) -> None: ...
     def set_connections(self, hosts: Collection[Any]) -> None: ...
-    def get_connection(self) -> Connection: ...
+    def get_connection(self, roles: Optional[FrozenSet[str]] = ...) -> Connection: ...
     def sniff_hosts(self, initial: bool = ...) -> None: ...
     def mark_dead(self, connection: Connection) -> None: ...
+    async def check_dead_connections(self) -> List[Connection]: ...
     async def perform_request(
         self,
         method: str,
@@ -20,7 +20,10 @@ from __future__ import unicode_literals
 import weakref
 from datetime import date, datetime
 from functools import wraps
+from itertools import chain
 from ..compat import string_types, quote, PY2, unquote, urlparse
+from ..connection.base import _ReiterableChunks, _is_chunked
+from ..serializer import _bytes_dumper
 
 # parts of URL to be omitted
 SKIP_IN_PATH = (None, "", b"", [], ())
@@ -145,8 +148,15 @@ def query_params(*es_query_params):
                     if v is not None:
                         params[p] = _escape(v)
 
-            # don't treat ignore, request_timeout, and opaque_id as other params to avoid escaping
-            for p in ("ignore", "request_timeout"):
+            # don't treat ignore and the timeouts as other params to avoid escaping
+            for p in (
+                "ignore",
+                "request_timeout",
+                "total_timeout",
+                "deadline",
+                "raw_response",
+                "stream_response",
+            ):
                 if p in kwargs:
                     params[p] = kwargs.pop(p)
             return func(*args, params=params, headers=headers, **kwargs)
@@ -157,9 +167,21 @@ def query_params(*es_query_params):
 
 
 def _bulk_body(serializer, body):
+    if isinstance(body, _ReiterableChunks):
+        # chunks of bytes, produced again by every attempt
+        return body
+    if _is_chunked(body):
+        # an iterator of bytes is a body streamed by chunks and sent as is
+        # (python 2 can't tell bytes from text though)
+        for first in body:
+            body = chain((first,), body)
+            if isinstance(first, bytes) and bytes is not str:
+                return body
+            break
+
     # if not passed in a string, serialize items and join by newline
     if not isinstance(body, string_types):
-        body = "\n".join(map(serializer.dumps, body))
+        body = b"\n".join(map(_bytes_dumper(serializer), body))
 
     # bulk body must end with a newline
     if isinstance(body, bytes):
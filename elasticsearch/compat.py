@@ -24,13 +24,13 @@ if PY2:
     from urllib import quote_plus, quote, urlencode, unquote
     from urlparse import urlparse
     from itertools import imap as map
-    from Queue import Queue
+    from Queue import Queue, Empty
 else:
     string_types = str, bytes
     from urllib.parse import quote, quote_plus, urlencode, urlparse, unquote
 
     map = map
-    from queue import Queue
+    from queue import Queue, Empty
 
 try:
     from collections.abs import Mapping
@@ -38,6 +38,16 @@ except ImportError:
     from collections import Mapping
 
 
+def to_text(data):
+    """
+    Decode a response body received as bytes, keeping the lone surrogates
+    Elasticsearch may send. Text is returned as is.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data).decode("utf-8", "surrogatepass")
+    return data
+
+
 __all__ = [
     "string_types",
     "quote_plus",
@@ -47,5 +57,7 @@ __all__ = [
     "urlparse",
     "map",
     "Queue",
+    "Empty",
     "Mapping",
+    "to_text",
 ]
@@ -16,11 +16,15 @@
 #  under the License.
 
 import sys
-from typing import Tuple
+from typing import Tuple, Union, TypeVar
 
 PY2: bool
 string_types: Tuple[type, ...]
 
+T = TypeVar("T")
+
+def to_text(data: Union[bytes, bytearray, memoryview, T]) -> Union[str, T]: ...
+
 if sys.version_info[0] == 2:
     from urllib import (
         quote_plus as quote_plus,
@@ -30,7 +34,7 @@ if sys.version_info[0] == 2:
     )
     from urlparse import urlparse as urlparse
     from itertools import imap as map
-    from Queue import Queue as Queue
+    from Queue import Queue as Queue, Empty as Empty
 else:
     from urllib.parse import (
         quote as quote,
@@ -41,4 +45,4 @@ else:
     )
 
     map = map
-    from queue import Queue as Queue
+    from queue import Queue as Queue, Empty as Empty
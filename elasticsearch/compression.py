@@ -0,0 +1,128 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import zlib
+
+from .exceptions import ImproperlyConfigured
+from .compat import string_types
+
+
+class Codec(object):
+    """
+    Compression format of the request bodies, sent as their
+    ``content-encoding``.
+    """
+
+    content_encoding = ""
+
+    def compressor(self, level):
+        """
+        Return a new object compressing a body with ``compress(data)`` and
+        ``flush()``, like the objects returned by ``zlib.compressobj``.
+        """
+        raise NotImplementedError()
+
+
+class GzipCodec(Codec):
+    content_encoding = "gzip"
+
+    def compressor(self, level):
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class DeflateCodec(Codec):
+    # 'deflate' in HTTP is the zlib format, not a raw deflate stream
+    content_encoding = "deflate"
+
+    def compressor(self, level):
+        return zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS)
+
+
+DEFAULT_CODECS = {
+    GzipCodec.content_encoding: GzipCodec(),
+    DeflateCodec.content_encoding: DeflateCodec(),
+}
+
+
+class Compression(object):
+    """
+    Compression of the request bodies sent with ``http_compress``. An
+    instance only holds its settings, it can be shared by all the
+    connections (and threads) of a client::
+
+        es = Elasticsearch(http_compress=Compression(level=1, min_size=4096))
+
+    Bodies smaller than ``min_size`` bytes are sent as they are: the CPU
+    spent compressing them isn't paid back by the few bytes saved, if any.
+    Streamed (chunked) bodies are always compressed as their size isn't
+    known before they are sent.
+
+    :arg codec: name of the codec (``"gzip"`` or ``"deflate"``) or a
+        :class:`Codec` instance, defaults to gzip
+    :arg level: compression level, from 1 (fastest) to 9 (smallest)
+    :arg min_size: size in bytes under which bodies aren't compressed
+    """
+
+    def __init__(self, codec="gzip", level=9, min_size=1024):
+        if isinstance(codec, string_types):
+            try:
+                codec = DEFAULT_CODECS[codec]
+            except KeyError:
+                raise ImproperlyConfigured(
+                    "Unknown compression codec %r, expected one of %s."
+                    % (codec, ", ".join(sorted(DEFAULT_CODECS)))
+                )
+        if not 1 <= level <= 9:
+            raise ImproperlyConfigured(
+                "Compression level must be between 1 and 9, got %r." % (level,)
+            )
+        self.codec = codec
+        self.level = level
+        self.min_size = min_size
+
+    @property
+    def content_encoding(self):
+        return self.codec.content_encoding
+
+    def compress(self, body):
+        """
+        Return ``body`` compressed, or ``None`` if it is too small to be
+        worth compressing.
+        """
+        if len(body) < self.min_size:
+            return None
+        compressor = self.codec.compressor(self.level)
+        return compressor.compress(body) + compressor.flush()
+
+    def compress_chunks(self, chunks):
+        """
+        Compress the chunks of a streamed body as they are produced.
+        """
+        compressor = self.codec.compressor(self.level)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def __repr__(self):
+        return "<%s: %s level=%d min_size=%d>" % (
+            self.__class__.__name__,
+            self.content_encoding,
+            self.level,
+            self.min_size,
+        )
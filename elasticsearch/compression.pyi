@@ -0,0 +1,40 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+class Codec(object):
+    content_encoding: str
+    def compressor(self, level: int) -> Any: ...
+
+class GzipCodec(Codec): ...
+class DeflateCodec(Codec): ...
+
+DEFAULT_CODECS: Dict[str, Codec]
+
+class Compression(object):
+    codec: Codec
+    level: int
+    min_size: int
+    def __init__(
+        self, codec: Union[str, Codec] = ..., level: int = ..., min_size: int = ...
+    ) -> None: ...
+    @property
+    def content_encoding(self) -> str: ...
+    def compress(self, body: bytes) -> Optional[bytes]: ...
+    def compress_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]: ...
+    def __repr__(self) -> str: ...
@@ -16,6 +16,7 @@
 #  under the License.
 
 from .base import Connection as Connection
+from .http_httpx import HttpxHttpConnection as HttpxHttpConnection
 from .http_requests import RequestsHttpConnection as RequestsHttpConnection
 from .http_urllib3 import (
     Urllib3HttpConnection as Urllib3HttpConnection,
@@ -17,8 +17,6 @@
 
 import logging
 import binascii
-import gzip
-import io
 import re
 from platform import python_version
 import warnings
@@ -35,6 +33,8 @@ from ..exceptions import (
     HTTP_EXCEPTIONS,
 )
 from .. import __versionstr__
+from ..compat import to_text
+from ..compression import Compression
 
 logger = logging.getLogger("elasticsearch")
 
@@ -48,6 +48,29 @@ if not _tracer_already_configured:
 _WARNING_RE = re.compile(r"\"([^\"]*)\"")
 
 
+class _ReiterableChunks(object):
+    """
+    Chunks of a request body produced anew every time they are iterated
+    over, so that the body can be sent again by a retry.
+    """
+
+    def __iter__(self):
+        raise NotImplementedError()
+
+
+def _is_chunked(body):
+    """
+    Whether ``body`` is an iterator of chunks (a generator for instance), or
+    re-iterable chunks, to be sent as they are produced rather than a whole
+    body.
+    """
+    return (
+        hasattr(body, "__next__")
+        or hasattr(body, "next")
+        or isinstance(body, _ReiterableChunks)
+    )
+
+
 class Connection(object):
     """
     Class responsible for maintaining a connection to an Elasticsearch node. It
@@ -61,7 +84,9 @@ class Connection(object):
     :arg use_ssl: use ssl for the connection if `True`
     :arg url_prefix: optional url prefix for elasticsearch
     :arg timeout: default timeout in seconds (float, default: 10)
-    :arg http_compress: Use gzip compression
+    :arg http_compress: Use gzip compression, or a
+        :class:`~elasticsearch.Compression` to choose the codec, level and
+        minimum size of the compressed bodies
     :arg cloud_id: The Cloud ID from ElasticCloud. Convenient way to connect to cloud instances.
     :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
         For tracing all requests made by this transport.
@@ -124,6 +149,13 @@ class Connection(object):
         if api_key is not None:
             self.headers["authorization"] = self._get_api_key_header_val(api_key)
 
+        if isinstance(http_compress, Compression):
+            self.compression = http_compress
+            http_compress = True
+        elif http_compress:
+            self.compression = Compression()
+        else:
+            self.compression = None
         if http_compress:
             self.headers["accept-encoding"] = "gzip,deflate"
 
@@ -157,10 +189,24 @@ class Connection(object):
         return id(self)
 
     def _gzip_compress(self, body):
-        buf = io.BytesIO()
-        with gzip.GzipFile(fileobj=buf, mode="wb") as f:
-            f.write(body)
-        return buf.getvalue()
+        # kept for the subclasses still using it, see _compress_body()
+        return Compression(min_size=0).compress(body)
+
+    def _compress_body(self, body, headers):
+        """
+        Compress ``body``, whole or chunked, if compression is enabled and
+        set its ``content-encoding`` in ``headers``.
+        """
+        if self.compression is None or not body:
+            return body
+        if _is_chunked(body):
+            compressed = self.compression.compress_chunks(body)
+        else:
+            compressed = self.compression.compress(body)
+            if compressed is None:
+                return body
+        headers["content-encoding"] = self.compression.content_encoding
+        return compressed
 
     def _raise_warnings(self, warning_headers):
         """If 'headers' contains a 'Warning' header raise
@@ -235,6 +281,38 @@ class Connection(object):
     ):
         raise NotImplementedError()
 
+    def perform_request_stream(
+        self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+    ):
+        """
+        Like :meth:`perform_request` but return the body of the response as
+        an iterator of ``bytes`` chunks, to be processed as they are received.
+        The iterator has to be consumed or closed for the connection to be
+        reused. The default implementation reads the whole body first.
+        """
+        status, headers, data = self.perform_request(
+            method, url, params, body, timeout=timeout, ignore=ignore, headers=headers
+        )
+        if not isinstance(data, bytes):
+            data = data.encode("utf-8", "surrogatepass")
+        return status, headers, iter((data,))
+
+    def warm_up(self, count=1, timeout=None):
+        """
+        Open connections to the node ahead of the first requests so that
+        these don't pay for the TCP and TLS handshakes. The default
+        implementation sends a single ``HEAD /`` request.
+
+        :arg count: number of connections to open
+        :arg timeout: timeout of the warm up
+        """
+        try:
+            self.perform_request("HEAD", "/", timeout=timeout)
+        except TransportError as e:
+            # any answer means that the connection is open
+            if not isinstance(e.status_code, int):
+                raise
+
     def log_request_success(
         self, method, full_url, path, body, status_code, response, duration
     ):
@@ -243,7 +321,10 @@ class Connection(object):
 
         # body has already been serialized to utf-8, deserialize it for logging
         # TODO: find a better way to avoid (de)encoding the body back and forth
-        if body:
+        if _is_chunked(body):
+            # the chunks are gone once sent
+            body = None
+        elif body:
             try:
                 body = body.decode("utf-8", "ignore")
             except AttributeError:
@@ -252,6 +333,9 @@ class Connection(object):
         logger.info(
             "%s %s [status:%s request:%.3fs]", method, full_url, status_code, duration
         )
+        # only decode the (possibly large) response when it gets logged
+        if logger.isEnabledFor(logging.DEBUG) or tracer.isEnabledFor(logging.DEBUG):
+            response = to_text(response)
         logger.debug("> %s", body)
         logger.debug("< %s", response)
 
@@ -283,7 +367,10 @@ class Connection(object):
 
         # body has already been serialized to utf-8, deserialize it for logging
         # TODO: find a better way to avoid (de)encoding the body back and forth
-        if body:
+        if _is_chunked(body):
+            # the chunks are gone once sent
+            body = None
+        elif body:
             try:
                 body = body.decode("utf-8", "ignore")
             except AttributeError:
@@ -291,6 +378,7 @@ class Connection(object):
 
         logger.debug("> %s", body)
 
+        response = to_text(response)
         self._log_trace(method, path, body, status_code, response, duration)
 
         if response is not None:
@@ -298,6 +386,7 @@ class Connection(object):
 
     def _raise_error(self, status_code, raw_data):
         """ Locate appropriate exception and raise it. """
+        raw_data = to_text(raw_data)
         error_message = raw_data
         additional_info = None
         try:
@@ -21,6 +21,7 @@ from typing import (
     Union,
     Optional,
     Mapping,
+    MutableMapping,
     Tuple,
     List,
     NoReturn,
@@ -29,8 +30,12 @@ from typing import (
     Any,
     AnyStr,
     Collection,
+    Iterator,
+    Iterable,
 )
 
+from ..compression import Compression
+
 logger: logging.Logger
 tracer: logging.Logger
 
@@ -38,6 +43,7 @@ class Connection(object):
     headers: Dict[str, str]
     use_ssl: bool
     http_compress: bool
+    compression: Optional[Compression]
     scheme: str
     hostname: str
     port: Optional[int]
@@ -52,7 +58,7 @@ class Connection(object):
         url_prefix: str = ...,
         timeout: Optional[Union[float, int]] = ...,
         headers: Optional[Mapping[str, str]] = ...,
-        http_compress: Optional[bool] = ...,
+        http_compress: Optional[Union[bool, Compression]] = ...,
         cloud_id: Optional[str] = ...,
         api_key: Optional[Union[Tuple[str, str], List[str], str]] = ...,
         opaque_id: Optional[str] = ...,
@@ -62,6 +68,11 @@ class Connection(object):
     def __eq__(self, other: object) -> bool: ...
     def __hash__(self) -> int: ...
     def _gzip_compress(self, body: bytes) -> bytes: ...
+    def _compress_body(
+        self,
+        body: Optional[Union[bytes, Iterator[bytes]]],
+        headers: MutableMapping[str, str],
+    ) -> Optional[Union[bytes, Iterator[bytes]]]: ...
     def _raise_warnings(self, warning_headers: Sequence[str]) -> None: ...
     def _pretty_json(self, data: Any) -> str: ...
     def _log_trace(
@@ -78,11 +89,24 @@ class Connection(object):
         method: str,
         url: str,
         params: Optional[Mapping[str, Any]] = ...,
-        body: Optional[bytes] = ...,
+        body: Optional[Union[bytes, Iterator[bytes]]] = ...,
+        timeout: Optional[Union[int, float]] = ...,
+        ignore: Collection[int] = ...,
+        headers: Optional[Mapping[str, str]] = ...,
+    ) -> Tuple[int, Mapping[str, str], Union[str, bytes]]: ...
+    def perform_request_stream(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Mapping[str, Any]] = ...,
+        body: Optional[Union[bytes, Iterator[bytes]]] = ...,
         timeout: Optional[Union[int, float]] = ...,
         ignore: Collection[int] = ...,
         headers: Optional[Mapping[str, str]] = ...,
-    ) -> Tuple[int, Mapping[str, str], str]: ...
+    ) -> Tuple[int, Mapping[str, str], Iterator[bytes]]: ...
+    def warm_up(
+        self, count: int = ..., timeout: Optional[Union[int, float]] = ...
+    ) -> None: ...
     def log_request_success(
         self,
         method: str,
@@ -90,7 +114,7 @@ class Connection(object):
         path: str,
         body: Optional[bytes],
         status_code: int,
-        response: str,
+        response: Union[str, bytes],
         duration: float,
     ) -> None: ...
     def log_request_fail(
@@ -101,9 +125,11 @@ class Connection(object):
         body: Optional[bytes],
         duration: float,
         status_code: Optional[int] = ...,
-        response: Optional[str] = ...,
+        response: Optional[Union[str, bytes]] = ...,
         exception: Optional[Exception] = ...,
     ) -> None: ...
-    def _raise_error(self, status_code: int, raw_data: str) -> NoReturn: ...
+    def _raise_error(
+        self, status_code: int, raw_data: Union[str, bytes]
+    ) -> NoReturn: ...
     def _get_default_user_agent(self) -> str: ...
     def _get_api_key_header_val(self, api_key: Any) -> str: ...
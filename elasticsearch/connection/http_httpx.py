@@ -0,0 +1,304 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import os
+import ssl
+import time
+import threading
+import warnings
+import urllib3
+
+try:
+    import asyncio
+    import httpx
+
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+from .base import Connection, _is_chunked
+from ..exceptions import (
+    ConnectionError,
+    ImproperlyConfigured,
+    ConnectionTimeout,
+    SSLError,
+)
+from ..compat import urlencode
+
+_loop_lock = threading.Lock()
+# event loop running the requests of the synchronous connections, and the
+# process it was started in
+_loop = _loop_pid = None
+
+
+def _event_loop():
+    """
+    Return the event loop shared by the synchronous connections, run by a
+    daemon thread started on first use (again in a forked child).
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_loop.run_forever, name="elasticsearch-httpx"
+            )
+            thread.daemon = True
+            thread.start()
+            _loop_pid = os.getpid()
+        return _loop
+
+
+class _AsyncChunks(object):
+    """
+    Asynchronous iterator over the chunks of a request body, produced by a
+    synchronous iterator, for httpx to stream them.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        future = asyncio.get_event_loop().create_future()
+        try:
+            future.set_result(next(self.chunks))
+        except StopIteration:
+            future.set_exception(StopAsyncIteration())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class HttpxHttpConnection(Connection):
+    """
+    Connection using the `httpx` library over HTTP/2, multiplexing
+    concurrent requests as streams of a few connections instead of holding
+    a socket per in-flight request. Meant for reverse proxies and load
+    balancers speaking HTTP/2 in front of the cluster, Elasticsearch itself
+    only speaks HTTP/1.1.
+
+    Over TLS the protocol is negotiated with ALPN, falling back to HTTP/1.1
+    when the server doesn't offer ``h2``. Over plain http HTTP/2 is used
+    with prior knowledge (h2c), the server must support it. Requires
+    ``httpx`` with its ``http2`` extra.
+
+    HTTP/2 in pure Python costs more CPU per request than HTTP/1.1 with
+    ``urllib3``: it pays off when sockets are the scarce resource (proxies
+    limiting connections, costly TLS handshakes, thousands of concurrent
+    requests) rather than for the raw throughput of a single process.
+
+    The synchronous HTTP/2 client of httpx can't be shared between threads
+    (concurrent requests may open their streams out of order), so the
+    requests of all threads are sent by its asynchronous client running on
+    an event loop in a background thread, shared by all the connections.
+
+    :arg http_auth: optional http auth information as either ':' separated
+        string or a tuple
+    :arg use_ssl: use ssl for the connection if `True`
+    :arg verify_certs: whether to verify SSL certificates
+    :arg ssl_show_warn: show warning when verify certs is disabled
+    :arg ca_certs: optional path to CA bundle. By default the bundle of the
+        system will be used.
+    :arg client_cert: path to the file containing the private key and the
+        certificate, or cert only if using client_key
+    :arg client_key: path to the file containing the private key if using
+        separate cert and key files (client_cert will contain only the cert)
+    :arg ssl_context: ``ssl.SSLContext`` to use instead of creating one from
+        the other SSL related parameters
+    :arg maxsize: the maximum number of connections which will be opened to
+        this host, each carrying many concurrent requests with HTTP/2
+    :arg http2: speak HTTP/2 (default), ``False`` for HTTP/1.1
+    :arg headers: any custom http headers to be add to requests
+    :arg http_compress: Use gzip compression, or a
+        :class:`~elasticsearch.Compression` to tune it
+    :arg cloud_id: The Cloud ID from ElasticCloud. Convenient way to connect to cloud instances.
+        Other host connection params will be ignored.
+    :arg api_key: optional API Key authentication as either base64 encoded string or a tuple.
+    :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
+        For tracing all requests made by this transport.
+    """
+
+    def __init__(
+        self,
+        host="localhost",
+        port=None,
+        http_auth=None,
+        use_ssl=False,
+        verify_certs=True,
+        ssl_show_warn=True,
+        ca_certs=None,
+        client_cert=None,
+        client_key=None,
+        ssl_context=None,
+        maxsize=10,
+        http2=True,
+        headers=None,
+        http_compress=None,
+        cloud_id=None,
+        api_key=None,
+        opaque_id=None,
+        **kwargs
+    ):
+        if not HTTPX_AVAILABLE:
+            raise ImproperlyConfigured(
+                "Please install httpx[http2] to use %s." % self.__class__.__name__
+            )
+
+        self.headers = {}
+        super(HttpxHttpConnection, self).__init__(
+            host=host,
+            port=port,
+            use_ssl=use_ssl,
+            headers=headers,
+            http_compress=http_compress,
+            cloud_id=cloud_id,
+            api_key=api_key,
+            opaque_id=opaque_id,
+            **kwargs
+        )
+
+        if http_auth is not None:
+            if isinstance(http_auth, (tuple, list)):
+                http_auth = ":".join(http_auth)
+            self.headers.update(urllib3.make_headers(basic_auth=http_auth))
+
+        if self.use_ssl and ssl_context is None:
+            ssl_context = ssl.create_default_context(cafile=ca_certs)
+            if client_cert:
+                ssl_context.load_cert_chain(client_cert, client_key)
+            if not verify_certs:
+                if ca_certs:
+                    raise ImproperlyConfigured(
+                        "You cannot pass CA certificates when verify SSL is off."
+                    )
+                ssl_context.check_hostname = False
+                ssl_context.verify_mode = ssl.CERT_NONE
+                if ssl_show_warn:
+                    warnings.warn(
+                        "Connecting to %s using SSL with verify_certs=False is insecure."
+                        % self.host
+                    )
+
+        self.http2 = http2
+        self._client_kwargs = {
+            "verify": ssl_context if ssl_context is not None else True,
+            "http2": http2,
+            # HTTP/2 over plain http needs prior knowledge, there's no upgrade
+            "http1": not http2 or self.use_ssl,
+            "limits": httpx.Limits(
+                max_connections=maxsize, max_keepalive_connections=maxsize
+            ),
+            "trust_env": False,
+        }
+        self.session = self._create_session()
+
+    def _create_session(self):
+        self._closed = False
+        self._loop = _event_loop()
+        return httpx.AsyncClient(**self._client_kwargs)
+
+    def _prepare_request(self, method, url, params, body, headers):
+        url = self.url_prefix + url
+        if params:
+            url = "%s?%s" % (url, urlencode(params))
+        req_headers = self.headers.copy()
+        if headers:
+            req_headers.update(headers)
+        body = self._compress_body(body, req_headers)
+        if _is_chunked(body):
+            # streamed by the async client as the chunks are produced
+            body = _AsyncChunks(body)
+        return self.host + url, url, body, req_headers
+
+    def _handle_exception(self, method, full_url, url, body, duration, e):
+        self.log_request_fail(method, full_url, url, body, duration, exception=e)
+        if isinstance(e, httpx.TimeoutException):
+            raise ConnectionTimeout("TIMEOUT", str(e), e)
+        # httpx wraps the errors of the ssl module
+        if isinstance(e, ssl.SSLError) or isinstance(
+            getattr(e, "__context__", None), ssl.SSLError
+        ):
+            raise SSLError("N/A", str(e), e)
+        raise ConnectionError("N/A", str(e), e)
+
+    def perform_request(
+        self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+    ):
+        full_url, url, req_body, req_headers = self._prepare_request(
+            method, url, params, body, headers
+        )
+
+        start = time.time()
+        try:
+            response = asyncio.run_coroutine_threadsafe(
+                self.session.request(
+                    method,
+                    full_url,
+                    content=req_body,
+                    headers=req_headers,
+                    timeout=timeout or self.timeout,
+                ),
+                self._loop,
+            ).result()
+            duration = time.time() - start
+            raw_data = response.content
+        except Exception as e:
+            self._handle_exception(method, full_url, url, body, time.time() - start, e)
+
+        return self._process_response(
+            method, full_url, url, body, ignore, response, raw_data, duration
+        )
+
+    def _process_response(
+        self, method, full_url, url, body, ignore, response, raw_data, duration
+    ):
+        # raise warnings if any from the 'Warnings' header.
+        self._raise_warnings(response.headers.get_list("warning"))
+
+        # raise errors based on http status codes, let the client handle those if needed
+        if (
+            not (200 <= response.status_code < 300)
+            and response.status_code not in ignore
+        ):
+            self.log_request_fail(
+                method,
+                full_url,
+                url,
+                body,
+                duration,
+                response.status_code,
+                raw_data,
+            )
+            self._raise_error(response.status_code, raw_data)
+
+        self.log_request_success(
+            method, full_url, url, body, response.status_code, raw_data, duration
+        )
+
+        return response.status_code, response.headers, raw_data
+
+    def close(self):
+        """
+        Explicitly closes connections
+        """
+        if self._closed:
+            return
+        self._closed = True
+        asyncio.run_coroutine_threadsafe(self.session.aclose(), self._loop).result()
@@ -15,9 +15,10 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
-from typing import Optional, Any, Mapping
+from typing import Optional, Any, Mapping, Union
 import requests
 from .base import Connection
+from ..compression import Compression
 
 class RequestsHttpConnection(Connection):
     session: requests.Session
@@ -33,7 +34,7 @@ class RequestsHttpConnection(Connection):
         client_cert: Optional[Any] = ...,
         client_key: Optional[Any] = ...,
         headers: Optional[Mapping[str, str]] = ...,
-        http_compress: Optional[bool] = ...,
+        http_compress: Optional[Union[bool, Compression]] = ...,
         cloud_id: Optional[str] = ...,
         api_key: Optional[Any] = ...,
         opaque_id: Optional[str] = ...,
@@ -17,12 +17,13 @@
 
 import time
 import ssl
+import threading
 import urllib3  # type: ignore
 from urllib3.exceptions import ReadTimeoutError, SSLError as UrllibSSLError  # type: ignore
 from urllib3.util.retry import Retry  # type: ignore
 import warnings
 
-from .base import Connection
+from .base import Connection, _is_chunked
 from ..exceptions import (
     ConnectionError,
     ImproperlyConfigured,
@@ -37,6 +38,9 @@ from ..compat import urlencode
 VERIFY_CERTS_DEFAULT = object()
 SSL_SHOW_WARN_DEFAULT = object()
 
+# size of the chunks streamed response bodies are read in
+STREAM_CHUNK_SIZE = 64 * 1024
+
 CA_CERTS = None
 
 try:
@@ -88,7 +92,8 @@ class Urllib3HttpConnection(Connection):
         host. See https://urllib3.readthedocs.io/en/1.4/pools.html#api for more
         information.
     :arg headers: any custom http headers to be add to requests
-    :arg http_compress: Use gzip compression
+    :arg http_compress: Use gzip compression, or a
+        :class:`~elasticsearch.Compression` to tune it
     :arg cloud_id: The Cloud ID from ElasticCloud. Convenient way to connect to cloud instances.
         Other host connection params will be ignored.
     :arg api_key: optional API Key authentication as either base64 encoded string or a tuple.
@@ -214,6 +219,26 @@ class Urllib3HttpConnection(Connection):
 
     def perform_request(
         self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+    ):
+        return self._perform_request(
+            method, url, params, body, timeout, ignore, headers
+        )
+
+    def perform_request_stream(
+        self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+    ):
+        """
+        Like :meth:`perform_request` but the body of a successful response is
+        returned as an iterator of ``bytes`` chunks read from the socket as
+        they are consumed. The iterator has to be consumed or closed for the
+        connection to be reused.
+        """
+        return self._perform_request(
+            method, url, params, body, timeout, ignore, headers, stream=True
+        )
+
+    def _perform_request(
+        self, method, url, params, body, timeout, ignore, headers, stream=False
     ):
         url = self.url_prefix + url
         if params:
@@ -238,24 +263,30 @@ class Urllib3HttpConnection(Connection):
             request_headers = self.headers.copy()
             request_headers.update(headers or ())
 
-            if self.http_compress and body:
-                body = self._gzip_compress(body)
-                request_headers["content-encoding"] = "gzip"
+            if _is_chunked(body):
+                # sent with chunked transfer encoding as it is produced
+                kw["chunked"] = True
+            body = self._compress_body(body, request_headers)
 
             response = self.pool.urlopen(
-                method, url, body, retries=Retry(False), headers=request_headers, **kw
+                method,
+                url,
+                body,
+                retries=Retry(False),
+                headers=request_headers,
+                preload_content=not stream,
+                **kw
             )
             duration = time.time() - start
-            raw_data = response.data.decode("utf-8", "surrogatepass")
+            if stream and 200 <= response.status < 300:
+                raw_data = None
+            else:
+                raw_data = response.data
         except Exception as e:
             self.log_request_fail(
                 method, full_url, url, orig_body, time.time() - start, exception=e
             )
-            if isinstance(e, UrllibSSLError):
-                raise SSLError("N/A", str(e), e)
-            if isinstance(e, ReadTimeoutError):
-                raise ConnectionTimeout("TIMEOUT", str(e), e)
-            raise ConnectionError("N/A", str(e), e)
+            raise self._connection_error(e)
 
         # raise warnings if any from the 'Warnings' header.
         warning_headers = response.headers.get_all("warning", ())
@@ -272,8 +303,65 @@ class Urllib3HttpConnection(Connection):
             method, full_url, url, orig_body, response.status, raw_data, duration
         )
 
+        if stream:
+            if raw_data is None:
+                return response.status, response.getheaders(), self._stream(response)
+            return response.status, response.getheaders(), iter((raw_data,))
         return response.status, response.getheaders(), raw_data
 
+    def _connection_error(self, e):
+        """
+        The :class:`~elasticsearch.ConnectionError` to raise for the
+        exception ``e`` urllib3 raised.
+        """
+        if isinstance(e, UrllibSSLError):
+            return SSLError("N/A", str(e), e)
+        if isinstance(e, ReadTimeoutError):
+            return ConnectionTimeout("TIMEOUT", str(e), e)
+        return ConnectionError("N/A", str(e), e)
+
+    def _stream(self, response):
+        done = False
+        try:
+            for chunk in response.stream(STREAM_CHUNK_SIZE):
+                yield chunk
+            done = True
+        except Exception as e:
+            # the node failed in the middle of the body
+            raise self._connection_error(e)
+        finally:
+            if not done:
+                # the rest of the body can't be left on the connection
+                response.close()
+            response.release_conn()
+
+    def warm_up(self, count=1, timeout=None):
+        """
+        Open up to ``count`` (at most ``maxsize``) connections to the node by
+        sending concurrent ``HEAD /`` requests, their connections are kept
+        in the pool.
+
+        :arg count: number of connections to open
+        :arg timeout: timeout of the warm up
+        """
+        count = min(count, self.pool.pool.maxsize)
+        errors = []
+
+        def warm_up():
+            try:
+                super(Urllib3HttpConnection, self).warm_up(timeout=timeout)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=warm_up) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors and len(errors) == count:
+            raise errors[0]
+
     def close(self):
         """
         Explicitly closes connection
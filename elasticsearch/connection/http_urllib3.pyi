@@ -19,6 +19,9 @@ import ssl
 from typing import Optional, Mapping, Any, Union
 import urllib3  # type: ignore
 from .base import Connection
+from ..compression import Compression
+
+STREAM_CHUNK_SIZE: int
 
 def create_ssl_context(
     cafile: Any = ...,
@@ -47,9 +50,12 @@ class Urllib3HttpConnection(Connection):
         maxsize: int = ...,
         headers: Optional[Mapping[str, str]] = ...,
         ssl_context: Optional[Any] = ...,
-        http_compress: Optional[bool] = ...,
+        http_compress: Optional[Union[bool, Compression]] = ...,
         cloud_id: Optional[str] = ...,
         api_key: Optional[Any] = ...,
         opaque_id: Optional[str] = ...,
         **kwargs: Any
     ) -> None: ...
+    def warm_up(
+        self, count: int = ..., timeout: Optional[Union[int, float]] = ...
+    ) -> None: ...
@@ -19,11 +19,12 @@ import time
 import random
 import logging
 import threading
+from collections import OrderedDict, deque
 
 try:
-    from Queue import PriorityQueue, Empty
+    from Queue import PriorityQueue
 except ImportError:
-    from queue import PriorityQueue, Empty
+    from queue import PriorityQueue
 
 from .exceptions import ImproperlyConfigured
 
@@ -63,6 +64,26 @@ class ConnectionSelector(object):
         """
         pass
 
+    def request_started(self, connection):
+        """
+        Called right before a request is sent over ``connection``. Selectors
+        that take the load of a node into account can override this.
+
+        :arg connection: the connection that is about to be used
+        """
+        pass
+
+    def request_finished(self, connection, duration, success=True):
+        """
+        Called once a request sent over ``connection`` has completed.
+
+        :arg connection: the connection that was used
+        :arg duration: time it took to get the response, in seconds
+        :arg success: ``False`` if the node failed to respond properly,
+            ``None`` if the request was cancelled before it completed
+        """
+        pass
+
 
 class RandomSelector(ConnectionSelector):
     """
@@ -88,6 +109,303 @@ class RoundRobinSelector(ConnectionSelector):
         return connections[self.data.rr]
 
 
+class LatencyAwareSelector(ConnectionSelector):
+    """
+    Selector that keeps track of how fast each connection is responding and
+    how many requests are currently in flight to it. On each selection two
+    connections are picked at random and the one with the lower expected
+    latency wins ("power of two choices").
+
+    The expected latency of a connection is an exponentially weighted moving
+    average (EWMA) of its response times multiplied by the number of requests
+    waiting on it. Connections that haven't been measured yet score zero so
+    that new nodes are tried right away. Failed requests are counted as taking
+    at least ``failure_penalty`` seconds, cancelled ones aren't counted.
+
+    The statistics are fed by the :class:`~elasticsearch.Transport` through
+    :meth:`~elasticsearch.ConnectionPool.request_started` and
+    :meth:`~elasticsearch.ConnectionPool.request_finished`. They are only
+    kept for the connections the selector was created with: requests still
+    finishing over the connections dropped by sniffing are ignored.
+    """
+
+    def __init__(self, opts, decay=0.3, failure_penalty=1.0):
+        """
+        :arg opts: dictionary of connection instances and their options
+        :arg decay: weight given to the most recent response time, between 0
+            and 1. Higher values react faster to a node slowing down.
+        :arg failure_penalty: minimum response time (in seconds) recorded for
+            a failed request
+        """
+        super(LatencyAwareSelector, self).__init__(opts)
+        self.decay = decay
+        self.failure_penalty = failure_penalty
+        self.lock = threading.Lock()
+        # connection -> [ewma, in_flight]
+        self.stats = {}
+
+    def _score(self, connection):
+        ewma, in_flight = self.stats.get(connection, (0.0, 0))
+        return ewma * (in_flight + 1)
+
+    def select(self, connections):
+        if len(connections) == 1:
+            return connections[0]
+        first, second = random.sample(connections, 2)
+        if self._score(second) < self._score(first):
+            return second
+        return first
+
+    def request_started(self, connection):
+        if connection not in self.connection_opts:
+            return
+        with self.lock:
+            stats = self.stats.setdefault(connection, [0.0, 0])
+            stats[1] += 1
+
+    def request_finished(self, connection, duration, success=True):
+        if connection not in self.connection_opts:
+            return
+        if success is None:
+            # cancelled, it says nothing about the latency of the node
+            with self.lock:
+                stats = self.stats.setdefault(connection, [0.0, 0])
+                stats[1] = max(stats[1] - 1, 0)
+            return
+        if not success:
+            duration = max(duration, self.failure_penalty)
+        with self.lock:
+            stats = self.stats.setdefault(connection, [0.0, 0])
+            if stats[0]:
+                stats[0] += self.decay * (duration - stats[0])
+            else:
+                stats[0] = duration
+            stats[1] = max(stats[1] - 1, 0)
+
+
+class ZoneAwareSelector(ConnectionSelector):
+    """
+    Selector preferring the connections to nodes in the same zone as the
+    client, only falling back to nodes in other zones when none of the local
+    ones are live.
+
+    The zone of a node is read from the ``attributes`` in its connection
+    options which sniffing fills in from the node's attributes (set with
+    ``node.attr.zone`` in ``elasticsearch.yml``). For hosts that are not
+    sniffed add them yourself, e.g. ``{"host": "es1", "attributes": {"zone":
+    "eu-west-1a"}}``.
+
+    Use :func:`functools.partial` to set the local zone::
+
+        Elasticsearch(
+            hosts,
+            sniff_on_start=True,
+            selector_class=partial(ZoneAwareSelector, zone="eu-west-1a"),
+        )
+    """
+
+    def __init__(
+        self, opts, zone=None, zone_attribute="zone", selector_class=RoundRobinSelector
+    ):
+        """
+        :arg opts: dictionary of connection instances and their options
+        :arg zone: zone the client runs in
+        :arg zone_attribute: name of the node attribute holding the zone
+        :arg selector_class: :class:`~elasticsearch.ConnectionSelector`
+            subclass used to choose among the preferred connections
+        """
+        super(ZoneAwareSelector, self).__init__(opts)
+        self.zone = zone
+        self.zone_attribute = zone_attribute
+        self.selector = selector_class(opts)
+        self.local = set(
+            c
+            for (c, o) in opts.items()
+            if (o.get("attributes") or {}).get(zone_attribute) == zone
+        )
+        # the pool hands over a new list whenever the live connections change
+        # so the local ones only need to be looked up again then
+        self._cache = (None, None)
+
+    def select(self, connections):
+        cached, candidates = self._cache
+        if connections is not cached:
+            local = [c for c in connections if c in self.local]
+            candidates = local or connections
+            self._cache = (connections, candidates)
+
+        if len(candidates) == 1:
+            return candidates[0]
+        return self.selector.select(candidates)
+
+    def request_started(self, connection):
+        self.selector.request_started(connection)
+
+    def request_finished(self, connection, duration, success=True):
+        self.selector.request_finished(connection, duration, success)
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker guarding a single connection. While the circuit is
+    *closed* requests flow normally and their outcome is recorded over a
+    sliding window of ``window`` seconds. Once at least ``min_requests`` have
+    been recorded and either the share of failed requests reaches
+    ``failure_rate`` or the share of requests slower than
+    ``slow_call_duration`` reaches ``slow_call_rate`` the circuit *opens* and
+    the connection is skipped.
+
+    After ``open_timeout`` seconds the circuit becomes *half-open* and lets
+    ``half_open_requests`` trial requests through. If they all succeed (and
+    are not slow) the circuit closes again, any failure opens it again.
+
+    The :class:`~elasticsearch.ConnectionPool` creates one breaker per
+    connection when given a ``circuit_breaker_class``; pass a
+    :func:`functools.partial` of this class to change the thresholds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_rate=0.5,
+        slow_call_duration=None,
+        slow_call_rate=0.5,
+        window=60,
+        min_requests=20,
+        open_timeout=30,
+        half_open_requests=3,
+    ):
+        """
+        :arg failure_rate: share (0-1) of failed requests that opens the circuit
+        :arg slow_call_duration: number of seconds after which a request counts
+            as slow, ``None`` to ignore latency
+        :arg slow_call_rate: share (0-1) of slow requests that opens the circuit
+        :arg window: length of the sliding window, in seconds
+        :arg min_requests: minimum number of requests in the window before
+            the circuit can open
+        :arg open_timeout: number of seconds the circuit stays open before
+            trial requests are let through
+        :arg half_open_requests: number of trial requests that need to succeed
+            to close the circuit again
+        """
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.window = window
+        self.min_requests = min_requests
+        self.open_timeout = open_timeout
+        self.half_open_requests = half_open_requests
+
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.opened_at = None
+        # (timestamp, failed, slow) of the requests in the window
+        self.outcomes = deque()
+        self.failures = 0
+        self.slow_calls = 0
+        # trial requests let through and succeeded while half-open
+        self.trials = 0
+        self.trial_successes = 0
+
+    def allow_request(self, now=None):
+        """
+        Whether a request can be sent over the connection. While half-open
+        every ``True`` returned counts as one of the trial requests.
+        """
+        if self.state == self.CLOSED:
+            return True
+
+        now = now if now else time.time()
+        with self.lock:
+            if self.state == self.OPEN:
+                if now < self.opened_at + self.open_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.trials = self.trial_successes = 0
+
+            if self.state == self.HALF_OPEN:
+                if self.trials >= self.half_open_requests:
+                    return False
+                self.trials += 1
+            return True
+
+    def cancel(self):
+        """
+        Forget a request that was let through but cancelled before it
+        completed, while half-open another trial request takes its place.
+        """
+        with self.lock:
+            if self.state == self.HALF_OPEN and self.trials:
+                self.trials -= 1
+
+    def record(self, duration, success=True, now=None):
+        """
+        Record the outcome of a request sent over the connection.
+
+        :arg duration: time it took to get the response, in seconds
+        :arg success: ``False`` if the node failed to respond properly
+        """
+        now = now if now else time.time()
+        slow = (
+            self.slow_call_duration is not None and duration >= self.slow_call_duration
+        )
+        failed = not success
+
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                if failed or slow:
+                    self._open(now)
+                    return
+                self.trial_successes += 1
+                if self.trial_successes >= self.half_open_requests:
+                    self._close()
+                return
+
+            if self.state == self.OPEN:
+                # request let through before the circuit opened, ignore
+                return
+
+            self.outcomes.append((now, failed, slow))
+            self.failures += failed
+            self.slow_calls += slow
+            self._expire(now)
+
+            total = len(self.outcomes)
+            if total < self.min_requests:
+                return
+            if self.failures >= self.failure_rate * total or (
+                self.slow_call_duration is not None
+                and self.slow_calls >= self.slow_call_rate * total
+            ):
+                self._open(now)
+
+    def _expire(self, now):
+        while self.outcomes and self.outcomes[0][0] <= now - self.window:
+            _, failed, slow = self.outcomes.popleft()
+            self.failures -= failed
+            self.slow_calls -= slow
+
+    def _open(self, now):
+        logger.warning(
+            "Circuit breaker opened after %i failed and %i slow requests out of %i.",
+            self.failures,
+            self.slow_calls,
+            len(self.outcomes),
+        )
+        self.state = self.OPEN
+        self.opened_at = now
+        self.outcomes.clear()
+        self.failures = self.slow_calls = 0
+
+    def _close(self):
+        logger.info("Circuit breaker closed after successful trial requests.")
+        self.state = self.CLOSED
+        self.opened_at = None
+
+
 class ConnectionPool(object):
     """
     Container holding the :class:`~elasticsearch.Connection` instances,
@@ -109,6 +427,12 @@ class ConnectionPool(object):
     the timeout is over the connection will be resurrected and returned to the
     live pool. A connection that has been previously marked as dead and
     succeeds will be marked as live (its fail count will be deleted).
+
+    Marking a connection as dead or alive takes constant time. The list of
+    live connections is never modified in place: it is rebuilt the next time
+    it is needed after such changes so that `get_connection` can read it
+    without taking a lock or copying it, and the dead connections are only
+    looked at once the earliest timeout is over.
     """
 
     def __init__(
@@ -118,6 +442,8 @@ class ConnectionPool(object):
         timeout_cutoff=5,
         selector_class=RoundRobinSelector,
         randomize_hosts=True,
+        resurrect_on_timeout=True,
+        circuit_breaker_class=None,
         **kwargs
     ):
         """
@@ -131,29 +457,79 @@ class ConnectionPool(object):
             subclass to use if more than one connection is live
         :arg randomize_hosts: shuffle the list of connections upon arrival to
             avoid dog piling effect across processes
+        :arg resurrect_on_timeout: put dead connections back into rotation once
+            their timeout is over. If ``False`` they only come back through
+            :meth:`revive` (or by force when no connection is live), which is
+            what the transport's health checker uses.
+        :arg circuit_breaker_class: factory for the
+            :class:`~elasticsearch.connection_pool.CircuitBreaker` guarding each
+            connection. Connections whose circuit is open are skipped by
+            :meth:`get_connection`. ``None`` disables circuit breaking.
         """
         if not connections:
             raise ImproperlyConfigured(
                 "No defined connections, you need to " "specify at least one host."
             )
         self.connection_opts = connections
-        self.connections = [c for (c, opts) in connections]
+        connections = [c for (c, opts) in connections]
         # remember original connection list for resurrect(force=True)
-        self.orig_connections = tuple(self.connections)
-        # PriorityQueue for thread safety and ease of timeout management
-        self.dead = PriorityQueue(len(self.connections))
+        self.orig_connections = tuple(connections)
+        # PriorityQueue for thread safety and ease of timeout management, the
+        # entries of revived connections are only dropped once at the front
+        self.dead = PriorityQueue()
         self.dead_count = {}
+        # dead connection -> time at which it can be resurrected
+        self.dead_until = {}
 
         if randomize_hosts:
             # randomize the connection list to avoid all clients hitting same node
             # after startup/restart
-            random.shuffle(self.connections)
+            random.shuffle(connections)
+
+        # snapshot of live connections, replaced (never mutated) under the lock
+        self._connections = connections
+        self.live = OrderedDict.fromkeys(connections)
+        self.lock = threading.Lock()
+        # earliest time at which a dead connection can be resurrected
+        self.next_resurrect = float("inf")
 
         # default timeout after which to try resurrecting a connection
         self.dead_timeout = dead_timeout
         self.timeout_cutoff = timeout_cutoff
+        self.resurrect_on_timeout = resurrect_on_timeout
+
+        self.selector = selector_class(dict(self.connection_opts))
+
+        # roles of every node as sniffed, None when unknown
+        self.node_roles = dict(
+            (c, None if opts.get("roles") is None else frozenset(opts["roles"]))
+            for (c, opts) in self.connection_opts
+        )
+        # roles -> (live connections, the ones among them with the roles)
+        self._routes = {}
+
+        self.circuit_breakers = None
+        if circuit_breaker_class is not None:
+            self.circuit_breakers = dict(
+                (c, circuit_breaker_class()) for c in self.orig_connections
+            )
 
-        self.selector = selector_class(dict(connections))
+    @property
+    def connections(self):
+        """
+        List of the live connections, not to be modified.
+        """
+        connections = self._connections
+        if connections is None:
+            with self.lock:
+                if self._connections is None:
+                    self._connections = list(self.live)
+                connections = self._connections
+        return connections
+
+    @connections.setter
+    def connections(self, connections):
+        self._connections = connections
 
     def mark_dead(self, connection, now=None):
         """
@@ -164,26 +540,31 @@ class ConnectionPool(object):
         """
         # allow inject for testing purposes
         now = now if now else time.time()
-        try:
-            self.connections.remove(connection)
-        except ValueError:
-            logger.info(
-                "Attempted to remove %r, but it does not exist in the connection pool.",
-                connection,
-            )
-            # connection not alive or another thread marked it already, ignore
-            return
-        else:
+        with self.lock:
+            if connection not in self.live:
+                logger.info(
+                    "Attempted to remove %r, but it does not exist in the connection pool.",
+                    connection,
+                )
+                # connection not alive or another thread marked it already, ignore
+                return
+
+            del self.live[connection]
+            self._connections = None
+
             dead_count = self.dead_count.get(connection, 0) + 1
             self.dead_count[connection] = dead_count
             timeout = self.dead_timeout * 2 ** min(dead_count - 1, self.timeout_cutoff)
             self.dead.put((now + timeout, connection))
-            logger.warning(
-                "Connection %r has failed for %i times in a row, putting on %i second timeout.",
-                connection,
-                dead_count,
-                timeout,
-            )
+            self.dead_until[connection] = now + timeout
+            self.next_resurrect = min(self.next_resurrect, now + timeout)
+
+        logger.warning(
+            "Connection %r has failed for %i times in a row, putting on %i second timeout.",
+            connection,
+            dead_count,
+            timeout,
+        )
 
     def mark_live(self, connection):
         """
@@ -209,38 +590,102 @@ class ConnectionPool(object):
             always returns a connection.
 
         """
-        # no dead connections
-        if self.dead.empty():
-            # we are forced to return a connection, take one from the original
-            # list. This is to avoid a race condition where get_connection can
-            # see no live connections but when it calls resurrect self.dead is
-            # also empty. We assume that other threat has resurrected all
-            # available connections so we can safely return one at random.
-            if force:
-                return random.choice(self.orig_connections)
-            return
-
-        try:
-            # retrieve a connection to check
-            timeout, connection = self.dead.get(block=False)
-        except Empty:
-            # other thread has been faster and the queue is now empty. If we
-            # are forced, return a connection at random again.
-            if force:
-                return random.choice(self.orig_connections)
-            return
+        with self.lock:
+            self._drop_revived()
+            # no dead connections
+            if self.dead.empty():
+                # we are forced to return a connection, take one from the
+                # original list. This is to avoid a race condition where
+                # get_connection can see no live connections but when it calls
+                # resurrect self.dead is also empty. We assume that other
+                # thread has resurrected all available connections so we can
+                # safely return one at random.
+                if force:
+                    return random.choice(self.orig_connections)
+                return
+
+            # peek at the connection that has been dead for the shortest time
+            timeout, connection = self.dead.queue[0]
+            if not force and timeout > time.time():
+                # not eligible yet, no need to look again before it is
+                self.next_resurrect = timeout
+                return
+
+            # either we were forced or the connection is elligible to be retried
+            self.dead.get(block=False)
+            del self.dead_until[connection]
+            self.live[connection] = None
+            self._connections = None
+            self._drop_revived()
 
-        if not force and timeout > time.time():
-            # return it back if not eligible and not forced
-            self.dead.put((timeout, connection))
-            return
-
-        # either we were forced or the connection is elligible to be retried
-        self.connections.append(connection)
         logger.info("Resurrecting connection %r (force=%s).", connection, force)
         return connection
 
-    def get_connection(self):
+    def dead_connections(self):
+        """
+        Return a list of the connections that are currently marked as dead.
+        """
+        with self.lock:
+            return list(self.dead_until)
+
+    def revive(self, connection):
+        """
+        Return a dead connection to the live pool regardless of its timeout,
+        typically because a health check has shown the node is responding.
+        Returns ``False`` if the connection wasn't dead.
+
+        :arg connection: the connection to bring back
+        """
+        with self.lock:
+            if self.dead_until.pop(connection, None) is None:
+                return False
+
+            self.live[connection] = None
+            self._connections = None
+            self._drop_revived()
+
+        self.mark_live(connection)
+        logger.info("Connection %r is responding again, reviving it.", connection)
+        return True
+
+    def _drop_revived(self):
+        """
+        Drop the entries of revived connections from the front of the dead
+        queue and move ``next_resurrect`` to the earliest remaining timeout.
+        Must be called with the lock held.
+        """
+        queue = self.dead.queue
+        while queue and self.dead_until.get(queue[0][1]) != queue[0][0]:
+            self.dead.get(block=False)
+        self.next_resurrect = queue[0][0] if queue else float("inf")
+
+    def request_started(self, connection):
+        """
+        Notify the selector that a request is about to be sent.
+
+        :arg connection: the connection that is about to be used
+        """
+        self.selector.request_started(connection)
+
+    def request_finished(self, connection, duration, success=True):
+        """
+        Notify the selector, and the connection's circuit breaker, that a
+        request has completed.
+
+        :arg connection: the connection that was used
+        :arg duration: time it took to get the response, in seconds
+        :arg success: ``False`` if the node failed to respond properly,
+            ``None`` if the request was cancelled before it completed
+        """
+        self.selector.request_finished(connection, duration, success)
+        if self.circuit_breakers is not None:
+            breaker = self.circuit_breakers.get(connection)
+            if breaker is not None and success is None:
+                breaker.cancel()
+            elif breaker is not None:
+                breaker.record(duration, success)
+
+    def get_connection(self, roles=None):
         """
         Return a connection from the pool using the `ConnectionSelector`
         instance.
@@ -250,14 +695,27 @@ class ConnectionPool(object):
         the selector instance to choose from.
 
         Returns a connection instance and it's current fail count.
+
+        :arg roles: only choose among nodes with one of these roles (see
+            :class:`~elasticsearch.transport.RoutingPolicy`), falling back to
+            any live node when none of them is live
         """
-        self.resurrect()
-        connections = self.connections[:]
+        if self.resurrect_on_timeout and self.next_resurrect <= time.time():
+            self.resurrect()
+        connections = self._connections
+        if connections is None:
+            connections = self.connections
 
         # no live nodes, resurrect one by force and return it
         if not connections:
             return self.resurrect(True)
 
+        if roles:
+            connections = self._with_roles(connections, roles)
+
+        if self.circuit_breakers is not None:
+            return self._select_allowed(connections)
+
         # only call selector if we have a selection
         if len(connections) > 1:
             return self.selector.select(connections)
@@ -265,6 +723,50 @@ class ConnectionPool(object):
         # only one connection, no need for a selector
         return connections[0]
 
+    def _with_roles(self, connections, roles):
+        """
+        Return the connections to nodes having any of ``roles``, or all of
+        them if there are none. The result is kept until the list of live
+        connections changes.
+        """
+        cached = self._routes.get(roles)
+        if cached is None or cached[0] is not connections:
+            matching = [c for c in connections if self._has_role(c, roles)]
+            cached = self._routes[roles] = (connections, matching or connections)
+        return cached[1]
+
+    def _has_role(self, connection, roles):
+        node_roles = self.node_roles.get(connection)
+        if node_roles is None:
+            # not sniffed, nothing is known about the node
+            return False
+        if not node_roles:
+            return "coordinating_only" in roles
+        return not node_roles.isdisjoint(roles)
+
+    def _select_allowed(self, connections):
+        """
+        Select a connection whose circuit breaker lets the request through.
+        Trial requests of half-open circuits go first, otherwise the selector
+        chooses among the closed circuits. When every circuit is open fall
+        back to any live connection, the same way a dead connection is
+        resurrected by force.
+        """
+        closed = []
+        now = time.time()
+        for connection in connections:
+            breaker = self.circuit_breakers[connection]
+            if breaker.state == breaker.CLOSED:
+                closed.append(connection)
+            elif breaker.allow_request(now):
+                return connection
+
+        if closed:
+            connections = closed
+        if len(connections) > 1:
+            return self.selector.select(connections)
+        return connections[0]
+
     def close(self):
         """
         Explicitly closes connections
@@ -287,7 +789,7 @@ class DummyConnectionPool(ConnectionPool):
         self.connection = connections[0][0]
         self.connections = (self.connection,)
 
-    def get_connection(self):
+    def get_connection(self, roles=None):
         return self.connection
 
     def close(self):
@@ -296,10 +798,14 @@ class DummyConnectionPool(ConnectionPool):
         """
         self.connection.close()
 
+    def dead_connections(self):
+        return []
+
     def _noop(self, *args, **kwargs):
         pass
 
-    mark_dead = mark_live = resurrect = _noop
+    mark_dead = mark_live = resurrect = revive = _noop
+    request_started = request_finished = _noop
 
 
 class EmptyConnectionPool(ConnectionPool):
@@ -309,10 +815,14 @@ class EmptyConnectionPool(ConnectionPool):
         self.connections = []
         self.connection_opts = []
 
-    def get_connection(self):
+    def get_connection(self, roles=None):
         raise ImproperlyConfigured("No connections were configured")
 
+    def dead_connections(self):
+        return []
+
     def _noop(self, *args, **kwargs):
         pass
 
-    close = mark_dead = mark_live = resurrect = _noop
+    close = mark_dead = mark_live = resurrect = revive = _noop
+    request_started = request_finished = _noop
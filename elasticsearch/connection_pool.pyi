@@ -16,7 +16,20 @@
 #  under the License.
 
 import logging
-from typing import Sequence, Optional, Type, Any, Union, List, Tuple, Dict
+from typing import (
+    Sequence,
+    Optional,
+    Type,
+    Any,
+    Union,
+    List,
+    Tuple,
+    Dict,
+    Set,
+    Deque,
+    Callable,
+    FrozenSet,
+)
 from .connection import Connection
 
 try:
@@ -30,10 +43,74 @@ class ConnectionSelector(object):
     connection_opts: Sequence[Tuple[Connection, Any]]
     def __init__(self, opts: Sequence[Tuple[Connection, Any]]) -> None: ...
     def select(self, connections: Sequence[Connection]) -> Connection: ...
+    def request_started(self, connection: Connection) -> None: ...
+    def request_finished(
+        self, connection: Connection, duration: float, success: Optional[bool] = ...
+    ) -> None: ...
 
 class RandomSelector(ConnectionSelector): ...
 class RoundRobinSelector(ConnectionSelector): ...
 
+class LatencyAwareSelector(ConnectionSelector):
+    decay: float
+    failure_penalty: float
+    lock: Any
+    stats: Dict[Connection, List[float]]
+    def __init__(
+        self,
+        opts: Sequence[Tuple[Connection, Any]],
+        decay: float = ...,
+        failure_penalty: float = ...,
+    ) -> None: ...
+
+class ZoneAwareSelector(ConnectionSelector):
+    zone: Optional[str]
+    zone_attribute: str
+    selector: ConnectionSelector
+    local: Set[Connection]
+    def __init__(
+        self,
+        opts: Sequence[Tuple[Connection, Any]],
+        zone: Optional[str] = ...,
+        zone_attribute: str = ...,
+        selector_class: Type[ConnectionSelector] = ...,
+    ) -> None: ...
+
+class CircuitBreaker(object):
+    CLOSED: str
+    OPEN: str
+    HALF_OPEN: str
+    failure_rate: float
+    slow_call_duration: Optional[float]
+    slow_call_rate: float
+    window: float
+    min_requests: int
+    open_timeout: float
+    half_open_requests: int
+    lock: Any
+    state: str
+    opened_at: Optional[float]
+    outcomes: Deque[Tuple[float, bool, bool]]
+    failures: int
+    slow_calls: int
+    trials: int
+    trial_successes: int
+    def __init__(
+        self,
+        failure_rate: float = ...,
+        slow_call_duration: Optional[float] = ...,
+        slow_call_rate: float = ...,
+        window: float = ...,
+        min_requests: int = ...,
+        open_timeout: float = ...,
+        half_open_requests: int = ...,
+    ) -> None: ...
+    def allow_request(self, now: Optional[float] = ...) -> bool: ...
+    def cancel(self) -> None: ...
+    def record(
+        self, duration: float, success: Optional[bool] = ..., now: Optional[float] = ...
+    ) -> None: ...
+
 class ConnectionPool(object):
     connections_opts: Sequence[Tuple[Connection, Any]]
     connections: Sequence[Connection]
@@ -42,7 +119,14 @@ class ConnectionPool(object):
     dead_count: Dict[Connection, int]
     dead_timeout: float
     timeout_cutoff: int
+    resurrect_on_timeout: bool
     selector: ConnectionSelector
+    live: Dict[Connection, None]
+    dead_until: Dict[Connection, float]
+    lock: Any
+    next_resurrect: float
+    circuit_breakers: Optional[Dict[Connection, CircuitBreaker]]
+    node_roles: Dict[Connection, Optional[FrozenSet[str]]]
     def __init__(
         self,
         connections: Sequence[Tuple[Connection, Any]],
@@ -50,12 +134,20 @@ class ConnectionPool(object):
         timeout_cutoff: int = ...,
         selector_class: Type[ConnectionSelector] = ...,
         randomize_hosts: bool = ...,
+        resurrect_on_timeout: bool = ...,
+        circuit_breaker_class: Optional[Callable[[], CircuitBreaker]] = ...,
         **kwargs: Any
     ) -> None: ...
     def mark_dead(self, connection: Connection, now: Optional[float] = ...) -> None: ...
     def mark_live(self, connection: Connection) -> None: ...
     def resurrect(self, force: bool = ...) -> Optional[Connection]: ...
-    def get_connection(self) -> Connection: ...
+    def dead_connections(self) -> List[Connection]: ...
+    def revive(self, connection: Connection) -> bool: ...
+    def request_started(self, connection: Connection) -> None: ...
+    def request_finished(
+        self, connection: Connection, duration: float, success: Optional[bool] = ...
+    ) -> None: ...
+    def get_connection(self, roles: Optional[FrozenSet[str]] = ...) -> Connection: ...
     def close(self) -> None: ...
     def __repr__(self) -> str: ...
 
@@ -63,13 +155,17 @@ class DummyConnectionPool(ConnectionPool):
     def __init__(
         self, connections: Sequence[Tuple[Connection, Any]], **kwargs: Any
     ) -> None: ...
-    def get_connection(self) -> Connection: ...
+    def get_connection(self, roles: Optional[FrozenSet[str]] = ...) -> Connection: ...
     def close(self) -> None: ...
+    def dead_connections(self) -> List[Connection]: ...
     def _noop(self, *args: Any, **kwargs: Any) -> Any: ...
-    mark_dead = mark_live = resurrect = _noop
+    mark_dead = mark_live = resurrect = revive = _noop
+    request_started = request_finished = _noop
 
 class EmptyConnectionPool(ConnectionPool):
     def __init__(self, *_: Any, **__: Any) -> None: ...
-    def get_connection(self) -> Connection: ...
+    def get_connection(self, roles: Optional[FrozenSet[str]] = ...) -> Connection: ...
+    def dead_connections(self) -> List[Connection]: ...
     def _noop(self, *args: Any, **kwargs: Any) -> Any: ...
-    close = mark_dead = mark_live = resurrect = _noop
+    close = mark_dead = mark_live = resurrect = revive = _noop
+    request_started = request_finished = _noop
@@ -20,6 +20,8 @@ from .errors import BulkIndexError, ScanError
 from .actions import expand_action, streaming_bulk, bulk, parallel_bulk
 from .actions import scan, reindex
 from .actions import _chunk_actions, _process_bulk_chunk
+from .streaming import HitsParser, iter_hits
+from .dataframe import bulk_dataframe
 
 __all__ = [
     "BulkIndexError",
@@ -32,6 +34,9 @@ __all__ = [
     "reindex",
     "_chunk_actions",
     "_process_bulk_chunk",
+    "HitsParser",
+    "iter_hits",
+    "bulk_dataframe",
 ]
 
 
@@ -45,8 +50,15 @@ try:
         async_bulk,
         async_reindex,
         async_streaming_bulk,
+        async_bulk_dataframe,
     )
 
-    __all__ += ["async_scan", "async_bulk", "async_reindex", "async_streaming_bulk"]
+    __all__ += [
+        "async_scan",
+        "async_bulk",
+        "async_reindex",
+        "async_streaming_bulk",
+        "async_bulk_dataframe",
+    ]
 except (ImportError, SyntaxError):
     pass
@@ -27,6 +27,8 @@ from .actions import (
     _chunk_actions as _chunk_actions,
     _process_bulk_chunk as _process_bulk_chunk,
 )
+from .streaming import HitsParser as HitsParser, iter_hits as iter_hits
+from .dataframe import bulk_dataframe as bulk_dataframe
 
 try:
     # Asyncio only supported on Python 3.6+
@@ -38,6 +40,7 @@ try:
         async_bulk as async_bulk,
         async_reindex as async_reindex,
         async_streaming_bulk as async_streaming_bulk,
+        async_bulk_dataframe as async_bulk_dataframe,
     )
 except (ImportError, SyntaxError):
     pass
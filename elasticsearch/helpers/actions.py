@@ -20,14 +20,20 @@ import time
 
 from ..exceptions import TransportError
 from ..compat import map, string_types, Queue, Mapping
+from ..connection.base import _ReiterableChunks
+from ..serializer import _bytes_dumper
 
 from .errors import ScanError, BulkIndexError
+from .streaming import HitsParser, iter_hits
 
 import logging
 
 
 logger = logging.getLogger("elasticsearch.helpers")
 
+# size of the chunks bulk request bodies are streamed in
+BULK_BODY_CHUNK_BYTES = 64 * 1024
+
 
 def expand_action(data):
     """
@@ -97,6 +103,22 @@ def expand_action(data):
     return action, data.get("_source", data)
 
 
+def _serialize_action(serializer, action, data):
+    """
+    Serialize an action and its data (``None`` if it has none), return them
+    along with the number of bytes they take in the body of a bulk request.
+    """
+    dumps_bytes = _bytes_dumper(serializer)
+    action = dumps_bytes(action)
+    # +1 to account for the trailing new line character
+    size = len(action) + 1
+
+    if data is not None:
+        data = dumps_bytes(data)
+        size += len(data) + 1
+    return action, data, size
+
+
 class _ActionChunker:
     def __init__(self, chunk_size, max_chunk_bytes, serializer):
         self.chunk_size = chunk_size
@@ -108,16 +130,17 @@ class _ActionChunker:
         self.bulk_actions = []
         self.bulk_data = []
 
-    def feed(self, action, data):
+    def feed(self, action, data, serialized=None):
+        """
+        Add an action to the current chunk, returning the previous chunk if
+        it is full. ``serialized`` is what :func:`_serialize_action` returns
+        for the action when it was already serialized.
+        """
         ret = None
         raw_data, raw_action = data, action
-        action = self.serializer.dumps(action)
-        # +1 to account for the trailing new line character
-        cur_size = len(action.encode("utf-8")) + 1
-
-        if data is not None:
-            data = self.serializer.dumps(data)
-            cur_size += len(data.encode("utf-8")) + 1
+        if serialized is None:
+            serialized = _serialize_action(self.serializer, action, data)
+        action, data, cur_size = serialized
 
         # full chunk, send it and start a new one
         if self.bulk_actions and (
@@ -147,16 +170,74 @@ class _ActionChunker:
         return ret
 
 
+def _bulk_body_chunks(bulk_actions, chunk_bytes=BULK_BODY_CHUNK_BYTES):
+    """
+    Encode the serialized actions into the NDJSON body of a bulk request, in
+    chunks of about ``chunk_bytes`` streamed to the connection so that the
+    whole body is never held in memory.
+    """
+    lines, size = [], 0
+    for line in bulk_actions:
+        if not isinstance(line, bytes):
+            line = line.encode("utf-8", "surrogatepass")
+        lines.append(line)
+        lines.append(b"\n")
+        size += len(line) + 1
+        if size >= chunk_bytes:
+            yield b"".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield b"".join(lines)
+
+
+class _BulkBody(_ReiterableChunks):
+    """
+    The NDJSON body of a bulk request, its chunks encoded again from the
+    serialized actions every time it is iterated over so that a request
+    that failed midway can be retried on another node.
+    """
+
+    def __init__(self, bulk_actions):
+        self.bulk_actions = bulk_actions
+
+    def __iter__(self):
+        return _bulk_body_chunks(self.bulk_actions)
+
+
+def _resolve_deadline(kwargs, total_timeout=None):
+    """
+    Turn the ``total_timeout`` of a helper into a ``deadline`` shared by all
+    the requests it sends and return that deadline.
+    """
+    total_timeout = kwargs.pop("total_timeout", total_timeout)
+    if total_timeout is not None:
+        deadline = time.time() + total_timeout
+        kwargs["deadline"] = min(deadline, kwargs.get("deadline") or deadline)
+    return kwargs.get("deadline")
+
+
+def _backoff(attempt, initial_backoff, max_backoff, deadline):
+    """
+    Number of seconds to wait before the retry ``attempt``, never past
+    ``deadline``.
+    """
+    backoff = min(max_backoff, initial_backoff * 2 ** (attempt - 1))
+    if deadline is not None:
+        backoff = max(0, min(backoff, deadline - time.time()))
+    return backoff
+
+
 def _chunk_actions(actions, chunk_size, max_chunk_bytes, serializer):
     """
-    Split actions into chunks by number or size, serialize them into strings in
-    the process.
+    Split actions into chunks by number or size, serialize them into bytes in
+    the process. An expanded action may come with its serialized form, what
+    :func:`_serialize_action` returns, as a third element.
     """
     chunker = _ActionChunker(
         chunk_size=chunk_size, max_chunk_bytes=max_chunk_bytes, serializer=serializer
     )
-    for action, data in actions:
-        ret = chunker.feed(action, data)
+    for item in actions:
+        ret = chunker.feed(*item)
         if ret:
             yield ret
     ret = chunker.flush()
@@ -232,7 +313,7 @@ def _process_bulk_chunk(
     """
     try:
         # send the actual request
-        resp = client.bulk("\n".join(bulk_actions) + "\n", *args, **kwargs)
+        resp = client.bulk(_BulkBody(bulk_actions), *args, **kwargs)
     except TransportError as e:
         gen = _process_bulk_chunk_error(
             error=e,
@@ -295,7 +376,11 @@ def streaming_bulk(
         2**retry_number``
     :arg max_backoff: maximum number of seconds a retry will wait
     :arg yield_ok: if set to False will skip successful documents in the output
+
+    A ``total_timeout`` (in seconds) limits the whole operation: the
+    ``bulk`` requests and the waits between retries share one deadline.
     """
+    deadline = _resolve_deadline(kwargs)
     actions = map(expand_action_callback, actions)
 
     for bulk_data, bulk_actions in _chunk_actions(
@@ -305,7 +390,7 @@ def streaming_bulk(
         for attempt in range(max_retries + 1):
             to_retry, to_retry_data = [], []
             if attempt:
-                time.sleep(min(max_backoff, initial_backoff * 2 ** (attempt - 1)))
+                time.sleep(_backoff(attempt, initial_backoff, max_backoff, deadline))
 
             try:
                 for data, (ok, info) in zip(
@@ -330,10 +415,10 @@ def streaming_bulk(
                             and info["status"] == 429
                             and (attempt + 1) <= max_retries
                         ):
-                            # _process_bulk_chunk expects strings so we need to
+                            # _process_bulk_chunk expects bytes so we need to
                             # re-serialize the data
                             to_retry.extend(
-                                map(client.transport.serializer.dumps, data)
+                                map(_bytes_dumper(client.transport.serializer), data)
                             )
                             to_retry_data.append(data)
                         else:
@@ -427,11 +512,15 @@ def parallel_bulk(
         (`None` if data line should be omitted).
     :arg queue_size: size of the task queue between the main thread (producing
         chunks to send) and the processing threads.
+
+    A ``total_timeout`` (in seconds) limits the whole operation rather than
+    each ``bulk`` request.
     """
     # Avoid importing multiprocessing unless parallel_bulk is used
     # to avoid exceptions on restricted environments like App Engine
     from multiprocessing.pool import ThreadPool
 
+    _resolve_deadline(kwargs)
     actions = map(expand_action_callback, actions)
 
     class BlockingPool(ThreadPool):
@@ -473,6 +562,8 @@ def scan(
     request_timeout=None,
     clear_scroll=True,
     scroll_kwargs=None,
+    total_timeout=None,
+    stream=False,
     **kwargs
 ):
     """
@@ -503,6 +594,13 @@ def scan(
         to true.
     :arg scroll_kwargs: additional kwargs to be passed to
         :meth:`~elasticsearch.Elasticsearch.scroll`
+    :arg total_timeout: maximum number of seconds the whole scan may take,
+        the ``search`` and ``scroll`` requests share one deadline. The time
+        spent consuming the hits counts as well.
+    :arg stream: parse the responses incrementally, yielding every hit as
+        soon as it has been received instead of once the whole page has
+        been, so that only one hit is held in memory at a time rather than
+        ``size`` of them. See :class:`~elasticsearch.helpers.HitsParser`.
 
     Any additional keyword arguments will be passed to the initial
     :meth:`~elasticsearch.Elasticsearch.search` call::
@@ -515,6 +613,12 @@ def scan(
 
     """
     scroll_kwargs = scroll_kwargs or {}
+    deadline = _resolve_deadline(kwargs, total_timeout)
+    if deadline is not None:
+        scroll_kwargs = dict(scroll_kwargs, deadline=deadline)
+    if stream:
+        kwargs["stream_response"] = True
+        scroll_kwargs = dict(scroll_kwargs, stream_response=True)
 
     if not preserve_order:
         query = query.copy() if query else {}
@@ -524,12 +628,26 @@ def scan(
     resp = client.search(
         body=query, scroll=scroll, size=size, request_timeout=request_timeout, **kwargs
     )
-    scroll_id = resp.get("_scroll_id")
+    scroll_id = None if stream else resp.get("_scroll_id")
+    parser = hits = None
 
     try:
-        while scroll_id and resp["hits"]["hits"]:
-            for hit in resp["hits"]["hits"]:
-                yield hit
+        while True:
+            if stream:
+                # the rest of the response is known once the hits are parsed
+                parser = HitsParser()
+                hits = iter_hits(parser, resp)
+                for hit in hits:
+                    yield hit
+                resp = parser.response
+                scroll_id = resp.get("_scroll_id")
+                if not (scroll_id and parser.count):
+                    break
+            else:
+                if not (scroll_id and resp["hits"]["hits"]):
+                    break
+                for hit in resp["hits"]["hits"]:
+                    yield hit
 
             # check if we have any errors
             if (resp["_shards"]["successful"] + resp["_shards"]["skipped"]) < resp[
@@ -554,9 +672,15 @@ def scan(
             resp = client.scroll(
                 body={"scroll_id": scroll_id, "scroll": scroll}, **scroll_kwargs
             )
-            scroll_id = resp.get("_scroll_id")
+            if not stream:
+                scroll_id = resp.get("_scroll_id")
 
     finally:
+        if hits is not None:
+            hits.close()
+        if parser is not None:
+            # the page may have been left before all of it was parsed
+            scroll_id = parser.response.get("_scroll_id", scroll_id)
         if scroll_id and clear_scroll:
             client.clear_scroll(body={"scroll_id": [scroll_id]}, ignore=(404,))
 
@@ -34,6 +34,7 @@ from ..client import Elasticsearch
 from ..serializer import Serializer
 
 logger: logging.Logger
+BULK_BODY_CHUNK_BYTES: int
 
 def expand_action(data: Any) -> Tuple[Dict[str, Any], Optional[Any]]: ...
 def _chunk_actions(
@@ -91,6 +92,8 @@ def scan(
     request_timeout: Optional[Union[float, int]] = ...,
     clear_scroll: bool = ...,
     scroll_kwargs: Optional[Mapping[str, Any]] = ...,
+    total_timeout: Optional[Union[float, int]] = ...,
+    stream: bool = ...,
     **kwargs: Any
 ) -> Generator[Any, None, None]: ...
 def reindex(
@@ -0,0 +1,262 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from itertools import repeat
+from json.encoder import encode_basestring
+
+from ..compat import string_types, to_text
+from ..exceptions import ImproperlyConfigured
+from ..serializer import _bytes_dumper
+from .actions import bulk
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = pd = None
+
+OP_TYPES = ("index", "create", "update", "delete")
+
+
+def _check_arguments(id_column, op_type):
+    if pd is None:
+        raise ImproperlyConfigured("Please install pandas to index DataFrames.")
+    if op_type not in OP_TYPES:
+        raise ValueError(
+            "Unknown op_type %r, expected one of %s." % (op_type, ", ".join(OP_TYPES))
+        )
+    if id_column is None and op_type in ("update", "delete"):
+        raise ValueError("The %r op_type needs an id_column." % op_type)
+
+
+def _expanded(item):
+    # the actions of a DataFrame come expanded and serialized
+    return item
+
+
+def _datetime_unit(values, mask):
+    """
+    The coarsest unit that loses none of the precision of ``values``. It is
+    chosen for the whole batch, dates that need fewer fractional digits than
+    others get trailing zeros.
+    """
+    ticks = values[~mask].astype("datetime64[ns]").view("i8")
+    for unit, size in (("s", 10 ** 9), ("ms", 10 ** 6), ("us", 10 ** 3)):
+        if not (ticks % size).any():
+            return unit
+    return "ns"
+
+
+def _encode_numbers(values):
+    """
+    Return the JSON texts of the numbers of a 1 or 2 dimensional array, as
+    (nested) lists.
+    """
+    if values.dtype.kind == "f" and values.dtype.itemsize < 8:
+        # the shortest representation of a float32, not of its float64 value
+        return values.astype(str).tolist()
+    # converting to python numbers is faster than numpy's own formatting
+    encode = repr if values.dtype.kind == "f" else str
+    if values.ndim == 1:
+        return list(map(encode, values.tolist()))
+    return [list(map(encode, row)) for row in values.tolist()]
+
+
+def _encode_objects(values, mask, serializer):
+    # dense vectors, arrays of the same length, are encoded as a matrix
+    if len(values) and not mask.any() and isinstance(values[0], np.ndarray):
+        try:
+            matrix = np.stack(values)
+        except ValueError:
+            matrix = None
+        if (
+            matrix is not None
+            and matrix.ndim == 2
+            and matrix.dtype.kind in "iuf"
+            and np.isfinite(matrix).all()
+        ):
+            return ["[%s]" % ",".join(row) for row in _encode_numbers(matrix)]
+
+    dumps = serializer.dumps
+    return [
+        "null"
+        if null
+        else encode_basestring(to_text(value))
+        if isinstance(value, string_types)
+        else dumps(value)
+        for value, null in zip(values, mask)
+    ]
+
+
+def _encode_column(series, serializer):
+    """
+    Return the JSON texts of the values of ``series``, ``null`` for the
+    missing values (``None``, ``NaN``, ``NaT``, ``pd.NA``) and the infinite
+    floats. Numbers, booleans, dates and categories are encoded a whole
+    array at a time, other values one by one with ``serializer``.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        # encode the categories once, code -1 (missing) picks the last one
+        categories = _encode_column(pd.Series(dtype.categories), serializer)
+        encoded = np.array(categories + ["null"], dtype=object)
+        return encoded[series.cat.codes.to_numpy()].tolist()
+
+    mask = series.isna().to_numpy()
+    kind = getattr(dtype, "kind", "O")
+    if kind in "iufb":
+        # the nullable dtypes (Int64, boolean...) have a numpy counterpart
+        values = series.to_numpy(dtype=getattr(dtype, "numpy_dtype", dtype), na_value=0)
+        if kind == "b":
+            encoded = np.where(values, "true", "false").tolist()
+        else:
+            encoded = _encode_numbers(values)
+            if kind == "f":
+                mask |= ~np.isfinite(values)
+    elif kind == "M":
+        timezone = "naive"
+        if getattr(dtype, "tz", None) is not None:
+            series = series.dt.tz_convert("UTC").dt.tz_localize(None)
+            timezone = "UTC"
+        values = series.to_numpy()
+        encoded = np.datetime_as_string(
+            values, unit=_datetime_unit(values, mask), timezone=timezone
+        )
+        encoded = list(map('"%s"'.__mod__, encoded.tolist()))
+    else:
+        return _encode_objects(series.to_numpy(dtype=object), mask, serializer)
+
+    for index in np.flatnonzero(mask).tolist():
+        encoded[index] = "null"
+    return encoded
+
+
+def _encode_ids(series, id_column):
+    """
+    Return the ``_id`` of the documents as text, integral floats written
+    without their fractional part (``1.0`` is ``"1"``).
+    """
+    if series.isna().any():
+        raise ValueError("The %r id_column has missing values." % (id_column,))
+    if getattr(series.dtype, "kind", "O") == "f":
+        return [
+            "%d" % value if value.is_integer() else repr(value)
+            for value in series.astype(float).tolist()
+        ]
+    return series.astype(str).tolist()
+
+
+def _encode_batch(dataframe, id_column, op_type, serializer):
+    """
+    Return the actions indexing the rows of ``dataframe``, expanded and
+    serialized for :func:`~elasticsearch.helpers.actions._chunk_actions`:
+    ``(action, source, (action line, source line, size))``, the source being
+    its JSON line.
+    """
+    columns = [name for name in dataframe.columns if name != id_column]
+    # the values are formatted into a template of the source, one per row
+    template = "{%s}" % ",".join(
+        encode_basestring(u"%s" % (name,)).replace("%", "%%") + ":%s"
+        for name in columns
+    )
+    if op_type == "update":
+        template = '{"doc":%s}' % template
+    if columns:
+        rows = zip(*[_encode_column(dataframe[name], serializer) for name in columns])
+    else:
+        rows = repeat((), len(dataframe))
+
+    if id_column is None:
+        action = {op_type: {}}
+        actions = repeat((action, _bytes_dumper(serializer)(action)))
+    else:
+        ids = _encode_ids(dataframe[id_column], id_column)
+        action_template = '{"%s":{"_id":%%s}}' % op_type
+        actions = (
+            (
+                {op_type: {"_id": _id}},
+                (action_template % encode_basestring(_id)).encode(
+                    "utf-8", "surrogatepass"
+                ),
+            )
+            for _id in ids
+        )
+
+    if op_type == "delete":
+        return [(action, None, (line, None, len(line) + 1)) for action, line in actions]
+
+    items = []
+    for (action, line), row in zip(actions, rows):
+        source = (template % row).encode("utf-8", "surrogatepass")
+        items.append((action, source, (line, source, len(line) + len(source) + 2)))
+    return items
+
+
+def _dataframe_actions(dataframe, id_column, op_type, serializer, batch_size):
+    for start in range(0, len(dataframe), batch_size):
+        batch = dataframe.iloc[start : start + batch_size]
+        for item in _encode_batch(batch, id_column, op_type, serializer):
+            yield item
+
+
+def bulk_dataframe(
+    client, dataframe, id_column=None, op_type="index", batch_size=10000, **kwargs
+):
+    """
+    Index the rows of a pandas ``DataFrame`` as documents, their fields
+    named after the columns. Instead of turning every row into a ``dict``
+    for :func:`~elasticsearch.helpers.bulk` to serialize, the columns are
+    encoded to JSON ``batch_size`` rows at a time, a whole array at once for
+    numbers, booleans, dates and categories:
+
+    - dates are written in ISO 8601, in UTC for timezone aware ones
+    - missing values (``None``, ``NaN``, ``NaT``, ``pd.NA``) and infinite
+      floats are written as ``null``
+    - a column of numpy arrays of the same length (``dense_vector``) is
+      encoded as a matrix
+    - other values, strings included, are serialized one by one with the
+      serializer of the client
+
+    The serialized actions are then sent in chunks following the
+    ``chunk_size`` and ``max_chunk_bytes`` of
+    :func:`~elasticsearch.helpers.streaming_bulk`. The ``data`` of the errors
+    reported is the JSON line of the source, as ``bytes``.
+
+    ::
+
+        success, errors = bulk_dataframe(es, df, index="trips", id_column="trip_id")
+
+    :arg client: instance of :class:`~elasticsearch.Elasticsearch` to use
+    :arg dataframe: the ``DataFrame`` to index
+    :arg id_column: name of the column holding the ``_id`` of the documents,
+        it isn't part of their source and can't have missing values.
+        Elasticsearch generates the ids when ``None``
+    :arg op_type: ``index`` (default), ``create``, ``update`` (partial
+        documents) or ``delete`` (only the ids are sent)
+    :arg batch_size: number of rows encoded at a time
+
+    Any additional keyword arguments, ``index`` for instance, will be passed
+    to :func:`~elasticsearch.helpers.bulk` which is used to execute the
+    operation, see :func:`~elasticsearch.helpers.bulk` for more accepted
+    parameters.
+    """
+    _check_arguments(id_column, op_type)
+    actions = _dataframe_actions(
+        dataframe, id_column, op_type, client.transport.serializer, batch_size
+    )
+    kwargs["expand_action_callback"] = _expanded
+    return bulk(client, actions, **kwargs)
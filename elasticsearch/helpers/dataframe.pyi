@@ -0,0 +1,34 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from typing import Any, List, Optional, Tuple, Union
+from ..client import Elasticsearch
+from ..serializer import Serializer
+
+OP_TYPES: Tuple[str, ...]
+
+def _encode_batch(
+    dataframe: Any, id_column: Optional[Any], op_type: str, serializer: Serializer
+) -> List[Tuple[Any, ...]]: ...
+def bulk_dataframe(
+    client: Elasticsearch,
+    dataframe: Any,
+    id_column: Optional[Any] = ...,
+    op_type: str = ...,
+    batch_size: int = ...,
+    **kwargs: Any
+) -> Tuple[int, Union[int, List[Any]]]: ...
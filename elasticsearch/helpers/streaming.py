@@ -0,0 +1,280 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import codecs
+import json
+import re
+
+from ..exceptions import SerializationError
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRUCTURE = re.compile(r'[{}\[\]"]')
+_STRING = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[ \t\n\r,}\]]")
+
+# parser states
+_START, _KEY, _COLON, _VALUE, _HITS, _DONE = range(6)
+
+
+class HitsParser(object):
+    """
+    Incremental parser of the body of a search or scroll response, fed with
+    the chunks of ``bytes`` returned by a request sent with
+    ``stream_response=True``. Every element of ``hits.hits`` is returned as
+    soon as it has been received, so only one hit (and one chunk) has to be
+    held in memory at a time instead of the whole page. Everything else
+    (``_scroll_id``, ``_shards``, ``hits.total``...) is collected in
+    :attr:`response`, where ``hits.hits`` is an empty list.
+
+    The body is expected to be well formed JSON as sent by Elasticsearch, it
+    is only validated as far as needed to find the hits.
+
+    ::
+
+        status, headers, chunks = connection.perform_request_stream("GET", "/_search")
+        parser = HitsParser()
+        for chunk in chunks:
+            for hit in parser.feed(chunk):
+                process(hit)
+        parser.close()
+        print(parser.response["_shards"])
+    """
+
+    def __init__(self):
+        self.response = {}
+        self.count = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")("surrogatepass")
+        self._json = json.JSONDecoder()
+        self._buffer = u""
+        self._pos = 0
+        self._state = _START
+        self._objects = [self.response]
+        self._key = None
+        # progress of the search for the end of the current value
+        self._scan = None
+
+    def feed(self, chunk):
+        """
+        Parse the next chunk of the body and return the list of the hits it
+        completed.
+
+        :arg chunk: ``bytes`` (or text) following the previous chunks
+        """
+        if not isinstance(chunk, type(u"")):
+            chunk = self._decoder.decode(chunk)
+        # only keep what hasn't been parsed yet, the local variable lets
+        # CPython extend the string in place when nothing else refers to it
+        buf = self._buffer
+        self._buffer = None
+        if self._pos:
+            buf = buf[self._pos :]
+            self._pos = 0
+        buf += chunk
+        self._buffer = buf
+
+        hits = []
+        self._parse(buf, hits)
+        self.count += len(hits)
+        return hits
+
+    def close(self):
+        """
+        Signal the end of the body, return the hits left and raise
+        :class:`~elasticsearch.SerializationError` if the body is incomplete.
+        """
+        hits = self.feed(self._decoder.decode(b"", True))
+        if self._state != _DONE:
+            raise SerializationError(
+                "Incomplete response body, %d hits were parsed." % self.count
+            )
+        return hits
+
+    def _parse(self, buf, hits):
+        pos = self._pos
+        objects = self._objects
+        size = len(buf)
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos == size:
+                break
+            state = self._state
+            char = buf[pos]
+
+            if state == _HITS:
+                if char == ",":
+                    pos += 1
+                elif char == "]":
+                    pos += 1
+                    self._state = _KEY
+                else:
+                    value = self._read_value(buf, pos)
+                    if value is None:
+                        break
+                    hits.append(value[0])
+                    pos = value[1]
+
+            elif state == _KEY:
+                if char == ",":
+                    pos += 1
+                elif char == "}":
+                    pos += 1
+                    objects.pop()
+                    if not objects:
+                        self._state = _DONE
+                elif char == '"':
+                    value = self._read_value(buf, pos)
+                    if value is None:
+                        break
+                    self._key, pos = value
+                    self._state = _COLON
+                else:
+                    self._unexpected(buf, pos)
+
+            elif state == _COLON:
+                if char != ":":
+                    self._unexpected(buf, pos)
+                pos += 1
+                self._state = _VALUE
+
+            elif state == _VALUE:
+                if self._key == "hits" and len(objects) == 1 and char == "{":
+                    # descend into the hits object
+                    objects[-1]["hits"] = obj = {}
+                    objects.append(obj)
+                    self._state = _KEY
+                    pos += 1
+                elif self._key == "hits" and len(objects) == 2 and char == "[":
+                    objects[-1]["hits"] = []
+                    self._state = _HITS
+                    pos += 1
+                else:
+                    value = self._read_value(buf, pos)
+                    if value is None:
+                        break
+                    objects[-1][self._key], pos = value
+                    self._state = _KEY
+
+            elif state == _START:
+                if char != "{":
+                    self._unexpected(buf, pos)
+                pos += 1
+                self._state = _KEY
+
+            else:
+                self._unexpected(buf, pos)
+
+        self._pos = pos
+
+    def _read_value(self, buf, pos):
+        """
+        Return the JSON value starting at ``pos`` along with the position
+        following it, or ``None`` if it isn't complete yet.
+        """
+        if self._scan is None:
+            # most values are complete, let the C decoder find their end
+            try:
+                value, end = self._json.raw_decode(buf, pos)
+            except ValueError:
+                pass
+            else:
+                # a number could go on in the next chunk
+                if buf[pos] in '{["' or _SCALAR_END.match(buf, end):
+                    return value, end
+
+        end = self._value_end(buf, pos)
+        if end is None:
+            return None
+        return self._decode(buf, pos), end
+
+    def _value_end(self, buf, start):
+        """
+        Return the position following the JSON value starting at ``start``,
+        or ``None`` if it isn't complete yet. The search resumes where it
+        stopped the next time it is called for the same value.
+        """
+        if buf[start] not in '{["':
+            match = _SCALAR_END.search(buf, start)
+            return match.start() if match else None
+
+        if self._scan is None:
+            pos, depth, in_string = start, 0, False
+        else:
+            pos, depth, in_string = self._scan
+            pos += start
+        size = len(buf)
+        while True:
+            if in_string:
+                match = _STRING.search(buf, pos)
+                if match is None:
+                    pos = size
+                    break
+                if match.group() == "\\":
+                    if match.end() == size:
+                        # the escaped character is in the next chunk
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                in_string = False
+                pos = match.end()
+            else:
+                match = _STRUCTURE.search(buf, pos)
+                if match is None:
+                    pos = size
+                    break
+                char = match.group()
+                pos = match.end()
+                if char == '"':
+                    in_string = True
+                    continue
+                depth += 1 if char in "{[" else -1
+            if depth == 0:
+                self._scan = None
+                return pos
+
+        # positions are kept relative to the value as the buffer gets trimmed
+        self._scan = (pos - start, depth, in_string)
+        return None
+
+    def _decode(self, buf, pos):
+        try:
+            return self._json.raw_decode(buf, pos)[0]
+        except ValueError as e:
+            raise SerializationError(buf[pos : pos + 100], e)
+
+    def _unexpected(self, buf, pos):
+        raise SerializationError(
+            "Unexpected %r in the response body." % buf[pos : pos + 20]
+        )
+
+
+def iter_hits(parser, chunks):
+    """
+    Feed ``chunks`` to ``parser`` and yield the hits as they are parsed. The
+    chunks are closed when the generator is, so that the connection can be
+    reused.
+    """
+    try:
+        for chunk in chunks:
+            for hit in parser.feed(chunk):
+                yield hit
+        for hit in parser.close():
+            yield hit
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,282 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import time
+import random
+import threading
+
+from .compat import unquote
+
+_MASK = 0xFFFFFFFF
+
+
+def _rotl(x, r):
+    return ((x << r) | (x >> (32 - r))) & _MASK
+
+
+def _to_int32(x):
+    x &= _MASK
+    return x - 0x100000000 if x & 0x80000000 else x
+
+
+def murmur3_32(data, seed=0):
+    """
+    MurmurHash3 (x86, 32 bit) of ``data``, returned as a signed integer like
+    Java's ``int``.
+    """
+    data = bytearray(data)
+    length = len(data)
+    h1 = seed
+    rounded_end = length & ~3
+
+    for i in range(0, rounded_end, 4):
+        k1 = data[i] | data[i + 1] << 8 | data[i + 2] << 16 | data[i + 3] << 24
+        k1 = _rotl((k1 * 0xCC9E2D51) & _MASK, 15)
+        h1 ^= (k1 * 0x1B873593) & _MASK
+        h1 = (_rotl(h1, 13) * 5 + 0xE6546B64) & _MASK
+
+    tail = length & 3
+    if tail:
+        k1 = 0
+        if tail == 3:
+            k1 ^= data[rounded_end + 2] << 16
+        if tail >= 2:
+            k1 ^= data[rounded_end + 1] << 8
+        k1 ^= data[rounded_end]
+        k1 = _rotl((k1 * 0xCC9E2D51) & _MASK, 15)
+        h1 ^= (k1 * 0x1B873593) & _MASK
+
+    h1 ^= length
+    h1 ^= h1 >> 16
+    h1 = (h1 * 0x85EBCA6B) & _MASK
+    h1 ^= h1 >> 13
+    h1 = (h1 * 0xC2B2AE35) & _MASK
+    h1 ^= h1 >> 16
+    return _to_int32(h1)
+
+
+def routing_hash(value):
+    """
+    Hash of a routing value (or document id) the way Elasticsearch computes
+    it: murmur3 over the UTF-16 code units of the string.
+    """
+    return murmur3_32(value.encode("utf-16-le"))
+
+
+def shard_id(
+    routing_num_shards, number_of_shards, doc_id, routing=None, partition_size=1
+):
+    """
+    Compute the shard a document belongs to, mirroring Elasticsearch's
+    ``OperationRouting``.
+
+    :arg routing_num_shards: ``routing_num_shards`` of the index
+    :arg number_of_shards: number of primary shards of the index
+    :arg doc_id: id of the document
+    :arg routing: custom routing value, if any
+    :arg partition_size: ``index.routing_partition_size`` of the index
+    """
+    offset = 0
+    if routing is not None and partition_size > 1:
+        offset = routing_hash(doc_id) % partition_size
+    effective = doc_id if routing is None else routing
+    value = _to_int32(routing_hash(effective) + offset)
+    routing_factor = routing_num_shards // number_of_shards
+    return (value % routing_num_shards) // routing_factor
+
+
+def _to_text(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value
+
+
+class ShardRouter(object):
+    """
+    Sends single document operations (get, exists, index, create, update and
+    delete) straight to a node holding a copy of the document's shard,
+    saving the hop from the coordinating node to that node. Writes go to the
+    node holding the primary, reads to any started copy.
+
+    The shard of a document is computed with Elasticsearch's murmur3
+    routing from the index's ``routing_num_shards``, number of shards and
+    ``routing_partition_size`` (read from the cluster state) and the shard
+    allocation is read with the ``search_shards`` API. Both are cached per
+    index and refreshed in the background every ``refresh_interval``
+    seconds, until the first refresh of an index its requests are sent as
+    usual. Requests with a ``preference`` and indices with a
+    ``routing_path`` are never routed.
+
+    The nodes are matched to connections by their HTTP publish address so
+    this works best together with sniffing.
+
+    :arg refresh_interval: number of seconds after which the cached routing
+        information of an index is refreshed
+    :arg max_indices: maximum number of indices to keep routing information
+        for, the least recently refreshed one is dropped to make room
+    """
+
+    # endpoints of the single document APIs and whether they write
+    DOCUMENT_ENDPOINTS = {
+        "_doc": None,
+        "_source": False,
+        "_create": True,
+        "_update": True,
+    }
+
+    def __init__(self, refresh_interval=60, max_indices=1000):
+        self.refresh_interval = refresh_interval
+        self.max_indices = max_indices
+
+        self.lock = threading.Lock()
+        # index -> (fetched_at, routing table or None if it can't be routed)
+        self.tables = {}
+        # indices being refreshed
+        self.refreshing = set()
+
+    def parse(self, method, url, params):
+        """
+        Return the index, document id, routing value and whether the request
+        writes for a single document operation, ``None`` otherwise.
+        """
+        parts = url.split("?", 1)[0].strip("/").split("/")
+        if len(parts) != 3 or parts[1] not in self.DOCUMENT_ENDPOINTS:
+            return None
+        index, endpoint, doc_id = parts
+        if "," in index or "*" in index or not doc_id:
+            return None
+        params = params or {}
+        if "preference" in params:
+            return None
+
+        write = self.DOCUMENT_ENDPOINTS[endpoint]
+        if write is None:
+            write = method not in ("GET", "HEAD")
+        routing = params.get("routing")
+        if routing is not None:
+            routing = _to_text(routing)
+        return (
+            _to_text(unquote(index)),
+            _to_text(unquote(doc_id)),
+            routing,
+            write,
+        )
+
+    def route(self, method, url, params):
+        """
+        Return the index of a single document operation and the addresses
+        (``(host, port)`` tuples) of the nodes it should be sent to, in order
+        of preference. The index is ``None`` for other requests and the list
+        of addresses is empty when there is nothing known about the index.
+        """
+        request = self.parse(method, url, params)
+        if request is None:
+            return None, []
+        index, doc_id, routing, write = request
+
+        table = self.tables.get(index, (None, None))[1]
+        if table is None:
+            return index, []
+
+        shard = shard_id(
+            table["routing_num_shards"],
+            table["number_of_shards"],
+            doc_id,
+            routing,
+            table["partition_size"],
+        )
+        primary, copies = table["shards"].get(shard, (None, []))
+        if write:
+            return index, [primary] if primary is not None else []
+        copies = list(copies)
+        random.shuffle(copies)
+        return index, copies
+
+    def start_refresh(self, index, now=None):
+        """
+        Return ``True`` if the routing information of ``index`` is missing
+        or stale and no refresh is running yet, the caller is then expected
+        to fetch it and call :meth:`update` followed by :meth:`refresh_done`.
+        """
+        now = now if now else time.time()
+        with self.lock:
+            fetched_at = self.tables.get(index, (None, None))[0]
+            if fetched_at is not None and now < fetched_at + self.refresh_interval:
+                return False
+            if index in self.refreshing:
+                return False
+            self.refreshing.add(index)
+            return True
+
+    def refresh_done(self, index):
+        with self.lock:
+            self.refreshing.discard(index)
+
+    def invalidate(self, index):
+        """
+        Make the next request to ``index`` refresh its routing information.
+        """
+        with self.lock:
+            fetched_at, table = self.tables.get(index, (None, None))
+            if fetched_at is not None:
+                self.tables[index] = (0, table)
+
+    def update(self, index, metadata, search_shards, node_addresses, now=None):
+        """
+        Build the routing table of ``index``.
+
+        :arg metadata: response of ``GET /_cluster/state/metadata/<index>``
+        :arg search_shards: response of ``GET /<index>/_search_shards``
+        :arg node_addresses: dictionary mapping node ids to the address
+            (``(host, port)``) of the node
+        """
+        now = now if now else time.time()
+        table = self._build_table(metadata, search_shards, node_addresses)
+        with self.lock:
+            if index not in self.tables and len(self.tables) >= self.max_indices:
+                stalest = min(self.tables, key=lambda i: self.tables[i][0])
+                del self.tables[stalest]
+            self.tables[index] = (now, table)
+
+    def _build_table(self, metadata, search_shards, node_addresses):
+        indices = (metadata or {}).get("metadata", {}).get("indices", {})
+        # an alias pointing at several indices can't be routed
+        if len(indices) != 1:
+            return None
+        meta = list(indices.values())[0]
+        settings = meta.get("settings", {}).get("index", {})
+        if settings.get("routing_path"):
+            return None
+
+        number_of_shards = int(settings["number_of_shards"])
+        shards = {}
+        for copies in search_shards.get("shards", []):
+            for copy in copies:
+                address = node_addresses.get(copy.get("node"))
+                if copy.get("state") != "STARTED" or address is None:
+                    continue
+                entry = shards.setdefault(copy["shard"], [None, []])
+                if copy.get("primary"):
+                    entry[0] = address
+                entry[1].append(address)
+
+        return {
+            "number_of_shards": number_of_shards,
+            "routing_num_shards": int(meta.get("routing_num_shards", number_of_shards)),
+            "partition_size": int(settings.get("routing_partition_size", 1)),
+            "shards": shards,
+        }
@@ -0,0 +1,57 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple, Union
+
+def murmur3_32(data: Union[bytes, bytearray], seed: int = ...) -> int: ...
+def routing_hash(value: str) -> int: ...
+def shard_id(
+    routing_num_shards: int,
+    number_of_shards: int,
+    doc_id: str,
+    routing: Optional[str] = ...,
+    partition_size: int = ...,
+) -> int: ...
+
+class ShardRouter(object):
+    DOCUMENT_ENDPOINTS: Dict[str, Optional[bool]]
+    refresh_interval: float
+    max_indices: int
+    lock: threading.Lock
+    tables: Dict[str, Tuple[float, Optional[Dict[str, Any]]]]
+    refreshing: Set[str]
+    def __init__(
+        self, refresh_interval: float = ..., max_indices: int = ...
+    ) -> None: ...
+    def parse(
+        self, method: str, url: str, params: Optional[Mapping[str, Any]]
+    ) -> Optional[Tuple[str, str, Optional[str], bool]]: ...
+    def route(
+        self, method: str, url: str, params: Optional[Mapping[str, Any]]
+    ) -> Tuple[Optional[str], List[Tuple[str, int]]]: ...
+    def start_refresh(self, index: str, now: Optional[float] = ...) -> bool: ...
+    def refresh_done(self, index: str) -> None: ...
+    def invalidate(self, index: str) -> None: ...
+    def update(
+        self,
+        index: str,
+        metadata: Optional[Mapping[str, Any]],
+        search_shards: Optional[Mapping[str, Any]],
+        node_addresses: Mapping[str, Tuple[str, int]],
+        now: Optional[float] = ...,
+    ) -> None: ...
@@ -15,17 +15,25 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import sys
+
 try:
     import simplejson as json
 except ImportError:
     import json
 
+import inspect
 import uuid
 from datetime import date, datetime
 from decimal import Decimal
+from functools import partial
+from operator import methodcaller
 
 from .exceptions import SerializationError, ImproperlyConfigured
-from .compat import string_types
+from .compat import string_types, to_text
+
+# json.loads() of the standard library parses bytes since Python 3.6
+JSON_LOADS_BYTES = json.__name__ == "json" and sys.version_info >= (3, 6)
 
 INTEGER_TYPES = ()
 FLOAT_TYPES = (Decimal,)
@@ -62,9 +70,96 @@ try:
 except ImportError:
     pd = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _encoded_dumps(dumps, data):
+    data = dumps(data)
+    try:
+        return data.encode("utf-8", "surrogatepass")
+    except (UnicodeDecodeError, AttributeError):
+        # bytes/str - no need to re-encode
+        return data
+
+
+def _bytes_dumper(serializer):
+    """
+    Return the ``dumps_bytes()`` of ``serializer``, or its equivalent for
+    the serializers that don't subclass :class:`Serializer`.
+    """
+    dumps_bytes = getattr(serializer, "dumps_bytes", None)
+    if dumps_bytes is None:
+        dumps_bytes = partial(_encoded_dumps, serializer.dumps)
+    return dumps_bytes
+
+
+def _unserializable(data):
+    raise TypeError("Unable to serialize %r (type: %s)" % (data, type(data)))
+
+
+def _datetime64_isoformat(data):
+    return data.item().isoformat()
+
+
+def _none(data):
+    return None
+
+
+# isoformat() of the actual class, subclasses may override it
+_isoformat = methodcaller("isoformat")
+
+# encoders of the types the json module can't serialize, instances of their
+# subclasses are encoded the same way
+DEFAULT_ENCODERS = {date: _isoformat, datetime: _isoformat, uuid.UUID: str}
+DEFAULT_ENCODERS.update(dict.fromkeys(INTEGER_TYPES, int))
+DEFAULT_ENCODERS.update(dict.fromkeys(FLOAT_TYPES, float))
+if np:
+    DEFAULT_ENCODERS.update(
+        {
+            np.bool_: bool,
+            np.datetime64: _datetime64_isoformat,
+            np.ndarray: np.ndarray.tolist,
+        }
+    )
+if pd:
+    DEFAULT_ENCODERS.update(
+        {
+            pd.Timestamp: _isoformat,
+            # NaT is a datetime without an isoformat() Elasticsearch accepts
+            type(pd.NaT): _unserializable,
+            pd.Series: pd.Series.tolist,
+            pd.Categorical: pd.Categorical.tolist,
+        }
+    )
+    if hasattr(pd, "NA"):
+        DEFAULT_ENCODERS[type(pd.NA)] = _none
+
+# the hot types are encoded by their own unbound methods, only for instances
+# of exactly these types
+_EXACT_ENCODERS = {date: date.isoformat, datetime: datetime.isoformat}
+if pd:
+    _EXACT_ENCODERS[pd.Timestamp] = pd.Timestamp.isoformat
+
+
+def _encoder_cache(encoders):
+    """
+    Return the cache of the encoders by exact type, seeded with ``encoders``
+    and the exact encoders of the hot types still using the default one.
+    """
+    cache = dict(encoders)
+    for type_, encoder in _EXACT_ENCODERS.items():
+        if encoders.get(type_) is DEFAULT_ENCODERS.get(type_):
+            cache[type_] = encoder
+    return cache
+
 
 class Serializer(object):
     mimetype = ""
+    # loads() parses bytes as they are, without decoding them to text first
+    bytes_native = False
 
     def loads(self, s):
         raise NotImplementedError()
@@ -72,12 +167,20 @@ class Serializer(object):
     def dumps(self, data):
         raise NotImplementedError()
 
+    def dumps_bytes(self, data):
+        """
+        Serialize ``data`` into UTF-8 encoded ``bytes``, the form in which
+        it is sent. Serializers producing bytes directly should override it
+        to skip the intermediate text of :meth:`dumps`.
+        """
+        return _encoded_dumps(self.dumps, data)
+
 
 class TextSerializer(Serializer):
     mimetype = "text/plain"
 
     def loads(self, s):
-        return s
+        return to_text(s)
 
     def dumps(self, data):
         if isinstance(data, string_types):
@@ -87,36 +190,68 @@ class TextSerializer(Serializer):
 
 
 class JSONSerializer(Serializer):
+    """
+    Serializes to JSON with the ``json`` module (``simplejson`` when it is
+    installed). The values it can't serialize natively are passed to
+    :meth:`default`, which encodes them with the encoder registered for
+    their type, or one of its base classes::
+
+        serializer = JSONSerializer()
+        serializer.register(set, list)
+        es = Elasticsearch(serializer=serializer)
+
+    Encoders for dates, ``Decimal``, ``UUID`` and the numpy and pandas types
+    are registered by default.
+    """
+
     mimetype = "application/json"
+    bytes_native = JSON_LOADS_BYTES
+    # shared by the instances until they register an encoder
+    _encoders = DEFAULT_ENCODERS
+    _cache = _encoder_cache(DEFAULT_ENCODERS)
+
+    def register(self, type_, encoder):
+        """
+        Encode the instances of ``type_`` and its subclasses with
+        ``encoder(value)``, which returns a value the ``json`` module can
+        serialize (or raises ``TypeError``). Replaces the encoder already
+        registered for ``type_``, if any.
+
+        :arg type_: the type to encode
+        :arg encoder: callable taking the value and returning its encoding
+        """
+        encoders = dict(self._encoders)
+        encoders[type_] = encoder
+        self._encoders = encoders
+        self._cache = _encoder_cache(encoders)
+
+    def _find_encoder(self, type_):
+        encoders = self._encoders
+        for base in inspect.getmro(type_):
+            if base in encoders:
+                encoder = encoders[base]
+                break
+        else:
+            # the registered type may be an abstract base class
+            for base, encoder in encoders.items():
+                if issubclass(type_, base):
+                    break
+            else:
+                encoder = _unserializable
+        self._cache[type_] = encoder
+        return encoder
 
     def default(self, data):
-        if isinstance(data, TIME_TYPES) and getattr(pd, "NaT", None) is not data:
-            return data.isoformat()
-        elif isinstance(data, uuid.UUID):
-            return str(data)
-        elif isinstance(data, FLOAT_TYPES):
-            return float(data)
-        elif INTEGER_TYPES and isinstance(data, INTEGER_TYPES):
-            return int(data)
-
-        # Special cases for numpy and pandas types
-        elif np:
-            if isinstance(data, np.bool_):
-                return bool(data)
-            elif isinstance(data, np.datetime64):
-                return data.item().isoformat()
-            elif isinstance(data, np.ndarray):
-                return data.tolist()
-        if pd:
-            if isinstance(data, (pd.Series, pd.Categorical)):
-                return data.tolist()
-            elif data is getattr(pd, "NA", None):
-                return None
-
-        raise TypeError("Unable to serialize %r (type: %s)" % (data, type(data)))
+        try:
+            encoder = self._cache[type(data)]
+        except KeyError:
+            encoder = self._find_encoder(type(data))
+        return encoder(data)
 
     def loads(self, s):
         try:
+            if isinstance(s, bytes) and not JSON_LOADS_BYTES:
+                s = to_text(s)
             return json.loads(s)
         except (ValueError, TypeError) as e:
             raise SerializationError(s, e)
@@ -134,6 +269,72 @@ class JSONSerializer(Serializer):
             raise SerializationError(data, e)
 
 
+class OrjsonSerializer(JSONSerializer):
+    """
+    :class:`JSONSerializer` using `orjson <https://github.com/ijl/orjson>`_,
+    which parses and produces ``bytes`` several times faster than the
+    ``json`` module and serializes numpy arrays natively::
+
+        es = Elasticsearch(serializer=OrjsonSerializer())
+
+    The types orjson doesn't know about (``Decimal``, pandas...) go through
+    :meth:`~JSONSerializer.default` and the documents it refuses (integers
+    over 64 bits for instance) are serialized with the ``json`` module, so
+    it accepts the same documents as :class:`JSONSerializer`. Unlike the
+    ``json`` module it serializes ``NaN`` and infinite floats as ``null``.
+
+    The encoders registered with :meth:`~JSONSerializer.register` for dates,
+    numpy types, dataclasses and subclasses of ``str``, ``int``, ``dict`` or
+    ``list`` take over from orjson's own serialization of these types, but
+    ``UUID`` and ``Enum`` instances are always serialized by orjson.
+    """
+
+    bytes_native = True
+
+    def __init__(self):
+        if orjson is None:
+            raise ImproperlyConfigured(
+                "Please install orjson to use %s." % self.__class__.__name__
+            )
+        self._option = orjson.OPT_SERIALIZE_NUMPY
+
+    def register(self, type_, encoder):
+        super(OrjsonSerializer, self).register(type_, encoder)
+        # orjson only calls default() for the types it serializes natively
+        # when told to pass them through
+        if issubclass(type_, date):
+            self._option |= orjson.OPT_PASSTHROUGH_DATETIME
+        if hasattr(type_, "__dataclass_fields__"):
+            self._option |= orjson.OPT_PASSTHROUGH_DATACLASS
+        builtins = (str, int, dict, list)
+        if issubclass(type_, builtins) and type_ not in builtins:
+            self._option |= orjson.OPT_PASSTHROUGH_SUBCLASS
+        if np and issubclass(type_, (np.generic, np.ndarray)):
+            self._option &= ~orjson.OPT_SERIALIZE_NUMPY
+
+    def loads(self, s):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # let the json module have a go, it accepts NaN and lone surrogates
+            return super(OrjsonSerializer, self).loads(s)
+
+    def dumps(self, data):
+        if isinstance(data, string_types):
+            return data
+        return self.dumps_bytes(data).decode("utf-8", "surrogatepass")
+
+    def dumps_bytes(self, data):
+        if isinstance(data, string_types):
+            return super(OrjsonSerializer, self).dumps_bytes(data)
+
+        try:
+            return orjson.dumps(data, default=self.default, option=self._option)
+        except orjson.JSONEncodeError:
+            data = JSONSerializer.dumps(self, data)
+            return data.encode("utf-8", "surrogatepass")
+
+
 DEFAULT_SERIALIZERS = {
     JSONSerializer.mimetype: JSONSerializer(),
     TextSerializer.mimetype: TextSerializer(),
@@ -150,17 +351,21 @@ class Deserializer(object):
             )
         self.serializers = serializers
 
-    def loads(self, s, mimetype=None):
+    def get_serializer(self, mimetype=None):
+        """
+        Return the serializer of the ``content-type`` ``mimetype``.
+        """
         if not mimetype:
-            deserializer = self.default
-        else:
-            # split out charset
-            mimetype, _, _ = mimetype.partition(";")
-            try:
-                deserializer = self.serializers[mimetype]
-            except KeyError:
-                raise SerializationError(
-                    "Unknown mimetype, unable to deserialize: %s" % mimetype
-                )
-
-        return deserializer.loads(s)
+            return self.default
+
+        # split out charset
+        mimetype, _, _ = mimetype.partition(";")
+        try:
+            return self.serializers[mimetype]
+        except KeyError:
+            raise SerializationError(
+                "Unknown mimetype, unable to deserialize: %s" % mimetype
+            )
+
+    def loads(self, s, mimetype=None):
+        return self.get_serializer(mimetype).loads(s)
@@ -15,24 +15,33 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Callable, Dict, Union
 
 class Serializer(object):
     mimetype: str
-    def loads(self, s: str) -> Any: ...
+    bytes_native: bool
+    def loads(self, s: Union[str, bytes]) -> Any: ...
     def dumps(self, data: Any) -> str: ...
+    def dumps_bytes(self, data: Any) -> bytes: ...
 
 class TextSerializer(Serializer):
     mimetype: str
-    def loads(self, s: str) -> Any: ...
+    def loads(self, s: Union[str, bytes]) -> Any: ...
     def dumps(self, data: Any) -> str: ...
 
+DEFAULT_ENCODERS: Dict[type, Callable[[Any], Any]]
+
 class JSONSerializer(Serializer):
     mimetype: str
+    def register(self, type_: type, encoder: Callable[[Any], Any]) -> None: ...
     def default(self, data: Any) -> Any: ...
-    def loads(self, s: str) -> Any: ...
+    def loads(self, s: Union[str, bytes]) -> Any: ...
     def dumps(self, data: Any) -> str: ...
 
+class OrjsonSerializer(JSONSerializer):
+    def __init__(self) -> None: ...
+    def dumps_bytes(self, data: Any) -> bytes: ...
+
 DEFAULT_SERIALIZERS: Dict[str, Serializer]
 
 class Deserializer(object):
@@ -41,4 +50,5 @@ class Deserializer(object):
         serializers: Dict[str, Serializer],
         default_mimetype: str = ...,
     ) -> None: ...
-    def loads(self, s: str, mimetype: Optional[str] = ...) -> Any: ...
+    def get_serializer(self, mimetype: Optional[str] = ...) -> Serializer: ...
+    def loads(self, s: Union[str, bytes], mimetype: Optional[str] = ...) -> Any: ...
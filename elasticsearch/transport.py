@@ -15,12 +15,25 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import copy
+import re
 import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from fnmatch import fnmatch
 from itertools import chain
 
+from .compat import Queue, Empty, quote, unquote, to_text, string_types
 from .connection import Urllib3HttpConnection
+from .connection.base import _ReiterableChunks, _is_chunked
 from .connection_pool import ConnectionPool, DummyConnectionPool, EmptyConnectionPool
-from .serializer import JSONSerializer, Deserializer, DEFAULT_SERIALIZERS
+from .serializer import (
+    JSONSerializer,
+    Deserializer,
+    DEFAULT_SERIALIZERS,
+    _bytes_dumper,
+)
 from .exceptions import (
     ConnectionError,
     TransportError,
@@ -28,6 +41,8 @@ from .exceptions import (
     ConnectionTimeout,
 )
 
+logger = logging.getLogger("elasticsearch")
+
 
 def get_host_info(node_info, host):
     """
@@ -49,6 +64,957 @@ def get_host_info(node_info, host):
     return host
 
 
+class HedgePolicy(object):
+    """
+    Decides when an idempotent read (``GET`` and ``HEAD`` requests, searches,
+    ``_mget`` and ``_msearch``) that hasn't been answered yet should also be
+    sent to a second node. The first successful response is used and the
+    other request is abandoned.
+
+    The hedge delay is a ``percentile`` of the latencies recently observed
+    across all the nodes, each node keeping its own window of samples so that
+    the busiest node doesn't push the others out. To cap the extra load every
+    request earns ``max_ratio`` of a hedge, a request is only hedged when a
+    whole one has been earned and at most ``burst`` can be saved up.
+
+    :arg percentile: percentile (0-100) of the observed latencies to wait for
+        before sending the request to a second node
+    :arg max_ratio: maximum number of hedged requests per request sent
+    :arg burst: maximum number of requests that can be hedged in a row
+    :arg window: number of latency samples to keep per node
+    :arg min_samples: number of samples needed before any request is hedged
+    """
+
+    # idempotent endpoints that are sent as POST requests
+    HEDGED_ENDPOINTS = ("_search", "_mget", "_msearch")
+
+    def __init__(
+        self, percentile=95, max_ratio=0.05, burst=10, window=100, min_samples=20
+    ):
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self.window = window
+        self.min_samples = min_samples
+
+        self.lock = threading.Lock()
+        # connection -> recent latencies
+        self.latencies = {}
+        self.tokens = burst
+        self._delay = None
+        # number of samples recorded since the delay was computed
+        self._stale = 0
+
+        # statistics
+        self.requests = 0
+        self.hedged = 0
+        self.hedges_won = 0
+
+    def is_hedgeable(self, method, url):
+        """
+        Whether a request is idempotent and can safely be sent twice.
+        """
+        if method in ("GET", "HEAD"):
+            return True
+        if method != "POST":
+            return False
+        path = url.split("?", 1)[0].rstrip("/")
+        return path.rsplit("/", 1)[-1] in self.HEDGED_ENDPOINTS
+
+    def record(self, connection, duration):
+        """
+        Record how long a successful request over ``connection`` took.
+        """
+        with self.lock:
+            samples = self.latencies.get(connection)
+            if samples is None:
+                samples = self.latencies[connection] = deque(maxlen=self.window)
+            samples.append(duration)
+            self._stale += 1
+
+    def prune(self, connections):
+        """
+        Forget the latencies of nodes that are no longer in ``connections``.
+        """
+        with self.lock:
+            for connection in list(self.latencies):
+                if connection not in connections:
+                    del self.latencies[connection]
+                    self._stale += 1
+
+    def hedge_delay(self):
+        """
+        Number of seconds to wait for an answer before hedging a request, or
+        ``None`` if there isn't enough data yet.
+        """
+        with self.lock:
+            # sorting all the samples is not free, only do it once a tenth of
+            # the window has changed
+            if self._stale and (self._delay is None or self._stale * 10 >= self.window):
+                samples = sorted(chain.from_iterable(self.latencies.values()))
+                self._stale = 0
+                self._delay = None
+                if len(samples) >= max(self.min_samples, 1):
+                    index = int(len(samples) * self.percentile / 100.0)
+                    self._delay = samples[min(index, len(samples) - 1)]
+            return self._delay
+
+    def request_sent(self):
+        """
+        Count a new hedgeable request, earning ``max_ratio`` of a hedge.
+        """
+        with self.lock:
+            self.requests += 1
+            self.tokens = min(self.burst, self.tokens + self.max_ratio)
+
+    def acquire(self):
+        """
+        Take a hedge from the budget, return ``False`` if it is exhausted.
+        """
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self.hedged += 1
+            return True
+
+    def hedge_won(self):
+        with self.lock:
+            self.hedges_won += 1
+
+
+class RetryBudget(object):
+    """
+    Token bucket limiting the number of retries a client sends, so that a
+    degraded cluster isn't hit with ``max_retries + 1`` times the load. Every
+    retry spends a token and every successful request earns ``ratio`` of
+    one back. Once the bucket is empty failed requests are not retried.
+
+    The same instance can be shared between several clients to give them a
+    common budget.
+
+    :arg ratio: number of retries allowed per successful request
+    :arg max_tokens: size of the bucket, the bucket starts full
+    """
+
+    def __init__(self, ratio=0.1, max_tokens=10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+
+        self.lock = threading.Lock()
+        self.tokens = max_tokens
+
+        # statistics
+        self.successes = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def deposit(self):
+        """
+        Earn back ``ratio`` of a retry after a successful request.
+        """
+        with self.lock:
+            self.successes += 1
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """
+        Spend a token on a retry, return ``False`` if the budget is
+        exhausted and the request shouldn't be retried.
+        """
+        with self.lock:
+            if self.tokens < 1:
+                self.rejected += 1
+                return False
+            self.tokens -= 1
+            self.retries += 1
+            return True
+
+    def stats(self):
+        """
+        Return the budget usage as a dictionary.
+        """
+        with self.lock:
+            return {
+                "tokens": self.tokens,
+                "max_tokens": self.max_tokens,
+                "successes": self.successes,
+                "retries": self.retries,
+                "rejected": self.rejected,
+            }
+
+
+class ConcurrencyLimiter(object):
+    """
+    Adaptive limit on the number of requests in flight, either to each node
+    (``per_node=True``) or for the whole client. The limit follows the AIMD
+    algorithm: it grows by one after a successful request made while at least
+    half of the limit was in use, and is multiplied by ``backoff_ratio`` when
+    the cluster signals overload - a ``429`` or ``503`` response, a timeout or
+    a response ``latency_tolerance`` times slower than the average.
+
+    When the limit is reached requests wait for a free slot (up to
+    ``queue_timeout`` seconds) or, with ``block=False``, fail right away with
+    a :class:`~elasticsearch.TransportError`.
+
+    :arg initial_limit: number of requests allowed in flight at first
+    :arg min_limit: lowest the limit can shrink to
+    :arg max_limit: highest the limit can grow to
+    :arg backoff_ratio: factor applied to the limit on overload
+    :arg latency_tolerance: how many times slower than the average latency a
+        response must be to count as overload, ``None`` to ignore latency
+    :arg per_node: keep a separate limit for every node
+    :arg block: wait for a free slot instead of failing
+    :arg queue_timeout: maximum number of seconds to wait for a free slot,
+        ``None`` to wait forever
+    """
+
+    OVERLOAD_STATUS = (429, 503)
+
+    def __init__(
+        self,
+        initial_limit=20,
+        min_limit=1,
+        max_limit=200,
+        backoff_ratio=0.9,
+        latency_tolerance=2.0,
+        per_node=False,
+        block=True,
+        queue_timeout=None,
+    ):
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.per_node = per_node
+        self.block = block
+        self.queue_timeout = queue_timeout
+
+        self.lock = threading.Lock()
+        # key -> [limit, in_flight, average latency]
+        self.limits = {}
+        # key -> callables waiting for a free slot
+        self.waiters = {}
+
+        # statistics
+        self.rejected = 0
+
+    def _state(self, connection):
+        key = connection if self.per_node else None
+        state = self.limits.get(key)
+        if state is None:
+            state = self.limits[key] = [float(self.initial_limit), 0, None]
+        return key, state
+
+    def limit(self, connection=None):
+        """
+        Current limit for ``connection`` (or for the client if the limit
+        isn't per node).
+        """
+        with self.lock:
+            return int(self._state(connection)[1][0])
+
+    def try_acquire(self, connection, waiter=None):
+        """
+        Take a slot for a request over ``connection`` if one is free. If not,
+        and ``waiter`` is given, it will be called once a slot frees up.
+        """
+        with self.lock:
+            key, state = self._state(connection)
+            if state[1] < int(state[0]):
+                state[1] += 1
+                return True
+            if waiter is not None:
+                self.waiters.setdefault(key, deque()).append(waiter)
+            return False
+
+    def cancel_waiter(self, connection, waiter):
+        """
+        Stop waiting for a slot. If ``waiter`` has been called already the
+        wake up is passed on to the next one.
+        """
+        with self.lock:
+            key = connection if self.per_node else None
+            waiters = self.waiters.get(key, ())
+            if waiter in waiters:
+                waiters.remove(waiter)
+                return
+        self._wake(key)
+
+    def reject(self):
+        with self.lock:
+            self.rejected += 1
+
+    def acquire(self, connection):
+        """
+        Take a slot for a request over ``connection``, waiting for one to
+        free up if needed. Returns ``False`` if no slot could be taken.
+        """
+        if self.try_acquire(connection):
+            return True
+
+        deadline = None
+        if self.queue_timeout is not None:
+            deadline = time.time() + self.queue_timeout
+        while self.block:
+            woken = threading.Event()
+            if self.try_acquire(connection, woken.set):
+                return True
+            timeout = None if deadline is None else max(0, deadline - time.time())
+            if not woken.wait(timeout):
+                self.cancel_waiter(connection, woken.set)
+                break
+
+        self.reject()
+        return False
+
+    def release(self, connection, duration, overloaded=False):
+        """
+        Free the slot taken by a finished request and adapt the limit.
+
+        :arg duration: time it took to get the response, in seconds
+        :arg overloaded: whether the cluster signalled overload
+        """
+        with self.lock:
+            key = connection if self.per_node else None
+            state = self.limits.get(key)
+            if state is None:
+                # the node has been pruned in the meantime
+                return
+            limit, in_flight, average = state
+            state[1] = in_flight - 1
+
+            if (
+                not overloaded
+                and average is not None
+                and self.latency_tolerance is not None
+            ):
+                overloaded = duration > self.latency_tolerance * average
+            if not overloaded:
+                state[2] = (
+                    duration if average is None else average * 0.9 + duration * 0.1
+                )
+
+            if overloaded:
+                state[0] = max(self.min_limit, limit * self.backoff_ratio)
+            elif in_flight * 2 >= limit:
+                state[0] = min(self.max_limit, limit + 1)
+        self._wake(key)
+
+    def _wake(self, key):
+        with self.lock:
+            state = self.limits.get(key)
+            waiters = self.waiters.get(key)
+            if not waiters or state[1] >= int(state[0]):
+                return
+            waiter = waiters.popleft()
+        waiter()
+
+    def prune(self, connections):
+        """
+        Forget the limits of nodes that are no longer in ``connections``. The
+        requests waiting for a slot on such a node are woken up.
+        """
+        if not self.per_node:
+            return
+        woken = []
+        with self.lock:
+            for key in list(self.limits):
+                if key not in connections:
+                    del self.limits[key]
+                    woken.extend(self.waiters.pop(key, ()))
+        for waiter in woken:
+            waiter()
+
+    def is_overload(self, error):
+        """
+        Whether ``error`` means the cluster is overloaded.
+        """
+        return (
+            isinstance(error, ConnectionTimeout)
+            or error.status_code in self.OVERLOAD_STATUS
+        )
+
+
+class RoutingPolicy(object):
+    """
+    Routes requests to nodes according to their roles, for example bulk
+    requests to ingest nodes and searches to coordinating only nodes, so that
+    heavy indexing doesn't compete with searches for the same nodes::
+
+        RoutingPolicy({"bulk": ["ingest"], "search": ["coordinating_only"]})
+
+    Requests are sorted into API families by the first endpoint in their
+    path found in ``ENDPOINT_FAMILIES`` (``_bulk`` is ``bulk``, ``_search``,
+    ``_msearch`` and ``_count`` are ``search``, ``_cluster``, ``_cat``,
+    ``_nodes`` and ``_tasks`` are ``admin``). A request is sent to a node
+    having any of the roles listed for its family, the special
+    ``coordinating_only`` role matching nodes without any role. Families
+    without a route, and requests when none of the matching nodes is live,
+    go to any node.
+
+    The roles of the nodes are only known once they have been sniffed, or
+    when given as ``roles`` in the ``hosts`` parameter.
+
+    :arg routes: dictionary mapping API families to lists of node roles
+    """
+
+    ENDPOINT_FAMILIES = {
+        "_bulk": "bulk",
+        "_search": "search",
+        "_msearch": "search",
+        "_count": "search",
+        "_cluster": "admin",
+        "_cat": "admin",
+        "_nodes": "admin",
+        "_tasks": "admin",
+    }
+
+    def __init__(self, routes):
+        self.routes = dict(
+            (family, frozenset(roles)) for family, roles in routes.items()
+        )
+
+    def family(self, method, url):
+        """
+        Return the API family of a request, ``None`` if it isn't known.
+        """
+        for part in url.split("?", 1)[0].split("/"):
+            family = self.ENDPOINT_FAMILIES.get(part)
+            if family is not None:
+                return family
+        return None
+
+    def roles_for(self, method, url):
+        """
+        Return the node roles a request should be routed to, ``None`` to use
+        any node.
+        """
+        return self.routes.get(self.family(method, url))
+
+
+def _estimate_size(data, limit):
+    """
+    Rough size in bytes of ``data`` once serialized. The walk through the
+    objects stops as soon as ``limit`` is reached, so that finding out that
+    a body is large costs no more than going through ``limit`` bytes of it.
+    """
+    if isinstance(data, (string_types, bytearray, memoryview)):
+        return len(data)
+    size, stack = 0, [iter((data,))]
+    while stack:
+        if size >= limit:
+            return size
+        for item in stack[-1]:
+            if isinstance(item, string_types):
+                size += len(item) + 3
+            elif isinstance(item, dict):
+                size += 2
+                stack.append(chain.from_iterable(item.items()))
+                break
+            elif isinstance(item, (list, tuple)):
+                size += 2
+                stack.append(iter(item))
+                break
+            else:
+                # numbers, dates... or the buffer of a numpy array
+                size += getattr(item, "nbytes", 8)
+            if size >= limit:
+                return size
+        else:
+            stack.pop()
+    return size
+
+
+def _serialize_body(serializer, body):
+    """
+    Serialize ``body`` into ``bytes``.
+    """
+    return _bytes_dumper(serializer)(body)
+
+
+def _deserialize_body(deserializer, data, mimetype):
+    """
+    Deserialize the body of a response.
+    """
+    serializer = deserializer.get_serializer(mimetype)
+    if not getattr(serializer, "bytes_native", False):
+        data = to_text(data)
+    return serializer.loads(data)
+
+
+class OffloadPolicy(object):
+    """
+    Keeps CPU heavy work on large payloads off the event loop of an
+    :class:`~elasticsearch.AsyncTransport`: request bodies of at least
+    ``min_size`` bytes are serialized and compressed, and responses of at
+    least ``min_size`` bytes are deserialized, in ``executor`` while the
+    loop goes on serving other coroutines. Smaller payloads are handled on
+    the loop, where they cost less than a round trip to the executor.
+    ``async_streaming_bulk`` serializes large documents in the executor as
+    well and lets the loop run every ``min_size`` bytes of smaller ones.
+
+    The size of a body that isn't serialized yet is estimated by walking
+    through it, up to ``min_size`` bytes.
+
+    Compression releases the GIL and runs in parallel with the loop in a
+    thread pool but the ``json`` module holds it while it (de)serializes a
+    payload, so JSON only leaves the loop with a
+    :class:`~concurrent.futures.ProcessPoolExecutor`, at the cost of copying
+    the payloads to and from the processes. The work is done by functions
+    that can be pickled along with the serializers and the compression.
+
+    :arg executor: :class:`~concurrent.futures.Executor` to run the work
+        in, defaults to the default executor of the loop (a thread pool)
+    :arg min_size: size in bytes from which payloads are offloaded
+    """
+
+    def __init__(self, executor=None, min_size=1024 * 1024):
+        self.executor = executor
+        self.min_size = min_size
+
+    def offload(self, payload):
+        """
+        Whether ``payload``, ``bytes``, text or an object to serialize, is
+        large enough to be handled in the executor.
+        """
+        return _estimate_size(payload, self.min_size) >= self.min_size
+
+    def run(self, loop, func, *args):
+        """
+        Call ``func(*args)`` in the executor and return an awaitable of its
+        result.
+        """
+        return loop.run_in_executor(self.executor, func, *args)
+
+
+def _pool_connection(pool, roles):
+    """
+    Get a connection from ``pool``, among the nodes with one of ``roles``
+    if any: custom connection pools may not take them.
+    """
+    if roles:
+        return pool.get_connection(roles)
+    return pool.get_connection()
+
+
+class _ChunkedBody(object):
+    """
+    Iterator over the chunks of a streamed request body, encoding text and
+    remembering whether any chunk was consumed: the body can only be sent
+    again by a retry as long as it wasn't, or if its chunks are re-iterable.
+    """
+
+    def __init__(self, chunks):
+        self.source = chunks
+        self.chunks = iter(chunks)
+        self.started = False
+
+    def restart(self):
+        """
+        Get the body ready to be sent again, return whether it can be.
+        """
+        if self.started:
+            if not isinstance(self.source, _ReiterableChunks):
+                return False
+            self.chunks = iter(self.source)
+            self.started = False
+        return True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.started = True
+        chunk = next(self.chunks)
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode("utf-8", "surrogatepass")
+        return chunk
+
+    next = __next__
+
+
+class _StreamedChunks(object):
+    """
+    Iterator over the chunks of a streamed response. The request only counts
+    as finished, with ``finish`` called with the error it failed with if any,
+    once the chunks are exhausted, fail or are closed.
+    """
+
+    def __init__(self, chunks, finish):
+        self.source = chunks
+        self.chunks = iter(chunks)
+        self.finish = finish
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.finish is None:
+            raise StopIteration
+        try:
+            return next(self.chunks)
+        except StopIteration:
+            self._finish(None)
+            raise
+        except Exception as e:
+            self._finish(e)
+            raise
+
+    next = __next__
+
+    def close(self):
+        self._finish(None)
+
+    def _finish(self, error):
+        finish, self.finish = self.finish, None
+        if finish is None:
+            return
+        try:
+            close = getattr(self.source, "close", None)
+            if close is not None:
+                close()
+        finally:
+            finish(error)
+
+
+def _request_key(method, url, headers, params, body, ignore):
+    """
+    Hashable key identifying a request, ``None`` if the request can't be
+    identified (unhashable parameters or a body that isn't serialized yet).
+    """
+    key = (
+        method,
+        url,
+        tuple(sorted((headers or {}).items())),
+        tuple(sorted((params or {}).items())),
+        body,
+        tuple(ignore),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class RequestCoalescer(object):
+    """
+    Shares a single in-flight request between concurrent identical
+    idempotent requests: while a request is running any identical one (same
+    method, url, headers, query parameters and serialized body) waits for
+    its outcome instead of being sent again. Every caller gets its own copy
+    of the response, or the same exception.
+
+    ``GET`` and ``HEAD`` requests, and ``POST`` requests to the endpoints in
+    ``COALESCED_ENDPOINTS``, are coalesced. The ``request_timeout`` of the
+    waiting requests isn't taken into account, they wait as long as the
+    request they are waiting for.
+
+    :arg copy_response: function returning a copy of a deserialized response
+        handed to each waiting caller, :func:`copy.deepcopy` by default
+    """
+
+    COALESCED_ENDPOINTS = ("_search", "_mget", "_msearch", "_count")
+
+    def __init__(self, copy_response=copy.deepcopy):
+        self.copy_response = copy_response
+
+        self.lock = threading.Lock()
+        # request key -> in-flight request
+        self.in_flight = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    def key(self, method, url, headers, params, body, ignore=()):
+        """
+        Return the key identifying a request, ``None`` if it can't be
+        coalesced.
+        """
+        if method not in ("GET", "HEAD"):
+            path = url.split("?", 1)[0].rstrip("/")
+            if (
+                method != "POST"
+                or path.rsplit("/", 1)[-1] not in self.COALESCED_ENDPOINTS
+            ):
+                return None
+        return _request_key(method, url, headers, params, body, ignore)
+
+    def call(self, key, func):
+        """
+        Return the result of ``func()``, or of the identical request already
+        in flight.
+        """
+        with self.lock:
+            self.requests += 1
+            flight = self.in_flight.get(key)
+            leader = flight is None
+            if leader:
+                # [done event, result, exception, number of waiting requests]
+                flight = self.in_flight[key] = [threading.Event(), None, None, 0]
+            else:
+                flight[3] += 1
+                self.coalesced += 1
+
+        if not leader:
+            flight[0].wait()
+            if flight[2] is not None:
+                raise flight[2]
+            return self.copy_response(flight[1])
+
+        try:
+            result = func()
+        except BaseException as e:
+            flight[2] = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+                waiters = flight[3]
+            if waiters and flight[2] is None:
+                try:
+                    # the waiting requests copy a response of their own, the
+                    # caller may modify the one it gets while they do
+                    flight[1] = self.copy_response(result)
+                except BaseException as e:
+                    flight[2] = e
+            flight[0].set()
+        return result
+
+    def stats(self):
+        """
+        Return the number of coalesceable requests seen and how many of them
+        shared another request's response.
+        """
+        with self.lock:
+            return {"requests": self.requests, "coalesced": self.coalesced}
+
+
+class ResponseCache(object):
+    """
+    Caches the responses of read APIs for a few seconds, for data read far
+    more often than it changes (dashboards, lookups)::
+
+        ResponseCache(max_entries=10000, ttls={"_search": 5, "_cat": 30})
+
+    The endpoint of a request is the first part of its path found in
+    ``ttls``, which is merged into ``DEFAULT_TTLS`` (``_doc`` and
+    ``_source`` for get, ``_mget``, ``_search``, ``_count``, ``_mapping``
+    and ``_cat``); set an endpoint's TTL to ``0`` to not cache it. Only
+    ``GET`` and ``HEAD`` requests, and ``POST`` requests to ``_search``,
+    ``_mget`` and ``_count``, are cached, never scrolls. Identical requests
+    (same method, url, headers, query parameters and body) share an entry
+    and the least recently used entry is evicted once there are
+    ``max_entries``.
+
+    Unless ``invalidate_on_write`` is ``False``, a write sent through the
+    same client (``WRITE_ENDPOINTS``, or deleting or creating an index)
+    drops the cached responses of the indices it targets, or of all indices
+    when they aren't known (bulk requests without an index for example).
+    Index names are compared as written in the requests, wildcard patterns
+    included, but aliases aren't resolved: cache the responses of aliases
+    only when the writes go through the same alias or a short TTL is fine.
+
+    :arg max_entries: maximum number of cached responses
+    :arg ttls: dictionary mapping endpoints to the number of seconds their
+        responses are cached for
+    :arg invalidate_on_write: whether writes drop the cached responses of
+        the indices they target
+    :arg copy_response: function returning a copy of a deserialized
+        response, used so that callers modifying their response don't
+        modify the cached one, :func:`copy.deepcopy` by default
+    """
+
+    DEFAULT_TTLS = {
+        "_doc": 1,
+        "_source": 1,
+        "_mget": 1,
+        "_search": 1,
+        "_count": 1,
+        "_mapping": 60,
+        "_cat": 10,
+    }
+    POST_ENDPOINTS = ("_search", "_mget", "_count")
+    WRITE_ENDPOINTS = (
+        "_doc",
+        "_create",
+        "_update",
+        "_bulk",
+        "_delete_by_query",
+        "_update_by_query",
+        "_mapping",
+    )
+
+    _BULK_INDEX = re.compile(br'"_index"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+    def __init__(
+        self,
+        max_entries=1000,
+        ttls=None,
+        invalidate_on_write=True,
+        copy_response=copy.deepcopy,
+    ):
+        self.max_entries = max_entries
+        self.ttls = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self.invalidate_on_write = invalidate_on_write
+        self.copy_response = copy_response
+
+        self.lock = threading.Lock()
+        # key -> (expires_at, indices, response), least recently used first
+        self.entries = OrderedDict()
+        # index name or pattern ("_all" for all indices) -> keys
+        self.by_index = {}
+        # bumped by every invalidation so that responses of requests sent
+        # before a write aren't cached after it
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _parse(self, url):
+        path = url.split("?", 1)[0].strip("/")
+        parts = path.split("/") if path else []
+        indices = None
+        if parts and not parts[0].startswith("_"):
+            indices = tuple(unquote(parts[0]).split(","))
+        return parts, indices
+
+    def key(self, method, url, headers, params, body, ignore=()):
+        """
+        Return the key and TTL of a cacheable request, ``(None, None)``
+        otherwise.
+        """
+        if method not in ("GET", "HEAD", "POST"):
+            return None, None
+        parts, _ = self._parse(url)
+        endpoint = None
+        for part in parts:
+            if part in self.ttls:
+                endpoint = part
+                break
+        if (
+            not endpoint
+            or not self.ttls[endpoint]
+            or "scroll" in parts
+            or (params and "scroll" in params)
+            or (method == "POST" and endpoint not in self.POST_ENDPOINTS)
+        ):
+            return None, None
+        key = _request_key(method, url, headers, params, body, ignore)
+        return key, (self.ttls[endpoint] if key is not None else None)
+
+    def get(self, key, now=None):
+        """
+        Return ``(True, response)`` for a cached response, ``(False,
+        generation)`` otherwise, the generation being passed on to
+        :meth:`put`.
+        """
+        now = now if now else time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or now >= entry[0]:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False, self.generation
+            # move it to the most recently used end
+            del self.entries[key]
+            self.entries[key] = entry
+            self.hits += 1
+        return True, self.copy_response(entry[2])
+
+    def put(self, key, url, response, ttl, generation, now=None):
+        """
+        Cache the response of a request sent at ``generation``.
+        """
+        now = now if now else time.time()
+        response = self.copy_response(response)
+        _, indices = self._parse(url)
+        indices = indices or ("_all",)
+        with self.lock:
+            # a write happened while the request was in flight
+            if generation != self.generation:
+                return
+            if key in self.entries:
+                self._remove(key)
+            while len(self.entries) >= self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+            self.entries[key] = (now + ttl, indices, response)
+            for index in indices:
+                self.by_index.setdefault(index, set()).add(key)
+
+    def written(self, method, url, body=None):
+        """
+        Drop the cached responses of the indices a request writes to, if it
+        is a write.
+        """
+        if not self.invalidate_on_write or method not in ("PUT", "POST", "DELETE"):
+            return
+        parts, indices = self._parse(url)
+        # creating or deleting an index
+        index_api = len(parts) == 1 and indices is not None and method != "POST"
+        if not index_api and not any(part in self.WRITE_ENDPOINTS for part in parts):
+            return
+
+        if "_bulk" in parts:
+            # the actions can target other indices than the one in the url
+            if isinstance(body, bytes):
+                found = self._BULK_INDEX.findall(body)
+                indices = (indices or ()) + tuple(i.decode("utf-8") for i in found)
+                indices = indices or None
+            else:
+                indices = None
+        self.invalidate(indices)
+
+    def invalidate(self, indices=None):
+        """
+        Drop the cached responses of ``indices``, of all indices if
+        ``None``. Both the cached and the written indices may be patterns.
+        """
+        with self.lock:
+            self.generation += 1
+            self.invalidations += 1
+            if indices is None or "_all" in indices:
+                self.entries.clear()
+                self.by_index.clear()
+                return
+            for name in list(self.by_index):
+                if name == "_all" or any(
+                    name == index
+                    or ("*" in name and fnmatch(index, name))
+                    or ("*" in index and fnmatch(name, index))
+                    for index in indices
+                ):
+                    for key in list(self.by_index.get(name, ())):
+                        self._remove(key)
+
+    def _remove(self, key):
+        _, indices, _ = self.entries.pop(key)
+        for index in indices:
+            keys = self.by_index.get(index)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_index[index]
+
+    def stats(self):
+        """
+        Return the number of cached responses and the hits, misses,
+        evictions and invalidations so far.
+        """
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
 class Transport(object):
     """
     Encapsulation of transport-related to logic. Handles instantiation of the
@@ -59,6 +1025,9 @@ class Transport(object):
 
     DEFAULT_CONNECTION_CLASS = Urllib3HttpConnection
 
+    # maximum number of nodes asked for the node information at once
+    SNIFF_THREAD_COUNT = 8
+
     def __init__(
         self,
         hosts,
@@ -76,6 +1045,16 @@ class Transport(object):
         retry_on_status=(502, 503, 504),
         retry_on_timeout=False,
         send_get_body_as="GET",
+        health_check_interval=None,
+        sniff_in_background=False,
+        hedge_policy=None,
+        retry_budget=None,
+        concurrency_limiter=None,
+        routing_policy=None,
+        shard_router=None,
+        request_coalescer=None,
+        response_cache=None,
+        warm_up_connections=0,
         **kwargs
     ):
         """
@@ -110,6 +1089,40 @@ class Transport(object):
             don't support passing bodies with GET requests. If you set this to
             'POST' a POST method will be used instead, if to 'source' then the body
             will be serialized and passed as a query parameter `source`.
+        :arg health_check_interval: number of seconds between health checks of
+            dead connections. When set, a background thread probes dead nodes
+            with a ``HEAD /`` request and only returns them to the pool once
+            they respond, instead of retrying them with user requests after
+            their timeout.
+        :arg sniff_in_background: sniff from a background thread instead of
+            from within the request that notices the ``sniffer_timeout`` has
+            expired or that a connection has failed. The new connection pool
+            is swapped in once sniffing is done, requests never wait for it.
+        :arg hedge_policy: :class:`~elasticsearch.transport.HedgePolicy`
+            instance. When set, idempotent reads that take longer than usual
+            are also sent to a second node and the first response is used.
+        :arg retry_budget: :class:`~elasticsearch.transport.RetryBudget`
+            instance limiting the number of retries relative to the number of
+            successful requests.
+        :arg concurrency_limiter:
+            :class:`~elasticsearch.transport.ConcurrencyLimiter` instance
+            adapting the number of requests in flight to how loaded the
+            cluster is.
+        :arg routing_policy: :class:`~elasticsearch.transport.RoutingPolicy`
+            instance sending each family of APIs to the nodes with the
+            matching roles.
+        :arg shard_router: :class:`~elasticsearch.routing.ShardRouter`
+            instance sending single document operations straight to a node
+            holding the document's shard.
+        :arg request_coalescer: :class:`~elasticsearch.transport.RequestCoalescer`
+            instance sharing one in-flight request between concurrent
+            identical reads.
+        :arg response_cache: :class:`~elasticsearch.transport.ResponseCache`
+            instance caching the responses of read APIs.
+        :arg warm_up_connections: number of connections to open to each node,
+            in the background, when the client is created and when sniffing
+            discovers new nodes (default 0, connections are opened by the
+            first requests)
 
         Any extra keyword arguments will be passed to the `connection_class`
         when creating and instance unless overridden by that connection's
@@ -132,6 +1145,19 @@ class Transport(object):
         self.retry_on_timeout = retry_on_timeout
         self.retry_on_status = retry_on_status
         self.send_get_body_as = send_get_body_as
+        self.health_check_interval = health_check_interval
+        self.hedge_policy = hedge_policy
+        self.retry_budget = retry_budget
+        self.concurrency_limiter = concurrency_limiter
+        self.routing_policy = routing_policy
+        self.shard_router = shard_router
+        self.request_coalescer = request_coalescer
+        self.response_cache = response_cache
+        self.warm_up_connections = warm_up_connections
+        # (connection options, {(host, port): connection})
+        self._addresses = None
+        # signals background threads to stop
+        self._closed = threading.Event()
 
         # data serializer
         self.serializer = serializer
@@ -175,6 +1201,23 @@ class Transport(object):
         if sniff_on_start:
             self.sniff_hosts(True)
 
+        self.sniff_thread = None
+        if sniff_in_background and (sniffer_timeout or sniff_on_connection_fail):
+            self._sniff_requested = threading.Event()
+            self.sniff_thread = threading.Thread(
+                target=self._sniff_loop, name="elasticsearch-sniffer"
+            )
+            self.sniff_thread.daemon = True
+            self.sniff_thread.start()
+
+        self.health_check_thread = None
+        if health_check_interval:
+            self.health_check_thread = threading.Thread(
+                target=self._health_check_loop, name="elasticsearch-health-check"
+            )
+            self.health_check_thread.daemon = True
+            self.health_check_thread.start()
+
     def add_connection(self, host):
         """
         Create a new :class:`~elasticsearch.Connection` instance and add it to the pool.
@@ -193,19 +1236,30 @@ class Transport(object):
         :arg hosts: same as `__init__`
         """
         # construct the connections
+        def _connection_params(host):
+            # the roles and attributes of a node don't change the connection
+            return dict(
+                (k, v) for (k, v) in host.items() if k not in ("roles", "attributes")
+            )
+
+        created = []
+
         def _create_connection(host):
+            params = _connection_params(host)
             # if this is not the initial setup look at the existing connection
             # options and identify connections that haven't changed and can be
             # kept around.
             if hasattr(self, "connection_pool"):
                 for (connection, old_host) in self.connection_pool.connection_opts:
-                    if old_host == host:
+                    if _connection_params(old_host) == params:
                         return connection
 
             # previously unseen params, create new connection
             kwargs = self.kwargs.copy()
-            kwargs.update(host)
-            return self.connection_class(**kwargs)
+            kwargs.update(params)
+            connection = self.connection_class(**kwargs)
+            created.append(connection)
+            return connection
 
         connections = map(_create_connection, hosts)
 
@@ -213,20 +1267,58 @@ class Transport(object):
         if len(connections) == 1:
             self.connection_pool = DummyConnectionPool(connections)
         else:
+            pool_kwargs = self.kwargs
+            if self.health_check_interval:
+                # dead connections are brought back by the health checker
+                pool_kwargs = dict(pool_kwargs, resurrect_on_timeout=False)
             # pass the hosts dicts to the connection pool to optionally extract parameters from
             self.connection_pool = self.connection_pool_class(
-                connections, **self.kwargs
+                connections, **pool_kwargs
             )
 
-    def get_connection(self):
+        if self.hedge_policy is not None:
+            self.hedge_policy.prune(self.connection_pool.connections)
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.prune(
+                [c for (c, _) in self.connection_pool.connection_opts]
+            )
+        if self.warm_up_connections and created:
+            self._warm_up(created)
+
+    def _warm_up(self, connections):
+        """
+        Open ``warm_up_connections`` connections to each of ``connections``
+        in the background.
+        """
+
+        def warm_up(connection):
+            try:
+                connection.warm_up(self.warm_up_connections)
+            except Exception:
+                logger.warning(
+                    "Unable to warm up the connections to %r.",
+                    connection,
+                    exc_info=True,
+                )
+
+        for connection in connections:
+            thread = threading.Thread(
+                target=warm_up, args=(connection,), name="elasticsearch-warm-up"
+            )
+            thread.daemon = True
+            thread.start()
+
+    def get_connection(self, roles=None):
         """
         Retrieve a :class:`~elasticsearch.Connection` instance from the
         :class:`~elasticsearch.ConnectionPool` instance.
+
+        :arg roles: prefer nodes with one of these roles
         """
-        if self.sniffer_timeout:
+        if self.sniffer_timeout and self.sniff_thread is None:
             if time.time() >= self.last_sniff + self.sniffer_timeout:
                 self.sniff_hosts()
-        return self.connection_pool.get_connection()
+        return _pool_connection(self.connection_pool, roles)
 
     def _get_sniff_data(self, initial=False):
         """
@@ -234,6 +1326,10 @@ class Transport(object):
         dictionaries (one per node) containing all the information from the
         cluster.
 
+        The request is sent to all the known nodes in parallel and the first
+        node to answer wins, so that unresponsive nodes don't delay sniffing
+        by ``sniff_timeout`` each.
+
         It also sets the last_sniff attribute in case of a successful attempt.
 
         In rare cases it might be possible to override this method in your
@@ -247,21 +1343,13 @@ class Transport(object):
             self.last_sniff = time.time()
             # go through all current connections as well as the
             # seed_connections for good measure
-            for c in chain(self.connection_pool.connections, self.seed_connections):
-                try:
-                    # use small timeout for the sniffing request, should be a fast api call
-                    _, headers, node_info = c.perform_request(
-                        "GET",
-                        "/_nodes/_all/http",
-                        timeout=self.sniff_timeout if not initial else None,
-                    )
-                    node_info = self.deserializer.loads(
-                        node_info, headers.get("content-type")
-                    )
-                    break
-                except (ConnectionError, SerializationError):
-                    pass
-            else:
+            connections = list(self.connection_pool.connections)
+            connections.extend(c for c in self.seed_connections if c not in connections)
+            # use small timeout for the sniffing request, should be a fast api call
+            node_info = self._sniff_first_responder(
+                connections, self.sniff_timeout if not initial else None
+            )
+            if node_info is None:
                 raise TransportError("N/A", "Unable to sniff hosts.")
         except Exception:
             # keep the previous value on error
@@ -270,6 +1358,62 @@ class Transport(object):
 
         return list(node_info["nodes"].values())
 
+    def _sniff_first_responder(self, connections, timeout):
+        """
+        Ask ``connections`` for the node information using up to
+        ``SNIFF_THREAD_COUNT`` threads and return the first valid answer, or
+        ``None`` if no node answered. Once a node has answered no further
+        requests are started and the ones still in flight are abandoned.
+        """
+
+        def sniff(connection):
+            _, headers, node_info = connection.perform_request(
+                "GET", "/_nodes/_all/http", timeout=timeout
+            )
+            return self.deserializer.loads(node_info, headers.get("content-type"))
+
+        # no need for threads when there is only one node to ask
+        if len(connections) == 1:
+            try:
+                return sniff(connections[0])
+            except (ConnectionError, SerializationError):
+                return None
+
+        results = Queue()
+        answered = threading.Event()
+        lock = threading.Lock()
+        pending = iter(connections)
+
+        def worker():
+            while not answered.is_set():
+                with lock:
+                    connection = next(pending, None)
+                if connection is None:
+                    return
+                try:
+                    node_info = sniff(connection)
+                except Exception as e:
+                    results.put((None, e))
+                else:
+                    answered.set()
+                    results.put((node_info, None))
+
+        for _ in range(min(len(connections), self.SNIFF_THREAD_COUNT)):
+            thread = threading.Thread(target=worker, name="elasticsearch-sniff")
+            thread.daemon = True
+            thread.start()
+
+        try:
+            for _ in connections:
+                node_info, error = results.get()
+                if error is None:
+                    return node_info
+                if not isinstance(error, (ConnectionError, SerializationError)):
+                    raise error
+            return None
+        finally:
+            answered.set()
+
     def _get_host_info(self, host_info):
         host = {}
         address = host_info.get("http", {}).get("publish_address")
@@ -289,6 +1433,12 @@ class Transport(object):
             host["host"], host["port"] = address.rsplit(":", 1)
             host["port"] = int(host["port"])
 
+        # keep the roles and attributes (zone, rack, ...) of the node in the
+        # connection options so that selectors can make use of them
+        for key in ("roles", "attributes"):
+            if key in host_info:
+                host[key] = host_info[key]
+
         return self.host_info_callback(host_info, host)
 
     def sniff_hosts(self, initial=False):
@@ -314,6 +1464,34 @@ class Transport(object):
 
         self.set_connections(hosts)
 
+    def check_dead_connections(self):
+        """
+        Send a ``HEAD /`` request to every dead connection and return the
+        ones that respond to the live pool. Returns the revived connections.
+        """
+        revived = []
+        pool = self.connection_pool
+        for connection in pool.dead_connections():
+            try:
+                connection.perform_request(
+                    "HEAD", "/", timeout=self.health_check_interval
+                )
+            except TransportError as e:
+                # any HTTP response other than a retryable status means the
+                # node is up again
+                if self._is_node_failure(e):
+                    continue
+            if pool.revive(connection):
+                revived.append(connection)
+        return revived
+
+    def _health_check_loop(self):
+        while not self._closed.wait(self.health_check_interval):
+            try:
+                self.check_dead_connections()
+            except Exception:
+                logger.exception("Health check of dead connections failed.")
+
     def mark_dead(self, connection):
         """
         Mark a connection as dead (failed) in the connection pool. If sniffing
@@ -324,7 +1502,27 @@ class Transport(object):
         # mark as dead even when sniffing to avoid hitting this host during the sniff process
         self.connection_pool.mark_dead(connection)
         if self.sniff_on_connection_fail:
-            self.sniff_hosts()
+            if self.sniff_thread is not None:
+                self._sniff_requested.set()
+            else:
+                self.sniff_hosts()
+
+    def _sniff_loop(self):
+        while not self._closed.is_set():
+            timeout = None
+            if self.sniffer_timeout:
+                timeout = max(0, self.last_sniff + self.sniffer_timeout - time.time())
+            self._sniff_requested.wait(timeout)
+            if self._closed.is_set():
+                return
+
+            self._sniff_requested.clear()
+            try:
+                self.sniff_hosts()
+            except Exception:
+                # don't let the thread die, the next sniff may work
+                logger.warning("Sniffing in the background failed.", exc_info=True)
+                self.last_sniff = time.time()
 
     def perform_request(self, method, url, headers=None, params=None, body=None):
         """
@@ -338,6 +1536,20 @@ class Transport(object):
         If the operation was successful and the connection used was previously
         marked as dead, mark it as live, resetting it's failure count.
 
+        ``request_timeout`` in ``params`` limits each attempt while
+        ``total_timeout`` (in seconds) or ``deadline`` (a :func:`time.time`
+        timestamp) limit the whole request: every retry only gets the time
+        that is left and no attempt is started once it is over.
+
+        With ``raw_response`` in ``params`` the body of the response is
+        returned as ``bytes``, without being deserialized, to be forwarded
+        as is. With ``stream_response`` it is returned as an iterator of
+        ``bytes`` chunks instead, read from the connection as the iterator is
+        consumed, to be parsed incrementally (see
+        :class:`~elasticsearch.helpers.HitsParser`); the iterator has to be
+        consumed or closed for the connection to be reused. Such requests are
+        neither cached, coalesced nor hedged.
+
         :arg method: HTTP method to use
         :arg url: absolute url (without host) to target
         :arg headers: dictionary of headers, will be handed over to the
@@ -345,30 +1557,135 @@ class Transport(object):
         :arg params: dictionary of query parameters, will be handed over to the
             underlying :class:`~elasticsearch.Connection` class for serialization
         :arg body: body of the request, will be serialized using serializer and
-            passed to the connection
+            passed to the connection. An iterator of ``bytes`` (or text)
+            chunks, a generator for instance, is sent with chunked transfer
+            encoding as it is produced instead. Such a request is only
+            retried if the failed attempt didn't consume any chunk.
         """
-        method, params, body, ignore, timeout = self._resolve_request_args(
-            method, params, body
+        (
+            method,
+            params,
+            body,
+            ignore,
+            timeout,
+            deadline,
+            raw,
+            stream,
+        ) = self._resolve_request_args(method, params, body)
+        # neither the bodies nor a chunked request can be shared
+        keyed = not (raw or stream or isinstance(body, _ChunkedBody))
+
+        cache, cache_key = self.response_cache, None
+        if cache is not None and keyed:
+            cache_key, ttl = cache.key(method, url, headers, params, body, ignore)
+            if cache_key is not None:
+                hit, value = cache.get(cache_key)
+                if hit:
+                    return value
+
+        args = (
+            method,
+            url,
+            headers,
+            params,
+            body,
+            ignore,
+            timeout,
+            deadline,
+            raw,
+            stream,
         )
+        key = None
+        if self.request_coalescer is not None and keyed:
+            key = self.request_coalescer.key(method, url, headers, params, body, ignore)
+        try:
+            if key is not None:
+                data = self.request_coalescer.call(
+                    key, lambda: self._perform_request(*args)
+                )
+            else:
+                data = self._perform_request(*args)
+        finally:
+            if cache is not None and cache_key is None:
+                cache.written(method, url, body)
 
+        if cache_key is not None:
+            cache.put(cache_key, url, data, ttl, value)
+        return data
+
+    def _perform_request(
+        self,
+        method,
+        url,
+        headers,
+        params,
+        body,
+        ignore,
+        timeout,
+        deadline,
+        raw,
+        stream=False,
+    ):
+        # neither a streamed response nor a chunked body can be sent twice
+        hedge = (
+            not stream
+            and not isinstance(body, _ChunkedBody)
+            and self.hedge_policy is not None
+            and self.hedge_policy.is_hedgeable(method, url)
+        )
+        roles = None
+        if self.routing_policy is not None:
+            roles = self.routing_policy.roles_for(method, url)
+        index, routed = None, None
+        if self.shard_router is not None:
+            index, routed = self._get_shard_connection(method, url, params)
+
+        error = None
         for attempt in range(self.max_retries + 1):
-            connection = self.get_connection()
+            # don't start a new attempt once the deadline has passed
+            self._check_deadline(deadline, error)
+            if attempt == 0 and routed is not None:
+                connection = routed
+            else:
+                connection = self.get_connection(roles)
+            attempt_timeout, cut = self._attempt_timeout(connection, timeout, deadline)
 
             try:
-                status, headers_response, data = connection.perform_request(
-                    method,
-                    url,
-                    params,
-                    body,
-                    headers=headers,
-                    ignore=ignore,
-                    timeout=timeout,
-                )
+                if hedge:
+                    connection, response = self._perform_hedged_request(
+                        connection,
+                        roles,
+                        method,
+                        url,
+                        params,
+                        body,
+                        headers=headers,
+                        ignore=ignore,
+                        timeout=attempt_timeout,
+                    )
+                else:
+                    response = self._perform_connection_request(
+                        connection,
+                        method,
+                        url,
+                        params,
+                        body,
+                        headers=headers,
+                        ignore=ignore,
+                        timeout=attempt_timeout,
+                        stream=stream,
+                    )
+                status, headers_response, data = response
+                response = None
 
             except TransportError as e:
                 if method == "HEAD" and e.status_code == 404:
                     return False
+                if cut and isinstance(e, ConnectionTimeout):
+                    # the deadline passed, the node isn't to blame
+                    raise e
 
+                error = e
                 retry = False
                 if isinstance(e, ConnectionTimeout):
                     retry = self.retry_on_timeout
@@ -376,8 +1693,14 @@ class Transport(object):
                     retry = True
                 elif e.status_code in self.retry_on_status:
                     retry = True
+                if isinstance(body, _ChunkedBody) and not body.restart():
+                    # the chunks that were sent are gone
+                    retry = False
 
                 if retry:
+                    if connection is routed:
+                        # the shards may have moved away from the node
+                        self.shard_router.invalidate(index)
                     try:
                         # only mark as dead if we are retrying
                         self.mark_dead(connection)
@@ -385,8 +1708,8 @@ class Transport(object):
                         # If sniffing on failure, it could fail too. Catch the
                         # exception not to interrupt the retries.
                         pass
-                    # raise exception on last retry
-                    if attempt == self.max_retries:
+                    # raise exception on last retry or once the budget is spent
+                    if attempt == self.max_retries or not self._retry_allowed():
                         raise e
                 else:
                     raise e
@@ -394,26 +1717,303 @@ class Transport(object):
             else:
                 # connection didn't fail, confirm it's live status
                 self.connection_pool.mark_live(connection)
+                if self.retry_budget is not None:
+                    self.retry_budget.deposit()
 
                 if method == "HEAD":
                     return 200 <= status < 300
 
+                if stream:
+                    return data
+
+                if raw:
+                    if not isinstance(data, (bytes, bytearray, memoryview)):
+                        data = data.encode("utf-8", "surrogatepass")
+                    return data
+
                 if data:
-                    data = self.deserializer.loads(
-                        data, headers_response.get("content-type")
+                    data = _deserialize_body(
+                        self.deserializer, data, headers_response.get("content-type")
                     )
                 return data
 
+    def _get_shard_connection(self, method, url, params):
+        """
+        Return the index targeted by a single document operation along with
+        a live connection to a node holding the document's shard, or
+        ``None`` to let the connection pool choose. Schedules a refresh of
+        the index's routing information when needed.
+        """
+        router = self.shard_router
+        index, addresses = router.route(method, url, params)
+        if index is None:
+            return None, None
+        if router.start_refresh(index):
+            self._schedule_shard_refresh(index)
+
+        live = self.connection_pool.connections
+        by_address = self._connections_by_address()
+        for address in addresses:
+            connection = by_address.get(address)
+            if connection is not None and connection in live:
+                return index, connection
+        return index, None
+
+    def _connections_by_address(self):
+        opts = self.connection_pool.connection_opts
+        cached = self._addresses
+        if cached is None or cached[0] is not opts:
+            by_address = dict(((c.hostname, c.port), c) for (c, _) in opts)
+            cached = self._addresses = (opts, by_address)
+        return cached[1]
+
+    def _node_addresses(self, node_info):
+        """
+        Map the node ids from the nodes info API to the addresses used as
+        connection options.
+        """
+        addresses = {}
+        for node_id, info in node_info.get("nodes", {}).items():
+            host = self._get_host_info(info)
+            if host:
+                addresses[node_id] = (host["host"], host["port"])
+        return addresses
+
+    def _shard_routing_requests(self, index):
+        """
+        Requests fetching the node addresses, the routing settings and the
+        shard allocation of ``index``.
+        """
+        quoted = quote(index.encode("utf-8"))
+        return (
+            ("/_nodes/_all/http", None),
+            (
+                "/_cluster/state/metadata/%s" % quoted,
+                {
+                    "filter_path": "metadata.indices.*.settings.index,"
+                    "metadata.indices.*.routing_num_shards"
+                },
+            ),
+            ("/%s/_search_shards" % quoted, {"filter_path": "shards"}),
+        )
+
+    def _schedule_shard_refresh(self, index):
+        thread = threading.Thread(
+            target=self._refresh_shard_routing,
+            args=(index,),
+            name="elasticsearch-shard-routing",
+        )
+        thread.daemon = True
+        thread.start()
+
+    def _refresh_shard_routing(self, index):
+        router = self.shard_router
+        try:
+            nodes, metadata, shards = [
+                self.perform_request("GET", url, params=params)
+                for (url, params) in self._shard_routing_requests(index)
+            ]
+            router.update(index, metadata, shards, self._node_addresses(nodes))
+        except Exception:
+            logger.warning(
+                "Unable to fetch the shard routing of %r.", index, exc_info=True
+            )
+            # send requests as usual until the next refresh
+            router.update(index, None, None, {})
+        finally:
+            router.refresh_done(index)
+
+    def _perform_connection_request(self, connection, *args, **kwargs):
+        """
+        Send a single request over ``connection``, keeping the connection
+        pool informed about how long it took and whether the node failed.
+        """
+        limiter = self.concurrency_limiter
+        if limiter is not None and not limiter.acquire(connection):
+            raise TransportError("N/A", "Concurrency limit reached.")
+
+        stream = kwargs.pop("stream", False)
+        self.connection_pool.request_started(connection)
+        start = time.time()
+        success = False
+        overloaded = False
+        try:
+            if stream:
+                status, headers, chunks = connection.perform_request_stream(
+                    *args, **kwargs
+                )
+
+                def finish(error):
+                    self._stream_finished(connection, time.time() - start, error)
+
+                response = status, headers, _StreamedChunks(chunks, finish)
+            else:
+                response = connection.perform_request(*args, **kwargs)
+            success = True
+            return response
+        except TransportError as e:
+            success = not self._is_server_error(e)
+            overloaded = limiter is not None and limiter.is_overload(e)
+            raise
+        finally:
+            # a streamed response is finished once its chunks have been read
+            if not (stream and success):
+                duration = time.time() - start
+                self._request_finished(connection, duration, success, overloaded)
+
+    def _request_finished(self, connection, duration, success, overloaded):
+        """
+        Record the outcome of a request over ``connection`` and free its slot
+        in the concurrency limiter.
+        """
+        self.connection_pool.request_finished(connection, duration, success)
+        if success and self.hedge_policy is not None:
+            self.hedge_policy.record(connection, duration)
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.release(connection, duration, overloaded)
+
+    def _stream_finished(self, connection, duration, error):
+        """
+        Finish a streamed request once its response has been read, marking
+        the node dead if the connection failed in the middle of the body.
+        """
+        success = error is None
+        overloaded = False
+        if isinstance(error, TransportError):
+            success = not self._is_server_error(error)
+            limiter = self.concurrency_limiter
+            overloaded = limiter is not None and limiter.is_overload(error)
+        self._request_finished(connection, duration, success, overloaded)
+        if isinstance(error, ConnectionError):
+            try:
+                self.mark_dead(connection)
+            except TransportError:
+                # sniffing on failure may fail too, report the original error
+                pass
+
+    def _perform_hedged_request(self, connection, roles, *args, **kwargs):
+        """
+        Send a request over ``connection`` and, if it isn't answered within
+        the hedge delay, over a second connection (to a node with one of
+        ``roles`` if any) as well. Returns the connection that answered first
+        along with its response. If both requests fail the error of the
+        original one is raised.
+        """
+        policy = self.hedge_policy
+        policy.request_sent()
+        delay = policy.hedge_delay()
+        if delay is None or len(self.connection_pool.connections) < 2:
+            return (
+                connection,
+                self._perform_connection_request(connection, *args, **kwargs),
+            )
+
+        results = Queue()
+
+        def send(conn):
+            try:
+                response = self._perform_connection_request(conn, *args, **kwargs)
+            except Exception as e:
+                results.put((conn, None, e))
+            else:
+                results.put((conn, response, None))
+
+        def start(conn):
+            thread = threading.Thread(
+                target=send, args=(conn,), name="elasticsearch-hedge"
+            )
+            thread.daemon = True
+            thread.start()
+
+        start(connection)
+        try:
+            result = results.get(timeout=delay)
+        except Empty:
+            hedge_connection = _pool_connection(self.connection_pool, roles)
+            if hedge_connection is connection or not policy.acquire():
+                result = results.get()
+            else:
+                start(hedge_connection)
+                result = results.get()
+                if result[2] is not None:
+                    # first answer was an error, wait for the other one
+                    other = results.get()
+                    if other[2] is None or other[0] is connection:
+                        result = other
+                if result[0] is hedge_connection and result[2] is None:
+                    policy.hedge_won()
+
+        connection, response, error = result
+        if error is not None:
+            raise error
+        return connection, response
+
+    def _check_deadline(self, deadline, error=None):
+        """
+        Raise ``error``, the failure of the previous attempt, or a
+        :class:`~elasticsearch.exceptions.ConnectionTimeout` if ``deadline``
+        has passed.
+        """
+        if deadline is not None and time.time() >= deadline:
+            if error is not None:
+                raise error
+            raise ConnectionTimeout("TIMEOUT", "Request deadline exceeded.", None)
+
+    def _attempt_timeout(self, connection, timeout, deadline):
+        """
+        Timeout of the next attempt over ``connection``: ``timeout``, or the
+        connection's own default, cut down to the time left until
+        ``deadline``. Returns the timeout and whether it was cut down.
+        """
+        if deadline is None:
+            return timeout, False
+        remaining = max(0, deadline - time.time())
+        if timeout is None:
+            timeout = getattr(connection, "timeout", None)
+        if timeout is not None and timeout <= remaining:
+            return timeout, False
+        return remaining, True
+
+    def _retry_allowed(self):
+        """
+        Whether the retry budget, if any, allows another retry.
+        """
+        return self.retry_budget is None or self.retry_budget.withdraw()
+
+    def _is_node_failure(self, error):
+        """
+        Whether ``error`` means the node itself is in trouble as opposed to
+        the request being rejected.
+        """
+        return (
+            isinstance(error, ConnectionError)
+            or error.status_code in self.retry_on_status
+        )
+
+    def _is_server_error(self, error):
+        """
+        Whether ``error`` counts against the health of the node: a node
+        failure or any other 5xx response.
+        """
+        return self._is_node_failure(error) or (
+            isinstance(error.status_code, int) and error.status_code >= 500
+        )
+
     def close(self):
         """
         Explicitly closes connections
         """
+        self._closed.set()
+        if self.sniff_thread is not None:
+            self._sniff_requested.set()
         self.connection_pool.close()
 
     def _resolve_request_args(self, method, params, body):
         """Resolves parameters for .perform_request()"""
-        if body is not None:
-            body = self.serializer.dumps(body)
+        if _is_chunked(body):
+            body = _ChunkedBody(body)
+        elif body is not None:
+            body = _serialize_body(self.serializer, body)
 
             # some clients or environments don't support sending GET with body
             if method in ("HEAD", "GET") and self.send_get_body_as != "GET":
@@ -425,22 +2025,24 @@ class Transport(object):
                 elif self.send_get_body_as == "source":
                     if params is None:
                         params = {}
-                    params["source"] = body
+                    params["source"] = to_text(body)
                     body = None
 
-        if body is not None:
-            try:
-                body = body.encode("utf-8", "surrogatepass")
-            except (UnicodeDecodeError, AttributeError):
-                # bytes/str - no need to re-encode
-                pass
-
         ignore = ()
         timeout = None
+        deadline = None
+        raw = stream = False
         if params:
             timeout = params.pop("request_timeout", None)
             ignore = params.pop("ignore", ())
             if isinstance(ignore, int):
                 ignore = (ignore,)
-
-        return method, params, body, ignore, timeout
+            deadline = params.pop("deadline", None)
+            total_timeout = params.pop("total_timeout", None)
+            if total_timeout is not None:
+                expires = time.time() + total_timeout
+                deadline = expires if deadline is None else min(deadline, expires)
+            raw = params.pop("raw_response", False)
+            stream = params.pop("stream_response", False)
+
+        return method, params, body, ignore, timeout, deadline, raw, stream
@@ -15,7 +15,10 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import asyncio
+from concurrent.futures import Executor
 from typing import (
+    Awaitable,
     Callable,
     Optional,
     Union,
@@ -25,18 +28,191 @@ from typing import (
     Any,
     Dict,
     List,
+    FrozenSet,
+    Set,
+    Deque,
+    Tuple,
+    TypeVar,
 )
 
 from .connection import Connection
 from .connection_pool import ConnectionPool
+from .routing import ShardRouter
 from .serializer import Serializer, Deserializer
 
+T = TypeVar("T")
+
 def get_host_info(
     node_info: Dict[str, Any], host: Optional[Dict[str, Any]]
 ) -> Optional[Dict[str, Any]]: ...
 
+class HedgePolicy(object):
+    HEDGED_ENDPOINTS: Tuple[str, ...]
+    percentile: float
+    max_ratio: float
+    burst: float
+    window: int
+    min_samples: int
+    latencies: Dict[Connection, Deque[float]]
+    tokens: float
+    requests: int
+    hedged: int
+    hedges_won: int
+    def __init__(
+        self,
+        percentile: float = ...,
+        max_ratio: float = ...,
+        burst: float = ...,
+        window: int = ...,
+        min_samples: int = ...,
+    ) -> None: ...
+    def is_hedgeable(self, method: str, url: str) -> bool: ...
+    def record(self, connection: Connection, duration: float) -> None: ...
+    def prune(self, connections: Collection[Connection]) -> None: ...
+    def hedge_delay(self) -> Optional[float]: ...
+    def request_sent(self) -> None: ...
+    def acquire(self) -> bool: ...
+    def hedge_won(self) -> None: ...
+
+class RetryBudget(object):
+    ratio: float
+    max_tokens: float
+    tokens: float
+    successes: int
+    retries: int
+    rejected: int
+    def __init__(self, ratio: float = ..., max_tokens: float = ...) -> None: ...
+    def deposit(self) -> None: ...
+    def withdraw(self) -> bool: ...
+    def stats(self) -> Dict[str, float]: ...
+
+class ConcurrencyLimiter(object):
+    OVERLOAD_STATUS: Tuple[int, ...]
+    initial_limit: int
+    min_limit: int
+    max_limit: int
+    backoff_ratio: float
+    latency_tolerance: Optional[float]
+    per_node: bool
+    block: bool
+    queue_timeout: Optional[float]
+    lock: Any
+    limits: Dict[Optional[Connection], List[Any]]
+    waiters: Dict[Optional[Connection], Deque[Callable[[], Any]]]
+    rejected: int
+    def __init__(
+        self,
+        initial_limit: int = ...,
+        min_limit: int = ...,
+        max_limit: int = ...,
+        backoff_ratio: float = ...,
+        latency_tolerance: Optional[float] = ...,
+        per_node: bool = ...,
+        block: bool = ...,
+        queue_timeout: Optional[float] = ...,
+    ) -> None: ...
+    def limit(self, connection: Optional[Connection] = ...) -> int: ...
+    def try_acquire(
+        self, connection: Connection, waiter: Optional[Callable[[], Any]] = ...
+    ) -> bool: ...
+    def cancel_waiter(
+        self, connection: Connection, waiter: Callable[[], Any]
+    ) -> None: ...
+    def reject(self) -> None: ...
+    def acquire(self, connection: Connection) -> bool: ...
+    def release(
+        self, connection: Connection, duration: float, overloaded: bool = ...
+    ) -> None: ...
+    def prune(self, connections: Collection[Connection]) -> None: ...
+    def is_overload(self, error: Exception) -> bool: ...
+
+class RoutingPolicy(object):
+    ENDPOINT_FAMILIES: Dict[str, str]
+    routes: Dict[str, FrozenSet[str]]
+    def __init__(self, routes: Mapping[str, Collection[str]]) -> None: ...
+    def family(self, method: str, url: str) -> Optional[str]: ...
+    def roles_for(self, method: str, url: str) -> Optional[FrozenSet[str]]: ...
+
+class OffloadPolicy(object):
+    executor: Optional[Executor]
+    min_size: int
+    def __init__(
+        self, executor: Optional[Executor] = ..., min_size: int = ...
+    ) -> None: ...
+    def offload(self, payload: Any) -> bool: ...
+    def run(
+        self, loop: asyncio.AbstractEventLoop, func: Callable[..., T], *args: Any
+    ) -> Awaitable[T]: ...
+
+class RequestCoalescer(object):
+    COALESCED_ENDPOINTS: Tuple[str, ...]
+    copy_response: Callable[[Any], Any]
+    in_flight: Dict[Any, Any]
+    requests: int
+    coalesced: int
+    def __init__(self, copy_response: Callable[[Any], Any] = ...) -> None: ...
+    def key(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Mapping[str, str]],
+        params: Optional[Mapping[str, Any]],
+        body: Optional[bytes],
+        ignore: Collection[int] = ...,
+    ) -> Optional[Tuple[Any, ...]]: ...
+    def call(self, key: Tuple[Any, ...], func: Callable[[], Any]) -> Any: ...
+    def stats(self) -> Dict[str, int]: ...
+
+class ResponseCache(object):
+    DEFAULT_TTLS: Dict[str, float]
+    POST_ENDPOINTS: Tuple[str, ...]
+    WRITE_ENDPOINTS: Tuple[str, ...]
+    max_entries: int
+    ttls: Dict[str, float]
+    invalidate_on_write: bool
+    copy_response: Callable[[Any], Any]
+    entries: Dict[Any, Tuple[float, Tuple[str, ...], Any]]
+    by_index: Dict[str, Set[Any]]
+    generation: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    def __init__(
+        self,
+        max_entries: int = ...,
+        ttls: Optional[Mapping[str, float]] = ...,
+        invalidate_on_write: bool = ...,
+        copy_response: Callable[[Any], Any] = ...,
+    ) -> None: ...
+    def key(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Mapping[str, str]],
+        params: Optional[Mapping[str, Any]],
+        body: Optional[bytes],
+        ignore: Collection[int] = ...,
+    ) -> Tuple[Optional[Tuple[Any, ...]], Optional[float]]: ...
+    def get(
+        self, key: Tuple[Any, ...], now: Optional[float] = ...
+    ) -> Tuple[bool, Any]: ...
+    def put(
+        self,
+        key: Tuple[Any, ...],
+        url: str,
+        response: Any,
+        ttl: float,
+        generation: int,
+        now: Optional[float] = ...,
+    ) -> None: ...
+    def written(self, method: str, url: str, body: Optional[Any] = ...) -> None: ...
+    def invalidate(self, indices: Optional[Collection[str]] = ...) -> None: ...
+    def stats(self) -> Dict[str, int]: ...
+
 class Transport(object):
     DEFAULT_CONNECTION_CLASS: Type[Connection]
+    SNIFF_THREAD_COUNT: int
     connection_pool: ConnectionPool
     deserializer: Deserializer
 
@@ -44,6 +220,15 @@ class Transport(object):
     retry_on_timeout: bool
     retry_on_status: Collection[int]
     send_get_body_as: str
+    health_check_interval: Optional[float]
+    hedge_policy: Optional[HedgePolicy]
+    retry_budget: Optional[RetryBudget]
+    concurrency_limiter: Optional[ConcurrencyLimiter]
+    routing_policy: Optional[RoutingPolicy]
+    shard_router: Optional[ShardRouter]
+    request_coalescer: Optional[RequestCoalescer]
+    response_cache: Optional[ResponseCache]
+    warm_up_connections: int
     serializer: Serializer
     connection_pool_class: Type[ConnectionPool]
     connection_class: Type[Connection]
@@ -77,13 +262,24 @@ class Transport(object):
         retry_on_status: Collection[int] = ...,
         retry_on_timeout: bool = ...,
         send_get_body_as: str = ...,
+        health_check_interval: Optional[float] = ...,
+        sniff_in_background: bool = ...,
+        hedge_policy: Optional[HedgePolicy] = ...,
+        retry_budget: Optional[RetryBudget] = ...,
+        concurrency_limiter: Optional[ConcurrencyLimiter] = ...,
+        routing_policy: Optional[RoutingPolicy] = ...,
+        shard_router: Optional[ShardRouter] = ...,
+        request_coalescer: Optional[RequestCoalescer] = ...,
+        response_cache: Optional[ResponseCache] = ...,
+        warm_up_connections: int = ...,
         **kwargs: Any
     ) -> None: ...
     def add_connection(self, host: Any) -> None: ...
     def set_connections(self, hosts: Collection[Any]) -> None: ...
-    def get_connection(self) -> Connection: ...
+    def get_connection(self, roles: Optional[FrozenSet[str]] = ...) -> Connection: ...
     def sniff_hosts(self, initial: bool = ...) -> None: ...
     def mark_dead(self, connection: Connection) -> None: ...
+    def check_dead_connections(self) -> List[Connection]: ...
     def perform_request(
         self,
         method: str,
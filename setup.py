@@ -103,5 +103,7 @@ setup(
         "docs": docs_require,
         "requests": ["requests>=2.4.0, <3.0.0"],
         "async": async_require,
+        "http2": ["httpx[http2]>=0.18, <1"],
+        "orjson": ["orjson>=3"],
     },
 )
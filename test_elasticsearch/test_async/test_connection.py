@@ -16,8 +16,10 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import asyncio
 import ssl
 import gzip
+from concurrent.futures import ThreadPoolExecutor
 import io
 from mock import patch
 import warnings
@@ -27,7 +29,10 @@ from multidict import CIMultiDict
 import pytest
 
 from elasticsearch import AIOHttpConnection
+from elasticsearch.exceptions import ConnectionError, ConnectionTimeout
+from elasticsearch.transport import OffloadPolicy
 from elasticsearch import __versionstr__
+from elasticsearch.compat import to_text
 
 pytestmark = pytest.mark.asyncio
 
@@ -50,9 +55,18 @@ class TestAIOHttpConnection:
                 async def __aexit__(self, *_, **__):
                     pass
 
+                def __await__(self):
+                    return self.__aenter__().__await__()
+
+                def release(self):
+                    pass
+
                 async def text(self):
                     return response_body.decode("utf-8", "surrogatepass")
 
+                async def read(self):
+                    return response_body
+
             dummy_response = DummyResponse()
             dummy_response.headers = CIMultiDict()
             dummy_response.status = 200
@@ -151,11 +165,12 @@ class TestAIOHttpConnection:
         # Should be applied only if the request is sent with a body.
         assert "content-encoding" not in con.headers
 
-        await con.perform_request("GET", "/", body=b"{}")
+        body = b'{"ids":[%s]}' % b",".join(b"%d" % i for i in range(500))
+        await con.perform_request("GET", "/", body=body)
 
         _, kwargs = con.session.request.call_args
 
-        assert gzip_decompress(kwargs["data"]) == b"{}"
+        assert gzip_decompress(kwargs["data"]) == body
         assert kwargs["headers"]["accept-encoding"] == "gzip,deflate"
         assert kwargs["headers"]["content-encoding"] == "gzip"
 
@@ -167,6 +182,46 @@ class TestAIOHttpConnection:
         assert kwargs["headers"]["accept-encoding"] == "gzip,deflate"
         assert "content-encoding" not in kwargs["headers"]
 
+    async def test_small_body_is_not_compressed(self):
+        con = await self._get_mock_connection({"http_compress": True})
+        await con.perform_request("GET", "/", body=b"{}")
+
+        _, kwargs = con.session.request.call_args
+
+        assert kwargs["data"] == b"{}"
+        assert "content-encoding" not in kwargs["headers"]
+
+    async def test_large_body_is_compressed_in_the_executor(self):
+        executor = ThreadPoolExecutor(1)
+        policy = OffloadPolicy(executor, min_size=1500)
+        con = await self._get_mock_connection(
+            {"http_compress": True, "offload_policy": policy}
+        )
+        body = b'{"ids":[%s]}' % b",".join(b"%d" % i for i in range(500))
+
+        with patch.object(executor, "submit", wraps=executor.submit) as submit:
+            await con.perform_request("POST", "/", body=body)
+            _, kwargs = con.session.request.call_args
+            assert gzip_decompress(kwargs["data"]) == body
+            assert kwargs["headers"]["content-encoding"] == "gzip"
+            assert con.compression.compress == submit.call_args[0][0]
+
+            # smaller bodies are compressed on the loop
+            await con.perform_request("POST", "/", body=body[:1200])
+            _, kwargs = con.session.request.call_args
+            assert gzip_decompress(kwargs["data"]) == body[:1200]
+            assert 1 == submit.call_count
+
+    async def test_chunked_body_is_compressed_as_it_is_streamed(self):
+        con = await self._get_mock_connection({"http_compress": True})
+        await con.perform_request("POST", "/_bulk", body=iter([b"{}\n", b"{}\n"]))
+
+        _, kwargs = con.session.request.call_args
+        # aiohttp sends asynchronous iterators with chunked transfer encoding
+        chunks = [chunk async for chunk in kwargs["data"]]
+        assert gzip_decompress(b"".join(chunks)) == b"{}\n{}\n"
+        assert kwargs["headers"]["content-encoding"] == "gzip"
+
     def test_cloud_id_http_compress_override(self):
         # 'http_compress' will be 'True' by default for connections with
         # 'cloud_id' set but should prioritize user-defined values.
@@ -315,4 +370,111 @@ class TestAIOHttpConnection:
         buf = b"\xe4\xbd\xa0\xe5\xa5\xbd\xed\xa9\xaa"
         con = await self._get_mock_connection(response_body=buf)
         status, headers, data = await con.perform_request("GET", "/")
-        assert u"你好\uda6a" == data
+        assert buf == data
+        assert u"你好\uda6a" == to_text(data)
+
+    async def test_response_can_be_streamed(self):
+        con = await self._get_mock_connection()
+        events = []
+
+        class DummyContent:
+            async def iter_any(self):
+                for chunk in (b'{"a"', b": 1}"):
+                    yield chunk
+
+        class DummyResponse:
+            status = 200
+            headers = CIMultiDict()
+            content = DummyContent()
+
+            async def read(self):
+                raise AssertionError("the body shouldn't be read at once")
+
+            def release(self):
+                events.append("release")
+
+            def close(self):
+                events.append("close")
+
+        async def _dummy_request(*args, **kwargs):
+            return DummyResponse()
+
+        con.session.request = _dummy_request
+
+        status, headers, chunks = await con.perform_request_stream("GET", "/")
+        assert 200 == status
+        assert events == []
+        assert [b'{"a"', b": 1}"] == [chunk async for chunk in chunks]
+        assert ["release"] == events
+
+        events[:] = []
+        status, headers, chunks = await con.perform_request_stream("GET", "/")
+        await chunks.__anext__()
+        await chunks.aclose()
+        assert ["close", "release"] == events
+
+    async def test_failure_in_the_middle_of_the_stream_is_a_connection_error(self):
+        con = await self._get_mock_connection()
+
+        for error, raised in (
+            (
+                aiohttp.ClientPayloadError("Response payload is not completed"),
+                ConnectionError,
+            ),
+            (asyncio.TimeoutError(), ConnectionTimeout),
+        ):
+            events = []
+
+            class DummyContent:
+                async def iter_any(self):
+                    yield b'{"a"'
+                    raise error
+
+            class DummyResponse:
+                status = 200
+                headers = CIMultiDict()
+                content = DummyContent()
+
+                def release(self):
+                    events.append("release")
+
+                def close(self):
+                    events.append("close")
+
+            async def _dummy_request(*args, **kwargs):
+                return DummyResponse()
+
+            con.session.request = _dummy_request
+
+            status, headers, chunks = await con.perform_request_stream("GET", "/")
+            assert b'{"a"' == await chunks.__anext__()
+            with pytest.raises(raised) as e:
+                await chunks.__anext__()
+            assert error is e.value.info
+            assert ["close", "release"] == events
+
+
+class TestAsyncHttpxConnection:
+    async def test_request_is_multiplexed_over_the_client(self):
+        httpx = pytest.importorskip("httpx")
+        from elasticsearch import AsyncHttpxHttpConnection
+
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, content=b'{"ok": true}')
+
+        con = AsyncHttpxHttpConnection(opaque_id="app-1")
+        assert con._client_kwargs["http2"] and not con._client_kwargs["http1"]
+        await con.close()
+        con.session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        status, _, data = await con.perform_request(
+            "GET", "/_search", params={"q": "x"}
+        )
+        await con.close()
+
+        assert (200, b'{"ok": true}') == (status, data)
+        assert "http://localhost:9200/_search?q=x" == str(requests[0].url)
+        assert "app-1" == requests[0].headers["x-opaque-id"]
@@ -17,10 +17,13 @@
 
 import pytest
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from mock import patch, MagicMock
 
-from elasticsearch import helpers, TransportError
+from elasticsearch import helpers, JSONSerializer, TransportError
+from elasticsearch._async.helpers import _chunk_actions, aiter
 from elasticsearch.helpers import ScanError
+from elasticsearch.transport import OffloadPolicy
 
 
 pytestmark = pytest.mark.asyncio
@@ -49,6 +52,66 @@ class FailingBulkClient(object):
 
 
 class TestStreamingBulk(object):
+    async def test_large_documents_are_serialized_in_the_executor(self):
+        executor = ThreadPoolExecutor(1)
+        policy = OffloadPolicy(executor, min_size=1000)
+        actions = [({"index": {}}, {"a": "x" * 1000}), ({"index": {}}, {"a": "y"})]
+
+        with patch.object(executor, "submit", wraps=executor.submit) as submit:
+            chunks = [
+                chunk
+                async for chunk in _chunk_actions(
+                    aiter(actions), 10, 1024 * 1024, JSONSerializer(), policy
+                )
+            ]
+
+        assert 1 == submit.call_count
+        assert [
+            (
+                actions,
+                [
+                    b'{"index":{}}',
+                    b'{"a":"%s"}' % (b"x" * 1000),
+                    b'{"index":{}}',
+                    b'{"a":"y"}',
+                ],
+            )
+        ] == chunks
+
+    async def test_dataframe_batches_are_encoded_in_the_executor(self):
+        pd = pytest.importorskip("pandas")
+        executor = ThreadPoolExecutor(1)
+        client = MagicMock()
+        client.transport.serializer = JSONSerializer()
+        client.transport.offload_policy = OffloadPolicy(executor)
+        bodies = []
+
+        async def bulk(body, *args, **kwargs):
+            lines = b"".join(body).splitlines()
+            bodies.append(lines)
+            return {"items": [{"create": {"status": 201}} for _ in lines[::2]]}
+
+        client.bulk = bulk
+        df = pd.DataFrame({"id": ["a", "b", "c"], "n": [1, None, 3]})
+
+        with patch.object(executor, "submit", wraps=executor.submit) as submit:
+            result = await helpers.async_bulk_dataframe(
+                client, df, id_column="id", op_type="create", batch_size=2
+            )
+
+        assert (3, []) == result
+        assert 2 == submit.call_count
+        assert [
+            [
+                b'{"create":{"_id":"a"}}',
+                b'{"n":1.0}',
+                b'{"create":{"_id":"b"}}',
+                b'{"n":null}',
+                b'{"create":{"_id":"c"}}',
+                b'{"n":3.0}',
+            ]
+        ] == bodies
+
     async def test_actions_remain_unchanged(self, async_client):
         actions = [{"_id": 1}, {"_id": 2}]
         async for ok, item in helpers.async_streaming_bulk(
@@ -19,13 +19,32 @@
 from __future__ import unicode_literals
 import asyncio
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from mock import patch
 import pytest
 
 from elasticsearch import AsyncTransport
 from elasticsearch.connection import Connection
-from elasticsearch.connection_pool import DummyConnectionPool
-from elasticsearch.exceptions import ConnectionError, TransportError
+from elasticsearch.connection_pool import (
+    CircuitBreaker,
+    DummyConnectionPool,
+    LatencyAwareSelector,
+)
+from elasticsearch.exceptions import ConnectionError, ConnectionTimeout, TransportError
+from elasticsearch.transport import (
+    ConcurrencyLimiter,
+    HedgePolicy,
+    OffloadPolicy,
+    RequestCoalescer,
+    ResponseCache,
+    RetryBudget,
+    RoutingPolicy,
+)
+from elasticsearch.routing import ShardRouter, shard_id
+
+from ..test_routing import METADATA, NODES, SEARCH_SHARDS
 
 
 pytestmark = pytest.mark.asyncio
@@ -51,12 +70,30 @@ class DummyConnection(Connection):
             raise self.exception
         return self.status, self.headers, self.data
 
+    async def perform_request_stream(self, *args, **kwargs):
+        status, headers, data = await self.perform_request(*args, **kwargs)
+
+        async def chunks():
+            yield data.encode("utf-8")
+
+        return status, headers, chunks()
+
     async def close(self):
         if self.closed:
             raise RuntimeError("This connection is already closed")
         self.closed = True
 
 
+class RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super(RecordingExecutor, self).__init__(1)
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls.append(fn.__name__)
+        return super(RecordingExecutor, self).submit(fn, *args, **kwargs)
+
+
 CLUSTER_NODES = """{
   "_nodes" : {
     "total" : 1,
@@ -129,6 +166,30 @@ class TestTransport:
             "headers": None,
         } == t.get_connection().calls[0][1]
 
+    async def test_total_timeout_is_shared_by_all_attempts(self):
+        t = AsyncTransport(
+            [{"exception": ConnectionError("abandon ship"), "delay": 0.1}],
+            connection_class=DummyConnection,
+            max_retries=10,
+        )
+        await t._async_call()
+        connection = t.get_connection()
+
+        with pytest.raises(ConnectionError):
+            await t.perform_request("GET", "/", params={"total_timeout": 0.25})
+        # no attempt is started once the deadline has passed
+        assert 3 == len(connection.calls)
+        timeouts = [kwargs["timeout"] for (_, kwargs) in connection.calls]
+        assert sorted(timeouts, reverse=True) == timeouts
+        assert timeouts[0] <= 0.25
+
+    async def test_expired_deadline_sends_no_request(self):
+        t = AsyncTransport([{}], connection_class=DummyConnection)
+
+        with pytest.raises(ConnectionTimeout):
+            await t.perform_request("GET", "/", params={"deadline": time.time() - 1})
+        assert 0 == len(t.get_connection().calls)
+
     async def test_opaque_id(self):
         t = AsyncTransport([{}], opaque_id="app-1", connection_class=DummyConnection)
 
@@ -258,6 +319,73 @@ class TestTransport:
         assert connection_error
         assert 4 == len(t.get_connection().calls)
 
+    async def test_retries_stop_once_retry_budget_is_spent(self):
+        budget = RetryBudget(max_tokens=1)
+        t = AsyncTransport(
+            [{"exception": ConnectionError("abandon ship")}],
+            connection_class=DummyConnection,
+            retry_budget=budget,
+        )
+
+        with pytest.raises(ConnectionError):
+            await t.perform_request("GET", "/")
+        assert 2 == len(t.get_connection().calls)
+        assert (1, 1) == (budget.retries, budget.rejected)
+
+    async def test_requests_over_concurrency_limit_wait_for_a_slot(self, event_loop):
+        limiter = ConcurrencyLimiter(initial_limit=1, latency_tolerance=None)
+        t = AsyncTransport(
+            [{"delay": 0.05}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+
+        start = event_loop.time()
+        await asyncio.gather(*[t.perform_request("GET", "/") for _ in range(3)])
+        assert event_loop.time() - start >= 0.15
+        assert 0 == limiter.rejected
+
+    async def test_requests_over_concurrency_limit_fail_fast(self):
+        limiter = ConcurrencyLimiter(initial_limit=1, queue_timeout=0.01)
+        t = AsyncTransport(
+            [{"delay": 0.1}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+
+        results = await asyncio.gather(
+            *[t.perform_request("GET", "/") for _ in range(2)], return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, TransportError)]
+        assert 1 == len(errors)
+        assert "Concurrency limit reached." == errors[0].error
+        assert 1 == limiter.rejected
+
+    async def test_streamed_response_holds_its_slot_until_it_is_read(self):
+        limiter = ConcurrencyLimiter(initial_limit=1, queue_timeout=0.01)
+        t = AsyncTransport(
+            [{"data": '{"hits": 1}'}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+        stream = {"stream_response": True}
+
+        chunks = await t.perform_request(
+            "POST", "/_search", body={}, params=dict(stream)
+        )
+        with pytest.raises(TransportError):
+            await t.perform_request("GET", "/")
+        assert [b'{"hits": 1}'] == [chunk async for chunk in chunks]
+        assert {"hits": 1} == await t.perform_request("GET", "/")
+
+        # closing the chunks without reading them frees the slot as well
+        chunks = await t.perform_request(
+            "POST", "/_search", body={}, params=dict(stream)
+        )
+        await chunks.aclose()
+        assert {"hits": 1} == await t.perform_request("GET", "/")
+        assert 1 == limiter.rejected
+
     async def test_failed_connection_will_be_marked_as_dead(self):
         t = AsyncTransport(
             [{"exception": ConnectionError("abandon ship")}] * 2,
@@ -286,6 +414,364 @@ class TestTransport:
             assert 1 == len(t.connection_pool.connections)
             assert 1 == len(t.connection_pool.dead_count)
 
+    async def test_request_stats_are_reported_to_selector(self):
+        t = AsyncTransport(
+            [{"delay": 0.05}, {"exception": ConnectionError("abandon ship")}],
+            connection_class=DummyConnection,
+            selector_class=LatencyAwareSelector,
+            randomize_hosts=False,
+            max_retries=0,
+        )
+        await t._async_call()
+        slow, failing = t.connection_pool.connections
+
+        await t._perform_connection_request(slow, "GET", "/")
+        with pytest.raises(ConnectionError):
+            await t._perform_connection_request(failing, "GET", "/")
+
+        stats = t.connection_pool.selector.stats
+        assert stats[slow][0] >= 0.05
+        assert stats[slow][1] == 0
+        assert [1.0, 0] == stats[failing]
+
+    async def test_server_errors_open_the_circuit_breaker(self):
+        t = AsyncTransport(
+            [{"exception": TransportError(500, "oops")}, {}],
+            connection_class=DummyConnection,
+            circuit_breaker_class=partial(CircuitBreaker, min_requests=2),
+            randomize_hosts=False,
+        )
+        await t._async_call()
+        failing, ok = t.connection_pool.connections
+
+        for _ in range(2):
+            with pytest.raises(TransportError):
+                await t.perform_request("GET", "/")
+            await t.perform_request("GET", "/")
+        for _ in range(4):
+            await t.perform_request("GET", "/")
+
+        assert CircuitBreaker.OPEN == t.connection_pool.circuit_breakers[failing].state
+        assert 2 == len(failing.calls)
+        assert 6 == len(ok.calls)
+
+    async def test_requests_are_routed_by_node_roles(self):
+        t = AsyncTransport(
+            [
+                {"host": "ingest", "roles": ["ingest"]},
+                {"host": "data", "roles": ["data"]},
+            ],
+            connection_class=DummyConnection,
+            routing_policy=RoutingPolicy({"bulk": ["ingest"]}),
+        )
+        await t._async_call()
+
+        for _ in range(3):
+            await t.perform_request("POST", "/_bulk", body="{}\n")
+
+        calls = dict((c.hostname, c.calls) for c in t.connection_pool.connections)
+        assert 3 == len(calls["ingest"])
+        assert 0 == len(calls["data"])
+
+    async def test_document_requests_go_to_the_node_holding_the_shard(self):
+        router = ShardRouter()
+        router.update("logs", METADATA, SEARCH_SHARDS, NODES, now=time.time())
+        t = AsyncTransport(
+            [{"host": "es%d" % i, "port": 9200} for i in (1, 2, 3)],
+            connection_class=DummyConnection,
+            shard_router=router,
+        )
+        await t._async_call()
+
+        for doc_id in ("1", "2", "3", "4"):
+            await t.perform_request("PUT", "/logs/_doc/%s" % doc_id, body={})
+        for connection in t.connection_pool.connections:
+            for args, _ in connection.calls:
+                doc_id = args[1].rsplit("/", 1)[1]
+                node = "n%d" % (shard_id(768, 3, doc_id) + 1)
+                assert NODES[node][0] == connection.hostname
+
+    async def test_shard_routing_is_refreshed_in_a_task(self, event_loop):
+        router = ShardRouter()
+        t = AsyncTransport([{}], connection_class=DummyConnection, shard_router=router)
+        await t._async_call()
+
+        await t.perform_request("GET", "/logs/_doc/1")
+        assert "logs" in router.refreshing
+        await asyncio.sleep(0.01)
+
+        # nothing usable in the responses, requests keep going anywhere
+        assert set() == router.refreshing
+        assert ("logs", []) == router.route("GET", "/logs/_doc/1", None)
+        urls = [args[1] for args, _ in t.connection_pool.connections[0].calls]
+        assert "/logs/_search_shards" in urls
+
+    async def test_concurrent_identical_reads_share_one_request(self):
+        coalescer = RequestCoalescer()
+        t = AsyncTransport(
+            [{"delay": 0.05, "data": '{"a": [1]}'}],
+            connection_class=DummyConnection,
+            request_coalescer=coalescer,
+        )
+        await t._async_call()
+
+        results = await asyncio.gather(
+            *[t.perform_request("GET", "/i/_doc/1") for _ in range(5)]
+        )
+        await t.perform_request("GET", "/i/_doc/2")
+
+        assert 2 == len(t.connection_pool.connections[0].calls)
+        assert [{"a": [1]}] * 5 == results
+        assert 5 == len(set(id(r) for r in results))
+        assert {"requests": 6, "coalesced": 4} == coalescer.stats()
+
+    async def test_leader_modifying_its_response_does_not_affect_the_others(self):
+        t = AsyncTransport(
+            [{"delay": 0.05, "data": '{"hits": [1]}'}],
+            connection_class=DummyConnection,
+            request_coalescer=RequestCoalescer(),
+        )
+        await t._async_call()
+
+        async def get(i):
+            response = await t.perform_request("GET", "/i/_search")
+            response["hits"].append(i)
+            return response
+
+        results = await asyncio.gather(*[get(i) for i in range(3)])
+
+        assert [{"hits": [1, i]} for i in range(3)] == results
+
+    async def test_cancelled_coalesced_request_does_not_cancel_others(self, event_loop):
+        t = AsyncTransport(
+            [{"delay": 0.05}],
+            connection_class=DummyConnection,
+            request_coalescer=RequestCoalescer(),
+        )
+        await t._async_call()
+
+        first = event_loop.create_task(t.perform_request("GET", "/"))
+        await asyncio.sleep(0)
+        second = event_loop.create_task(t.perform_request("GET", "/"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert {} == await second
+        assert first.cancelled()
+
+    async def test_cached_responses_are_not_sent_again(self):
+        cache = ResponseCache()
+        t = AsyncTransport(
+            [{"data": '{"hits": 1}'}],
+            connection_class=DummyConnection,
+            response_cache=cache,
+        )
+        await t._async_call()
+
+        for _ in range(3):
+            assert {"hits": 1} == await t.perform_request("POST", "/i/_search", body={})
+        await t.perform_request("POST", "/i/_update_by_query", body={})
+        await t.perform_request("POST", "/i/_search", body={})
+
+        assert 3 == len(t.connection_pool.connections[0].calls)
+        assert 2 == cache.stats()["hits"]
+
+    async def test_streamed_response_is_returned_as_chunks(self):
+        t = AsyncTransport(
+            [{"data": '{"hits": 1}'}],
+            connection_class=DummyConnection,
+            response_cache=ResponseCache(),
+        )
+        await t._async_call()
+
+        for _ in range(2):
+            chunks = await t.perform_request(
+                "POST", "/i/_search", body={}, params={"stream_response": True}
+            )
+            assert [b'{"hits": 1}'] == [chunk async for chunk in chunks]
+        # streamed responses are neither served from nor stored in the cache
+        assert 2 == len(t.connection_pool.connections[0].calls)
+        assert {} == t.connection_pool.connections[0].calls[0][0][2]
+
+    async def test_node_failing_in_the_middle_of_a_streamed_response_is_marked_dead(
+        self,
+    ):
+        class BrokenStreamConnection(DummyConnection):
+            async def perform_request_stream(self, *args, **kwargs):
+                async def chunks():
+                    yield b'{"hits"'
+                    raise ConnectionError("N/A", "Connection broken", None)
+
+                self.calls.append((args, kwargs))
+                return 200, {}, chunks()
+
+        t = AsyncTransport([{}, {}], connection_class=BrokenStreamConnection)
+        await t._async_call()
+        chunks = await t.perform_request(
+            "POST", "/_search", body={}, params={"stream_response": True}
+        )
+        connection = [c for c in t.connection_pool.connections if c.calls][0]
+
+        assert b'{"hits"' == await chunks.__anext__()
+        with pytest.raises(ConnectionError):
+            await chunks.__anext__()
+        assert connection not in t.connection_pool.connections
+        assert 1 == len(t.connection_pool.connections)
+
+    async def test_failed_sniff_does_not_hide_the_error_of_a_streamed_response(
+        self,
+    ):
+        class BrokenStreamConnection(DummyConnection):
+            async def perform_request_stream(self, *args, **kwargs):
+                async def chunks():
+                    yield b'{"hits"'
+                    raise ConnectionError("N/A", "Connection broken", None)
+
+                return 200, {}, chunks()
+
+        t = AsyncTransport(
+            [{}, {}],
+            connection_class=BrokenStreamConnection,
+            sniff_on_connection_fail=True,
+        )
+        await t._async_call()
+        chunks = await t.perform_request(
+            "POST", "/_search", body={}, params={"stream_response": True}
+        )
+
+        assert b'{"hits"' == await chunks.__anext__()
+        with patch.object(
+            t, "create_sniff_task", side_effect=TransportError("N/A", "sniff failed")
+        ):
+            with pytest.raises(ConnectionError):
+                await chunks.__anext__()
+        assert 1 == len(t.connection_pool.connections)
+
+    async def test_large_payloads_are_handled_in_the_executor(self):
+        executor = RecordingExecutor()
+        t = AsyncTransport(
+            [{"data": json.dumps({"hits": ["x" * 100] * 10})}],
+            connection_class=DummyConnection,
+            offload_policy=OffloadPolicy(executor, min_size=1000),
+        )
+        await t._async_call()
+
+        assert {"hits": ["x" * 100] * 10} == await t.perform_request(
+            "POST", "/i/_bulk", body={"docs": ["y" * 100] * 10}
+        )
+        assert ["_serialize_body", "_deserialize_body"] == executor.calls
+        # the connections get the policy to compress large bodies
+        assert t.kwargs["offload_policy"] is t.offload_policy
+        connection = t.connection_pool.connections[0]
+        assert b'{"docs":["' == connection.calls[0][0][3][:10]
+
+        connection.data = "{}"
+        assert {} == await t.perform_request("POST", "/i/_search", body={})
+        assert 2 == len(executor.calls)
+
+    async def test_slow_read_is_hedged_and_loser_cancelled(self, event_loop):
+        policy = HedgePolicy(min_samples=1)
+        t = AsyncTransport(
+            [{"delay": 0.5}, {}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            hedge_policy=policy,
+        )
+        await t._async_call()
+        slow, fast = t.connection_pool.connections
+        policy.record(fast, 0.01)
+
+        start = event_loop.time()
+        assert {} == await t.perform_request("POST", "/_search", body={})
+        assert event_loop.time() - start < 0.4
+        # the slow request was cancelled before it completed
+        await asyncio.sleep(0.5)
+        assert 0 == len(slow.calls)
+        assert 1 == len(fast.calls)
+        assert (1, 1) == (policy.hedged, policy.hedges_won)
+
+    async def test_cancelled_hedge_loser_is_not_recorded_as_a_failure(self):
+        policy = HedgePolicy(min_samples=1)
+        t = AsyncTransport(
+            [{"delay": 0.5}, {}],
+            connection_class=DummyConnection,
+            selector_class=LatencyAwareSelector,
+            circuit_breaker_class=partial(CircuitBreaker, min_requests=1),
+            randomize_hosts=False,
+            hedge_policy=policy,
+        )
+        await t._async_call()
+        slow, fast = t.connection_pool.connections
+        policy.record(fast, 0.01)
+
+        with patch.object(
+            t.connection_pool, "get_connection", side_effect=[slow, fast]
+        ):
+            assert {} == await t.perform_request("POST", "/_search", body={})
+        await asyncio.sleep(0)
+
+        assert (1, 1) == (policy.hedged, policy.hedges_won)
+        # the slow node neither got the failure penalty nor a failure
+        assert [0.0, 0] == t.connection_pool.selector.stats[slow]
+        breaker = t.connection_pool.circuit_breakers[slow]
+        assert (CircuitBreaker.CLOSED, 0) == (breaker.state, breaker.failures)
+
+    async def test_hedged_request_raises_original_error_when_both_fail(self):
+        policy = HedgePolicy(min_samples=1)
+        t = AsyncTransport(
+            [
+                {"delay": 0.1, "exception": TransportError(400, "original")},
+                {"exception": TransportError(400, "hedge")},
+            ],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            hedge_policy=policy,
+        )
+        await t._async_call()
+        policy.record(t.connection_pool.connections[1], 0.01)
+
+        with pytest.raises(TransportError) as e:
+            await t.perform_request("GET", "/")
+        assert "original" == e.value.error
+        assert 1 == policy.hedged
+
+    async def test_health_checker_revives_responding_connections(self):
+        t = AsyncTransport(
+            [{"exception": ConnectionError("abandon ship")}, {}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            health_check_interval=3600,
+        )
+        await t._async_call()
+        failing, ok = t.connection_pool.connections
+        t.mark_dead(failing)
+        t.mark_dead(ok)
+
+        assert [ok] == await t.check_dead_connections()
+        assert [ok] == t.connection_pool.connections
+        assert [failing] == t.connection_pool.dead_connections()
+        assert (("HEAD", "/"), {"timeout": 3600}) == failing.calls[-1]
+        await t.close()
+
+    async def test_health_check_task_probes_in_background(self):
+        t = AsyncTransport(
+            [{}, {}], connection_class=DummyConnection, health_check_interval=0.01
+        )
+        await t._async_call()
+        conn = t.connection_pool.connections[0]
+        t.mark_dead(conn)
+
+        for _ in range(100):
+            if not t.connection_pool.dead_connections():
+                break
+            await asyncio.sleep(0.01)
+        assert [] == t.connection_pool.dead_connections()
+        assert conn in t.connection_pool.connections
+
+        task = t.health_check_task
+        await t.close()
+        assert task.done()
+
     async def test_sniff_will_use_seed_connections(self):
         t = AsyncTransport([{"data": CLUSTER_NODES}], connection_class=DummyConnection)
         await t._async_call()
@@ -348,6 +834,28 @@ class TestTransport:
         assert 1 == len(t.connection_pool.connections)
         assert connection is t.get_connection()
 
+    async def test_warm_up_only_new_connections(self):
+        warmed_up = []
+
+        class WarmUpConnection(DummyConnection):
+            async def warm_up(self, count=1, timeout=None):
+                warmed_up.append((self.host, count))
+
+        t = AsyncTransport(
+            [{"host": "localhost"}],
+            connection_class=WarmUpConnection,
+            data=CLUSTER_NODES,
+            warm_up_connections=4,
+        )
+        await t._async_call()
+        await asyncio.sleep(0)
+        assert [("http://localhost:9200", 4)] == warmed_up
+        del warmed_up[:]
+
+        await t.sniff_hosts()
+        await asyncio.sleep(0)
+        assert [("http://1.1.1.1:123", 4)] == warmed_up
+
     async def test_sniff_on_fail_triggers_sniffing_on_fail(self):
         t = AsyncTransport(
             [{"exception": ConnectionError("abandon ship")}, {"data": CLUSTER_NODES}],
@@ -424,6 +932,7 @@ class TestTransport:
         assert t.connection_pool.connection_opts[0][1] == {
             "host": "somehost.tld",
             "port": 123,
+            "roles": ["master", "data", "ingest"],
         }
 
     @patch("elasticsearch._async.transport.AsyncTransport.sniff_hosts")
@@ -71,6 +71,23 @@ class TestClient(ElasticsearchTestCase):
         calls = self.assert_url_called("HEAD", "/")
         self.assertEqual([({"request_timeout": 0.1}, {}, None)], calls)
 
+    def test_total_timeout_and_deadline_are_passed_through_unescaped(self):
+        self.client.ping(total_timeout=1.5, deadline=1234.5)
+        calls = self.assert_url_called("HEAD", "/")
+        self.assertEqual(
+            [({"total_timeout": 1.5, "deadline": 1234.5}, {}, None)], calls
+        )
+
+    def test_raw_response_is_passed_through(self):
+        self.client.info(raw_response=True)
+        calls = self.assert_url_called("GET", "/")
+        self.assertEqual([({"raw_response": True}, {}, None)], calls)
+
+    def test_stream_response_is_passed_through(self):
+        self.client.search(stream_response=True)
+        calls = self.assert_url_called("POST", "/_search")
+        self.assertEqual([({"stream_response": True}, {}, None)], calls)
+
     def test_params_is_copied_when(self):
         rt = object()
         params = dict(request_timeout=rt)
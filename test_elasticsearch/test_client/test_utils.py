@@ -20,6 +20,7 @@ from __future__ import unicode_literals
 
 from elasticsearch.client.utils import _bulk_body, _make_path, _escape, query_params
 from elasticsearch.compat import PY2
+from elasticsearch.serializer import JSONSerializer
 
 from ..test_cases import TestCase, SkipTest
 
@@ -122,6 +123,18 @@ class TestBulkBody(TestCase):
             _bulk_body(None, string_body),
         )
 
+    def test_bulk_body_as_iterator_of_bytes_is_streamed(self):
+        if PY2:
+            raise SkipTest("Python 2 can't tell bytes from text")
+        chunks = [b'{"index": {}}\n{"field1": ', b'"value1"}\n']
+        body = _bulk_body(None, iter(chunks))
+        self.assertFalse(isinstance(body, (bytes, str)))
+        self.assertEqual(chunks, list(body))
+
+    def test_bulk_body_as_iterator_of_documents_is_serialized(self):
+        body = _bulk_body(JSONSerializer(), iter([{"index": {}}, {"a": 1}]))
+        self.assertEqual(b'{"index":{}}\n{"a":1}\n', body)
+
     def test_bulk_body_as_bytestring_adds_trailing_newline(self):
         bytestring_body = b'"{"index":{ "_index" : "test"}}\n{"field1": "value1"}"'
         self.assertEqual(
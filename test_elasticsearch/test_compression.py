@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import gzip
+import io
+import zlib
+
+from elasticsearch.compression import Codec, Compression, DeflateCodec, GzipCodec
+from elasticsearch.exceptions import ImproperlyConfigured
+
+from .test_cases import TestCase
+
+
+def gzip_decompress(data):
+    return gzip.GzipFile(fileobj=io.BytesIO(data), mode="rb").read()
+
+
+class TestCompression(TestCase):
+    def test_defaults_to_gzip(self):
+        compression = Compression(min_size=0)
+        self.assertIsInstance(compression.codec, GzipCodec)
+        self.assertEqual("gzip", compression.content_encoding)
+        self.assertEqual(b"{}", gzip_decompress(compression.compress(b"{}")))
+
+    def test_deflate(self):
+        compression = Compression("deflate", min_size=0)
+        self.assertIsInstance(compression.codec, DeflateCodec)
+        self.assertEqual("deflate", compression.content_encoding)
+        self.assertEqual(b"{}", zlib.decompress(compression.compress(b"{}")))
+
+    def test_bodies_under_min_size_are_not_compressed(self):
+        compression = Compression(min_size=10)
+        self.assertIsNone(compression.compress(b"{}"))
+        self.assertIsNotNone(compression.compress(b"[1,2,3,4,5]"))
+
+    def test_lower_level_compresses_less(self):
+        body = b",".join(b"%d" % (i * 7919 % 100003) for i in range(10000))
+        fast = Compression(level=1).compress(body)
+        small = Compression(level=9).compress(body)
+        self.assertLess(len(small), len(fast))
+        self.assertEqual(body, gzip_decompress(fast))
+
+    def test_chunks_are_compressed_as_they_are_produced(self):
+        compression = Compression()
+        produced = []
+
+        def chunks():
+            for chunk in (b"{}\n", b"{}\n"):
+                produced.append(chunk)
+                yield chunk
+
+        compressed = compression.compress_chunks(chunks())
+        self.assertEqual([], produced)
+        # chunks smaller than min_size are compressed as well
+        self.assertEqual(b"{}\n{}\n", gzip_decompress(b"".join(compressed)))
+
+    def test_custom_codec(self):
+        class RawDeflateCodec(Codec):
+            content_encoding = "x-raw-deflate"
+
+            def compressor(self, level):
+                return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+        compression = Compression(RawDeflateCodec(), min_size=0)
+        self.assertEqual("x-raw-deflate", compression.content_encoding)
+        self.assertEqual(
+            b"{}", zlib.decompress(compression.compress(b"{}"), -zlib.MAX_WBITS)
+        )
+
+    def test_unknown_codec_raises_improperly_configured(self):
+        self.assertRaises(ImproperlyConfigured, Compression, "brotli")
+
+    def test_invalid_level_raises_improperly_configured(self):
+        self.assertRaises(ImproperlyConfigured, Compression, level=0)
+        self.assertRaises(ImproperlyConfigured, Compression, level=10)
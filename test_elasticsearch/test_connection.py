@@ -20,6 +20,10 @@ import re
 import ssl
 import gzip
 import io
+import socket
+import threading
+import time
+import zlib
 from mock import Mock, patch
 import urllib3
 from urllib3._collections import HTTPHeaderDict
@@ -27,20 +31,30 @@ import warnings
 from requests.auth import AuthBase
 from platform import python_version
 
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
 import pytest
 
 from elasticsearch.exceptions import (
     TransportError,
     ConflictError,
+    ConnectionError,
+    ConnectionTimeout,
     RequestError,
     NotFoundError,
 )
 from elasticsearch.connection import (
     Connection,
+    HttpxHttpConnection,
     RequestsHttpConnection,
     Urllib3HttpConnection,
 )
-from elasticsearch import __versionstr__
+from elasticsearch.connection.http_httpx import HTTPX_AVAILABLE
+from elasticsearch import Compression, __versionstr__
+from elasticsearch.compat import to_text
 from .test_cases import TestCase, SkipTest
 
 
@@ -50,6 +64,10 @@ CLOUD_ID_PORT_AND_KIBANA = "cluster:d2VzdGV1cm9wZS5henVyZS5lbGFzdGljLWNsb3VkLmNv
 CLOUD_ID_NO_PORT_OR_KIBANA = "cluster:d2VzdGV1cm9wZS5henVyZS5lbGFzdGljLWNsb3VkLmNvbSRlN2RlOWYxMzQ1ZTQ0OTAyODNkOTAzYmU1YjZmOTE5ZSQ="
 
 
+# large enough to be compressed with the default 'min_size'
+LARGE_BODY = b'{"ids":[%s]}' % b",".join(b"%d" % i for i in range(500))
+
+
 def gzip_decompress(data):
     buf = gzip.GzipFile(fileobj=io.BytesIO(data), mode="rb")
     return buf.read()
@@ -260,11 +278,11 @@ class TestUrllib3Connection(TestCase):
         # Should be applied only if the request is sent with a body.
         self.assertNotIn("content-encoding", con.headers)
 
-        con.perform_request("GET", "/", body=b"{}")
+        con.perform_request("GET", "/", body=LARGE_BODY)
 
         (_, _, req_body), kwargs = con.pool.urlopen.call_args
 
-        self.assertEqual(gzip_decompress(req_body), b"{}")
+        self.assertEqual(gzip_decompress(req_body), LARGE_BODY)
         self.assertEqual(kwargs["headers"]["accept-encoding"], "gzip,deflate")
         self.assertEqual(kwargs["headers"]["content-encoding"], "gzip")
 
@@ -276,6 +294,47 @@ class TestUrllib3Connection(TestCase):
         self.assertEqual(kwargs["headers"]["accept-encoding"], "gzip,deflate")
         self.assertNotIn("content-encoding", kwargs["headers"])
 
+    def test_small_body_is_not_compressed(self):
+        con = self._get_mock_connection({"http_compress": True})
+        con.perform_request("GET", "/", body=b"{}")
+
+        (_, _, req_body), kwargs = con.pool.urlopen.call_args
+
+        self.assertEqual(b"{}", req_body)
+        self.assertEqual(kwargs["headers"]["accept-encoding"], "gzip,deflate")
+        self.assertNotIn("content-encoding", kwargs["headers"])
+
+    def test_http_compression_settings(self):
+        con = self._get_mock_connection(
+            {"http_compress": Compression("deflate", level=1, min_size=0)}
+        )
+        self.assertTrue(con.http_compress)
+        self.assertEqual(con.headers["accept-encoding"], "gzip,deflate")
+
+        con.perform_request("GET", "/", body=b"{}")
+
+        (_, _, req_body), kwargs = con.pool.urlopen.call_args
+
+        self.assertEqual(b"{}", zlib.decompress(req_body))
+        self.assertEqual(kwargs["headers"]["content-encoding"], "deflate")
+
+    def test_chunked_body_is_streamed(self):
+        con = self._get_mock_connection()
+        con.perform_request("POST", "/_bulk", body=iter([b"{}\n", b"{}\n"]))
+
+        (_, _, req_body), kwargs = con.pool.urlopen.call_args
+        self.assertTrue(kwargs["chunked"])
+        self.assertEqual([b"{}\n", b"{}\n"], list(req_body))
+
+    def test_chunked_body_is_compressed_as_it_is_streamed(self):
+        con = self._get_mock_connection({"http_compress": True})
+        con.perform_request("POST", "/_bulk", body=iter([b"{}\n", b"{}\n"]))
+
+        (_, _, req_body), kwargs = con.pool.urlopen.call_args
+        self.assertTrue(kwargs["chunked"])
+        self.assertEqual("gzip", kwargs["headers"]["content-encoding"])
+        self.assertEqual(b"{}\n{}\n", gzip_decompress(b"".join(req_body)))
+
     def test_cloud_id_http_compress_override(self):
         # 'http_compress' will be 'True' by default for connections with
         # 'cloud_id' set but should prioritize user-defined values.
@@ -421,7 +480,105 @@ class TestUrllib3Connection(TestCase):
         buf = b"\xe4\xbd\xa0\xe5\xa5\xbd\xed\xa9\xaa"
         con = self._get_mock_connection(response_body=buf)
         status, headers, data = con.perform_request("GET", "/")
-        self.assertEqual(u"你好\uda6a", data)
+        self.assertEqual(buf, data)
+        self.assertEqual(u"你好\uda6a", to_text(data))
+
+    def test_response_can_be_streamed(self):
+        con = Urllib3HttpConnection()
+        response = Mock(status=200, headers=HTTPHeaderDict({}))
+        response.stream.return_value = iter([b'{"a"', b": 1}"])
+        con.pool.urlopen = Mock(return_value=response)
+
+        status, headers, chunks = con.perform_request_stream("GET", "/_search")
+
+        self.assertFalse(con.pool.urlopen.call_args[1]["preload_content"])
+        self.assertEqual([b'{"a"', b": 1}"], list(chunks))
+        response.release_conn.assert_called_once_with()
+        self.assertFalse(response.close.called)
+
+    def test_unfinished_stream_is_closed(self):
+        con = Urllib3HttpConnection()
+        response = Mock(status=200, headers=HTTPHeaderDict({}))
+        response.stream.return_value = iter([b'{"a"', b": 1}"])
+        con.pool.urlopen = Mock(return_value=response)
+
+        status, headers, chunks = con.perform_request_stream("GET", "/_search")
+        next(chunks)
+        chunks.close()
+
+        # the rest of the body can't be read by the next request
+        response.close.assert_called_once_with()
+        response.release_conn.assert_called_once_with()
+
+    def test_failure_in_the_middle_of_the_stream_is_a_connection_error(self):
+        con = Urllib3HttpConnection()
+        for error, raised in (
+            (urllib3.exceptions.ProtocolError("Connection broken"), ConnectionError),
+            (
+                urllib3.exceptions.ReadTimeoutError(None, "/", "timed out"),
+                ConnectionTimeout,
+            ),
+        ):
+
+            def stream(size, error=error):
+                yield b'{"a"'
+                raise error
+
+            response = Mock(status=200, headers=HTTPHeaderDict({}))
+            response.stream.side_effect = stream
+            con.pool.urlopen = Mock(return_value=response)
+
+            status, headers, chunks = con.perform_request_stream("GET", "/_search")
+
+            self.assertEqual(b'{"a"', next(chunks))
+            with self.assertRaises(raised) as e:
+                next(chunks)
+            self.assertIs(error, e.exception.info)
+            response.close.assert_called_once_with()
+            response.release_conn.assert_called_once_with()
+
+    def test_warm_up_opens_connections_in_parallel(self):
+        accepted = []
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                accepted.append(self.request)
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    data += self.request.recv(1024)
+                # answer once the other requests had the time to be sent
+                time.sleep(0.2)
+                self.request.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+                # keep the connection open until the client closes it
+                self.request.recv(1024)
+
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            con = Urllib3HttpConnection(
+                host="127.0.0.1", port=server.server_address[1], maxsize=3
+            )
+            con.warm_up(5)
+
+            self.assertEqual(3, len(accepted))
+            conns = [con.pool._get_conn() for _ in range(3)]
+            self.assertTrue(all(c.sock is not None for c in conns))
+            con.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_warm_up_fails_when_no_connection_can_be_opened(self):
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        port = server.getsockname()[1]
+        server.close()
+
+        con = Urllib3HttpConnection(host="127.0.0.1", port=port)
+        self.assertRaises(ConnectionError, con.warm_up, 2)
 
 
 class TestRequestsConnection(TestCase):
@@ -449,7 +606,7 @@ class TestRequestsConnection(TestCase):
 
         status, headers, data = connection.perform_request(*args, **kwargs)
         self.assertEqual(200, status)
-        self.assertEqual("{}", data)
+        self.assertEqual(b"{}", data)
 
         timeout = kwargs.pop("timeout", connection.timeout)
         args, kwargs = connection.session.send.call_args
@@ -546,9 +703,10 @@ class TestRequestsConnection(TestCase):
         # Should be applied only if the request is sent with a body.
         self.assertNotIn("content-encoding", con.session.headers)
 
-        con.perform_request("GET", "/", body=b"{}")
+        con.perform_request("GET", "/", body=LARGE_BODY)
 
         req = con.session.send.call_args[0][0]
+        self.assertEqual(gzip_decompress(req.body), LARGE_BODY)
         self.assertEqual(req.headers["content-encoding"], "gzip")
         self.assertEqual(req.headers["accept-encoding"], "gzip,deflate")
 
@@ -823,4 +981,108 @@ class TestRequestsConnection(TestCase):
         buf = b"\xe4\xbd\xa0\xe5\xa5\xbd\xed\xa9\xaa"
         con = self._get_mock_connection(response_body=buf)
         status, headers, data = con.perform_request("GET", "/")
-        self.assertEqual(u"你好\uda6a", data)
+        self.assertEqual(buf, data)
+        self.assertEqual(u"你好\uda6a", to_text(data))
+
+
+class TestHttpxConnection(TestCase):
+    def setUp(self):
+        if not HTTPX_AVAILABLE:
+            raise SkipTest("httpx isn't installed")
+
+    def _get_mock_connection(self, connection_params={}, handler=None):
+        import httpx
+
+        con = HttpxHttpConnection(**connection_params)
+        requests = []
+
+        def _handler(request):
+            requests.append(request)
+            if handler is not None:
+                return handler(request)
+            return httpx.Response(200, content=b"{}")
+
+        con.session = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+        return con, requests
+
+    def test_speaks_http2_with_prior_knowledge_over_http(self):
+        con = HttpxHttpConnection()
+        self.assertTrue(con._client_kwargs["http2"])
+        self.assertFalse(con._client_kwargs["http1"])
+
+        # negotiated with ALPN over TLS, falling back to HTTP/1.1
+        con = HttpxHttpConnection(use_ssl=True)
+        self.assertTrue(con._client_kwargs["http2"])
+        self.assertTrue(con._client_kwargs["http1"])
+        self.assertIsInstance(con._client_kwargs["verify"], ssl.SSLContext)
+
+        con = HttpxHttpConnection(http2=False)
+        self.assertFalse(con._client_kwargs["http2"])
+        self.assertTrue(con._client_kwargs["http1"])
+
+    def test_request_is_sent_with_headers_params_and_body(self):
+        con, requests = self._get_mock_connection(
+            {"http_auth": ("username", "secret"), "url_prefix": "/prefix"}
+        )
+        status, _, data = con.perform_request(
+            "POST",
+            "/_search",
+            params={"q": "a b"},
+            body=b'{"answer": 42}',
+            headers={"x-custom": "1"},
+        )
+
+        self.assertEqual((200, b"{}"), (status, data))
+        request = requests[0]
+        self.assertEqual("http://localhost:9200/prefix/_search?q=a+b", str(request.url))
+        self.assertEqual(b'{"answer": 42}', request.content)
+        self.assertEqual("Basic dXNlcm5hbWU6c2VjcmV0", request.headers["authorization"])
+        self.assertEqual("1", request.headers["x-custom"])
+        self.assertEqual("application/json", request.headers["content-type"])
+
+    def test_http_compression(self):
+        con, requests = self._get_mock_connection({"http_compress": True})
+        con.perform_request("PUT", "/", body=LARGE_BODY)
+
+        self.assertEqual("gzip", requests[0].headers["content-encoding"])
+        self.assertEqual(LARGE_BODY, gzip_decompress(requests[0].content))
+
+    def test_errors_are_raised(self):
+        import httpx
+
+        con, _ = self._get_mock_connection(
+            handler=lambda r: httpx.Response(404, content=b'{"found": false}')
+        )
+        self.assertRaises(NotFoundError, con.perform_request, "GET", "/i/_doc/1")
+        self.assertEqual(404, con.perform_request("GET", "/i/_doc/1", ignore=(404,))[0])
+
+        def timeout(request):
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        con, _ = self._get_mock_connection(handler=timeout)
+        self.assertRaises(ConnectionTimeout, con.perform_request, "GET", "/")
+
+    def test_close_can_be_called_twice(self):
+        con, _ = self._get_mock_connection()
+        con.close()
+        con.close()
+
+        self.assertTrue(con.session.is_closed)
+
+    def test_chunked_body_is_streamed(self):
+        con, requests = self._get_mock_connection()
+
+        con.perform_request("POST", "/_bulk", body=iter([b"{}\n", b'{"a":1}\n']))
+
+        self.assertEqual(b'{}\n{"a":1}\n', requests[0].content)
+        self.assertEqual("chunked", requests[0].headers["transfer-encoding"])
+        self.assertNotIn("content-length", requests[0].headers)
+
+    def test_connections_share_one_event_loop(self):
+        cons = [HttpxHttpConnection(), HttpxHttpConnection()]
+
+        self.assertIs(cons[0]._loop, cons[1]._loop)
+        for con in cons:
+            con.close()
+        # closing a connection leaves the loop running for the others
+        self.assertTrue(cons[0]._loop.is_running())
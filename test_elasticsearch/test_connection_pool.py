@@ -15,11 +15,16 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import threading
 import time
+from mock import patch
 
 from elasticsearch.connection_pool import (
+    CircuitBreaker,
     ConnectionPool,
     RoundRobinSelector,
+    LatencyAwareSelector,
+    ZoneAwareSelector,
     DummyConnectionPool,
 )
 from elasticsearch.connection import Connection
@@ -155,3 +160,309 @@ class TestConnectionPool(TestCase):
         self.assertEqual(3, pool.dead_count[42])
         pool.mark_live(42)
         self.assertNotIn(42, pool.dead_count)
+
+    def test_live_connections_are_never_modified_in_place(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)], randomize_hosts=False)
+        snapshot = pool.connections
+
+        pool.mark_dead(1)
+        self.assertEqual([0, 1, 2], snapshot)
+        self.assertEqual([0, 2], pool.connections)
+
+        snapshot = pool.connections
+        pool.resurrect(force=True)
+        self.assertEqual([0, 2], snapshot)
+        self.assertEqual([0, 2, 1], pool.connections)
+
+    def test_dead_connections_are_not_checked_before_timeout(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)])
+        now = time.time()
+        pool.mark_dead(1, now=now)
+        pool.mark_dead(2, now=now - 30)
+        self.assertEqual(now + 30, pool.next_resurrect)
+
+        with patch.object(pool, "resurrect") as resurrect:
+            for _ in range(10):
+                self.assertEqual(0, pool.get_connection())
+        self.assertEqual(0, resurrect.call_count)
+
+    def test_next_resurrect_follows_the_dead_queue(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)])
+        now = time.time()
+        pool.mark_dead(1, now=now - 61)
+        pool.mark_dead(2, now=now)
+
+        pool.get_connection()
+        self.assertIn(1, pool.connections)
+        self.assertEqual(now + 60, pool.next_resurrect)
+
+        pool.resurrect(force=True)
+        self.assertEqual(float("inf"), pool.next_resurrect)
+
+    def test_concurrent_mark_dead_and_resurrect_keep_pool_consistent(self):
+        pool = ConnectionPool([(x, {}) for x in range(10)], dead_timeout=0)
+
+        def worker():
+            for i in range(200):
+                pool.mark_dead(pool.get_connection())
+                pool.resurrect()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        while pool.resurrect() is not None:
+            pass
+        self.assertEqual(list(range(10)), sorted(pool.connections))
+        self.assertEqual(set(range(10)), set(pool.live))
+
+    def test_revive_returns_dead_connection_to_live_pool(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)], randomize_hosts=False)
+        now = time.time()
+        pool.mark_dead(1, now=now)
+        pool.mark_dead(2, now=now - 30)
+
+        self.assertTrue(pool.revive(2))
+        self.assertFalse(pool.revive(2))
+        self.assertEqual([0, 2], pool.connections)
+        self.assertEqual([1], pool.dead_connections())
+        self.assertNotIn(2, pool.dead_count)
+        self.assertEqual(now + 60, pool.next_resurrect)
+
+    def test_revived_connection_can_fail_again(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)], randomize_hosts=False)
+        now = time.time()
+        pool.mark_dead(1, now=now - 61)
+        pool.mark_dead(2, now=now)
+        pool.revive(2)
+        pool.mark_dead(2, now=now - 62)
+
+        self.assertEqual([1, 2], sorted(pool.dead_connections()))
+        self.assertEqual(2, pool.resurrect())
+        self.assertEqual(1, pool.resurrect())
+        # the entry left behind by the revival is skipped
+        self.assertIsNone(pool.resurrect())
+        self.assertTrue(pool.dead.empty())
+        self.assertEqual(float("inf"), pool.next_resurrect)
+        self.assertEqual([0, 2, 1], pool.connections)
+
+    def test_no_resurrection_on_timeout_if_disabled(self):
+        pool = ConnectionPool([(x, {}) for x in range(2)], resurrect_on_timeout=False)
+        pool.mark_dead(0, now=time.time() - 61)
+
+        self.assertEqual([1, 1], [pool.get_connection(), pool.get_connection()])
+        self.assertEqual([0], pool.dead_connections())
+
+    def test_get_connection_prefers_nodes_with_roles(self):
+        pool = ConnectionPool(
+            [
+                (0, {"roles": ["data", "ingest"]}),
+                (1, {"roles": []}),
+                (2, {"roles": ["data", "master"]}),
+                (3, {}),
+            ],
+            randomize_hosts=False,
+        )
+
+        self.assertEqual(0, pool.get_connection(frozenset(["ingest"])))
+        self.assertEqual(1, pool.get_connection(frozenset(["coordinating_only"])))
+        self.assertEqual(
+            set([0, 2]),
+            set(pool.get_connection(frozenset(["data"])) for _ in range(4)),
+        )
+
+    def test_get_connection_falls_back_when_no_node_has_roles(self):
+        pool = ConnectionPool(
+            [(0, {"roles": ["data", "ingest"]}), (1, {"roles": ["data"]})],
+            randomize_hosts=False,
+        )
+        pool.mark_dead(0)
+
+        self.assertEqual(1, pool.get_connection(frozenset(["ingest"])))
+        self.assertEqual(1, pool.get_connection(frozenset(["ml"])))
+
+
+class TestLatencyAwareSelector(TestCase):
+    opts = {0: {}, 1: {}}
+
+    def test_faster_connection_is_preferred(self):
+        selector = LatencyAwareSelector(self.opts)
+        for _ in range(3):
+            selector.request_started(0)
+            selector.request_finished(0, 0.5)
+            selector.request_started(1)
+            selector.request_finished(1, 0.01)
+
+        self.assertEqual(
+            [1] * 20,
+            [selector.select([0, 1]) for _ in range(20)],
+        )
+
+    def test_unmeasured_connections_are_tried_first(self):
+        selector = LatencyAwareSelector(self.opts)
+        selector.request_started(0)
+        selector.request_finished(0, 0.01)
+
+        self.assertEqual(1, selector.select([0, 1]))
+
+    def test_in_flight_requests_count_against_connection(self):
+        selector = LatencyAwareSelector(self.opts)
+        for conn in (0, 1):
+            selector.request_started(conn)
+            selector.request_finished(conn, 0.1)
+        for _ in range(3):
+            selector.request_started(0)
+
+        self.assertEqual(1, selector.select([0, 1]))
+        self.assertEqual([0.1, 3], selector.stats[0])
+
+    def test_moving_average_and_failure_penalty(self):
+        selector = LatencyAwareSelector(self.opts, decay=0.5, failure_penalty=2.0)
+        selector.request_started(0)
+        selector.request_finished(0, 1.0)
+        selector.request_started(0)
+        selector.request_finished(0, 0.0, success=False)
+
+        self.assertEqual([1.5, 0], selector.stats[0])
+
+    def test_pool_forwards_request_stats_to_selector(self):
+        pool = ConnectionPool(
+            [(x, {}) for x in range(2)], selector_class=LatencyAwareSelector
+        )
+        pool.request_started(1)
+        pool.request_finished(1, 0.25)
+
+        self.assertEqual([0.25, 0], pool.selector.stats[1])
+
+    def test_stats_are_only_kept_for_known_connections(self):
+        selector = LatencyAwareSelector(self.opts)
+        # a request over a connection removed by sniffing finishing late
+        selector.request_started(2)
+        selector.request_finished(2, 0.1)
+
+        self.assertEqual({}, selector.stats)
+
+
+class TestZoneAwareSelector(TestCase):
+    opts = {
+        0: {"attributes": {"zone": "a"}},
+        1: {"attributes": {"zone": "b"}},
+        2: {"attributes": {"zone": "a"}},
+        3: {},
+    }
+
+    def test_selects_from_local_zone(self):
+        selector = ZoneAwareSelector(self.opts, zone="a")
+
+        self.assertEqual(
+            [0, 2, 0, 2], [selector.select([0, 1, 2, 3]) for _ in range(4)]
+        )
+
+    def test_falls_back_to_other_zones(self):
+        selector = ZoneAwareSelector(self.opts, zone="a")
+
+        self.assertEqual([1, 3, 1], [selector.select([1, 3]) for _ in range(3)])
+
+    def test_zone_attribute_is_configurable(self):
+        opts = {0: {"attributes": {"rack": "r1"}}, 1: {"attributes": {"rack": "r2"}}}
+        selector = ZoneAwareSelector(opts, zone="r2", zone_attribute="rack")
+
+        self.assertEqual(1, selector.select([0, 1]))
+
+    def test_request_stats_reach_inner_selector(self):
+        selector = ZoneAwareSelector(
+            self.opts, zone="b", selector_class=LatencyAwareSelector
+        )
+        selector.request_started(1)
+        selector.request_finished(1, 0.5)
+
+        self.assertEqual([0.5, 0], selector.selector.stats[1])
+
+
+class TestCircuitBreaker(TestCase):
+    def test_opens_on_failure_rate_once_enough_requests(self):
+        breaker = CircuitBreaker(failure_rate=0.5, min_requests=4)
+        for success in (False, False, True):
+            breaker.record(0.01, success, now=100)
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+
+        breaker.record(0.01, True, now=100)
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+        self.assertFalse(breaker.allow_request(now=101))
+
+    def test_opens_on_slow_requests(self):
+        breaker = CircuitBreaker(
+            slow_call_duration=1.0, slow_call_rate=0.5, min_requests=2
+        )
+        breaker.record(0.1, now=100)
+        breaker.record(2.0, now=100)
+
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+
+    def test_old_outcomes_leave_the_window(self):
+        breaker = CircuitBreaker(window=10, min_requests=2)
+        breaker.record(0.01, False, now=100)
+        breaker.record(0.01, False, now=111)
+
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        self.assertEqual(1, breaker.failures)
+
+    def test_half_open_lets_limited_trials_through(self):
+        breaker = CircuitBreaker(min_requests=1, open_timeout=30, half_open_requests=2)
+        breaker.record(0.01, False, now=100)
+
+        self.assertFalse(breaker.allow_request(now=129))
+        self.assertTrue(breaker.allow_request(now=130))
+        self.assertEqual(CircuitBreaker.HALF_OPEN, breaker.state)
+        self.assertTrue(breaker.allow_request(now=130))
+        self.assertFalse(breaker.allow_request(now=130))
+
+        breaker.record(0.01, now=131)
+        self.assertEqual(CircuitBreaker.HALF_OPEN, breaker.state)
+        breaker.record(0.01, now=131)
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        self.assertTrue(breaker.allow_request(now=131))
+
+    def test_cancelled_trial_lets_another_one_through(self):
+        breaker = CircuitBreaker(min_requests=1, open_timeout=30, half_open_requests=1)
+        breaker.record(0.01, False, now=100)
+        self.assertTrue(breaker.allow_request(now=130))
+        self.assertFalse(breaker.allow_request(now=130))
+
+        breaker.cancel()
+        self.assertEqual(CircuitBreaker.HALF_OPEN, breaker.state)
+        self.assertTrue(breaker.allow_request(now=130))
+
+    def test_failed_trial_opens_the_circuit_again(self):
+        breaker = CircuitBreaker(min_requests=1, open_timeout=30)
+        breaker.record(0.01, False, now=100)
+        breaker.allow_request(now=130)
+
+        breaker.record(0.01, False, now=131)
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+        self.assertFalse(breaker.allow_request(now=160))
+        self.assertTrue(breaker.allow_request(now=161))
+
+    def test_pool_skips_connections_with_open_circuit(self):
+        pool = ConnectionPool(
+            [(x, {}) for x in range(3)],
+            randomize_hosts=False,
+            circuit_breaker_class=lambda: CircuitBreaker(min_requests=1),
+        )
+        pool.request_finished(1, 0.01, success=False)
+
+        self.assertEqual(CircuitBreaker.OPEN, pool.circuit_breakers[1].state)
+        self.assertEqual([0, 2, 0, 2], [pool.get_connection() for _ in range(4)])
+
+    def test_pool_falls_back_when_every_circuit_is_open(self):
+        pool = ConnectionPool(
+            [(x, {}) for x in range(2)],
+            randomize_hosts=False,
+            circuit_breaker_class=lambda: CircuitBreaker(min_requests=1),
+        )
+        pool.request_finished(0, 0.01, success=False)
+        pool.request_finished(1, 0.01, success=False)
+
+        self.assertIn(pool.get_connection(), (0, 1))
@@ -16,11 +16,16 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import json
 import mock
 import time
 import threading
 import pytest
+import numpy as np
+import pandas as pd
 from elasticsearch import helpers, Elasticsearch
+from elasticsearch.connection import Connection
+from elasticsearch.exceptions import SerializationError, TransportError
 from elasticsearch.serializer import JSONSerializer
 
 from .test_cases import TestCase
@@ -200,8 +205,7 @@ class TestChunkActions(TestCase):
         )
         self.assertEqual(25, len(chunks))
         for chunk_data, chunk_actions in chunks:
-            chunk = u"".join(chunk_actions)
-            chunk = chunk if isinstance(chunk, str) else chunk.encode("utf-8")
+            chunk = b"".join(chunk_actions)
             self.assertLessEqual(len(chunk), max_byte_size)
 
 
@@ -210,3 +214,355 @@ class TestExpandActions(TestCase):
         self.assertEqual(
             ('{"index":{}}', "whatever"), helpers.expand_action("whatever")
         )
+
+
+class TestTotalTimeout(TestCase):
+    def test_scan_requests_share_one_deadline(self):
+        client = mock.Mock()
+        shards = {"successful": 1, "skipped": 0, "total": 1}
+        client.search.return_value = {
+            "_scroll_id": "scroll_id",
+            "_shards": shards,
+            "hits": {"hits": [{"_id": 1}]},
+        }
+        client.scroll.return_value = {
+            "_scroll_id": "scroll_id",
+            "_shards": shards,
+            "hits": {"hits": []},
+        }
+
+        hits = list(helpers.scan(client, index="test-index", total_timeout=10))
+
+        self.assertEqual([{"_id": 1}], hits)
+        deadline = client.search.call_args[1]["deadline"]
+        self.assertAlmostEqual(time.time() + 10, deadline, delta=1)
+        self.assertNotIn("total_timeout", client.search.call_args[1])
+        self.assertEqual(deadline, client.scroll.call_args[1]["deadline"])
+        # the scroll is cleared even once the deadline has passed
+        self.assertNotIn("deadline", client.clear_scroll.call_args[1])
+
+    def test_streaming_bulk_requests_share_one_deadline(self):
+        client = mock.Mock()
+        client.transport.serializer = JSONSerializer()
+        client.bulk.side_effect = lambda *args, **kwargs: {
+            "items": [{"index": {"status": 201}}]
+        }
+
+        results = list(
+            helpers.streaming_bulk(
+                client, [{"a": 1}, {"a": 2}], chunk_size=1, total_timeout=10
+            )
+        )
+
+        self.assertEqual(2, len(results))
+        deadlines = set(c[1]["deadline"] for c in client.bulk.call_args_list)
+        self.assertEqual(1, len(deadlines))
+        self.assertNotIn("total_timeout", client.bulk.call_args[1])
+
+    def test_backoff_never_waits_past_the_deadline(self):
+        self.assertEqual(8, helpers.actions._backoff(3, 2, 600, None))
+        self.assertLessEqual(helpers.actions._backoff(3, 2, 600, time.time() + 1), 1)
+        self.assertEqual(0, helpers.actions._backoff(3, 2, 600, time.time() - 1))
+
+
+class TestHitsParser(TestCase):
+    response = {
+        "_scroll_id": "scroll_id",
+        "took": 3,
+        "_shards": {"total": 2, "successful": 2, "skipped": 0, "failed": 0},
+        "hits": {
+            "total": {"value": 3, "relation": "eq"},
+            "max_score": 12.5,
+            "hits": [
+                {"_id": "1", "_source": {"title": 'quoted "[{" \\ and escaped'}},
+                {"_id": "2", "_source": {"title": u"你好 \U0001f600", "n": [-1.5e3]}},
+                {"_id": "3", "_source": {"empty": {}, "flags": [True, None]}},
+            ],
+        },
+        "aggregations": {"hits": {"value": 1}},
+    }
+
+    def test_hits_are_returned_as_soon_as_they_are_complete(self):
+        body = json.dumps(self.response, ensure_ascii=False).encode("utf-8")
+        for size in (1, 2, 7, 64, len(body)):
+            parser = helpers.HitsParser()
+            hits = []
+            for i in range(0, len(body), size):
+                hits.extend(parser.feed(body[i : i + size]))
+            hits.extend(parser.close())
+
+            self.assertEqual(self.response["hits"]["hits"], hits)
+            self.assertEqual(3, parser.count)
+            self.assertEqual(
+                dict(self.response, hits=dict(self.response["hits"], hits=[])),
+                parser.response,
+            )
+
+    def test_metadata_is_known_before_the_hits(self):
+        parser = helpers.HitsParser()
+        body = json.dumps(self.response).encode("utf-8")
+
+        hits = parser.feed(body[: body.index(b'"2"')])
+
+        self.assertEqual(["1"], [h["_id"] for h in hits])
+        self.assertEqual("scroll_id", parser.response["_scroll_id"])
+        self.assertEqual(2, parser.response["_shards"]["total"])
+
+    def test_lone_surrogates_are_kept(self):
+        body = b'{"hits": {"hits": [{"_id": "\xed\xa9\xaa"}]}}'
+        parser = helpers.HitsParser()
+        hits = [
+            hit
+            for byte in range(len(body))
+            for hit in parser.feed(body[byte : byte + 1])
+        ]
+        self.assertEqual([{"_id": u"\uda6a"}], hits + parser.close())
+
+    def test_incomplete_body_raises(self):
+        parser = helpers.HitsParser()
+        parser.feed(b'{"hits": {"hits": [{"_id": "1"}, {"_id"')
+        self.assertRaises(SerializationError, parser.close)
+        self.assertRaises(SerializationError, helpers.HitsParser().feed, b"[]")
+
+
+class TestStreamedScan(TestCase):
+    @staticmethod
+    def _chunks(response):
+        body = json.dumps(response).encode("utf-8")
+        return iter([body[i : i + 10] for i in range(0, len(body), 10)])
+
+    def test_hits_of_every_page_are_streamed(self):
+        shards = {"successful": 1, "skipped": 0, "total": 1}
+        client = mock.Mock()
+        client.search.return_value = self._chunks(
+            {"_scroll_id": "a", "_shards": shards, "hits": {"hits": [{"_id": 1}]}}
+        )
+        client.scroll.side_effect = [
+            self._chunks(
+                {"_scroll_id": "b", "_shards": shards, "hits": {"hits": [{"_id": 2}]}}
+            ),
+            self._chunks({"_scroll_id": "b", "_shards": shards, "hits": {"hits": []}}),
+        ]
+
+        hits = list(helpers.scan(client, index="test-index", stream=True))
+
+        self.assertEqual([{"_id": 1}, {"_id": 2}], hits)
+        self.assertTrue(client.search.call_args[1]["stream_response"])
+        self.assertTrue(client.scroll.call_args[1]["stream_response"])
+        self.assertEqual("b", client.scroll.call_args[1]["body"]["scroll_id"])
+        client.clear_scroll.assert_called_once_with(
+            body={"scroll_id": ["b"]}, ignore=(404,)
+        )
+
+    def test_scroll_is_cleared_when_a_page_is_left_early(self):
+        closed = []
+
+        def chunks():
+            try:
+                for chunk in self._chunks(
+                    {"_scroll_id": "a", "hits": {"hits": [{"_id": 1}, {"_id": 2}]}}
+                ):
+                    yield chunk
+            finally:
+                closed.append(True)
+
+        client = mock.Mock()
+        client.search.return_value = chunks()
+
+        scan = helpers.scan(client, index="test-index", stream=True)
+        self.assertEqual({"_id": 1}, next(scan))
+        scan.close()
+
+        # the rest of the response is dropped along with its connection
+        self.assertEqual([True], closed)
+        client.clear_scroll.assert_called_once_with(
+            body={"scroll_id": ["a"]}, ignore=(404,)
+        )
+
+
+class TestStreamedBulkBody(TestCase):
+    def test_body_is_streamed_in_chunks(self):
+        actions = ['{"index":{}}', u'{"a":"é"}'] * 10
+
+        chunks = list(helpers.actions._bulk_body_chunks(actions, chunk_bytes=50))
+
+        self.assertEqual(
+            (u"\n".join(actions) + u"\n").encode("utf-8"), b"".join(chunks)
+        )
+        self.assertLess(1, len(chunks))
+        for chunk in chunks[:-1]:
+            self.assertLessEqual(50, len(chunk))
+
+    def test_bulk_sends_a_chunked_body(self):
+        client = mock.Mock()
+        client.transport.serializer = JSONSerializer()
+        bodies = []
+
+        def bulk(body, *args, **kwargs):
+            bodies.append(b"".join(body))
+            return {"items": [{"index": {"status": 201}}, {"index": {"status": 201}}]}
+
+        client.bulk.side_effect = bulk
+
+        self.assertEqual((2, []), helpers.bulk(client, [{"a": 1}, {"a": 2}]))
+        self.assertEqual([b'{"index":{}}\n{"a":1}\n{"index":{}}\n{"a":2}\n'], bodies)
+
+    def test_serializer_without_dumps_bytes(self):
+        class PlainSerializer(object):
+            mimetype = "application/json"
+
+            def dumps(self, data):
+                return json.dumps(data, separators=(",", ":"))
+
+        client = mock.Mock()
+        client.transport.serializer = PlainSerializer()
+        bodies = []
+
+        def bulk(body, *args, **kwargs):
+            bodies.append(b"".join(body))
+            return {"items": [{"index": {"status": 201}}]}
+
+        client.bulk.side_effect = bulk
+
+        self.assertEqual((1, []), helpers.bulk(client, [{"a": u"é"}]))
+        self.assertEqual([u'{"index":{}}\n{"a":"\\u00e9"}\n'.encode("utf-8")], bodies)
+
+    def test_bulk_body_is_sent_again_to_another_node(self):
+        class ConsumingConnection(Connection):
+            def __init__(self, status=200, **kwargs):
+                self.status, self.bodies = status, []
+                super(ConsumingConnection, self).__init__(**kwargs)
+
+            def perform_request(self, method, url, params=None, body=None, **kwargs):
+                self.bodies.append(b"".join(body))
+                if self.status != 200:
+                    raise TransportError(self.status, "Service Unavailable")
+                data = {"items": [{"index": {"_id": "1", "status": 201}}]}
+                return 200, {}, json.dumps(data)
+
+        client = Elasticsearch(
+            [{"status": 503}, {}],
+            connection_class=ConsumingConnection,
+            randomize_hosts=False,
+        )
+        first, second = client.transport.connection_pool.connections
+
+        self.assertEqual((1, []), helpers.bulk(client, [{"a": 1}]))
+        self.assertEqual([b'{"index":{}}\n{"a":1}\n'], first.bodies)
+        self.assertEqual(first.bodies, second.bodies)
+
+
+class TestBulkDataFrame(TestCase):
+    def setup_method(self, _):
+        self.client = mock.Mock()
+        self.client.transport.serializer = JSONSerializer()
+        self.bodies = []
+
+        def bulk(body, *args, **kwargs):
+            lines = b"".join(body).splitlines()
+            self.bodies.append(lines)
+            return {"items": [{"index": {"status": 201}} for _ in lines[::2]]}
+
+        self.client.bulk.side_effect = bulk
+
+    def test_columns_are_encoded_like_documents(self):
+        df = pd.DataFrame(
+            {
+                "id": [1, 2],
+                "int": [1, 2],
+                "float": [0.5, np.nan],
+                "bool": [True, False],
+                "date": pd.to_datetime(["2020-01-01T12:30:15.5", None]),
+                "text": [u'é"%s', None],
+                "category": pd.Categorical(["a", None]),
+                "nullable": pd.array([None, 3], dtype="Int64"),
+                "vector": [np.array([0.5, 1.0], dtype=np.float32)] * 2,
+                "object": [{"a": np.int64(1)}, [1, 2]],
+            }
+        )
+
+        self.assertEqual(
+            (2, []), helpers.bulk_dataframe(self.client, df, id_column="id")
+        )
+        self.assertEqual(
+            [
+                {"index": {"_id": "1"}},
+                {
+                    "int": 1,
+                    "float": 0.5,
+                    "bool": True,
+                    "date": "2020-01-01T12:30:15.500",
+                    "text": u'é"%s',
+                    "category": "a",
+                    "nullable": None,
+                    "vector": [0.5, 1.0],
+                    "object": {"a": 1},
+                },
+                {"index": {"_id": "2"}},
+                {
+                    "int": 2,
+                    "float": None,
+                    "bool": False,
+                    "date": None,
+                    "text": None,
+                    "category": None,
+                    "nullable": 3,
+                    "vector": [0.5, 1.0],
+                    "object": [1, 2],
+                },
+            ],
+            [json.loads(line.decode("utf-8")) for line in self.bodies[0]],
+        )
+
+    def test_rows_are_sent_in_chunks(self):
+        df = pd.DataFrame({"a": range(10)})
+
+        helpers.bulk_dataframe(
+            self.client, df, op_type="create", batch_size=3, chunk_size=4
+        )
+
+        self.assertEqual([8, 8, 4], [len(lines) for lines in self.bodies])
+        self.assertEqual(b'{"create":{}}', self.bodies[0][0])
+        self.assertEqual(
+            [b'{"a":%d}' % i for i in range(10)],
+            [line for lines in self.bodies for line in lines[1::2]],
+        )
+
+    def test_timezones_are_converted_to_utc(self):
+        df = pd.DataFrame({"d": pd.to_datetime(["2020-01-01T12:30:00+01:00"])})
+
+        helpers.bulk_dataframe(self.client, df)
+
+        self.assertEqual(b'{"d":"2020-01-01T11:30:00Z"}', self.bodies[0][1])
+
+    def test_update_and_delete_need_ids(self):
+        df = pd.DataFrame({"id": ["x"], "a": [1]})
+
+        self.assertRaises(
+            ValueError, helpers.bulk_dataframe, self.client, df, op_type="update"
+        )
+        self.assertRaises(
+            ValueError, helpers.bulk_dataframe, self.client, df, op_type="upsert"
+        )
+        helpers.bulk_dataframe(self.client, df, id_column="id", op_type="update")
+        self.assertEqual(
+            [b'{"update":{"_id":"x"}}', b'{"doc":{"a":1}}'], self.bodies[0]
+        )
+
+    def test_float_ids_are_written_like_integers(self):
+        df = pd.DataFrame({"id": [1.0, 2.5], "a": [1, 2]})
+
+        helpers.bulk_dataframe(self.client, df, id_column="id", op_type="delete")
+
+        self.assertEqual(
+            [b'{"delete":{"_id":"1"}}', b'{"delete":{"_id":"2.5"}}'], self.bodies[0]
+        )
+
+    def test_missing_ids_are_refused(self):
+        for ids in ([1.0, np.nan], ["x", None], pd.array([1, None], dtype="Int64")):
+            df = pd.DataFrame({"id": ids, "a": [1, 2]})
+
+            self.assertRaises(
+                ValueError, helpers.bulk_dataframe, self.client, df, id_column="id"
+            )
+        self.assertEqual([], self.bodies)
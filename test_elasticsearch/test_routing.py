@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from __future__ import unicode_literals
+
+from elasticsearch.routing import ShardRouter, murmur3_32, routing_hash, shard_id
+
+from .test_cases import TestCase
+
+METADATA = {
+    "metadata": {
+        "indices": {
+            "logs": {
+                "routing_num_shards": 768,
+                "settings": {"index": {"number_of_shards": "3"}},
+            }
+        }
+    }
+}
+
+SEARCH_SHARDS = {
+    "shards": [
+        [
+            {"node": "n1", "shard": 0, "primary": True, "state": "STARTED"},
+            {"node": "n2", "shard": 0, "primary": False, "state": "STARTED"},
+        ],
+        [
+            {"node": "n2", "shard": 1, "primary": True, "state": "STARTED"},
+            {"node": "n3", "shard": 1, "primary": False, "state": "INITIALIZING"},
+        ],
+        [
+            {"node": "n3", "shard": 2, "primary": True, "state": "STARTED"},
+            {"node": "n1", "shard": 2, "primary": False, "state": "STARTED"},
+        ],
+    ]
+}
+
+NODES = {"n1": ("es1", 9200), "n2": ("es2", 9200), "n3": ("es3", 9200)}
+
+
+class TestMurmur3(TestCase):
+    def test_matches_reference_vectors(self):
+        self.assertEqual(0, murmur3_32(b""))
+        self.assertEqual(0x514E28B7, murmur3_32(b"", seed=1))
+        self.assertEqual(0x2362F9DE, murmur3_32(b"\x00\x00\x00\x00"))
+        self.assertEqual(0x248BFA47, murmur3_32(b"hello"))
+        self.assertEqual(
+            0x2FA826CD,
+            murmur3_32(b"The quick brown fox jumps over the lazy dog", 0x9747B28C),
+        )
+
+    def test_routing_hash_matches_elasticsearch(self):
+        # Murmur3HashFunctionTests from Elasticsearch
+        self.assertEqual(0x5A0CB7C3, routing_hash("hell"))
+        self.assertEqual(0xD7C31989 - 2 ** 32, routing_hash("hello"))
+        self.assertEqual(0x22AB2984, routing_hash("hello w"))
+        self.assertEqual(
+            0xE07DB09C - 2 ** 32,
+            routing_hash("The quick brown fox jumps over the lazy dog"),
+        )
+
+    def test_shard_id_uses_routing_factor(self):
+        for doc_id in ("1", "2", "foo", "ünïcode"):
+            expected = (routing_hash(doc_id) % 768) // 256
+            self.assertEqual(expected, shard_id(768, 3, doc_id))
+        self.assertEqual(0, shard_id(1, 1, "anything"))
+
+    def test_shard_id_prefers_routing_and_adds_partition_offset(self):
+        self.assertEqual(shard_id(30, 30, "user"), shard_id(30, 30, "1", "user"))
+        offset = routing_hash("1") % 5
+        self.assertEqual(
+            (routing_hash("user") + offset) % 30,
+            shard_id(30, 30, "1", "user", partition_size=5),
+        )
+
+
+class TestShardRouter(TestCase):
+    def test_only_single_document_operations_are_parsed(self):
+        router = ShardRouter()
+        self.assertEqual(
+            ("logs", "1", None, False), router.parse("GET", "/logs/_doc/1", None)
+        )
+        self.assertEqual(
+            ("logs", "a b", "u", True),
+            router.parse("PUT", "/logs/_doc/a%20b", {"routing": "u"}),
+        )
+        self.assertEqual(
+            ("logs", "1", None, True), router.parse("POST", "/logs/_update/1", {})
+        )
+        self.assertIsNone(router.parse("GET", "/logs/_search", None))
+        self.assertIsNone(router.parse("POST", "/logs/_doc", None))
+        self.assertIsNone(router.parse("GET", "/a,b/_doc/1", None))
+        self.assertIsNone(router.parse("GET", "/logs/_doc/1", {"preference": "x"}))
+
+    def test_writes_go_to_primary_and_reads_to_started_copies(self):
+        router = ShardRouter()
+        self.assertEqual(("logs", []), router.route("GET", "/logs/_doc/1", None))
+        router.update("logs", METADATA, SEARCH_SHARDS, NODES)
+
+        for doc_id in ("1", "2", "3", "4", "5", "6"):
+            shard = shard_id(768, 3, doc_id)
+            primary = NODES["n%d" % (shard + 1)]
+            index, addresses = router.route("PUT", "/logs/_doc/" + doc_id, None)
+            self.assertEqual(("logs", [primary]), (index, addresses))
+
+            index, addresses = router.route("GET", "/logs/_doc/" + doc_id, None)
+            self.assertIn(primary, addresses)
+            # the initializing copy of shard 1 is never used
+            self.assertEqual(1 if shard == 1 else 2, len(addresses))
+
+    def test_refresh_is_started_once_per_interval(self):
+        router = ShardRouter(refresh_interval=10)
+        self.assertTrue(router.start_refresh("logs", now=100))
+        self.assertFalse(router.start_refresh("logs", now=100))
+        router.update("logs", METADATA, SEARCH_SHARDS, NODES, now=100)
+        router.refresh_done("logs")
+
+        self.assertFalse(router.start_refresh("logs", now=105))
+        self.assertTrue(router.start_refresh("logs", now=111))
+        router.refresh_done("logs")
+
+        router.update("logs", METADATA, SEARCH_SHARDS, NODES, now=120)
+        router.invalidate("logs")
+        self.assertTrue(router.start_refresh("logs", now=121))
+
+    def test_aliases_and_routing_path_indices_are_not_routed(self):
+        router = ShardRouter()
+        alias = {"metadata": {"indices": {"a": {}, "b": {}}}}
+        router.update("alias", alias, SEARCH_SHARDS, NODES)
+        self.assertEqual(("alias", []), router.route("GET", "/alias/_doc/1", None))
+
+        tsdb = {
+            "metadata": {
+                "indices": {
+                    "tsdb": {
+                        "settings": {
+                            "index": {"number_of_shards": "3", "routing_path": "host"}
+                        }
+                    }
+                }
+            }
+        }
+        router.update("tsdb", tsdb, SEARCH_SHARDS, NODES)
+        self.assertEqual(("tsdb", []), router.route("GET", "/tsdb/_doc/1", None))
+
+    def test_stalest_index_is_dropped_when_full(self):
+        router = ShardRouter(max_indices=2)
+        router.update("a", METADATA, SEARCH_SHARDS, NODES, now=1)
+        router.update("b", METADATA, SEARCH_SHARDS, NODES, now=2)
+        router.update("c", METADATA, SEARCH_SHARDS, NODES, now=3)
+        self.assertEqual(set(["b", "c"]), set(router.tables))
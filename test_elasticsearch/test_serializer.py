@@ -19,6 +19,10 @@
 import sys
 import uuid
 
+try:
+    from collections.abc import Set
+except ImportError:
+    from collections import Set
 from datetime import datetime
 from decimal import Decimal
 
@@ -27,6 +31,7 @@ import pandas as pd
 
 from elasticsearch.serializer import (
     JSONSerializer,
+    OrjsonSerializer,
     Deserializer,
     DEFAULT_SERIALIZERS,
     TextSerializer,
@@ -161,11 +166,188 @@ class TestJSONSerializer(TestCase):
     def test_strings_are_left_untouched(self):
         self.assertEqual("你好", JSONSerializer().dumps("你好"))
 
+    def test_loads_bytes(self):
+        self.assertEqual(
+            {"d": u"你好\uda6a"},
+            JSONSerializer().loads(b'{"d": "\xe4\xbd\xa0\xe5\xa5\xbd\xed\xa9\xaa"}'),
+        )
+
+    def test_registered_encoders_are_used_for_subclasses(self):
+        class Point(object):
+            def __init__(self, x, y):
+                self.x, self.y = x, y
+
+        class Point3D(Point):
+            pass
+
+        serializer = JSONSerializer()
+        serializer.register(Point, lambda p: [p.x, p.y])
+        self.assertEqual(
+            '{"p":[1,2],"q":[3,4]}',
+            serializer.dumps({"p": Point(1, 2), "q": Point3D(3, 4)}),
+        )
+        # other serializers are left alone
+        self.assertRaises(SerializationError, JSONSerializer().dumps, Point(1, 2))
+
+    def test_registered_abstract_base_classes_match_virtual_subclasses(self):
+        serializer = JSONSerializer()
+        serializer.register(Set, sorted)
+        self.assertEqual('{"d":[1,2]}', serializer.dumps({"d": {2, 1}}))
+
+    def test_register_replaces_default_encoders(self):
+        serializer = JSONSerializer()
+        serializer.register(datetime, lambda d: d.strftime("%Y/%m/%d"))
+        self.assertEqual(
+            '{"d":"2010/10/01"}', serializer.dumps({"d": datetime(2010, 10, 1)})
+        )
+
+    def test_overridden_isoformat_is_used_for_subclasses(self):
+        class Date(datetime):
+            def isoformat(self):
+                return self.strftime("%Y-%m-%d")
+
+        self.assertEqual(
+            '{"d":"2010-10-01"}', JSONSerializer().dumps({"d": Date(2010, 10, 1)})
+        )
+
+    def test_dumps_bytes(self):
+        self.assertEqual(
+            b'{"d":"\xe4\xbd\xa0\xe5\xa5\xbd\xed\xa9\xaa"}',
+            JSONSerializer().dumps_bytes({"d": u"你好\uda6a"}),
+        )
+        self.assertEqual(b"{}", JSONSerializer().dumps_bytes(b"{}"))
+        self.assertEqual(b"{}", JSONSerializer().dumps_bytes(u"{}"))
+
+
+class TestOrjsonSerializer(TestCase):
+    def setup_method(self, _):
+        try:
+            self.serializer = OrjsonSerializer()
+        except ImproperlyConfigured:
+            raise SkipTest("orjson isn't installed")
+
+    def test_registered_encoders_are_used_for_subclasses(self):
+        class Point(object):
+            def __init__(self, x, y):
+                self.x, self.y = x, y
+
+        class Point3D(Point):
+            pass
+
+        serializer = JSONSerializer()
+        serializer.register(Point, lambda p: [p.x, p.y])
+        self.assertEqual(
+            '{"p":[1,2],"q":[3,4]}',
+            serializer.dumps({"p": Point(1, 2), "q": Point3D(3, 4)}),
+        )
+        # other serializers are left alone
+        self.assertRaises(SerializationError, JSONSerializer().dumps, Point(1, 2))
+
+    def test_registered_abstract_base_classes_match_virtual_subclasses(self):
+        serializer = JSONSerializer()
+        serializer.register(Set, sorted)
+        self.assertEqual('{"d":[1,2]}', serializer.dumps({"d": {2, 1}}))
+
+    def test_register_replaces_default_encoders(self):
+        serializer = JSONSerializer()
+        serializer.register(datetime, lambda d: d.strftime("%Y/%m/%d"))
+        self.assertEqual(
+            '{"d":"2010/10/01"}', serializer.dumps({"d": datetime(2010, 10, 1)})
+        )
+
+    def test_overridden_isoformat_is_used_for_subclasses(self):
+        class Date(datetime):
+            def isoformat(self):
+                return self.strftime("%Y-%m-%d")
+
+        self.assertEqual(
+            '{"d":"2010-10-01"}', JSONSerializer().dumps({"d": Date(2010, 10, 1)})
+        )
+
+    def test_dumps_bytes(self):
+        self.assertEqual(
+            b'{"d":"\xe4\xbd\xa0\xe5\xa5\xbd","n":[1,2.5,null,true]}',
+            self.serializer.dumps_bytes({"d": u"你好", "n": [1, 2.5, None, True]}),
+        )
+        self.assertEqual(b"{}", self.serializer.dumps_bytes(b"{}"))
+        self.assertEqual(b"{}", self.serializer.dumps_bytes(u"{}"))
+
+    def test_dumps_returns_text(self):
+        self.assertEqual(u'{"d":"你好"}', self.serializer.dumps({"d": u"你好"}))
+        self.assertEqual("你好", self.serializer.dumps("你好"))
+
+    def test_serializes_like_json_serializer(self):
+        data = {
+            "datetime": datetime(2010, 10, 1, 2, 30),
+            "decimal": Decimal("3.8"),
+            "uuid": uuid.UUID("00000000-0000-0000-0000-000000000003"),
+            "np_int": np.int8(-1),
+            "np_uint": np.uint64(2 ** 63),
+            "np_float": np.float32(0.5),
+            "np_bool": np.bool_(True),
+            "np_datetime": np.datetime64("2010-10-01T02:30:00"),
+            "np_array": np.array([[1, 2], [3, 4]]),
+            "timestamp": pd.Timestamp("2010-10-01T02:30:00"),
+            "series": pd.Series([1, 2]),
+            "category": pd.Categorical(["a", "b"]),
+            "na": pd.NA,
+        }
+        self.assertEqual(
+            JSONSerializer().loads(JSONSerializer().dumps(data)),
+            self.serializer.loads(self.serializer.dumps_bytes(data)),
+        )
+
+    def test_falls_back_to_json_for_documents_orjson_refuses(self):
+        self.assertEqual(
+            b'{"d":%d}' % 2 ** 70, self.serializer.dumps_bytes({"d": 2 ** 70})
+        )
+        self.assertEqual(
+            b'{"d":"\xed\xa9\xaa"}', self.serializer.dumps_bytes({"d": u"\uda6a"})
+        )
+        self.assertEqual({"d": 2 ** 70}, self.serializer.loads(b'{"d":%d}' % 2 ** 70))
+        self.assertEqual(
+            {"d": u"\uda6a"}, self.serializer.loads(b'{"d":"\xed\xa9\xaa"}')
+        )
+
+    def test_raises_serialization_error(self):
+        self.assertRaises(SerializationError, self.serializer.dumps_bytes, object())
+        self.assertRaises(SerializationError, self.serializer.loads, b"{{")
+        self.assertRaises(SerializationError, self.serializer.loads, object())
+
+    def test_registered_encoders_replace_native_serialization(self):
+        class Tag(str):
+            pass
+
+        self.serializer.register(datetime, lambda d: d.strftime("%Y/%m/%d"))
+        self.serializer.register(np.int64, lambda i: "#%d" % i)
+        self.serializer.register(Tag, lambda t: t.upper())
+        self.assertEqual(
+            b'{"d":"2010/10/01","i":"#1","f":0.5,"t":"A"}',
+            self.serializer.dumps_bytes(
+                {
+                    "d": datetime(2010, 10, 1, 2, 30),
+                    "i": np.int64(1),
+                    "f": np.float32(0.5),
+                    "t": Tag("a"),
+                }
+            ),
+        )
+        # other serializers are left alone
+        self.assertEqual(
+            b'{"d":"2010-10-01T02:30:00"}',
+            OrjsonSerializer().dumps_bytes({"d": datetime(2010, 10, 1, 2, 30)}),
+        )
+
 
 class TestTextSerializer(TestCase):
     def test_strings_are_left_untouched(self):
         self.assertEqual("你好", TextSerializer().dumps("你好"))
 
+    def test_bytes_are_decoded(self):
+        self.assertEqual(
+            u"你好\uda6a", TextSerializer().loads(b"\xe4\xbd\xa0\xe5\xa5\xbd\xed\xa9\xaa")
+        )
+
     def test_raises_serialization_error_on_dump_error(self):
         self.assertRaises(SerializationError, TextSerializer().dumps, {})
 
@@ -186,6 +368,14 @@ class TestDeserializer(TestCase):
             self.de.loads('{"some":"data"}', "text/plain; charset=whatever"),
         )
 
+    def test_get_serializer(self):
+        self.assertIs(DEFAULT_SERIALIZERS["application/json"], self.de.get_serializer())
+        self.assertIs(
+            DEFAULT_SERIALIZERS["text/plain"],
+            self.de.get_serializer("text/plain; charset=whatever"),
+        )
+        self.assertRaises(SerializationError, self.de.get_serializer, "text/html")
+
     def test_raises_serialization_error_on_unknown_mimetype(self):
         self.assertRaises(SerializationError, self.de.loads, "{}", "text/html")
 
@@ -17,16 +17,43 @@
 #  under the License.
 
 from __future__ import unicode_literals
+import copy
 import json
+import threading
 import time
+from functools import partial
 from mock import patch
 
-from elasticsearch.transport import Transport, get_host_info
+from elasticsearch.transport import (
+    ConcurrencyLimiter,
+    HedgePolicy,
+    OffloadPolicy,
+    RequestCoalescer,
+    ResponseCache,
+    RetryBudget,
+    RoutingPolicy,
+    Transport,
+    _estimate_size,
+    get_host_info,
+)
 from elasticsearch.connection import Connection
-from elasticsearch.connection_pool import DummyConnectionPool
-from elasticsearch.exceptions import ConnectionError, TransportError
+from elasticsearch.connection_pool import (
+    CircuitBreaker,
+    ConnectionPool,
+    DummyConnectionPool,
+    LatencyAwareSelector,
+    ZoneAwareSelector,
+)
+from elasticsearch.exceptions import (
+    ConnectionError,
+    ConnectionTimeout,
+    TransportError,
+)
+from elasticsearch.routing import ShardRouter, shard_id
+from elasticsearch.serializer import JSON_LOADS_BYTES, JSONSerializer
 
 from .test_cases import TestCase
+from .test_routing import METADATA, NODES, SEARCH_SHARDS
 
 
 class DummyConnection(Connection):
@@ -34,15 +61,25 @@ class DummyConnection(Connection):
         self.exception = kwargs.pop("exception", None)
         self.status, self.data = kwargs.pop("status", 200), kwargs.pop("data", "{}")
         self.headers = kwargs.pop("headers", {})
+        self.delay = kwargs.pop("delay", 0)
         self.calls = []
         super(DummyConnection, self).__init__(**kwargs)
 
     def perform_request(self, *args, **kwargs):
         self.calls.append((args, kwargs))
+        if self.delay:
+            # behave like a node that doesn't answer within the timeout
+            timeout = kwargs.get("timeout")
+            time.sleep(min(self.delay, timeout or self.delay))
+            if timeout and timeout < self.delay:
+                raise ConnectionTimeout("TIMEOUT", "timed out", None)
         if self.exception:
             raise self.exception
         return self.status, self.headers, self.data
 
+    def close(self):
+        pass
+
 
 CLUSTER_NODES = """{
   "_nodes" : {
@@ -95,6 +132,88 @@ CLUSTER_NODES_7x_PUBLISH_HOST = """{
 }"""
 
 
+# recorded from a three node 7.10 cluster spread over two zones
+CLUSTER_NODES_ZONES = """{
+  "_nodes" : {
+    "total" : 3,
+    "successful" : 3,
+    "failed" : 0
+  },
+  "cluster_name" : "zones",
+  "nodes" : {
+    "f6jqLbu9TMShhT0cYXcsnA" : {
+      "name" : "es-a1",
+      "transport_address" : "10.0.1.11:9300",
+      "host" : "10.0.1.11",
+      "ip" : "10.0.1.11",
+      "version" : "7.10.0",
+      "build_flavor" : "default",
+      "build_type" : "docker",
+      "build_hash" : "51e9d6f22758d0374a0f3f5c6e8f3a7997850f96",
+      "roles" : [ "data", "ingest", "master", "ml", "remote_cluster_client", "transform" ],
+      "attributes" : {
+        "ml.machine_memory" : "4124463104",
+        "xpack.installed" : "true",
+        "zone" : "eu-west-1a",
+        "transform.node" : "true",
+        "ml.max_open_jobs" : "20"
+      },
+      "http" : {
+        "bound_address" : [ "0.0.0.0:9200" ],
+        "publish_address" : "10.0.1.11:9200",
+        "max_content_length_in_bytes" : 104857600
+      }
+    },
+    "3sz5kBsRTP2JCZy0V0ldYw" : {
+      "name" : "es-b1",
+      "transport_address" : "10.0.2.11:9300",
+      "host" : "10.0.2.11",
+      "ip" : "10.0.2.11",
+      "version" : "7.10.0",
+      "build_flavor" : "default",
+      "build_type" : "docker",
+      "build_hash" : "51e9d6f22758d0374a0f3f5c6e8f3a7997850f96",
+      "roles" : [ "data", "ingest", "master", "ml", "remote_cluster_client", "transform" ],
+      "attributes" : {
+        "ml.machine_memory" : "4124463104",
+        "xpack.installed" : "true",
+        "zone" : "eu-west-1b",
+        "transform.node" : "true",
+        "ml.max_open_jobs" : "20"
+      },
+      "http" : {
+        "bound_address" : [ "0.0.0.0:9200" ],
+        "publish_address" : "10.0.2.11:9200",
+        "max_content_length_in_bytes" : 104857600
+      }
+    },
+    "Ymb4Pl4XRt-A1W5cFbMzBQ" : {
+      "name" : "es-b2",
+      "transport_address" : "10.0.2.12:9300",
+      "host" : "10.0.2.12",
+      "ip" : "10.0.2.12",
+      "version" : "7.10.0",
+      "build_flavor" : "default",
+      "build_type" : "docker",
+      "build_hash" : "51e9d6f22758d0374a0f3f5c6e8f3a7997850f96",
+      "roles" : [ "data", "ingest", "ml", "remote_cluster_client", "transform" ],
+      "attributes" : {
+        "ml.machine_memory" : "4124463104",
+        "xpack.installed" : "true",
+        "zone" : "eu-west-1b",
+        "transform.node" : "true",
+        "ml.max_open_jobs" : "20"
+      },
+      "http" : {
+        "bound_address" : [ "0.0.0.0:9200" ],
+        "publish_address" : "10.0.2.12:9200",
+        "max_content_length_in_bytes" : 104857600
+      }
+    }
+  }
+}"""
+
+
 class TestHostsInfoCallback(TestCase):
     def test_master_only_nodes_are_ignored(self):
         nodes = [
@@ -130,6 +249,61 @@ class TestTransport(TestCase):
             t.get_connection().calls[0][1],
         )
 
+    def test_total_timeout_is_shared_by_all_attempts(self):
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship"), "delay": 0.1}],
+            connection_class=DummyConnection,
+            max_retries=10,
+        )
+        connection = t.get_connection()
+
+        self.assertRaises(
+            ConnectionError,
+            t.perform_request,
+            "GET",
+            "/",
+            params={"total_timeout": 0.25},
+        )
+        # no attempt is started once the deadline has passed
+        self.assertEqual(3, len(connection.calls))
+        timeouts = [kwargs["timeout"] for (_, kwargs) in connection.calls]
+        self.assertEqual(sorted(timeouts, reverse=True), timeouts)
+        self.assertLessEqual(timeouts[0], 0.25)
+
+    def test_request_timeout_is_kept_when_within_the_deadline(self):
+        t = Transport([{}], connection_class=DummyConnection)
+
+        t.perform_request(
+            "GET", "/", params={"request_timeout": 1, "total_timeout": 10}
+        )
+        self.assertEqual(1, t.get_connection().calls[0][1]["timeout"])
+
+    def test_expired_deadline_sends_no_request(self):
+        t = Transport([{}], connection_class=DummyConnection)
+
+        self.assertRaises(
+            ConnectionTimeout,
+            t.perform_request,
+            "GET",
+            "/",
+            params={"deadline": time.time() - 1},
+        )
+        self.assertEqual(0, len(t.get_connection().calls))
+
+    def test_timeout_cut_by_the_deadline_does_not_mark_connection_dead(self):
+        t = Transport(
+            [{"delay": 1}], connection_class=DummyConnection, retry_on_timeout=True
+        )
+
+        self.assertRaises(
+            ConnectionTimeout,
+            t.perform_request,
+            "GET",
+            "/",
+            params={"total_timeout": 0.05},
+        )
+        self.assertEqual(1, len(t.connection_pool.connections))
+
     def test_opaque_id(self):
         t = Transport([{}], opaque_id="app-1", connection_class=DummyConnection)
 
@@ -208,6 +382,61 @@ class TestTransport(TestCase):
             t.get_connection().calls[0][0],
         )
 
+    def test_bytes_native_serializer_loads_bytes(self):
+        class BytesSerializer(JSONSerializer):
+            bytes_native = True
+
+            def loads(self, s):
+                assert isinstance(s, bytes)
+                return super(BytesSerializer, self).loads(s)
+
+            def dumps_bytes(self, data):
+                return b"[%s]" % super(BytesSerializer, self).dumps_bytes(data)
+
+        t = Transport(
+            [{}],
+            connection_class=DummyConnection,
+            serializer=BytesSerializer(),
+            data=b'{"a":1}',
+        )
+
+        self.assertEqual({"a": 1}, t.perform_request("GET", "/", body={}))
+        self.assertEqual(("GET", "/", None, b"[{}]"), t.get_connection().calls[0][0])
+
+    def test_json_serializer_loads_bytes_when_the_json_module_does(self):
+        t = Transport(
+            [{}],
+            connection_class=DummyConnection,
+            data=b'{"d":"\xe4\xbd\xa0\xe5\xa5\xbd"}',
+        )
+
+        with patch.object(JSONSerializer, "loads", return_value={}) as loads:
+            t.perform_request("GET", "/")
+        data = loads.call_args[0][0]
+        self.assertIsInstance(data, bytes if JSON_LOADS_BYTES else type(""))
+
+    def test_serializer_not_subclassing_serializer(self):
+        class PlainSerializer(object):
+            mimetype = "application/json"
+
+            def loads(self, s):
+                return json.loads(s)
+
+            def dumps(self, data):
+                return json.dumps(data)
+
+        t = Transport(
+            [{}],
+            connection_class=DummyConnection,
+            serializer=PlainSerializer(),
+            data='{"a": 1}',
+        )
+
+        self.assertEqual({"a": 1}, t.perform_request("GET", "/", body={"b": 2}))
+        self.assertEqual(
+            ("GET", "/", None, b'{"b": 2}'), t.get_connection().calls[0][0]
+        )
+
     def test_kwargs_passed_on_to_connections(self):
         t = Transport([{"host": "google.com"}], port=123)
         self.assertEqual(1, len(t.connection_pool.connections))
@@ -245,6 +474,176 @@ class TestTransport(TestCase):
         self.assertRaises(ConnectionError, t.perform_request, "GET", "/")
         self.assertEqual(4, len(t.get_connection().calls))
 
+    def test_retries_stop_once_retry_budget_is_spent(self):
+        budget = RetryBudget(max_tokens=2)
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship")}],
+            connection_class=DummyConnection,
+            retry_budget=budget,
+        )
+
+        self.assertRaises(ConnectionError, t.perform_request, "GET", "/")
+        self.assertEqual(3, len(t.get_connection().calls))
+        self.assertRaises(ConnectionError, t.perform_request, "GET", "/")
+        self.assertEqual(4, len(t.get_connection().calls))
+        self.assertEqual(
+            {
+                "tokens": 0,
+                "max_tokens": 2,
+                "successes": 0,
+                "retries": 2,
+                "rejected": 2,
+            },
+            budget.stats(),
+        )
+
+    def test_successful_requests_refill_retry_budget(self):
+        budget = RetryBudget(ratio=0.5, max_tokens=1)
+        t = Transport([{}], connection_class=DummyConnection, retry_budget=budget)
+        budget.withdraw()
+
+        t.perform_request("GET", "/")
+        self.assertFalse(budget.withdraw())
+        for _ in range(3):
+            t.perform_request("GET", "/")
+        self.assertEqual(1, budget.tokens)
+        self.assertTrue(budget.withdraw())
+        self.assertEqual(4, budget.successes)
+
+    def test_concurrency_limit_grows_additively_and_shrinks_multiplicatively(self):
+        limiter = ConcurrencyLimiter(initial_limit=4, backoff_ratio=0.5)
+        self.assertEqual(
+            [True] * 4 + [False], [limiter.try_acquire(0) for _ in range(5)]
+        )
+
+        limiter.release(0, 0.1)
+        self.assertEqual(5, limiter.limit())
+        limiter.release(0, 0.1, overloaded=True)
+        self.assertEqual(2, limiter.limit())
+        limiter.release(0, 0.1)
+        self.assertEqual(3, limiter.limit())
+        # not enough requests in flight to grow the limit
+        limiter.release(0, 0.1)
+        self.assertEqual(3, limiter.limit())
+
+    def test_latency_spike_shrinks_concurrency_limit(self):
+        limiter = ConcurrencyLimiter(initial_limit=10, latency_tolerance=2.0)
+        limiter.try_acquire(0)
+        limiter.release(0, 0.1)
+        limiter.try_acquire(0)
+        limiter.release(0, 0.5)
+
+        self.assertEqual(9, limiter.limit())
+
+    def test_concurrency_limit_can_be_per_node(self):
+        limiter = ConcurrencyLimiter(initial_limit=1, per_node=True)
+
+        self.assertTrue(limiter.try_acquire(0))
+        self.assertTrue(limiter.try_acquire(1))
+        self.assertFalse(limiter.try_acquire(0))
+
+    def _run_concurrently(self, transport, count):
+        errors = []
+
+        def request():
+            try:
+                transport.perform_request("GET", "/")
+            except TransportError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=request) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_requests_over_concurrency_limit_wait_for_a_slot(self):
+        limiter = ConcurrencyLimiter(initial_limit=1, latency_tolerance=None)
+        t = Transport(
+            [{"delay": 0.05}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+
+        start = time.time()
+        self.assertEqual([], self._run_concurrently(t, 3))
+        self.assertGreaterEqual(time.time() - start, 0.15)
+        self.assertEqual(0, limiter.rejected)
+
+    def test_requests_over_concurrency_limit_fail_fast(self):
+        limiter = ConcurrencyLimiter(initial_limit=1, block=False)
+        t = Transport(
+            [{"delay": 0.1}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+
+        errors = self._run_concurrently(t, 2)
+        self.assertEqual(1, len(errors))
+        self.assertEqual("Concurrency limit reached.", errors[0].error)
+        self.assertEqual(1, limiter.rejected)
+
+    def test_waiting_for_a_slot_times_out(self):
+        limiter = ConcurrencyLimiter(initial_limit=1, queue_timeout=0.01)
+        t = Transport(
+            [{"delay": 0.1}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+
+        self.assertEqual(1, len(self._run_concurrently(t, 2)))
+        self.assertEqual(0, len(limiter.waiters[None]))
+
+    def test_overload_responses_shrink_concurrency_limit(self):
+        limiter = ConcurrencyLimiter(initial_limit=10, backoff_ratio=0.5)
+        t = Transport(
+            [{"exception": TransportError(429, "too_many_requests")}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+
+        self.assertRaises(TransportError, t.perform_request, "GET", "/")
+        self.assertEqual(5, limiter.limit())
+
+    def test_streamed_response_holds_its_slot_until_it_is_read(self):
+        limiter = ConcurrencyLimiter(initial_limit=1, block=False)
+        t = Transport(
+            [{"data": '{"hits": 1}'}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+        stream = {"stream_response": True}
+
+        chunks = t.perform_request("POST", "/_search", body={}, params=dict(stream))
+        self.assertRaises(TransportError, t.perform_request, "GET", "/")
+        self.assertEqual([b'{"hits": 1}'], list(chunks))
+        self.assertEqual({"hits": 1}, t.perform_request("GET", "/"))
+
+        # closing the chunks without reading them frees the slot as well
+        t.perform_request("POST", "/_search", body={}, params=dict(stream)).close()
+        self.assertEqual({"hits": 1}, t.perform_request("GET", "/"))
+        self.assertEqual(1, limiter.rejected)
+
+    def test_concurrency_limits_of_removed_nodes_are_pruned(self):
+        limiter = ConcurrencyLimiter(per_node=True)
+        t = Transport(
+            [{"host": "a"}, {"host": "b"}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+        a, b = sorted(t.connection_pool.connections, key=lambda c: c.host)
+        for connection in (a, b):
+            limiter.try_acquire(connection)
+        limiter.release(a, 0.1)
+
+        t.set_connections([{"host": "a"}])
+
+        self.assertEqual([a], list(limiter.limits))
+        # a request still in flight to a removed node doesn't bring it back
+        limiter.release(b, 0.1)
+        self.assertEqual([a], list(limiter.limits))
+
     def test_failed_connection_will_be_marked_as_dead(self):
         t = Transport(
             [{"exception": ConnectionError("abandon ship")}] * 2,
@@ -266,6 +665,649 @@ class TestTransport(TestCase):
             self.assertEqual(1, len(t.connection_pool.connections))
             self.assertEqual(1, len(t.connection_pool.dead_count))
 
+    def test_request_stats_are_reported_to_selector(self):
+        t = Transport(
+            [{}, {"exception": ConnectionError("abandon ship")}],
+            connection_class=DummyConnection,
+            selector_class=LatencyAwareSelector,
+            randomize_hosts=False,
+            max_retries=0,
+        )
+        ok, failing = t.connection_pool.connections
+
+        t._perform_connection_request(ok, "GET", "/")
+        self.assertRaises(
+            ConnectionError, t._perform_connection_request, failing, "GET", "/"
+        )
+
+        stats = t.connection_pool.selector.stats
+        self.assertEqual(0, stats[ok][1])
+        self.assertLess(stats[ok][0], 1.0)
+        self.assertEqual([1.0, 0], stats[failing])
+
+    def test_server_errors_open_the_circuit_breaker(self):
+        t = Transport(
+            [{"exception": TransportError(500, "oops")}, {}],
+            connection_class=DummyConnection,
+            circuit_breaker_class=partial(CircuitBreaker, min_requests=2),
+            randomize_hosts=False,
+        )
+        failing, ok = t.connection_pool.connections
+
+        for _ in range(2):
+            self.assertRaises(TransportError, t.perform_request, "GET", "/")
+            t.perform_request("GET", "/")
+        for _ in range(4):
+            t.perform_request("GET", "/")
+
+        self.assertEqual(
+            CircuitBreaker.OPEN, t.connection_pool.circuit_breakers[failing].state
+        )
+        self.assertEqual(2, len(failing.calls))
+        self.assertEqual(6, len(ok.calls))
+
+    def test_routing_policy_sorts_requests_into_families(self):
+        policy = RoutingPolicy({})
+        self.assertEqual("bulk", policy.family("POST", "/_bulk"))
+        self.assertEqual("bulk", policy.family("PUT", "/logs/_bulk?refresh=true"))
+        self.assertEqual("search", policy.family("POST", "/logs/_search"))
+        self.assertEqual("search", policy.family("GET", "/_msearch/template"))
+        self.assertEqual("admin", policy.family("GET", "/_cluster/health"))
+        self.assertIsNone(policy.family("GET", "/logs/_doc/1"))
+
+    def test_offload_policy_offloads_large_payloads(self):
+        policy = OffloadPolicy(min_size=1000)
+        self.assertFalse(policy.offload(b"x" * 999))
+        self.assertTrue(policy.offload("x" * 1000))
+        self.assertFalse(policy.offload({"query": {"match": {"title": "x" * 100}}}))
+        self.assertTrue(policy.offload({"docs": [{"title": "x" * 100}] * 10}))
+
+    def test_size_estimate_stops_at_the_limit(self):
+        body = {"ids": list(range(100000)), "nested": [[["x" * 10]]]}
+        self.assertLess(_estimate_size(body, 1000), 1100)
+        self.assertAlmostEqual(
+            len(json.dumps(body["nested"])),
+            _estimate_size(body["nested"], 1000),
+            delta=5,
+        )
+
+    def test_requests_are_routed_by_node_roles(self):
+        t = Transport(
+            [
+                {"host": "ingest", "roles": ["ingest"]},
+                {"host": "coordinating", "roles": []},
+                {"host": "data", "roles": ["data"]},
+            ],
+            connection_class=DummyConnection,
+            routing_policy=RoutingPolicy(
+                {"bulk": ["ingest"], "search": ["coordinating_only"]}
+            ),
+        )
+
+        for _ in range(3):
+            t.perform_request("POST", "/_bulk", body="{}\n")
+            t.perform_request("POST", "/logs/_search", body={})
+            t.perform_request("GET", "/_cluster/health")
+
+        urls = dict(
+            (c.hostname, [args[1] for args, _ in c.calls])
+            for c in t.connection_pool.connections
+        )
+        self.assertEqual(3, urls["ingest"].count("/_bulk"))
+        self.assertEqual(3, urls["coordinating"].count("/logs/_search"))
+        # admin requests go to any node
+        self.assertEqual(9, sum(len(u) for u in urls.values()))
+
+    def test_roles_are_only_passed_to_the_connection_pool_when_routed(self):
+        class NoRolesConnectionPool(ConnectionPool):
+            def get_connection(self):
+                return super(NoRolesConnectionPool, self).get_connection()
+
+        t = Transport(
+            [{}, {}],
+            connection_class=DummyConnection,
+            connection_pool_class=NoRolesConnectionPool,
+        )
+
+        self.assertEqual({}, t.perform_request("GET", "/"))
+
+    def test_hedged_requests_are_routed_by_node_roles(self):
+        class RecordingConnectionPool(ConnectionPool):
+            def get_connection(self, roles=None):
+                self.roles.append(roles)
+                return super(RecordingConnectionPool, self).get_connection(roles)
+
+        RecordingConnectionPool.roles = roles = []
+        policy = HedgePolicy(min_samples=1)
+        t = Transport(
+            [
+                {"host": "slow", "roles": [], "delay": 0.3},
+                {"host": "fast", "roles": []},
+                {"host": "ingest", "roles": ["ingest"]},
+            ],
+            connection_class=DummyConnection,
+            connection_pool_class=RecordingConnectionPool,
+            randomize_hosts=False,
+            hedge_policy=policy,
+            routing_policy=RoutingPolicy({"search": ["coordinating_only"]}),
+        )
+        slow, fast, ingest = t.connection_pool.connections
+        policy.record(fast, 0.01)
+
+        t.perform_request("POST", "/logs/_search", body={})
+
+        self.assertEqual(1, policy.hedged)
+        self.assertEqual([frozenset(["coordinating_only"])] * 2, roles)
+        self.assertEqual([], ingest.calls)
+
+    def test_document_requests_go_to_the_node_holding_the_shard(self):
+        router = ShardRouter()
+        router.update("logs", METADATA, SEARCH_SHARDS, NODES, now=time.time())
+        t = Transport(
+            [{"host": "es%d" % i, "port": 9200} for i in (1, 2, 3)],
+            connection_class=DummyConnection,
+            shard_router=router,
+        )
+
+        for doc_id in ("1", "2", "3", "4"):
+            t.perform_request("PUT", "/logs/_doc/%s" % doc_id, body={})
+        for connection in t.connection_pool.connections:
+            for args, _ in connection.calls:
+                doc_id = args[1].rsplit("/", 1)[1]
+                node = "n%d" % (shard_id(768, 3, doc_id) + 1)
+                self.assertEqual(NODES[node][0], connection.hostname)
+
+    def test_failing_routed_node_invalidates_shard_routing(self):
+        router = ShardRouter()
+        router.update("logs", METADATA, SEARCH_SHARDS, NODES, now=time.time())
+        t = Transport(
+            [
+                {"host": "es%d" % i, "port": 9200, "exception": ConnectionError()}
+                for i in (1, 2, 3)
+            ],
+            connection_class=DummyConnection,
+            shard_router=router,
+            max_retries=0,
+        )
+
+        with patch.object(t, "_schedule_shard_refresh") as refresh:
+            self.assertRaises(
+                ConnectionError, t.perform_request, "PUT", "/logs/_doc/1", body={}
+            )
+            self.assertEqual(0, router.tables["logs"][0])
+            self.assertRaises(
+                ConnectionError, t.perform_request, "PUT", "/logs/_doc/1", body={}
+            )
+            refresh.assert_called_once_with("logs")
+
+    def test_shard_routing_is_fetched_from_the_cluster(self):
+        router = ShardRouter()
+        t = Transport([{}], connection_class=DummyConnection, shard_router=router)
+        nodes = {
+            "nodes": dict(
+                (node, {"roles": ["data"], "http": {"publish_address": "%s:%d" % a}})
+                for (node, a) in NODES.items()
+            )
+        }
+
+        with patch.object(
+            t, "perform_request", side_effect=[nodes, METADATA, SEARCH_SHARDS]
+        ) as perform_request:
+            self.assertTrue(router.start_refresh("logs"))
+            t._refresh_shard_routing("logs")
+
+        self.assertEqual(
+            [
+                "/_nodes/_all/http",
+                "/_cluster/state/metadata/logs",
+                "/logs/_search_shards",
+            ],
+            [args[1] for args, _ in perform_request.call_args_list],
+        )
+        self.assertEqual(set(), router.refreshing)
+        primary = NODES["n%d" % (shard_id(768, 3, "1") + 1)]
+        self.assertEqual(("logs", [primary]), router.route("PUT", "/logs/_doc/1", {}))
+
+    def test_request_coalescer_only_coalesces_idempotent_requests(self):
+        coalescer = RequestCoalescer()
+        self.assertIsNotNone(coalescer.key("GET", "/", None, None, None))
+        self.assertIsNotNone(coalescer.key("POST", "/i/_search", {}, {}, b"{}"))
+        self.assertIsNone(coalescer.key("POST", "/i/_doc", None, None, b"{}"))
+        self.assertIsNone(coalescer.key("PUT", "/i/_search", None, None, b"{}"))
+        self.assertNotEqual(
+            coalescer.key("GET", "/", None, {"q": "a"}, None),
+            coalescer.key("GET", "/", None, {"q": "b"}, None),
+        )
+        self.assertNotEqual(
+            coalescer.key("GET", "/", {"authorization": "a"}, None, None),
+            coalescer.key("GET", "/", {"authorization": "b"}, None, None),
+        )
+
+    def test_concurrent_identical_reads_share_one_request(self):
+        coalescer = RequestCoalescer()
+        t = Transport(
+            [{"delay": 0.1, "data": '{"a": [1]}'}],
+            connection_class=DummyConnection,
+            request_coalescer=coalescer,
+        )
+        results = []
+
+        def search():
+            results.append(t.perform_request("POST", "/i/_search", body={"q": 1}))
+
+        threads = [threading.Thread(target=search) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(t.get_connection().calls))
+        self.assertEqual([{"a": [1]}] * 5, results)
+        # every caller gets its own copy
+        self.assertEqual(5, len(set(id(r) for r in results)))
+        self.assertEqual({"requests": 5, "coalesced": 4}, coalescer.stats())
+        self.assertEqual({}, coalescer.in_flight)
+
+    def test_leader_modifying_its_response_does_not_affect_the_others(self):
+        def slow_copy(response):
+            # the waiting requests copy the response after the leader got it
+            time.sleep(0.05)
+            return copy.deepcopy(response)
+
+        coalescer = RequestCoalescer(copy_response=slow_copy)
+        waiting = threading.Event()
+        results = []
+
+        def request():
+            waiting.wait()
+            return {"hits": [1]}
+
+        def call():
+            response = coalescer.call("key", request)
+            response["hits"].append("mutated")
+            results.append(response)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while coalescer.stats()["coalesced"] < 2:
+            time.sleep(0.001)
+        waiting.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([{"hits": [1, "mutated"]}] * 3, results)
+
+    def test_coalesced_requests_share_the_error(self):
+        t = Transport(
+            [{"delay": 0.1, "exception": TransportError(400, "bad")}],
+            connection_class=DummyConnection,
+            request_coalescer=RequestCoalescer(),
+        )
+        errors = []
+
+        def get():
+            try:
+                t.perform_request("GET", "/_cluster/health")
+            except TransportError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=get) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(t.get_connection().calls))
+        self.assertEqual(3, len(errors))
+
+    def test_raw_response_is_returned_as_bytes(self):
+        t = Transport(
+            [{"data": '{"hits": "你好"}'}],
+            connection_class=DummyConnection,
+            response_cache=ResponseCache(),
+        )
+
+        for _ in range(2):
+            self.assertEqual(
+                '{"hits": "你好"}'.encode("utf-8"),
+                t.perform_request("GET", "/_search", params={"raw_response": True}),
+            )
+        self.assertEqual({"hits": "你好"}, t.perform_request("GET", "/_search"))
+        # raw responses are neither served from nor stored in the cache
+        self.assertEqual(3, len(t.get_connection().calls))
+        self.assertEqual({}, t.get_connection().calls[0][0][2])
+
+    def test_chunked_body_is_encoded_and_sent_as_it_is_produced(self):
+        t = Transport([{}], connection_class=DummyConnection)
+
+        t.perform_request("POST", "/_bulk", body=(c for c in [b"{}\n", "你好\n"]))
+
+        body = t.get_connection().calls[0][0][3]
+        self.assertEqual([b"{}\n", "你好\n".encode("utf-8")], list(body))
+
+    def test_chunked_body_is_only_retried_until_a_chunk_is_consumed(self):
+        class ConsumingConnection(DummyConnection):
+            def perform_request(self, method, url, params, body, **kwargs):
+                next(body)
+                return super(ConsumingConnection, self).perform_request(
+                    method, url, params, body, **kwargs
+                )
+
+        for connection_class, calls in (
+            (DummyConnection, 3),
+            (ConsumingConnection, 1),
+        ):
+            t = Transport(
+                [{"exception": ConnectionError("abandon ship")}] * 3,
+                connection_class=connection_class,
+                randomize_hosts=False,
+                max_retries=2,
+            )
+            connections = list(t.connection_pool.connections)
+            self.assertRaises(
+                ConnectionError,
+                t.perform_request,
+                "POST",
+                "/_bulk",
+                body=iter([b"{}\n"]),
+            )
+            self.assertEqual(calls, sum(len(c.calls) for c in connections))
+
+    def test_streamed_response_is_returned_as_chunks(self):
+        policy = HedgePolicy(min_samples=1)
+        t = Transport(
+            [{"data": '{"hits": "你好"}', "delay": 0.2}, {"data": "{}"}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            hedge_policy=policy,
+        )
+        policy.record(t.connection_pool.connections[1], 0.01)
+
+        chunks = t.perform_request(
+            "POST", "/_search", body={}, params={"stream_response": True}
+        )
+
+        self.assertEqual(['{"hits": "你好"}'.encode("utf-8")], list(chunks))
+        # a streamed response is never hedged
+        self.assertEqual(0, policy.hedged)
+        self.assertEqual([], t.connection_pool.connections[1].calls)
+
+    def test_node_failing_in_the_middle_of_a_streamed_response_is_marked_dead(self):
+        class BrokenStreamConnection(DummyConnection):
+            def perform_request_stream(self, *args, **kwargs):
+                def chunks():
+                    yield b'{"hits"'
+                    raise ConnectionError("N/A", "Connection broken", None)
+
+                self.calls.append((args, kwargs))
+                return 200, {}, chunks()
+
+        t = Transport([{}, {}], connection_class=BrokenStreamConnection)
+        chunks = t.perform_request(
+            "POST", "/_search", body={}, params={"stream_response": True}
+        )
+        connection = [c for c in t.connection_pool.connections if c.calls][0]
+
+        self.assertEqual(b'{"hits"', next(chunks))
+        self.assertRaises(ConnectionError, next, chunks)
+        self.assertNotIn(connection, t.connection_pool.connections)
+        self.assertEqual(1, len(t.connection_pool.connections))
+
+    def test_response_cache_only_caches_read_apis(self):
+        cache = ResponseCache(ttls={"_count": 0})
+        self.assertEqual(1, cache.key("GET", "/i/_doc/1", None, None, None)[1])
+        self.assertEqual(60, cache.key("GET", "/i/_mapping", None, None, None)[1])
+        self.assertEqual(10, cache.key("GET", "/_cat/indices", None, None, None)[1])
+        self.assertIsNotNone(cache.key("POST", "/i/_search", None, None, b"{}")[0])
+        self.assertIsNone(cache.key("POST", "/i/_count", None, None, b"{}")[0])
+        self.assertIsNone(cache.key("PUT", "/i/_doc/1", None, None, b"{}")[0])
+        self.assertIsNone(cache.key("POST", "/i/_doc/_mapping", None, None, None)[0])
+        self.assertIsNone(cache.key("GET", "/_cluster/health", None, None, None)[0])
+        self.assertIsNone(
+            cache.key("POST", "/i/_search", None, {"scroll": "1m"}, None)[0]
+        )
+        self.assertIsNone(cache.key("GET", "/_search/scroll", None, None, b"{}")[0])
+
+    def test_response_cache_expires_and_evicts_entries(self):
+        cache = ResponseCache(max_entries=2)
+        for i in range(3):
+            url = "/i/_doc/%d" % i
+            key, ttl = cache.key("GET", url, None, None, None)
+            cache.put(key, url, {"n": i}, ttl, cache.get(key, now=100)[1], now=100)
+        key0, _ = cache.key("GET", "/i/_doc/0", None, None, None)
+        key1, _ = cache.key("GET", "/i/_doc/1", None, None, None)
+        key2, _ = cache.key("GET", "/i/_doc/2", None, None, None)
+
+        self.assertFalse(cache.get(key0, now=100)[0])
+        self.assertEqual((True, {"n": 1}), cache.get(key1, now=100))
+        self.assertFalse(cache.get(key2, now=101)[0])
+        self.assertEqual(
+            {"entries": 1, "hits": 1, "misses": 5, "evictions": 1, "invalidations": 0},
+            cache.stats(),
+        )
+
+    def test_response_cache_is_invalidated_by_writes_to_cached_indices(self):
+        cache = ResponseCache()
+        urls = ("/logs/_search", "/logs-*/_search", "/metrics/_search", "/_search")
+        for url in urls:
+            key, ttl = cache.key("POST", url, None, None, b"{}")
+            cache.put(key, url, {}, ttl, cache.generation)
+        self.assertEqual(4, len(cache.entries))
+
+        cache.written("GET", "/logs/_doc/1")
+        cache.written("POST", "/logs/_search", b"{}")
+        self.assertEqual(4, len(cache.entries))
+
+        cache.written("PUT", "/logs-1/_doc/1", b"{}")
+        self.assertEqual(
+            set(["/logs/_search", "/metrics/_search"]),
+            set(url for (_, url, _, _, _, _) in cache.entries),
+        )
+        cache.written("POST", "/_bulk", b'{"index": {"_index": "logs"}}\n{}\n')
+        self.assertEqual(
+            ["/metrics/_search"], [url for (_, url, _, _, _, _) in cache.entries]
+        )
+        cache.written("DELETE", "/metrics")
+        self.assertEqual({}, cache.by_index)
+
+    def test_response_cache_is_invalidated_by_writes_to_index_patterns(self):
+        cache = ResponseCache()
+
+        def cache_searches():
+            for url in ("/logs-2020/_search", "/metrics/_search"):
+                key, ttl = cache.key("POST", url, None, None, b"{}")
+                cache.put(key, url, {}, ttl, cache.generation)
+
+        cache_searches()
+        cache.written("POST", "/logs-*/_update_by_query", b"{}")
+        self.assertEqual(
+            ["/metrics/_search"], [url for (_, url, _, _, _, _) in cache.entries]
+        )
+
+        cache_searches()
+        cache.written("POST", "/_all/_delete_by_query", b"{}")
+        self.assertEqual({}, cache.entries)
+        self.assertEqual({}, cache.by_index)
+
+    def test_response_of_request_racing_a_write_is_not_cached(self):
+        cache = ResponseCache()
+        key, ttl = cache.key("GET", "/i/_doc/1", None, None, None)
+        _, generation = cache.get(key)
+        cache.written("PUT", "/i/_doc/1", b"{}")
+        cache.put(key, "/i/_doc/1", {"stale": True}, ttl, generation)
+        self.assertFalse(cache.get(key)[0])
+
+    def test_cached_responses_are_not_sent_again(self):
+        cache = ResponseCache()
+        t = Transport(
+            [{"data": '{"a": [1]}'}],
+            connection_class=DummyConnection,
+            response_cache=cache,
+        )
+
+        first = t.perform_request("GET", "/i/_doc/1")
+        first["a"].append(2)
+        self.assertEqual({"a": [1]}, t.perform_request("GET", "/i/_doc/1"))
+        self.assertEqual(1, len(t.get_connection().calls))
+
+        t.perform_request("PUT", "/i/_doc/1", body={})
+        t.perform_request("GET", "/i/_doc/1")
+        self.assertEqual(3, len(t.get_connection().calls))
+        self.assertEqual(1, cache.stats()["hits"])
+
+    def test_hedge_policy_only_hedges_idempotent_reads(self):
+        policy = HedgePolicy()
+        self.assertTrue(policy.is_hedgeable("GET", "/i/_doc/1"))
+        self.assertTrue(policy.is_hedgeable("HEAD", "/i"))
+        self.assertTrue(policy.is_hedgeable("POST", "/i/_search"))
+        self.assertTrue(policy.is_hedgeable("POST", "/_msearch/"))
+        self.assertFalse(policy.is_hedgeable("POST", "/_bulk"))
+        self.assertFalse(policy.is_hedgeable("PUT", "/i/_doc/_search"))
+
+    def test_hedge_delay_is_percentile_of_all_nodes(self):
+        policy = HedgePolicy(percentile=50, window=10, min_samples=5)
+        for i in range(4):
+            policy.record("a", i / 10.0)
+        self.assertIsNone(policy.hedge_delay())
+
+        for i in range(4, 10):
+            policy.record("b", i / 10.0)
+        self.assertEqual(0.5, policy.hedge_delay())
+
+        policy.prune(["b"])
+        self.assertEqual(0.7, policy.hedge_delay())
+
+    def test_slow_read_is_hedged_to_another_node(self):
+        policy = HedgePolicy(min_samples=1)
+        t = Transport(
+            [{"delay": 0.5}, {}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            hedge_policy=policy,
+        )
+        slow, fast = t.connection_pool.connections
+        policy.record(fast, 0.01)
+
+        start = time.time()
+        self.assertEqual({}, t.perform_request("GET", "/"))
+        self.assertLess(time.time() - start, 0.4)
+        self.assertEqual(1, len(slow.calls))
+        self.assertEqual(1, len(fast.calls))
+        self.assertEqual((1, 1), (policy.hedged, policy.hedges_won))
+
+    def test_writes_are_never_hedged(self):
+        policy = HedgePolicy(min_samples=1)
+        t = Transport(
+            [{"delay": 0.1}, {}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            hedge_policy=policy,
+        )
+        slow, fast = t.connection_pool.connections
+        policy.record(fast, 0.01)
+
+        t.perform_request("POST", "/_bulk", body="{}")
+        self.assertEqual(1, len(slow.calls))
+        self.assertEqual(0, len(fast.calls))
+        self.assertEqual(0, policy.requests)
+
+    def test_hedging_is_capped(self):
+        policy = HedgePolicy(min_samples=1, max_ratio=0, burst=1)
+        t = Transport(
+            [{"delay": 0.1}, {}, {"delay": 0.1}, {}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            hedge_policy=policy,
+        )
+        policy.record(t.connection_pool.connections[1], 0.01)
+
+        t.perform_request("GET", "/")
+        t.perform_request("GET", "/")
+        self.assertEqual(
+            [1, 1, 1, 0], [len(c.calls) for c in t.connection_pool.connections]
+        )
+        self.assertEqual((2, 1), (policy.requests, policy.hedged))
+
+    def test_hedged_request_raises_original_error_when_both_fail(self):
+        policy = HedgePolicy(min_samples=1)
+        t = Transport(
+            [
+                {"delay": 0.1, "exception": TransportError(400, "original")},
+                {"exception": TransportError(400, "hedge")},
+            ],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            hedge_policy=policy,
+        )
+        policy.record(t.connection_pool.connections[1], 0.01)
+
+        try:
+            t.perform_request("GET", "/")
+        except TransportError as e:
+            self.assertEqual("original", e.error)
+        else:
+            self.fail("TransportError not raised")
+
+    def test_health_checker_revives_responding_connections(self):
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship")}, {}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            health_check_interval=3600,
+        )
+        failing, ok = t.connection_pool.connections
+        t.mark_dead(failing)
+        t.mark_dead(ok)
+
+        self.assertEqual([ok], t.check_dead_connections())
+        self.assertEqual([ok], t.connection_pool.connections)
+        self.assertEqual([failing], t.connection_pool.dead_connections())
+        self.assertEqual((("HEAD", "/"), {"timeout": 3600}), failing.calls[-1])
+        t.close()
+
+    def test_health_checker_treats_http_errors_as_alive(self):
+        t = Transport(
+            [{"exception": TransportError(401, "unauthorized")}, {}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            health_check_interval=3600,
+        )
+        conn = t.connection_pool.connections[0]
+        t.mark_dead(conn)
+
+        self.assertEqual([conn], t.check_dead_connections())
+        t.close()
+
+    def test_dead_connections_wait_for_health_check(self):
+        t = Transport(
+            [{}, {}], connection_class=DummyConnection, health_check_interval=3600
+        )
+        conn = t.connection_pool.connections[0]
+        t.connection_pool.mark_dead(conn, now=time.time() - 3600)
+
+        for _ in range(5):
+            self.assertIsNot(conn, t.get_connection())
+        t.close()
+
+    def test_health_check_thread_probes_in_background(self):
+        t = Transport(
+            [{}, {}], connection_class=DummyConnection, health_check_interval=0.01
+        )
+        conn = t.connection_pool.connections[0]
+        t.mark_dead(conn)
+
+        for _ in range(100):
+            if not t.connection_pool.dead_connections():
+                break
+            time.sleep(0.01)
+        self.assertEqual([], t.connection_pool.dead_connections())
+        self.assertIn(conn, t.connection_pool.connections)
+
+        t.close()
+        t.health_check_thread.join(1)
+        self.assertFalse(t.health_check_thread.is_alive())
+
     def test_sniff_will_use_seed_connections(self):
         t = Transport([{"data": CLUSTER_NODES}], connection_class=DummyConnection)
         t.set_connections([{"data": "invalid"}])
@@ -274,6 +1316,41 @@ class TestTransport(TestCase):
         self.assertEqual(1, len(t.connection_pool.connections))
         self.assertEqual("http://1.1.1.1:123", t.get_connection().host)
 
+    def test_sniff_does_not_wait_for_hung_nodes(self):
+        t = Transport(
+            [{"delay": 1}, {"delay": 1}, {"data": CLUSTER_NODES}],
+            connection_class=DummyConnection,
+            sniff_timeout=1,
+            randomize_hosts=False,
+        )
+
+        start = time.time()
+        t.sniff_hosts()
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual("http://1.1.1.1:123", t.get_connection().host)
+
+    def test_sniff_fails_once_all_nodes_failed(self):
+        t = Transport(
+            [{"delay": 0.2}, {"exception": ConnectionError("abandon ship")}],
+            connection_class=DummyConnection,
+            sniff_timeout=0.1,
+        )
+
+        start = time.time()
+        self.assertRaises(TransportError, t.sniff_hosts)
+        self.assertLess(time.time() - start, 0.2)
+        self.assertEqual(2, len(t.connection_pool.connections))
+
+    def test_sniff_stops_asking_nodes_once_one_answered(self):
+        t = Transport(
+            [{"data": CLUSTER_NODES} for _ in range(20)],
+            connection_class=DummyConnection,
+        )
+        t.SNIFF_THREAD_COUNT = 1
+
+        t.sniff_hosts()
+        self.assertEqual(1, sum(len(c.calls) for c in t.seed_connections))
+
     def test_sniff_on_start_fetches_and_uses_nodes_list(self):
         t = Transport(
             [{"data": CLUSTER_NODES}],
@@ -319,6 +1396,32 @@ class TestTransport(TestCase):
         self.assertEqual(1, len(t.connection_pool.connections))
         self.assertIs(connection, t.get_connection())
 
+    def test_warm_up_only_new_connections(self):
+        warmed_up = []
+
+        class WarmUpConnection(DummyConnection):
+            def warm_up(self, count=1, timeout=None):
+                warmed_up.append((self.host, count))
+
+        t = Transport(
+            [{"host": "localhost"}],
+            connection_class=WarmUpConnection,
+            data=CLUSTER_NODES,
+            warm_up_connections=4,
+        )
+        for thread in threading.enumerate():
+            if thread.name == "elasticsearch-warm-up":
+                thread.join()
+        self.assertEqual([("http://localhost:9200", 4)], warmed_up)
+        del warmed_up[:]
+
+        t.sniff_hosts()
+        t.sniff_hosts()
+        for thread in threading.enumerate():
+            if thread.name == "elasticsearch-warm-up":
+                thread.join()
+        self.assertEqual([("http://1.1.1.1:123", 4)], warmed_up)
+
     def test_sniff_on_fail_triggers_sniffing_on_fail(self):
         t = Transport(
             [{"exception": ConnectionError("abandon ship")}, {"data": CLUSTER_NODES}],
@@ -368,6 +1471,66 @@ class TestTransport(TestCase):
         self.assertEqual("http://1.1.1.1:123", t.get_connection().host)
         self.assertTrue(time.time() - 1 < t.last_sniff < time.time() + 0.01)
 
+    def test_background_sniffer_does_not_block_requests(self):
+        t = Transport(
+            [{"data": CLUSTER_NODES}],
+            connection_class=DummyConnection,
+            sniffer_timeout=3600,
+            sniff_in_background=True,
+        )
+        sniffing = threading.Event()
+        release = threading.Event()
+        orig_sniff_hosts = t.sniff_hosts
+
+        def slow_sniff_hosts():
+            sniffing.set()
+            release.wait(5)
+            orig_sniff_hosts()
+
+        t.sniff_hosts = slow_sniff_hosts
+        t.last_sniff = time.time() - 3600
+        t._sniff_requested.set()
+        self.assertTrue(sniffing.wait(5))
+
+        # the sniffer is stuck, requests still go through the old pool
+        self.assertEqual(json.loads(CLUSTER_NODES), t.perform_request("GET", "/"))
+        self.assertIsInstance(t.get_connection(), DummyConnection)
+        self.assertNotEqual("http://1.1.1.1:123", t.get_connection().host)
+
+        release.set()
+        for _ in range(100):
+            if t.get_connection().host == "http://1.1.1.1:123":
+                break
+            time.sleep(0.01)
+        self.assertEqual("http://1.1.1.1:123", t.get_connection().host)
+
+        t.close()
+        t.sniff_thread.join(1)
+        self.assertFalse(t.sniff_thread.is_alive())
+
+    def test_background_sniffer_is_signalled_on_connection_fail(self):
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship")}, {"data": CLUSTER_NODES}],
+            connection_class=DummyConnection,
+            sniff_on_connection_fail=True,
+            sniff_in_background=True,
+            max_retries=0,
+            randomize_hosts=False,
+        )
+
+        with patch.object(t, "_sniff_requested") as sniff_requested:
+            self.assertRaises(ConnectionError, t.perform_request, "GET", "/")
+        self.assertEqual(1, sniff_requested.set.call_count)
+        self.assertEqual(1, len(t.connection_pool.connections))
+
+        t.mark_dead(t.connection_pool.connections[0])
+        for _ in range(100):
+            if t.get_connection().host == "http://1.1.1.1:123":
+                break
+            time.sleep(0.01)
+        self.assertEqual("http://1.1.1.1:123", t.get_connection().host)
+        t.close()
+
     def test_sniff_7x_publish_host(self):
         # Test the response shaped when a 7.x node has publish_host set
         # and the returend data is shaped in the fqdn/ip:port format.
@@ -380,9 +1543,48 @@ class TestTransport(TestCase):
         # Ensure we parsed out the fqdn and port from the fqdn/ip:port string.
         self.assertEqual(
             t.connection_pool.connection_opts[0][1],
-            {"host": "somehost.tld", "port": 123},
+            {
+                "host": "somehost.tld",
+                "port": 123,
+                "roles": ["master", "data", "ingest"],
+            },
+        )
+
+    def test_sniff_keeps_node_roles_and_attributes(self):
+        t = Transport([{"data": CLUSTER_NODES_ZONES}], connection_class=DummyConnection)
+        t.sniff_hosts()
+
+        opts = sorted(
+            (o for (_, o) in t.connection_pool.connection_opts),
+            key=lambda o: o["host"],
+        )
+        self.assertEqual(
+            ["eu-west-1a", "eu-west-1b", "eu-west-1b"],
+            [o["attributes"]["zone"] for o in opts],
+        )
+        self.assertEqual(
+            ["data", "ingest", "ml", "remote_cluster_client", "transform"],
+            opts[2]["roles"],
+        )
+
+    def test_zone_aware_selector_prefers_local_sniffed_nodes(self):
+        t = Transport(
+            [{"data": CLUSTER_NODES_ZONES}],
+            connection_class=DummyConnection,
+            selector_class=partial(ZoneAwareSelector, zone="eu-west-1b"),
+        )
+        t.sniff_hosts()
+
+        self.assertEqual(
+            set(["10.0.2.11", "10.0.2.12"]),
+            set(t.get_connection().hostname for _ in range(10)),
         )
 
+        for connection in list(t.connection_pool.connections):
+            if connection.hostname != "10.0.1.11":
+                t.connection_pool.mark_dead(connection)
+        self.assertEqual("10.0.1.11", t.get_connection().hostname)
+
     @patch("elasticsearch.transport.Transport.sniff_hosts")
     def test_sniffing_disabled_on_cloud_instances(self, sniff_hosts):
         t = Transport(
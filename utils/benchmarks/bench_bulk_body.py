@@ -0,0 +1,112 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares the peak memory and time of sending a large chunk of actions
+with the bulk helper when the body is joined in memory before being sent
+(how bulk requests used to be sent) and when it is streamed to the
+connection with chunked transfer encoding, with and without compression.
+
+    $ python utils/benchmarks/bench_bulk_body.py --docs 100000 --doc-bytes 1000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+import tracemalloc
+
+from aiohttp import web
+
+from elasticsearch import Elasticsearch, helpers
+from elasticsearch.helpers import actions
+
+
+async def handle_bulk(request):
+    # read the body without keeping it, like a node would
+    items = 0
+    async for line in request.content:
+        items += 1
+    body = b'{"took":1,"errors":false,"items":[%s]}' % b",".join(
+        [b'{"index":{"status":201}}'] * (items // 2)
+    )
+    return web.Response(body=body, content_type="application/json")
+
+
+def serve(port):
+    loop = asyncio.new_event_loop()
+    app = web.Application(client_max_size=1024 ** 3)
+    app.router.add_post("/_bulk", handle_bulk)
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port.value = site._server.sockets[0].getsockname()[1]
+    loop.run_forever()
+
+
+def joined_body(bulk_actions):
+    return "\n".join(bulk_actions) + "\n"
+
+
+def run(port, docs, http_compress):
+    client = Elasticsearch(
+        [{"host": "127.0.0.1", "port": port}],
+        http_compress=http_compress,
+        timeout=600,
+    )
+    tracemalloc.start()
+    start = time.time()
+    helpers.bulk(client, docs, chunk_size=len(docs), max_chunk_bytes=1024 ** 3)
+    duration = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    client.transport.close()
+    return duration, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--doc-bytes", type=int, default=1000)
+    args = parser.parse_args()
+
+    port = multiprocessing.Value("i", 0)
+    process = multiprocessing.Process(target=serve, args=(port,))
+    process.daemon = True
+    process.start()
+    while not port.value:
+        time.sleep(0.01)
+
+    docs = [
+        {"_index": "test-index", "n": i, "text": "x" * args.doc_bytes}
+        for i in range(args.docs)
+    ]
+    streamed = actions._bulk_body_chunks
+    print("%-24s %10s %10s" % ("body", "seconds", "peak MB"))
+    for name, body, http_compress in (
+        ("joined (before)", joined_body, False),
+        ("streamed", streamed, False),
+        ("joined gzip (before)", joined_body, True),
+        ("streamed gzip", streamed, True),
+    ):
+        actions._bulk_body_chunks = body
+        duration, peak = run(port.value, docs, http_compress)
+        print("%-24s %10.2f %10.1f" % (name, duration, peak / 1024.0 / 1024.0))
+
+
+if __name__ == "__main__":
+    main()
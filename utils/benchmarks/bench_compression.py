@@ -0,0 +1,105 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares the CPU cost per MB of compressing request bodies with the bytes
+saved, for every codec and level of ``Compression``, against the ``GzipFile``
+over ``BytesIO`` at level 9 every body used to go through. The cost of the
+small bodies, sent as they are under ``min_size``, is measured as well.
+
+    $ python utils/benchmarks/bench_compression.py --docs 20000 --repeat 5
+"""
+
+import argparse
+import gzip
+import io
+import json
+import time
+
+from elasticsearch.compression import Compression
+
+
+def bulk_body(docs):
+    lines = []
+    for i in range(docs):
+        lines.append(json.dumps({"index": {"_index": "logs", "_id": str(i)}}))
+        lines.append(
+            json.dumps(
+                {
+                    "@timestamp": "2020-01-01T00:%02d:%02d" % (i // 60 % 60, i % 60),
+                    "message": "GET /api/items/%d HTTP/1.1 200" % (i * 7919 % 100003),
+                    "host": "web-%d" % (i % 20),
+                    "bytes": i * 37 % 10000,
+                    "tags": ["prod", "eu"],
+                }
+            )
+        )
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def gzip_file(body):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb") as f:
+        f.write(body)
+    return buf.getvalue()
+
+
+def measure(compress, body, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        compressed = compress(body)
+    cpu = (time.process_time() - start) / repeat
+    return cpu, len(compressed if compressed is not None else body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--small", type=int, default=100000)
+    args = parser.parse_args()
+
+    body = bulk_body(args.docs)
+    mb = len(body) / 1024.0 / 1024.0
+    print("bulk body: %.1f MB" % mb)
+    print("%-22s %12s %10s %12s" % ("compression", "cpu ms/MB", "ratio", "saved MB"))
+
+    rows = [("GzipFile level 9", gzip_file)]
+    for codec in ("gzip", "deflate"):
+        for level in (1, 3, 6, 9):
+            compression = Compression(codec, level=level)
+            rows.append(("%s level %d" % (codec, level), compression.compress))
+    for name, compress in rows:
+        cpu, size = measure(compress, body, args.repeat)
+        print(
+            "%-22s %12.1f %10.3f %12.2f"
+            % (name, cpu * 1000 / mb, size / float(len(body)), mb - size / 1048576.0)
+        )
+
+    small = b'{"query":{"term":{"user.id":"kimchy"}},"size":10}'
+    print("\n%d byte body, %d times:" % (len(small), args.small))
+    print("%-22s %12s %10s" % ("compression", "cpu us/body", "bytes"))
+    for name, compress in (
+        ("GzipFile level 9", gzip_file),
+        ("gzip min_size=0", Compression(min_size=0).compress),
+        ("gzip min_size=1024", Compression().compress),
+    ):
+        cpu, size = measure(compress, small, args.small)
+        print("%-22s %12.2f %10d" % (name, cpu * 1e6, size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Measures how ConnectionPool.get_connection() scales with the number of
+threads sharing a single pool, with and without dead connections.
+
+    $ python utils/benchmarks/bench_connection_pool.py --duration 2
+"""
+
+import argparse
+import threading
+import time
+
+from elasticsearch.connection_pool import ConnectionPool
+
+
+def run(threads, duration, dead):
+    pool = ConnectionPool([(i, {}) for i in range(10)])
+    for connection in range(dead):
+        pool.mark_dead(connection)
+
+    start, stop = threading.Event(), threading.Event()
+    counts = [0] * threads
+
+    def worker(i):
+        get_connection = pool.get_connection
+        n = 0
+        # don't start spinning until all threads exist, spawning threads
+        # is slow while others are holding on to the GIL
+        start.wait()
+        while not stop.is_set():
+            for _ in range(100):
+                get_connection()
+            n += 100
+        counts[i] = n
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    start.set()
+    time.sleep(duration)
+    stop.set()
+    for w in workers:
+        w.join()
+    return sum(counts) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--dead", type=int, default=2)
+    parser.add_argument("--threads", default="1,4,16,64")
+    args = parser.parse_args()
+
+    print("%8s %18s %18s" % ("threads", "all live (ops/s)", "some dead (ops/s)"))
+    for threads in map(int, args.threads.split(",")):
+        print(
+            "%8d %18.0f %18.0f"
+            % (
+                threads,
+                run(threads, args.duration, 0),
+                run(threads, args.duration, args.dead),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares the CPU time of indexing the rows of a DataFrame (dates, numbers
+with missing values, categories, text and a small dense vector) by turning
+them into dicts for ``helpers.bulk`` with the time ``helpers.bulk_dataframe``
+takes encoding whole columns. The bulk requests are consumed by a client that
+doesn't send them, only the client side work is measured.
+
+    $ python utils/benchmarks/bench_dataframe.py --rows 1000000 --dims 8
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from elasticsearch import JSONSerializer
+from elasticsearch.helpers import bulk, bulk_dataframe
+
+
+class Transport(object):
+    serializer = JSONSerializer()
+
+
+class Client(object):
+    """Consumes the bodies of the bulk requests and reports success."""
+
+    transport = Transport()
+
+    def __init__(self):
+        self.bytes = 0
+
+    def bulk(self, body, *args, **kwargs):
+        items = 0
+        for chunk in body:
+            self.bytes += len(chunk)
+            items += chunk.count(b"\n")
+        return {"items": [{"index": {"status": 201}} for _ in range(items // 2)]}
+
+
+def dataframe(rows, dims):
+    random = np.random.RandomState(42)
+    df = pd.DataFrame(
+        {
+            "@timestamp": pd.date_range("2020-01-01", periods=rows, freq="s"),
+            "user_id": random.randint(0, 100000, rows),
+            "fare": np.where(random.rand(rows) < 0.1, np.nan, random.rand(rows) * 100),
+            "passengers": pd.array(
+                np.where(random.rand(rows) < 0.1, None, random.randint(1, 6, rows)),
+                dtype="Int64",
+            ),
+            "paid": random.rand(rows) < 0.5,
+            "zone": pd.Categorical.from_codes(
+                random.randint(0, 50, rows), ["zone-%d" % i for i in range(50)]
+            ),
+            "comment": np.array(["trip %d" % i for i in range(rows)], dtype=object),
+        }
+    )
+    if dims:
+        df["embedding"] = list(random.rand(rows, dims).astype(np.float32))
+    return df
+
+
+def row_dicts(client, df):
+    return bulk(client, df.to_dict("records"))
+
+
+def columns(client, df):
+    return bulk_dataframe(client, df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--dims", type=int, default=8)
+    args = parser.parse_args()
+
+    df = dataframe(args.rows, args.dims)
+    print("%d rows, %d columns" % (len(df), len(df.columns)))
+    print("%-12s %10s %12s %10s" % ("approach", "cpu s", "rows/s", "body MB"))
+    for name, index in (("row dicts", row_dicts), ("columns", columns)):
+        client = Client()
+        start = time.process_time()
+        success, errors = index(client, df)
+        duration = time.process_time() - start
+        assert success == len(df) and not errors
+        print(
+            "%-12s %10.2f %12.0f %10.1f"
+            % (name, duration, len(df) / duration, client.bytes / 1024.0 / 1024.0)
+        )
+
+
+if __name__ == "__main__":
+    main()
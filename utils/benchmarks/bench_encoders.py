@@ -0,0 +1,137 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares the cost per value of ``JSONSerializer.default`` encoding the
+types the json module can't serialize, through the registry of encoders by
+type, with the chain of ``isinstance`` checks it used to go through. The
+time of serializing a whole document made of such values is measured too.
+
+    $ python utils/benchmarks/bench_encoders.py --values 100000 --repeat 5
+"""
+
+import argparse
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from elasticsearch.serializer import (
+    FLOAT_TYPES,
+    INTEGER_TYPES,
+    TIME_TYPES,
+    JSONSerializer,
+)
+
+
+class ChainSerializer(JSONSerializer):
+    """The isinstance chain of ``JSONSerializer.default`` before the registry."""
+
+    def default(self, data):
+        if isinstance(data, TIME_TYPES) and getattr(pd, "NaT", None) is not data:
+            return data.isoformat()
+        elif isinstance(data, uuid.UUID):
+            return str(data)
+        elif isinstance(data, FLOAT_TYPES):
+            return float(data)
+        elif INTEGER_TYPES and isinstance(data, INTEGER_TYPES):
+            return int(data)
+
+        elif np:
+            if isinstance(data, np.bool_):
+                return bool(data)
+            elif isinstance(data, np.datetime64):
+                return data.item().isoformat()
+            elif isinstance(data, np.ndarray):
+                return data.tolist()
+        if pd:
+            if isinstance(data, (pd.Series, pd.Categorical)):
+                return data.tolist()
+            elif data is getattr(pd, "NA", None):
+                return None
+
+        raise TypeError("Unable to serialize %r (type: %s)" % (data, type(data)))
+
+
+VALUES = (
+    ("datetime", datetime(2020, 1, 1, 12, 30, 15)),
+    ("date", date(2020, 1, 1)),
+    ("Decimal", Decimal("12.34")),
+    ("UUID", uuid.UUID(int=42)),
+    ("np.int64", np.int64(42)),
+    ("np.float32", np.float32(0.5)),
+    ("np.bool_", np.bool_(True)),
+    ("np.datetime64", np.datetime64("2020-01-01T12:30:15")),
+    ("pd.Timestamp", pd.Timestamp("2020-01-01T12:30:15")),
+    ("pd.NA", pd.NA),
+)
+
+
+def best_of(repeat, func, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        func(*args)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def encode_all(default, values):
+    for value in values:
+        default(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--values", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    chain, registry = ChainSerializer(), JSONSerializer()
+    print("%-14s %12s %12s %8s" % ("type", "chain ns", "registry ns", "speedup"))
+    for name, value in VALUES:
+        values = [value] * args.values
+        before = best_of(args.repeat, encode_all, chain.default, values)
+        after = best_of(args.repeat, encode_all, registry.default, values)
+        print(
+            "%-14s %12.0f %12.0f %7.1fx"
+            % (
+                name,
+                before / args.values * 1e9,
+                after / args.values * 1e9,
+                before / after,
+            )
+        )
+
+    # a document of numpy scalars and dates, as built from a DataFrame row
+    doc = dict(
+        ("field%d" % i, value)
+        for i, (name, value) in enumerate(VALUES * (args.values // len(VALUES)))
+    )
+    before = best_of(args.repeat, chain.dumps, doc)
+    after = best_of(args.repeat, registry.dumps, doc)
+    print(
+        "\ndumps() of a document of %d such values: chain %.1f ms, "
+        "registry %.1f ms (%.1fx)"
+        % (len(doc), before * 1000, after * 1000, before / after)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares the throughput and number of sockets of the HTTP/1.1 urllib3
+connection with the HTTP/2 httpx connection against local servers (h2c and
+HTTP/1.1) answering every request after a fixed delay, like a proxy in front
+of a cluster would.
+
+    $ pip install httpx[http2]
+    $ python utils/benchmarks/bench_http2.py --threads 64 --delay 0.005
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+
+import h2.config
+import h2.connection
+import h2.events
+
+from elasticsearch import HttpxHttpConnection, Transport, Urllib3HttpConnection
+
+BODY = b'{"took": 1}'
+
+
+class Server(object):
+    """Counters shared with the benchmark process."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._connections = multiprocessing.Value("i", 0)
+        self._requests = multiprocessing.Value("i", 0)
+
+    @property
+    def connections(self):
+        return self._connections.value
+
+    @connections.setter
+    def connections(self, value):
+        self._connections.value = value
+
+    @property
+    def requests(self):
+        return self._requests.value
+
+    @requests.setter
+    def requests(self, value):
+        self._requests.value = value
+
+
+class H2Protocol(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False)
+        )
+
+    def connection_made(self, transport):
+        self.server.connections += 1
+        self.transport = transport
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                self.conn.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                asyncio.get_event_loop().call_later(
+                    self.server.delay, self.respond, event.stream_id
+                )
+        self.transport.write(self.conn.data_to_send())
+
+    def respond(self, stream_id):
+        self.server.requests += 1
+        self.conn.send_headers(
+            stream_id,
+            [
+                (":status", "200"),
+                ("content-type", "application/json"),
+                ("content-length", str(len(BODY))),
+            ],
+        )
+        self.conn.send_data(stream_id, BODY, end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+class HTTP11Protocol(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.buffer = b""
+
+    def connection_made(self, transport):
+        self.server.connections += 1
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            head, rest = self.buffer.split(b"\r\n\r\n", 1)
+            length = 0
+            for line in head.split(b"\r\n")[1:]:
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            if len(rest) < length:
+                return
+            self.buffer = rest[length:]
+            asyncio.get_event_loop().call_later(self.server.delay, self.respond)
+
+    def respond(self):
+        self.server.requests += 1
+        self.transport.write(
+            b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+            b"content-length: %d\r\n\r\n%s" % (len(BODY), BODY)
+        )
+
+
+def serve(servers, ports):
+    loop = asyncio.new_event_loop()
+
+    async def listen():
+        for name, protocol in (("h2c", H2Protocol), ("http/1.1", HTTP11Protocol)):
+            server = servers[name]
+            listener = await loop.create_server(
+                lambda p=protocol, s=server: p(s), "127.0.0.1", 0
+            )
+            ports[name] = listener.sockets[0].getsockname()[1]
+
+    loop.run_until_complete(listen())
+    loop.run_forever()
+
+
+def start_servers(delay):
+    """Run the servers in another process so that they don't compete with
+    the clients for the GIL."""
+    servers = {"h2c": Server(delay), "http/1.1": Server(delay)}
+    ports = multiprocessing.Manager().dict()
+    process = multiprocessing.Process(target=serve, args=(servers, ports))
+    process.daemon = True
+    process.start()
+    while len(ports) < len(servers):
+        time.sleep(0.01)
+    return servers, dict(ports)
+
+
+def run(connection_class, port, server, threads, requests, **kwargs):
+    transport = Transport(
+        [{"host": "127.0.0.1", "port": port}],
+        connection_class=connection_class,
+        **kwargs
+    )
+    server.connections = server.requests = 0
+
+    def worker():
+        for _ in range(requests):
+            transport.perform_request("GET", "/_search")
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.time()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    duration = time.time() - start
+    transport.close()
+    return server.requests / duration, server.connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    # urllib3 complains about every connection it can't keep in its pool
+    logging.getLogger("urllib3.connectionpool").setLevel(logging.ERROR)
+    servers, ports = start_servers(args.delay)
+
+    print("%-32s %12s %10s" % ("connection", "requests/s", "sockets"))
+    for name, connection_class, protocol, kwargs in (
+        ("Urllib3HttpConnection", Urllib3HttpConnection, "http/1.1", {}),
+        (
+            "Urllib3HttpConnection maxsize=%d" % args.threads,
+            Urllib3HttpConnection,
+            "http/1.1",
+            {"maxsize": args.threads},
+        ),
+        ("HttpxHttpConnection (h2c)", HttpxHttpConnection, "h2c", {"maxsize": 1}),
+    ):
+        throughput, sockets = run(
+            connection_class,
+            ports[protocol],
+            servers[protocol],
+            args.threads,
+            args.requests,
+            **kwargs
+        )
+        print("%-32s %12.0f %10d" % (name, throughput, sockets))
+
+
+if __name__ == "__main__":
+    main()
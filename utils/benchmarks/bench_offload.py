@@ -0,0 +1,144 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Measures how long the event loop is blocked (the lag of a coroutine
+ticking every millisecond) while an ``AsyncElasticsearch`` client sends a
+large compressed search and parses its large response, and while
+``async_bulk`` serializes and sends large documents: without an
+``OffloadPolicy``, with one running the work on large payloads in a thread
+pool and with one running it in a process pool.
+
+    $ python utils/benchmarks/bench_offload.py --hits 20000 --docs 2000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from aiohttp import web
+
+from elasticsearch import AsyncElasticsearch, helpers
+from elasticsearch.transport import OffloadPolicy
+
+from bench_bulk_body import handle_bulk
+from bench_raw_response import search_response
+
+
+def serve(hits, port):
+    body = search_response(hits)
+
+    async def handle_search(request):
+        await request.read()
+        return web.Response(body=body, content_type="application/json")
+
+    loop = asyncio.new_event_loop()
+    app = web.Application(client_max_size=1024 ** 3)
+    app.router.add_post("/_search", handle_search)
+    app.router.add_post("/_bulk", handle_bulk)
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port.value = site._server.sockets[0].getsockname()[1]
+    loop.run_forever()
+
+
+async def tick(lags, done):
+    loop = asyncio.get_event_loop()
+    while not done.is_set():
+        start = loop.time()
+        await asyncio.sleep(0.001)
+        lags.append(loop.time() - start - 0.001)
+
+
+async def search(client, requests, body):
+    for _ in range(requests):
+        await client.search(body=body)
+
+
+async def bulk(client, requests, actions):
+    for _ in range(requests):
+        await helpers.async_bulk(client, actions, max_chunk_bytes=1024 ** 3)
+
+
+async def measure(port, work, policy, requests, payload):
+    client = AsyncElasticsearch(
+        [{"host": "127.0.0.1", "port": port}],
+        http_compress=True,
+        timeout=600,
+        offload_policy=policy,
+    )
+    await work(client, 1, payload)
+
+    lags, done = [], asyncio.Event()
+    ticker = asyncio.ensure_future(tick(lags, done))
+    start = time.time()
+    await work(client, requests, payload)
+    duration = time.time() - start
+    done.set()
+    await ticker
+    await client.close()
+
+    lags.sort()
+    return duration, lags[int(len(lags) * 0.99)], lags[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    port = multiprocessing.Value("i", 0)
+    process = multiprocessing.Process(target=serve, args=(args.hits, port))
+    process.daemon = True
+    process.start()
+    while not port.value:
+        time.sleep(0.01)
+
+    print(
+        "%-8s %-18s %12s %12s %12s"
+        % ("work", "policy", "seconds", "p99 lag ms", "max lag ms")
+    )
+    search_body = {"query": {"terms": {"_id": [str(i) for i in range(args.hits)]}}}
+    actions = [
+        {"_index": "test-index", "text": "lorem ipsum " * 10000}
+        for _ in range(args.docs)
+    ]
+    for name, work, payload in (
+        ("search", search, search_body),
+        ("bulk", bulk, actions),
+    ):
+        for policy_name, policy in (
+            ("no policy", None),
+            ("threads >= 1MB", OffloadPolicy()),
+            ("processes >= 1MB", OffloadPolicy(ProcessPoolExecutor(2))),
+        ):
+            duration, p99, worst = asyncio.get_event_loop().run_until_complete(
+                measure(port.value, work, policy, args.requests, payload)
+            )
+            print(
+                "%-8s %-18s %12.2f %12.1f %12.1f"
+                % (name, policy_name, duration, p99 * 1000, worst * 1000)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares the CPU time and peak memory of reading a large search response
+when the connection decodes the body to text before it is parsed (how
+responses used to be handled), when the bytes are handed to the serializer
+and when the raw body is returned with ``raw_response=True``.
+
+    $ python utils/benchmarks/bench_raw_response.py --hits 20000 --requests 10
+"""
+
+import argparse
+import json
+import multiprocessing
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from elasticsearch import Transport, Urllib3HttpConnection
+from elasticsearch.compat import to_text
+
+
+def search_response(hits):
+    return json.dumps(
+        {
+            "took": 1,
+            "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+            "hits": {
+                "total": {"value": hits, "relation": "eq"},
+                "hits": [
+                    {
+                        "_index": "test-index",
+                        "_id": str(i),
+                        "_score": 1.0,
+                        "_source": {
+                            "title": "Document number %d" % i,
+                            "body": "lorem ipsum dolor sit amet " * 8,
+                            "tags": ["a", "b", "c"],
+                            "count": i,
+                        },
+                    }
+                    for i in range(hits)
+                ],
+            },
+        }
+    ).encode("utf-8")
+
+
+def serve(hits, port):
+    body = search_response(hits)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    port.value = server.server_address[1]
+    server.serve_forever()
+
+
+class TextConnection(Urllib3HttpConnection):
+    """Decodes the body before returning it, like connections used to."""
+
+    def perform_request(self, *args, **kwargs):
+        status, headers, data = super(TextConnection, self).perform_request(
+            *args, **kwargs
+        )
+        return status, headers, to_text(data)
+
+
+def run(connection_class, port, requests, params):
+    transport = Transport(
+        [{"host": "127.0.0.1", "port": port}], connection_class=connection_class
+    )
+    transport.perform_request("GET", "/_search", params=dict(params))
+
+    start = time.process_time()
+    for _ in range(requests):
+        transport.perform_request("GET", "/_search", params=dict(params))
+    cpu = (time.process_time() - start) / requests
+
+    tracemalloc.start()
+    transport.perform_request("GET", "/_search", params=dict(params))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    transport.close()
+    return cpu, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+
+    port = multiprocessing.Value("i", 0)
+    process = multiprocessing.Process(target=serve, args=(args.hits, port))
+    process.daemon = True
+    process.start()
+    while not port.value:
+        time.sleep(0.01)
+
+    size = len(search_response(args.hits))
+    print("response: %.1f MB" % (size / 1024.0 / 1024.0))
+    print("%-28s %14s %14s" % ("path", "cpu ms/request", "peak MB"))
+    for name, connection_class, params in (
+        ("text (before)", TextConnection, {}),
+        ("bytes", Urllib3HttpConnection, {}),
+        ("raw_response=True", Urllib3HttpConnection, {"raw_response": True}),
+    ):
+        cpu, peak = run(connection_class, port.value, args.requests, params)
+        print("%-28s %14.1f %14.1f" % (name, cpu * 1000, peak / 1024.0 / 1024.0))
+
+
+if __name__ == "__main__":
+    main()
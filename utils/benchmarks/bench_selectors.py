@@ -0,0 +1,105 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares tail latency of the connection selectors against a simulated
+cluster where one node keeps stalling (think long GC pauses).
+
+    $ python utils/benchmarks/bench_selectors.py --threads 16 --requests 200
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from elasticsearch import Transport
+from elasticsearch.connection import Connection
+from elasticsearch.connection_pool import (
+    LatencyAwareSelector,
+    RandomSelector,
+    RoundRobinSelector,
+)
+
+
+class SimulatedConnection(Connection):
+    """Connection answering after ``latency`` seconds, with a ``stall``
+    second pause every ``stall_rate`` of the requests."""
+
+    def __init__(self, latency=0.002, stall=0.0, stall_rate=0.0, **kwargs):
+        super(SimulatedConnection, self).__init__(**kwargs)
+        self.latency = latency
+        self.stall = stall
+        self.stall_rate = stall_rate
+
+    def perform_request(self, *args, **kwargs):
+        delay = self.latency
+        if self.stall and random.random() < self.stall_rate:
+            delay += self.stall
+        time.sleep(delay)
+        return 200, {}, "{}"
+
+
+def run(selector_class, hosts, threads, requests):
+    transport = Transport(
+        hosts, connection_class=SimulatedConnection, selector_class=selector_class
+    )
+    timings = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(requests):
+            start = time.time()
+            transport.perform_request("GET", "/")
+            local.append(time.time() - start)
+        with lock:
+            timings.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    timings.sort()
+
+    def percentile(p):
+        return timings[min(len(timings) - 1, int(len(timings) * p))] * 1000
+
+    return percentile(0.5), percentile(0.99), sum(timings) / len(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--stall", type=float, default=0.1)
+    parser.add_argument("--stall-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    hosts = [{"port": 9200 + i} for i in range(args.nodes)]
+    hosts[0].update(stall=args.stall, stall_rate=args.stall_rate)
+
+    print("%-22s %10s %10s %10s" % ("selector", "p50 (ms)", "p99 (ms)", "mean (ms)"))
+    for selector_class in (RoundRobinSelector, RandomSelector, LatencyAwareSelector):
+        p50, p99, mean = run(selector_class, hosts, args.threads, args.requests)
+        print("%-22s %10.2f %10.2f %10.2f" % (selector_class.__name__, p50, p99, mean))
+
+
+if __name__ == "__main__":
+    main()
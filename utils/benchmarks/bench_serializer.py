@@ -0,0 +1,154 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares the time spent serializing representative documents into the
+bytes sent to Elasticsearch, and parsing the bytes of a search response,
+with ``dumps()`` followed by an encoding (what the transport used to do),
+``JSONSerializer.dumps_bytes()`` and ``OrjsonSerializer`` when orjson is
+installed. Bulk bodies are built the way ``helpers.bulk`` builds them.
+
+    $ python utils/benchmarks/bench_serializer.py --docs 10000 --repeat 5
+"""
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+
+from elasticsearch.exceptions import ImproperlyConfigured
+from elasticsearch.helpers.actions import _bulk_body_chunks, _serialize_action
+from elasticsearch.serializer import JSONSerializer, OrjsonSerializer
+
+
+def log_doc(i):
+    return {
+        "@timestamp": datetime(2020, 1, 1) + timedelta(seconds=i),
+        "host": {"name": "web-%02d" % (i % 20), "ip": "10.0.%d.%d" % (i % 7, i % 251)},
+        "http": {"method": "GET", "status": 200 + i % 5, "bytes": i * 31 % 50000},
+        "url": "/products/%d?ref=search" % (i * 7919 % 100003),
+        "message": u"GET /products/%d HTTP/1.1 - réponse servie" % i,
+        "tags": ["prod", "eu-west-1"],
+    }
+
+
+def vector_doc(i):
+    return {
+        "id": str(uuid.UUID(int=i)),
+        "title": "document %d" % i,
+        "embedding": np.random.RandomState(i).rand(384).astype(np.float32),
+    }
+
+
+def nested_doc(i):
+    return {
+        "order_id": uuid.UUID(int=i),
+        "total": Decimal("%d.%02d" % (i % 1000, i % 100)),
+        "customer": {"id": i % 5000, "name": "customer %d" % i, "vip": i % 10 == 0},
+        "lines": [
+            {"sku": "SKU-%d" % (i * j), "qty": j, "price": 9.99 * j}
+            for j in range(1, 6)
+        ],
+    }
+
+
+DOCUMENTS = (("log", log_doc), ("vector", vector_doc), ("nested", nested_doc))
+
+
+def dumps_then_encode(serializer, data):
+    return serializer.dumps(data).encode("utf-8", "surrogatepass")
+
+
+def dumps_bytes(serializer, data):
+    return serializer.dumps_bytes(data)
+
+
+def best_of(repeat, func, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        func(*args)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def serialize_all(dump, serializer, docs):
+    for doc in docs:
+        dump(serializer, doc)
+
+
+def bulk_body(serializer, docs):
+    lines = []
+    for doc in docs:
+        action, data, _ = _serialize_action(serializer, {"index": {}}, doc)
+        lines.append(action)
+        lines.append(data)
+    for chunk in _bulk_body_chunks(lines):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    serializers = [
+        ("json dumps+encode", JSONSerializer(), dumps_then_encode),
+        ("json dumps_bytes", JSONSerializer(), dumps_bytes),
+    ]
+    try:
+        serializers.append(("orjson", OrjsonSerializer(), dumps_bytes))
+    except ImproperlyConfigured:
+        print("orjson isn't installed, skipping OrjsonSerializer")
+
+    print(
+        "%-8s %-18s %10s %10s %10s %12s"
+        % ("docs", "serializer", "dumps ms", "bulk ms", "loads ms", "dumps MB/s")
+    )
+    for name, make in DOCUMENTS:
+        docs = [make(i) for i in range(args.docs)]
+        # the response body of a search returning all the documents
+        response = JSONSerializer().dumps_bytes(
+            {"hits": {"hits": [{"_source": doc} for doc in docs]}}
+        )
+        for label, serializer, dump in serializers:
+            dumps = best_of(args.repeat, serialize_all, dump, serializer, docs)
+            bulk = best_of(args.repeat, bulk_body, serializer, docs)
+            if serializer.bytes_native:
+                loads = best_of(args.repeat, serializer.loads, response)
+            else:
+                loads = best_of(
+                    args.repeat, lambda: serializer.loads(response.decode("utf-8"))
+                )
+            print(
+                "%-8s %-18s %10.1f %10.1f %10.1f %12.1f"
+                % (
+                    name,
+                    label,
+                    dumps * 1000,
+                    bulk * 1000,
+                    loads * 1000,
+                    len(response) / 1024.0 / 1024.0 / dumps,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
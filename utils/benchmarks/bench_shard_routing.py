@@ -0,0 +1,155 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Counts the hops from the coordinating node to the node holding the shard
+saved by the shard router on a simulated cluster answering the nodes info,
+cluster state and search shards APIs like Elasticsearch would.
+
+    $ python utils/benchmarks/bench_shard_routing.py --nodes 6 --shards 12
+"""
+
+import argparse
+import json
+import random
+import time
+
+from elasticsearch import Transport
+from elasticsearch.connection import Connection
+from elasticsearch.routing import ShardRouter, shard_id
+
+
+class FakeCluster(object):
+    """Index ``shards`` primaries with ``replicas`` copies each spread over
+    ``nodes`` nodes, counting the requests forwarded to another node."""
+
+    def __init__(self, nodes, shards, replicas, routing_num_shards):
+        self.nodes = ["node-%d" % i for i in range(nodes)]
+        self.shards = shards
+        self.routing_num_shards = routing_num_shards
+        self.allocation = dict(
+            (shard, [self.nodes[(shard + r) % nodes] for r in range(replicas + 1)])
+            for shard in range(shards)
+        )
+        self.requests = 0
+        self.hops = 0
+
+    def handle(self, node, method, url):
+        path = url.split("?", 1)[0]
+        if path == "/_nodes/_all/http":
+            return {
+                "nodes": dict(
+                    (
+                        n,
+                        {
+                            "roles": ["data"],
+                            "http": {"publish_address": "localhost:%d" % (9200 + i)},
+                        },
+                    )
+                    for i, n in enumerate(self.nodes)
+                )
+            }
+        if path.startswith("/_cluster/state/metadata/"):
+            index = path.rsplit("/", 1)[1]
+            settings = {"number_of_shards": str(self.shards)}
+            return {
+                "metadata": {
+                    "indices": {
+                        index: {
+                            "routing_num_shards": self.routing_num_shards,
+                            "settings": {"index": settings},
+                        }
+                    }
+                }
+            }
+        if path.endswith("/_search_shards"):
+            return {
+                "shards": [
+                    [
+                        {"node": n, "shard": s, "primary": i == 0, "state": "STARTED"}
+                        for i, n in enumerate(copies)
+                    ]
+                    for s, copies in sorted(self.allocation.items())
+                ]
+            }
+
+        _, endpoint, doc_id = path.strip("/").split("/")
+        shard = shard_id(self.routing_num_shards, self.shards, doc_id)
+        copies = self.allocation[shard]
+        self.requests += 1
+        if method in ("GET", "HEAD"):
+            if node not in copies:
+                self.hops += 1
+        elif node != copies[0]:
+            self.hops += 1
+        return {}
+
+
+class SimulatedConnection(Connection):
+    def __init__(self, cluster=None, **kwargs):
+        super(SimulatedConnection, self).__init__(**kwargs)
+        self.cluster = cluster
+        self.node = cluster.nodes[self.port - 9200]
+
+    def perform_request(self, method, url, params=None, body=None, **kwargs):
+        return 200, {}, json.dumps(self.cluster.handle(self.node, method, url))
+
+
+def run(args, router):
+    cluster = FakeCluster(
+        args.nodes, args.shards, args.replicas, args.shards * args.routing_factor
+    )
+    transport = Transport(
+        [{"port": 9200 + i} for i in range(args.nodes)],
+        connection_class=SimulatedConnection,
+        cluster=cluster,
+        shard_router=router,
+    )
+    if router is not None:
+        # the first request to the index triggers the background refresh
+        transport.perform_request("GET", "/bench/_doc/warmup")
+        while router.refreshing:
+            time.sleep(0.001)
+        cluster.requests = cluster.hops = 0
+
+    rnd = random.Random(42)
+    for i in range(args.requests):
+        doc_id = str(rnd.randint(0, 10 ** 9))
+        if rnd.random() < args.write_ratio:
+            transport.perform_request("PUT", "/bench/_doc/" + doc_id, body={})
+        else:
+            transport.perform_request("GET", "/bench/_doc/" + doc_id)
+    return cluster.requests, cluster.hops
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=6)
+    parser.add_argument("--shards", type=int, default=12)
+    parser.add_argument("--replicas", type=int, default=1)
+    parser.add_argument("--routing-factor", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--write-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print("%-14s %10s %10s %10s" % ("routing", "requests", "hops", "hops/req"))
+    for name, router in (("round-robin", None), ("shard router", ShardRouter())):
+        requests, hops = run(args, router)
+        print("%-14s %10d %10d %10.3f" % (name, requests, hops, hops / float(requests)))
+
+
+if __name__ == "__main__":
+    main()
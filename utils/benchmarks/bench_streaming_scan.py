@@ -0,0 +1,103 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares the peak memory, time to the first hit and CPU time of going
+through the hits of a large search page when the whole response is read and
+deserialized before the first hit is seen and when it is sent with
+``stream_response=True`` and parsed incrementally by ``HitsParser``.
+
+    $ python utils/benchmarks/bench_streaming_scan.py --hits 20000 --requests 5
+"""
+
+import argparse
+import multiprocessing
+import time
+import tracemalloc
+
+from elasticsearch import Transport
+from elasticsearch.helpers import HitsParser, iter_hits
+
+from bench_raw_response import search_response, serve
+
+
+def buffered(transport):
+    response = transport.perform_request("GET", "/_search")
+    for hit in response["hits"]["hits"]:
+        yield hit
+
+
+def streamed(transport):
+    chunks = transport.perform_request(
+        "GET", "/_search", params={"stream_response": True}
+    )
+    return iter_hits(HitsParser(), chunks)
+
+
+def run(read, port, requests):
+    transport = Transport([{"host": "127.0.0.1", "port": port}])
+    for hit in read(transport):
+        pass
+
+    first, cpu = 0.0, 0.0
+    for _ in range(requests):
+        start, start_cpu = time.time(), time.process_time()
+        hits = read(transport)
+        next(hits)
+        first += time.time() - start
+        for hit in hits:
+            pass
+        cpu += time.process_time() - start_cpu
+
+    tracemalloc.start()
+    for hit in read(transport):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    transport.close()
+    return first / requests, cpu / requests, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    port = multiprocessing.Value("i", 0)
+    process = multiprocessing.Process(target=serve, args=(args.hits, port))
+    process.daemon = True
+    process.start()
+    while not port.value:
+        time.sleep(0.01)
+
+    size = len(search_response(args.hits))
+    print("response: %.1f MB" % (size / 1024.0 / 1024.0))
+    print(
+        "%-12s %16s %16s %10s"
+        % ("response", "first hit ms", "cpu ms/request", "peak MB")
+    )
+    for name, read in (("buffered", buffered), ("streamed", streamed)):
+        first, cpu, peak = run(read, port.value, args.requests)
+        print(
+            "%-12s %16.1f %16.1f %10.1f"
+            % (name, first * 1000, cpu * 1000, peak / 1024.0 / 1024.0)
+        )
+
+
+if __name__ == "__main__":
+    main()
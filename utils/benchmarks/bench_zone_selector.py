@@ -0,0 +1,114 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Compares the zone-aware selector with round-robin on a simulated cluster
+spread over three zones where requests crossing zones are slower (and, in
+the cloud, billed).
+
+    $ python utils/benchmarks/bench_zone_selector.py --nodes-per-zone 3
+"""
+
+import argparse
+import threading
+import time
+from functools import partial
+
+from elasticsearch import Transport
+from elasticsearch.connection import Connection
+from elasticsearch.connection_pool import RoundRobinSelector, ZoneAwareSelector
+
+ZONES = ("zone-a", "zone-b", "zone-c")
+
+
+class SimulatedConnection(Connection):
+    """Connection answering after ``latency`` seconds, plus ``cross_zone``
+    seconds for ``remote`` nodes that aren't in the client's zone."""
+
+    def __init__(self, remote=False, latency=0.001, cross_zone=0.0, **kwargs):
+        super(SimulatedConnection, self).__init__(**kwargs)
+        self.latency = latency
+        self.cross_zone = cross_zone
+        self.remote = remote
+        self.requests = 0
+
+    def perform_request(self, *args, **kwargs):
+        self.requests += 1
+        time.sleep(self.latency + (self.cross_zone if self.remote else 0))
+        return 200, {}, "{}"
+
+
+def run(selector_class, hosts, threads, requests):
+    transport = Transport(
+        hosts, connection_class=SimulatedConnection, selector_class=selector_class
+    )
+    timings = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(requests):
+            start = time.time()
+            transport.perform_request("GET", "/")
+            local.append(time.time() - start)
+        with lock:
+            timings.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    timings.sort()
+    connections = transport.connection_pool.connections
+    remote = sum(c.requests for c in connections if c.remote)
+
+    def percentile(p):
+        return timings[min(len(timings) - 1, int(len(timings) * p))] * 1000
+
+    return percentile(0.5), percentile(0.99), remote * 100.0 / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes-per-zone", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--cross-zone", type=float, default=0.002)
+    args = parser.parse_args()
+
+    hosts = [
+        {
+            "port": 9200 + i,
+            "attributes": {"zone": ZONES[i % len(ZONES)]},
+            "remote": i % len(ZONES) != 0,
+            "cross_zone": args.cross_zone,
+        }
+        for i in range(args.nodes_per_zone * len(ZONES))
+    ]
+
+    print("%-22s %10s %10s %12s" % ("selector", "p50 (ms)", "p99 (ms)", "cross-zone"))
+    for name, selector_class in (
+        ("RoundRobinSelector", RoundRobinSelector),
+        ("ZoneAwareSelector", partial(ZoneAwareSelector, zone=ZONES[0])),
+    ):
+        p50, p99, remote = run(selector_class, hosts, args.threads, args.requests)
+        print("%-22s %10.2f %10.2f %11.1f%%" % (name, p50, p99, remote))
+
+
+if __name__ == "__main__":
+    main()
@@ -69,6 +69,10 @@ GLOBAL_QUERY_PARAMS = {
     "format": "Optional[str]",
     "filter_path": "Optional[Union[str, Collection[str]]]",
     "request_timeout": "Optional[Union[int, float]]",
+    "total_timeout": "Optional[Union[int, float]]",
+    "deadline": "Optional[float]",
+    "raw_response": "Optional[bool]",
+    "stream_response": "Optional[bool]",
     "ignore": "Optional[Union[int, Collection[int]]]",
     "opaque_id": "Optional[str]",
 }